@@ -0,0 +1,70 @@
+"""
+Compares the binary codec with ``to_dict`` + JSON for lists of indicators and reports, in encoded size and in the time
+to encode and decode.
+
+Run
+python benchmarks/bench_codec.py --count 10000
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import time
+
+from trustar import Indicator, Report
+from trustar.models import codec
+
+
+def get_models(count):
+    """
+    :return: A list of (name, list of models) tuples.
+    """
+
+    enclave_ids = ["ac6a0d17-7350-4410-bc57-9699521db992", "2a8c2b4e-5b4c-4d56-9e4a-5d3f2b0c9e11"]
+    tags = [{'name': name, 'guid': "6b3cd5e5-8ff8-4a17-8d0f-87b0e1e0c1b%d" % i, 'enclaveId': enclave_ids[0]}
+            for i, name in enumerate(["malicious", "phishing", "c2"])]
+
+    indicators = [Indicator.from_dict({'value': "www.evil-%d.com" % i, 'indicatorType': "URL",
+                                       'priorityLevel': "HIGH", 'correlationCount': i % 50, 'whitelisted': False,
+                                       'weight': 1.0, 'firstSeen': 1515571633505 + i, 'lastSeen': 1515620420062 + i,
+                                       'sightings': i % 20, 'source': "honeypot", 'tags': tags[:i % 4],
+                                       'enclaveIds': enclave_ids[:1 + i % 2]})
+                  for i in range(count)]
+
+    reports = [Report.from_dict({'id': "1a09f14b-ef8c-443f-b082-%012d" % i, 'title': "Phishing Incident %d" % i,
+                                 'reportBody': "Employee reported suspect email from www.evil-%d.com." % i,
+                                 'timeBegan': 1479941278000 + i, 'distributionType': "ENCLAVE",
+                                 'enclaveIds': enclave_ids[:1], 'created': 1515571633505 + i,
+                                 'updated': 1515620420062 + i})
+               for i in range(count)]
+
+    return [("Indicator", Indicator, indicators), ("Report", Report, reports)]
+
+
+def measure(func, arg):
+    start = time.time()
+    result = func(arg)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the binary codec against JSON.")
+    parser.add_argument('--count', type=int, default=10000, help="number of models in each list")
+    args = parser.parse_args()
+
+    def json_dumps(models):
+        return json.dumps([model.to_dict() for model in models]).encode('utf-8')
+
+    print("%-10s %-6s %12s %12s %12s" % ("model", "format", "bytes", "encode (s)", "decode (s)"))
+    for name, cls, models in get_models(args.count):
+        data, encode_time = measure(json_dumps, models)
+        _, decode_time = measure(lambda d: [cls.from_dict(item) for item in json.loads(d.decode('utf-8'))], data)
+        print("%-10s %-6s %12d %12.3f %12.3f" % (name, "json", len(data), encode_time, decode_time))
+
+        data, encode_time = measure(codec.dumps, models)
+        _, decode_time = measure(codec.loads, data)
+        print("%-10s %-6s %12d %12.3f %12.3f" % (name, "binary", len(data), encode_time, decode_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Measures the throughput of local indicator extraction on synthetic report text, comparing one scan of the text per
+type of indicator (a separate regular expression for each type) with ``IndicatorExtractor``, which combines them into
+a single pattern, on a body held in memory and on a file read as a stream.
+
+Run
+python benchmarks/bench_extract.py --megabytes 50
+"""
+from __future__ import print_function
+
+import argparse
+import io
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+
+from trustar.extract import IndicatorExtractor, _PATTERNS, _NORMALIZERS
+
+
+WORDS = ("the attacker sent a phishing email with an attachment that dropped a loader which contacted its command "
+         "and control server over port 443 before moving laterally to the domain controller and exfiltrating "
+         "credentials see report.pdf for details e.g. the os.path module was used").split()
+
+
+def make_indicator(rng):
+    kind = rng.randrange(8)
+    if kind == 0:
+        return "%d.%d.%d.%d" % (rng.randint(1, 223), rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+    if kind == 1:
+        return "hxxp://bad%d[.]example.com/path/%d" % (rng.randrange(10000), rng.randrange(1000))
+    if kind == 2:
+        return "user%d@mail%d.example.org" % (rng.randrange(10000), rng.randrange(100))
+    if kind == 3:
+        return "%032x" % rng.getrandbits(128)
+    if kind == 4:
+        return "%064x" % rng.getrandbits(256)
+    if kind == 5:
+        return "CVE-20%02d-%04d" % (rng.randrange(10, 20), rng.randrange(10000))
+    if kind == 6:
+        return "evil%d.net" % rng.randrange(10000)
+    return "HKLM\\Software\\Run\\x%d" % rng.randrange(1000)
+
+
+def make_text(megabytes):
+    """
+    :return: Prose with an indicator about every 30 words.
+    """
+
+    rng = random.Random(0)
+    lines = []
+    size = 0
+    while size < megabytes * 1e6:
+        words = [rng.choice(WORDS) for _ in range(60)]
+        words[rng.randrange(30)] = make_indicator(rng)
+        words[30 + rng.randrange(30)] = make_indicator(rng)
+        line = " ".join(words) + ".\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines)
+
+
+def run_per_type(text):
+    """
+    A separate scan of the text for each type of indicator, without refanging.
+    """
+
+    found = set()
+    for indicator_type, pattern in _PATTERNS:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            value = _NORMALIZERS[indicator_type](match.group())
+            if value:
+                found.add((indicator_type, value))
+    return len(found)
+
+
+def run_combined(text):
+    return len(IndicatorExtractor().extract(text))
+
+
+def run_stream(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for _ in IndicatorExtractor().extract_stream(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local indicator extraction.")
+    parser.add_argument('--megabytes', type=float, default=50, help="size of the synthetic text")
+    args = parser.parse_args()
+
+    text = make_text(args.megabytes)
+    megabytes = len(text) / 1e6
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "report.txt")
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        print("%-34s %10s %10s %12s" % ("implementation", "seconds", "MB/s", "indicators"))
+        for name, func, arg in [("one scan per type, no refanging", run_per_type, text),
+                                ("IndicatorExtractor.extract", run_combined, text),
+                                ("IndicatorExtractor.extract_stream", run_stream, path)]:
+            start = time.time()
+            count = func(arg)
+            seconds = time.time() - start
+            print("%-34s %10.2f %10.1f %12d" % (name, seconds, megabytes / seconds, count))
+
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
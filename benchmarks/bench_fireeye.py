@@ -0,0 +1,206 @@
+"""
+Compares the throughput and peak memory of the previous FireEye alert ingest (read the whole export, parse it at once,
+then run the four filter loops, copied below) with ``trustar.fireeye`` (parse incrementally, filter in one pass) on a
+synthetic export.  Reports are built but not submitted, so that the numbers do not depend on the API.  Each
+implementation runs in its own process, so that the peak memory of one does not hide the other.
+
+Run
+python benchmarks/bench_fireeye.py --count 1000000
+"""
+from __future__ import print_function
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+
+from trustar.fireeye import ingest_alerts, read_alerts
+from trustar.models import Report
+from trustar.report_client import ReportClient
+
+
+def write_export(path, count):
+    """
+    Writes a synthetic FireEye alerts API export with ``count`` alerts, of which about 13% are filtered out.
+    """
+
+    rng = random.Random(0)
+    messages = ["Malware Object", "Malware Callback", "WINDOWS METHODOLOGY [Net User Add]", "BASH [Shellshock HTTP]",
+                "METHODOLOGY - WEB APP ATTACK [SQL Injection]", "Infection Match"]
+    message_weights = [40, 30, 3, 3, 3, 21]
+
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(u'{"appliance": {"name": "fe-nx-01", "version": "8.1.0"}, "alerts": [')
+        for i in range(count):
+            alert = {
+                'displayId': 1000000 + i,
+                'uuid': "%032x" % rng.getrandbits(128),
+                'message': rng.choices(messages, message_weights)[0],
+                'createDate': "2018-%02d-%02d %02d:%02d:%02d +00" % (rng.randint(1, 12), rng.randint(1, 28),
+                                                                     rng.randint(0, 23), rng.randint(0, 59),
+                                                                     rng.randint(0, 59)),
+                'product': "WEB_MPS",
+                'severity': rng.choice(["MINR", "MAJR", "CRIT"]),
+                'srcIp': "10.%d.%d.%d" % (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)),
+                'dstIp': "%d.%d.%d.%d" % (rng.randint(1, 223), rng.randint(0, 255), rng.randint(0, 255),
+                                          rng.randint(0, 255)),
+                'url': "http://example%d.com/path/%d" % (rng.randint(0, 10000), i),
+                'malware': [{'name': "Trojan.Generic", 'sid': rng.randint(1, 99999)}],
+                'distinguishers': {'virus': "fetestevent" if rng.random() < 0.02 else "Trojan.Generic"},
+            }
+            if rng.random() < 0.3:
+                alert['closedState'] = "False Positive" if rng.random() < 0.15 else "Closed"
+            f.write((u", " if i > 0 else u"") + json.dumps(alert))
+        f.write(u'], "alertsCount": %d}' % count)
+
+
+def legacy_filter_false_positive(alerts, track):
+    result = []
+    for o in alerts:
+        if 'closedState' in o:
+            if o['closedState'] != 'False Positive':
+                if 'distinguishers' in o:
+                    try:
+                        if 'virus' in o['distinguishers']:
+                            if o['distinguishers']['virus'] != 'fetestevent':
+                                result.append(o)
+                            else:
+                                track.append(o)
+                        else:
+                            result.append(o)
+                    except TypeError:
+                        result.append(o)
+                else:
+                    result.append(o)
+            else:
+                track.append(o)
+        elif 'distinguishers' in o:
+            try:
+                if 'virus' in o['distinguishers']:
+                    if o['distinguishers']['virus'] != 'fetestevent':
+                        result.append(o)
+                    else:
+                        track.append(o)
+                else:
+                    result.append(o)
+            except TypeError:
+                result.append(o)
+    return result
+
+
+def legacy_filter_message(alerts, substring, track):
+    result = []
+    for o in alerts:
+        if substring in o['message']:
+            track.append(o)
+        else:
+            result.append(o)
+    return result
+
+
+def run_legacy(path):
+    """
+    The previous implementation: read and parse the whole export, filter it in four passes, then build every report.
+    """
+
+    track = []
+    processed_line = open(path, 'r').read()
+    char_pos = processed_line.find("}")
+    alerts = json.loads("{" + processed_line[char_pos + 2:])['alerts']
+
+    alerts = legacy_filter_false_positive(alerts, track)
+    alerts = legacy_filter_message(alerts, 'WINDOWS METHODOLOGY', track)
+    alerts = legacy_filter_message(alerts, 'BASH [Shellshock HTTP]', track)
+    alerts = legacy_filter_message(alerts, 'METHODOLOGY - WEB APP ATTACK', track)
+
+    all_reports = []
+    for alert in alerts:
+        content = ""
+        for key in alert:
+            if isinstance(alert[key], (list, int, bool, dict)) or alert[key] is None:
+                content += key + ': ' + str(alert[key]).replace('u\'', '\'') + '\n'
+            else:
+                content += key + ': ' + alert[key].encode('ascii', 'ignore').decode('ascii') + '\n'
+        all_reports.append(Report(title=str(alert['displayId']) + ' ' + str(alert['message']),
+                                  body=content,
+                                  time_began=str(alert['createDate'])))
+
+    return len(all_reports), len(track)
+
+
+class NoOpClient(ReportClient):
+    """
+    Accepts every report without submitting it.
+    """
+
+    def submit_report(self, report):
+        return report
+
+
+def run_streaming(path):
+    """
+    ``trustar.fireeye``: parse incrementally, filter in one pass, and pass each report on as soon as it is built.
+    """
+
+    skipped = [0]
+
+    def on_skip(alert, reason):
+        skipped[0] += 1
+
+    with io.open(path, 'r', encoding='utf-8') as f:
+        count = sum(1 for _ in ingest_alerts(NoOpClient(), read_alerts(f), on_skip=on_skip, max_workers=None))
+
+    return count, skipped[0]
+
+
+def measure(func, path, queue):
+    start = time.time()
+    submitted, skipped = func(path)
+    seconds = time.time() - start
+    queue.put((seconds, submitted, skipped, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def run_in_process(func, path):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure, args=(func, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FireEye alert ingest.")
+    parser.add_argument('--count', type=int, default=1000000, help="number of alerts")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "alerts.json")
+        write_export(path, args.count)
+        size = os.path.getsize(path)
+        print("export: %d alerts, %.0f MB" % (args.count, size / 1e6))
+
+        results = [("previous implementation", run_in_process(run_legacy, path)),
+                   ("trustar.fireeye", run_in_process(run_streaming, path))]
+
+    finally:
+        shutil.rmtree(directory)
+
+    assert results[0][1][1:3] == results[1][1][1:3], "the implementations kept different alerts"
+
+    print("%-24s %10s %12s %10s %10s %14s" % ("implementation", "seconds", "alerts/s", "submitted", "skipped",
+                                              "peak RSS (MB)"))
+    for name, (seconds, submitted, skipped, max_rss) in results:
+        print("%-24s %10.2f %12d %10d %10d %14.0f" % (name, seconds, args.count / seconds, submitted, skipped,
+                                                      max_rss / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the throughput of iterating over pages of full models and of lazy views, reading only a few fields of each
+item, as a generator such as ``get_reports`` would when the ``lazy_models`` config value is ``True``.
+
+Run
+python benchmarks/bench_lazy_models.py --count 100000
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from trustar import Indicator, IndicatorView, Page, Report, ReportView
+
+
+def get_pages(count, page_size):
+    """
+    :return: A dict mapping each model name to a list of page dictionaries containing ``count`` items in total.
+    """
+
+    tag = {'name': "malicious", 'guid': "6b3cd5e5-8ff8-4a17-8d0f-87b0e1e0c1b8",
+           'enclaveId': "ac6a0d17-7350-4410-bc57-9699521db992"}
+
+    indicators = [{'value': "www.evil-%d.com" % i, 'indicatorType': "URL", 'priorityLevel': "HIGH",
+                   'correlationCount': 7, 'whitelisted': False, 'weight': 1.0, 'firstSeen': 1515571633505,
+                   'lastSeen': 1515620420062, 'sightings': 12, 'source': "honeypot", 'tags': [tag, tag],
+                   'enclaveIds': ["ac6a0d17-7350-4410-bc57-9699521db992"]}
+                  for i in range(count)]
+
+    reports = [{'id': "1a09f14b-ef8c-443f-b082-%012d" % i, 'title': "Phishing Incident %d" % i,
+                'reportBody': "Employee reported suspect email from www.evil.com. " * 20,
+                'timeBegan': "2018-01-10T08:07:13.505000+00:00", 'distributionType': "ENCLAVE",
+                'enclaveIds': ["ac6a0d17-7350-4410-bc57-9699521db992"], 'created': 1515571633505,
+                'updated': 1515620420062}
+               for i in range(count)]
+
+    def paginate(items):
+        return [{'items': items[i:i + page_size], 'pageNumber': i // page_size, 'pageSize': page_size,
+                 'totalElements': count, 'hasNext': i + page_size < count}
+                for i in range(0, count, page_size)]
+
+    return {'Report': paginate(reports), 'Indicator': paginate(indicators)}
+
+
+def measure(pages, content_type, fields):
+    """
+    Decodes every page and reads the given fields of every item.
+
+    :return: The number of items per second.
+    """
+
+    count = 0
+    start = time.time()
+    for page in pages:
+        for item in Page.from_dict(page, content_type=content_type):
+            for field in fields:
+                getattr(item, field)
+            count += 1
+
+    return count / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lazy views against full models.")
+    parser.add_argument('--count', type=int, default=100000, help="number of items of each model")
+    parser.add_argument('--page-size', type=int, default=100, help="number of items per page")
+    args = parser.parse_args()
+
+    pages = get_pages(args.count, args.page_size)
+    cases = [
+        ("Report", Report, ReportView, ['id', 'updated']),
+        ("Indicator", Indicator, IndicatorView, ['value', 'type'])
+    ]
+
+    print("%-10s %-16s %16s %16s %8s" % ("model", "fields read", "models/s", "views/s", "speedup"))
+    for name, model, view, fields in cases:
+        full = measure(pages[name], model, fields)
+        lazy = measure(pages[name], view, fields)
+        print("%-10s %-16s %16d %16d %7.1fx" % (name, ",".join(fields), full, lazy, lazy / full))
+
+
+if __name__ == '__main__':
+    main()
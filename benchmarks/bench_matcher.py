@@ -0,0 +1,155 @@
+"""
+Measures the throughput of scanning a synthetic proxy log for known indicators, comparing a line-by-line scan that
+looks each token up in a set (and tests each CIDR block in turn) with ``IndicatorMatcher.scan_file``, in one process
+and sharded across several.
+
+Run
+python benchmarks/bench_matcher.py --megabytes 500 --indicators 100000 --processes 4
+"""
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+
+from trustar import Indicator, IndicatorType
+from trustar.matcher import IndicatorMatcher, _parse_ipv4
+
+
+def make_indicators(count):
+    rng = random.Random(0)
+    indicators = []
+    for i in range(count):
+        kind = i % 6
+        if kind == 0:
+            indicators.append(Indicator(value="%d.%d.%d.%d" % (rng.randint(11, 191), rng.randint(0, 255),
+                                                               rng.randint(0, 255), rng.randint(0, 255)),
+                                        type=IndicatorType.IP))
+        elif kind == 1:
+            indicators.append(Indicator(value="%d.%d.0.0/16" % (rng.randint(11, 191), rng.randint(0, 255)),
+                                        type=IndicatorType.CIDR_BLOCK))
+        elif kind == 2:
+            indicators.append(Indicator(value="%032x" % rng.getrandbits(128), type=IndicatorType.MD5))
+        elif kind == 3:
+            indicators.append(Indicator(value="%064x" % rng.getrandbits(256), type=IndicatorType.SHA256))
+        elif kind == 4:
+            indicators.append(Indicator(value="bad%d.example.net" % i, type=IndicatorType.URL))
+        else:
+            indicators.append(Indicator(value="http://c2-%d.example.org/gate.php" % i, type=IndicatorType.URL))
+    return indicators
+
+
+def make_log(path, megabytes, indicators):
+    """
+    Writes a proxy log in which about one line in a thousand contains a known indicator, and the other lines contain
+    IP addresses and hashes that are not indicators.
+    """
+
+    rng = random.Random(1)
+    values = [i.value.split("/")[0] if i.type == IndicatorType.CIDR_BLOCK else i.value for i in indicators]
+    size = 0
+    with open(path, 'w') as f:
+        while size < megabytes * 1e6:
+            lines = []
+            for _ in range(1000):
+                lines.append("2018-03-01T12:%02d:%02d 10.%d.%d.%d GET http://www.site%d.com/index.html?id=%d "
+                             "200 %d \"Mozilla/5.0 (Windows NT 10.0; Win64; x64)\" %032x\n"
+                             % (rng.randrange(60), rng.randrange(60), rng.randrange(256), rng.randrange(256),
+                                rng.randrange(256), rng.randrange(100000), rng.randrange(10 ** 6),
+                                rng.randrange(10 ** 5), rng.getrandbits(128)))
+            lines[rng.randrange(1000)] = "2018-03-01T12:00:00 10.0.0.1 GET %s 200 0 -\n" % rng.choice(values)
+            chunk = "".join(lines)
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def run_line_by_line(path, indicators, limit):
+    """
+    Splits each line into tokens, looks each token up in a set, and tests IP addresses against each CIDR block.  Only
+    the first ``limit`` bytes of the log are scanned.
+    """
+
+    values = set()
+    networks = []
+    for indicator in indicators:
+        if indicator.type == IndicatorType.CIDR_BLOCK:
+            network, prefix_length = indicator.value.split("/")
+            mask = ~((1 << (32 - int(prefix_length))) - 1) & 0xffffffff
+            networks.append((_parse_ipv4(network), mask))
+        else:
+            values.add(indicator.value.lower())
+
+    token_pattern = re.compile(r"[^\s\"]+")
+    matches = 0
+    scanned = 0
+    with open(path, 'r') as f:
+        for line in f:
+            if scanned >= limit:
+                break
+            scanned += len(line)
+            for token in token_pattern.findall(line.lower()):
+                if token in values:
+                    matches += 1
+                    continue
+                address = _parse_ipv4(token)
+                if address is not None and any(address & mask == network for network, mask in networks):
+                    matches += 1
+    return scanned, matches
+
+
+def run_matcher(path, matcher, processes):
+    return os.path.getsize(path), sum(1 for _ in matcher.scan_file(path, processes=processes,
+                                                                   shard_size=32 * 1024 * 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scanning a log for known indicators.")
+    parser.add_argument('--megabytes', type=float, default=200, help="size of the synthetic log")
+    parser.add_argument('--indicators', type=int, default=60000, help="number of known indicators")
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                        help="number of processes to shard the scan across")
+    parser.add_argument('--baseline-megabytes', type=float, default=2,
+                        help="size of the part of the log to scan line by line (0 to skip)")
+    args = parser.parse_args()
+
+    indicators = make_indicators(args.indicators)
+
+    start = time.time()
+    matcher = IndicatorMatcher(indicators)
+    stats = matcher.get_stats()
+    print("built matcher of %d indicators in %.2f seconds: %s" % (len(matcher), time.time() - start, stats))
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "proxy.log")
+        size = make_log(path, args.megabytes, indicators)
+        print("scanning %.0f MB on %d CPUs" % (size / 1e6, multiprocessing.cpu_count()))
+
+        runs = [("IndicatorMatcher, 1 process", run_matcher, (path, matcher, None))]
+        if args.processes > 1:
+            runs.append(("IndicatorMatcher, %d processes" % args.processes, run_matcher,
+                         (path, matcher, args.processes)))
+        if args.baseline_megabytes > 0:
+            runs.insert(0, ("line by line, set lookups", run_line_by_line,
+                            (path, indicators, args.baseline_megabytes * 1e6)))
+
+        print("%-32s %10s %10s %10s %10s" % ("implementation", "MB", "seconds", "GB/s", "matches"))
+        for name, func, func_args in runs:
+            start = time.time()
+            scanned, count = func(*func_args)
+            seconds = time.time() - start
+            print("%-32s %10.0f %10.2f %10.4f %10d" % (name, scanned / 1e6, seconds, scanned / 1e9 / seconds,
+                                                      count))
+
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
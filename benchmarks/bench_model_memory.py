@@ -0,0 +1,89 @@
+"""
+Measures the memory used by a large number of |Indicator| objects, as returned by |get_indicators|, using tracemalloc.
+With ``--from-json``, the indicators are deserialized from a JSON response body instead, and the memory they retain
+after the body is discarded is measured; this includes the type and enclave ID strings they reference.
+
+Run
+python benchmarks/bench_model_memory.py --count 1000000
+python benchmarks/bench_model_memory.py --count 1000000 --from-json
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from trustar import Indicator, IndicatorType
+
+
+def measure(count):
+    """
+    Creates ``count`` indicators and returns the number of bytes allocated for them, excluding the indicator values
+    themselves, which are shared with the caller.
+
+    :param count: The number of indicators to create.
+    :return: The number of bytes allocated.
+    """
+
+    values = ["10.%d.%d.%d" % (i >> 16 & 255, i >> 8 & 255, i & 255) for i in range(count)]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    indicators = [Indicator(value=value, type=IndicatorType.IP) for value in values]
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(indicators) == count
+
+    return after - before
+
+
+def measure_from_json(count):
+    """
+    Deserializes ``count`` indicators from a JSON response body and returns the number of bytes still allocated once
+    the body has been discarded.
+
+    :param count: The number of indicators to create.
+    :return: The number of bytes allocated.
+    """
+
+    enclave_ids = ["ac6a0d17-7350-4410-bc57-9699521db992", "602d4795-31cd-44f9-a85d-f33cb869145a"]
+    body = json.dumps({'items': [{'value': "10.%d.%d.%d" % (i >> 16 & 255, i >> 8 & 255, i & 255),
+                                  'indicatorType': IndicatorType.IP,
+                                  'priorityLevel': "LOW",
+                                  'enclaveIds': enclave_ids} for i in range(count)]})
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    page = json.loads(body)
+    indicators = [Indicator.from_dict(item) for item in page['items']]
+    del page
+    gc.collect()
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(indicators) == count
+
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the memory used by Indicator objects.")
+    parser.add_argument('--count', type=int, default=1000000, help="number of indicators to create")
+    parser.add_argument('--from-json', action='store_true', help="deserialize the indicators from a JSON body")
+    args = parser.parse_args()
+
+    allocated = measure_from_json(args.count) if args.from_json else measure(args.count)
+    print("%d indicators: %.1f MiB (%.0f bytes per indicator)" % (args.count, allocated / 1024.0 / 1024.0,
+                                                                 float(allocated) / args.count))
+
+
+if __name__ == '__main__':
+    main()
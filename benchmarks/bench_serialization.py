@@ -0,0 +1,71 @@
+"""
+Microbenchmarks of ``to_dict``, ``to_dict(remove_nones=True)`` and ``from_dict`` for every model.
+
+Run
+python benchmarks/bench_serialization.py --number 100000
+"""
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from trustar import Enclave, EnclavePermissions, Indicator, Page, Report, RequestQuota, Tag
+
+
+def get_samples():
+    """
+    :return: A list of (name, model class, sample dictionary) tuples, one per model.
+    """
+
+    tag = {'name': "malicious", 'guid': "6b3cd5e5-8ff8-4a17-8d0f-87b0e1e0c1b8",
+           'enclaveId': "ac6a0d17-7350-4410-bc57-9699521db992"}
+    indicator = {'value': "www.evil.com", 'indicatorType': "URL", 'priorityLevel': "HIGH", 'correlationCount': 7,
+                 'whitelisted': False, 'weight': 1.0, 'firstSeen': 1515571633505, 'lastSeen': 1515620420062,
+                 'sightings': 12, 'source': "honeypot", 'tags': [tag, tag],
+                 'enclaveIds': ["ac6a0d17-7350-4410-bc57-9699521db992"]}
+    report = {'id': "1a09f14b-ef8c-443f-b082-9643071c522a", 'title': "Phishing Incident",
+              'reportBody': "Employee reported suspect email from www.evil.com. " * 20, 'timeBegan': 1479941278000,
+              'distributionType': "ENCLAVE", 'enclaveIds': ["ac6a0d17-7350-4410-bc57-9699521db992"],
+              'created': 1515571633505, 'updated': 1515620420062}
+    enclave = {'id': "ac6a0d17-7350-4410-bc57-9699521db992", 'name': "Research", 'type': "CLOSED"}
+    permissions = dict(enclave, read=True, create=True, update=False)
+    quota = {'guid': "1e5d0f83-5f1e-4a0f-9e52-d5b1f0f9b8a3", 'maxRequests': 1000, 'usedRequests': 12,
+             'timeWindow': 60000, 'lastResetTime': 1515571633505, 'nextResetTime': 1515571693505}
+    page = {'items': [indicator] * 25, 'pageNumber': 0, 'pageSize': 25, 'totalElements': 100, 'hasNext': True}
+
+    return [
+        ("Tag", Tag, tag),
+        ("Indicator", Indicator, indicator),
+        ("Report", Report, report),
+        ("Enclave", Enclave, enclave),
+        ("EnclavePermissions", EnclavePermissions, permissions),
+        ("RequestQuota", RequestQuota, quota),
+        ("Page[25 Indicator]", Page, page),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model serialization.")
+    parser.add_argument('--number', type=int, default=100000, help="number of calls per measurement")
+    args = parser.parse_args()
+
+    print("%-20s %14s %14s %14s" % ("model", "to_dict", "remove_nones", "from_dict"))
+    for name, cls, d in get_samples():
+        if cls is Page:
+            number = max(1, args.number // 25)
+            from_dict = lambda: Page.from_dict(d, content_type=Indicator)
+        else:
+            number = args.number
+            from_dict = lambda: cls.from_dict(d)
+
+        obj = from_dict()
+        timings = [
+            timeit.timeit(lambda: obj.to_dict(), number=number),
+            timeit.timeit(lambda: obj.to_dict(remove_nones=True), number=number),
+            timeit.timeit(from_dict, number=number),
+        ]
+        print("%-20s %14s %14s %14s" % ((name,) + tuple("%.2f us" % (t / number * 1e6) for t in timings)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Compares ``normalize_timestamp`` and ``normalize_timestamps`` with the previous implementation of
+``normalize_timestamp`` (copied below) on a mix of epoch, ISO-8601, free-form and datetime inputs.  The results of the
+new functions are checked against the previous implementation.
+
+Run
+python benchmarks/bench_timestamps.py --count 1000000
+"""
+from __future__ import print_function
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+import dateutil.parser
+import pytz
+from tzlocal import get_localzone
+
+from trustar.utils import normalize_timestamp, normalize_timestamps
+
+
+def legacy_normalize_timestamp(date_time):
+    """
+    The previous implementation of ``normalize_timestamp``, without logging.
+    """
+
+    datetime_dt = datetime.now()
+    current_time = int(time.time()) * 1000
+
+    try:
+        if isinstance(date_time, int):
+            if date_time < 10000000000:
+                date_time *= 1000
+            if date_time > current_time:
+                raise ValueError("The given time %s is in the future." % date_time)
+            return date_time
+
+        if isinstance(date_time, str):
+            datetime_dt = dateutil.parser.parse(date_time)
+        elif isinstance(date_time, datetime):
+            datetime_dt = date_time
+    except Exception:
+        datetime_dt = datetime.now()
+
+    if not datetime_dt.tzinfo:
+        local_timezone = get_localzone()
+        if hasattr(local_timezone, 'localize'):
+            datetime_dt = local_timezone.localize(datetime_dt)
+        else:
+            datetime_dt = datetime_dt.replace(tzinfo=local_timezone)
+        datetime_dt = datetime_dt.astimezone(pytz.utc)
+
+    return datetime_dt.isoformat()
+
+
+def get_inputs(count, distinct):
+    """
+    :return: A list of ``count`` timestamps drawn from ``distinct`` distinct values of mixed formats.
+    """
+
+    rng = random.Random(0)
+    formats = [
+        lambda t: int(t),
+        lambda t: int(t * 1000),
+        lambda t: datetime.utcfromtimestamp(t).strftime("%Y-%m-%dT%H:%M:%S"),
+        lambda t: datetime.utcfromtimestamp(t).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        lambda t: datetime.utcfromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S.%f+0100"),
+        lambda t: datetime.utcfromtimestamp(t).strftime("%Y-%m-%dT%H:%M:%S-05:00"),
+        lambda t: datetime.utcfromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S +00"),
+        lambda t: datetime.utcfromtimestamp(t).strftime("%Y-%m-%d"),
+        lambda t: datetime.utcfromtimestamp(t).strftime("%b %d %Y %I:%M%p"),
+        lambda t: datetime.utcfromtimestamp(t).replace(tzinfo=pytz.utc),
+    ]
+
+    values = [formats[i % len(formats)](rng.randint(1400000000, 1500000000)) for i in range(distinct)]
+    return [values[rng.randrange(distinct)] for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark timestamp normalization.")
+    parser.add_argument('--count', type=int, default=1000000, help="number of timestamps")
+    parser.add_argument('--distinct', type=int, default=10000, help="number of distinct timestamps")
+    args = parser.parse_args()
+
+    inputs = get_inputs(args.count, args.distinct)
+
+    start = time.time()
+    expected = [legacy_normalize_timestamp(value) for value in inputs]
+    legacy = time.time() - start
+
+    start = time.time()
+    single = [normalize_timestamp(value) for value in inputs]
+    fast = time.time() - start
+
+    start = time.time()
+    batch = normalize_timestamps(inputs)
+    batched = time.time() - start
+
+    assert single == expected, "normalize_timestamp differs from the previous implementation"
+    assert batch == expected, "normalize_timestamps differs from the previous implementation"
+
+    print("%-28s %10s %14s %8s" % ("implementation", "seconds", "timestamps/s", "speedup"))
+    for name, seconds in [("previous normalize_timestamp", legacy), ("normalize_timestamp", fast),
+                          ("normalize_timestamps", batched)]:
+        print("%-28s %10.2f %14d %7.1fx" % (name, seconds, args.count / seconds, legacy / seconds))
+
+
+if __name__ == '__main__':
+    main()
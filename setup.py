@@ -32,6 +32,9 @@ setup(
                       'six'
                       ],
     include_package_data=True,
+    entry_points={
+        'console_scripts': ['trustar = trustar.cli:main']
+    },
     scripts=glob('trustar/examples/**/*.py') + glob('trustar/examples/*.py'),
     use_2to3=True
 )
@@ -0,0 +1,110 @@
+"""
+A fake of the TruSTAR API, so that the client can be tested without contacting it.
+
+``create_client`` returns a real |TruStar| object whose API client is a ``FakeApiClient``.  Tests register the
+responses of the endpoints they use with ``FakeApiClient.handle``, and check the requests that were made in
+``FakeApiClient.requests``.
+"""
+import json
+import re
+import threading
+from collections import namedtuple
+from trustar import TruStar
+
+
+Request = namedtuple('Request', ['method', 'path', 'params', 'data', 'json', 'match'])
+
+
+class FakeResponse(object):
+
+    def __init__(self, body=None):
+        if isinstance(body, bytes):
+            self.content = body
+        elif isinstance(body, type(u"")):
+            self.content = body.encode('utf-8')
+        else:
+            self.content = json.dumps(body).encode('utf-8')
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+class FakeApiClient(object):
+    """
+    Records the requests made to it, and answers each with the handler registered for its method and path.  Requests
+    that have no handler get an empty body.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._handlers = []
+        # requests are made from worker threads by the concurrent methods of the client
+        self._lock = threading.Lock()
+
+    def handle(self, method, path, handler):
+        """
+        Registers the response of an endpoint.  Handlers registered later take precedence.
+
+        :param method: The HTTP method.
+        :param path: A regular expression that matches the whole path.
+        :param handler: The response body (bytes or text, or a value that is encoded as JSON), or a function that takes
+            a ``Request`` and returns the response body.  A function may raise an exception to fail the request.
+        """
+
+        self._handlers.insert(0, (method, re.compile(path + "$"), handler))
+
+    def get_requests(self, method=None, path=None):
+        """
+        :return: The requests with a method, and a path matching a regular expression.
+        """
+
+        with self._lock:
+            return [request for request in self.requests
+                    if (method is None or request.method == method)
+                    and (path is None or re.match(path + "$", request.path))]
+
+    def request(self, method, path, params=None, data=None, json=None, **kwargs):
+        for handler_method, pattern, handler in self._handlers:
+            match = pattern.match(path)
+            if handler_method == method and match is not None:
+                break
+        else:
+            handler = match = None
+
+        request = Request(method, path, params, data, json, match)
+        with self._lock:
+            self.requests.append(request)
+
+        body = handler(request) if callable(handler) else handler
+        return FakeResponse(body)
+
+    def get(self, path, params=None, **kwargs):
+        return self.request("GET", path, params=params, **kwargs)
+
+    def put(self, path, params=None, data=None, **kwargs):
+        return self.request("PUT", path, params=params, data=data, **kwargs)
+
+    def post(self, path, params=None, data=None, **kwargs):
+        return self.request("POST", path, params=params, data=data, **kwargs)
+
+    def delete(self, path, params=None, **kwargs):
+        return self.request("DELETE", path, params=params, **kwargs)
+
+
+def page(items, has_next=False):
+    """
+    :return: The body of a response from a paginated endpoint.
+    """
+
+    return {'items': items, 'pageNumber': 0, 'pageSize': len(items), 'totalElements': len(items), 'hasNext': has_next}
+
+
+def create_client(**config):
+    """
+    :return: A |TruStar| object whose requests are answered by a ``FakeApiClient``, in its ``_client`` attribute.
+    """
+
+    config = dict({'user_api_key': "key", 'user_api_secret': "secret", 'enclave_ids': ["e1"]}, **config)
+    ts = TruStar(config=config)
+    ts._client = FakeApiClient()
+    return ts
@@ -224,6 +224,94 @@ class TruStarTests(unittest.TestCase):
             for id in report_ids:
                 self.ts.delete_report(report_id=id)
 
+    def test_reconcile_enclave_tags(self):
+        """
+        Test that reconciling a report's tags adds the missing tags and deletes the unwanted ones.
+        """
+
+        enclave_id = self.ts.enclave_ids[0]
+
+        report = Report(title="Report 1",
+                        body="Blah blah blah",
+                        time_began=yesterday_time,
+                        enclave_ids=[enclave_id])
+        report = self.ts.submit_report(report=report)
+
+        try:
+            self.ts.add_enclave_tag(report_id=report.id, name="stale_tag", enclave_id=enclave_id)
+
+            desired = {report.id: [Tag(name="kept_tag", enclave_id=enclave_id)]}
+            results = self.ts.reconcile_enclave_tags(desired, enclave_ids=[enclave_id])
+
+            self.assertEqual(len(results), 1)
+            self.assertIsNone(results[0]['error'])
+            self.assertEqual([tag.name for tag in results[0]['added']], ["kept_tag"])
+            self.assertEqual([tag.name for tag in results[0]['deleted']], ["stale_tag"])
+
+            tags = self.ts.get_enclave_tags(report_id=report.id)
+            self.assertEqual([tag.name for tag in tags], ["kept_tag"])
+        finally:
+            self.ts.delete_report(report_id=report.id)
+
+    def test_local_store(self):
+        """
+        Test that a report synced into a LocalStore can be found by its enclave, tag and indicators.
+        """
+
+        enclave_id = self.ts.enclave_ids[0]
+
+        report = Report(title="Report 1",
+                        body="Blah blah blah evil.com",
+                        time_began=yesterday_time,
+                        enclave_ids=[enclave_id])
+        report = self.ts.submit_report(report=report)
+
+        try:
+            self.ts.add_enclave_tag(report_id=report.id, name="store_tag", enclave_id=enclave_id)
+
+            store = LocalStore()
+            store.sync_reports(self.ts, from_time=yesterday_time, enclave_ids=[enclave_id])
+
+            self.assertIn(report.id, [r.id for r in store.get_reports(enclave_ids=[enclave_id])])
+            self.assertIn(report.id, [r.id for r in store.get_reports(tag="store_tag")])
+            self.assertIn(report.id, [r.id for r in store.get_reports(indicator_values=["evil.com"])])
+
+            # a second sync only requests the reports updated since the first
+            self.assertGreater(store.get_sync_state('reports'), yesterday_time)
+        finally:
+            self.ts.delete_report(report_id=report.id)
+
+    def test_correlation_index(self):
+        """
+        Submits a fixture dataset of reports with shared indicators, indexes them in a CorrelationIndex, and checks that
+        the index agrees with the API.
+        """
+
+        shared = generate_ip()
+        groups = [[shared, generate_ip()], [shared, generate_ip()], [generate_ip()]]
+
+        reports = []
+        try:
+            for count, group in enumerate(groups):
+                report = Report(title="Test_Correlation_Index_Report_%s" % count,
+                                body=" some words ".join(group),
+                                enclave_ids=self.ts.enclave_ids)
+                reports.append(self.ts.submit_report(report=report))
+
+            index = CorrelationIndex()
+            for report in reports:
+                index.add_report(report.id, self.ts.get_indicators_for_report(report_id=report.id))
+
+            for group in groups:
+                expected = set(self.ts.get_correlated_report_ids(group)) & set(r.id for r in reports)
+                self.assertSetEqual(set(index.get_correlated_report_ids(group)), expected)
+
+            related = set(i.value for i in index.get_related_indicators([shared]))
+            self.assertSetEqual(related, set(groups[0][1:] + groups[1][1:]))
+        finally:
+            for report in reports:
+                self.ts.delete_report(report_id=report.id)
+
     @unittest.skip
     def test_search_indicators(self):
         indicators = self.ts.search_indicators("abc")
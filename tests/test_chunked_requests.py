@@ -0,0 +1,116 @@
+import threading
+import time
+import unittest
+from urllib.parse import urlencode
+from trustar import *
+from trustar.utils import MAX_QUERY_LENGTH, chunk_query_params, parallel_imap
+
+from fakes import create_client, page
+
+
+# long enough that a few hundred values do not fit in one query string
+VALUES = ["%03d-" % i + "x" * 100 + ".example.com" for i in range(200)]
+
+
+def get_query_length(request):
+    return len(urlencode({k: v for k, v in request.params.items() if v is not None}, doseq=True))
+
+
+class ChunkedRequestTests(unittest.TestCase):
+    """
+    Tests of splitting requests whose query strings would be too long, and of merging their results.
+    """
+
+    def test_chunk_query_params(self):
+        params = {'values': ["a" * 10] * 9, 'types': ["URL"] * 9, 'enclaveIds': ["e1", "e2"], 'other': None}
+        chunks = chunk_query_params(params, ['values', 'types'], max_length=100)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(sum((chunk['values'] for chunk in chunks), []), params['values'])
+        for chunk in chunks:
+            self.assertEqual(len(chunk['values']), len(chunk['types']))
+            self.assertEqual(chunk['enclaveIds'], ["e1", "e2"])
+            self.assertLessEqual(len(urlencode({k: v for k, v in chunk.items() if v is not None}, doseq=True)), 100)
+
+        # an element longer than the limit gets a set of its own
+        self.assertEqual([chunk['values'] for chunk in chunk_query_params({'values': ["a" * 50, "b"]}, ['values'],
+                                                                          max_length=10)],
+                         [["a" * 50], ["b"]])
+        self.assertEqual(chunk_query_params({'values': None, 'x': 1}, ['values']), [{'values': None, 'x': 1}])
+
+    def test_indicators_metadata(self):
+        ts = create_client()
+        # the server answers in a different order than the request, and changes the case of the values
+        ts._client.handle("GET", "indicators/metadata", lambda request: [
+            {'value': value.upper(), 'indicatorType': "URL"} for value in reversed(request.params['values'])])
+
+        indicators = ts.get_indicators_metadata([Indicator(value=value, type="URL") for value in VALUES],
+                                                max_workers=4)
+
+        requests = ts._client.get_requests("GET", "indicators/metadata")
+        self.assertGreater(len(requests), 1)
+        for request in requests:
+            self.assertLessEqual(get_query_length(request), MAX_QUERY_LENGTH)
+        self.assertEqual([i.value.lower() for i in indicators], VALUES)
+
+    def test_indicator_details(self):
+        ts = create_client()
+        # every chunk answers with the first value as well, which is only returned once
+        ts._client.handle("GET", "indicators/details", lambda request: [
+            {'value': value} for value in reversed(request.params['indicatorValues'] + [VALUES[0]])])
+
+        indicators = ts.get_indicator_details(VALUES, enclave_ids=["e1"], max_workers=4)
+
+        requests = ts._client.get_requests("GET", "indicators/details")
+        self.assertGreater(len(requests), 1)
+        for request in requests:
+            self.assertLessEqual(get_query_length(request), MAX_QUERY_LENGTH)
+            self.assertEqual(request.params['enclaveIds'], ["e1"])
+        self.assertEqual([i.value for i in indicators], VALUES)
+
+    def test_correlated_reports(self):
+        ts = create_client()
+        # each indicator correlates with its own report, and the first indicator of each chunk also with a shared one
+        ts._client.handle("GET", "reports/correlated", lambda request: page(
+            [{'id': "shared"}] + [{'id': "report-" + value} for value in request.params['indicators']]))
+
+        reports = list(ts.get_correlated_reports(VALUES, max_workers=4))
+
+        requests = ts._client.get_requests("GET", "reports/correlated")
+        self.assertGreater(len(requests), 1)
+        for request in requests:
+            self.assertLessEqual(get_query_length(request), MAX_QUERY_LENGTH)
+        self.assertEqual(sorted(r.id for r in reports), sorted(["shared"] + ["report-" + value for value in VALUES]))
+        self.assertEqual(reports[0].id, "shared")
+
+    def test_parallel_imap(self):
+        lock = threading.Lock()
+        taken = [0]
+        consumed = [0]
+        most_pending = [0]
+
+        def items():
+            for i in range(50):
+                with lock:
+                    taken[0] += 1
+                    most_pending[0] = max(most_pending[0], taken[0] - consumed[0])
+                yield i
+
+        def work(i):
+            # finish out of order
+            time.sleep(0.001 * (i % 3))
+            return i * i
+
+        results = []
+        for result in parallel_imap(work, items(), max_workers=3, max_pending=4):
+            results.append(result)
+            with lock:
+                consumed[0] += 1
+
+        self.assertEqual(results, [i * i for i in range(50)])
+        self.assertLessEqual(most_pending[0], 4)
+        self.assertEqual(list(parallel_imap(work, range(5), max_workers=None)), [i * i for i in range(5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
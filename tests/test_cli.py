@@ -0,0 +1,184 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from trustar import *
+from trustar import cli
+
+from fakes import create_client, page
+
+
+REPORTS = [
+    {'id': "r1", 'title': "First", 'reportBody': "evil.com", 'distributionType': "ENCLAVE", 'enclaveIds': ["e1"],
+     'timeBegan': 1514764800000, 'updated': 1514764801000},
+    {'id': "r2", 'title': "Second", 'reportBody': "1.2.3.4", 'distributionType': "ENCLAVE", 'enclaveIds': ["e2"],
+     'timeBegan': 1514764800000, 'updated': 1514764802000},
+]
+INDICATORS = [{'value': "evil.com", 'indicatorType': "URL"}, {'value': "1.2.3.4", 'indicatorType': "IP"},
+              {'value': "5.6.7.8", 'indicatorType': "IP"}]
+
+
+def create_cli_client():
+    """
+    :return: A client that serves the fixture reports, indicators and whitelist, and accepts submissions of reports
+        (except those titled "bad") and indicators.
+    """
+
+    ts = create_client()
+
+    def get_reports(request):
+        params = request.params
+        return page([report for report in reversed(REPORTS)
+                     if (params['from'] is None or report['updated'] >= params['from'])
+                     and (params['to'] is None or report['updated'] <= params['to'])])
+
+    def submit_report(request):
+        title = json.loads(request.data)['title']
+        if title == "bad":
+            raise ValueError("bad report")
+        return "id-" + title
+
+    ts._client.handle("GET", "reports", get_reports)
+    ts._client.handle("GET", "indicators", page(INDICATORS))
+    ts._client.handle("GET", "whitelist", page([{'value': "google.com", 'indicatorType': "URL"}]))
+    ts._client.handle("POST", "reports", submit_report)
+    return ts
+
+
+class CliTests(unittest.TestCase):
+    """
+    Tests of the argument parsing and the commands of the ``trustar`` command.
+    """
+
+    def setUp(self):
+        self.client = create_cli_client()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_command(self, argv):
+        """
+        Runs a command line with the fake client.
+
+        :return: The exit status.
+        """
+
+        args = cli.get_parser().parse_args(['-q'] + argv)
+        return args.func(self.client, args)
+
+    def write_ndjson(self, name, records):
+        path = os.path.join(self.directory, name)
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(u"".join(u"%s\n\n" % json.dumps(record) for record in records))
+        return path
+
+    def read_ndjson(self, path):
+        with io.open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_parse_arguments(self):
+        parser = cli.get_parser()
+        args = parser.parse_args(["export", "reports", "--from", "2018-01-01T00:00:00+00:00", "--to", "1514764801000",
+                                  "--enclave-ids", "e1, e2,", "--community"])
+        self.assertEqual((args.func, args.type), (cli.export_command, 'reports'))
+        self.assertEqual((args.from_time, args.to_time), (1514764800000, 1514764801000))
+        self.assertEqual(args.enclave_ids, ["e1", "e2"])
+        self.assertIs(args.is_enclave, False)
+        self.assertEqual((args.config_file, args.page_size, args.output), ("trustar.conf", 1000, None))
+        self.assertIsNone(parser.parse_args(["export", "whitelist"]).is_enclave)
+
+        args = parser.parse_args(["--config-role", "staging", "import", "indicators", "--batch-size", "10",
+                                  "--index", "index.db"])
+        self.assertEqual((args.func, args.config_role, args.batch_size, args.index),
+                         (cli.import_command, "staging", 10, "index.db"))
+
+        with io.open(os.devnull, 'w') as devnull:
+            stderr, cli.sys.stderr = cli.sys.stderr, devnull
+            try:
+                for argv in ([], ["export"], ["export", "tags"], ["import", "whitelist"],
+                             ["export", "reports", "--from", "not a date"]):
+                    self.assertRaises(SystemExit, parser.parse_args, argv)
+            finally:
+                cli.sys.stderr = stderr
+
+    def test_export(self):
+        path = os.path.join(self.directory, "reports.ndjson")
+        self.assertEqual(self.run_command(["export", "reports", "-o", path, "--from", "2018-01-01T00:00:00+00:00",
+                                           "--enclave-ids", "e1,e2"]), 0)
+        self.assertEqual([report['id'] for report in self.read_ndjson(path)], ["r2", "r1"])
+        self.assertEqual(self.client._client.get_requests("GET", "reports")[0].params['enclaveIds'], ["e1", "e2"])
+
+        self.run_command(["export", "reports", "-o", path, "--from", "1514764800000", "--to", "1514764801000"])
+        self.assertEqual([report['id'] for report in self.read_ndjson(path)], ["r1"])
+
+        path = os.path.join(self.directory, "indicators.ndjson")
+        self.assertEqual(self.run_command(["export", "indicators", "-o", path, "--page-size", "2"]), 0)
+        self.assertEqual(self.read_ndjson(path), INDICATORS)
+        self.assertEqual(self.client._client.get_requests("GET", "indicators")[0].params['pageSize'], 2)
+
+        path = os.path.join(self.directory, "whitelist.ndjson")
+        self.run_command(["export", "whitelist", "-o", path])
+        self.assertEqual([term['value'] for term in self.read_ndjson(path)], ["google.com"])
+
+    def test_import_reports(self):
+        path = self.write_ndjson("reports.ndjson", REPORTS + [dict(REPORTS[0], title="bad")])
+        index = os.path.join(self.directory, "index.db")
+
+        # one of the reports fails, so the exit status is 1
+        self.assertEqual(self.run_command(["import", "reports", "-i", path, "--enclave-ids", "e3", "--index", index]),
+                         1)
+        submitted = [json.loads(request.data) for request in self.client._client.get_requests("POST", "reports")]
+        self.assertEqual(sorted(report['title'] for report in submitted), ["First", "Second", "bad"])
+        self.assertEqual([report['enclaveIds'] for report in submitted], [["e3"]] * 3)
+        # the reports get new IDs
+        self.assertEqual([report['id'] for report in submitted], [None] * 3)
+
+        # the index records the submitted reports, so they are not submitted again
+        self.client = create_cli_client()
+        path = self.write_ndjson("reports.ndjson", REPORTS)
+        self.assertEqual(self.run_command(["import", "reports", "-i", path, "--enclave-ids", "e3", "--index", index]),
+                         0)
+        self.assertEqual(self.client._client.get_requests("POST", "reports"), [])
+
+    def test_import_indicators(self):
+        path = self.write_ndjson("indicators.ndjson", INDICATORS)
+        self.assertEqual(self.run_command(["import", "indicators", "-i", path, "--batch-size", "2",
+                                           "--enclave-ids", "e1"]), 0)
+
+        bodies = [json.loads(request.data) for request in self.client._client.get_requests("POST", "indicators")]
+        self.assertEqual(sorted(len(body['content']) for body in bodies), [1, 2])
+        self.assertEqual(sorted(i['value'] for body in bodies for i in body['content']),
+                         sorted(i['value'] for i in INDICATORS))
+        self.assertEqual([body['enclaveIds'] for body in bodies], [["e1"]] * 2)
+
+        def fail(request):
+            raise ValueError("rejected")
+
+        self.client._client.handle("POST", "indicators", fail)
+        self.assertEqual(self.run_command(["import", "indicators", "-i", path]), 1)
+
+    def test_main(self):
+        path = os.path.join(self.directory, "whitelist.ndjson")
+        created = []
+
+        def create_trustar(config_file, config_role):
+            created.append((config_file, config_role))
+            return self.client
+
+        trustar = cli.TruStar
+        cli.TruStar = create_trustar
+        try:
+            status = cli.main(["-q", "--config-file", "test.conf", "export", "whitelist", "-o", path])
+        finally:
+            cli.TruStar = trustar
+
+        self.assertEqual(status, 0)
+        self.assertEqual(created, [("test.conf", "trustar")])
+        self.assertEqual(len(self.read_ndjson(path)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from trustar import *
+from trustar.models import codec
+
+
+TAG = {'name': "malicious", 'guid': "6b3cd5e5-8ff8-4a17-8d0f-87b0e1e0c1b8",
+       'enclaveId': "ac6a0d17-7350-4410-bc57-9699521db992"}
+
+INDICATOR = {'value': "www.evil.com", 'indicatorType': "URL", 'priorityLevel': "HIGH", 'correlationCount': 7,
+             'whitelisted': False, 'weight': 1.5, 'firstSeen': 1515571633505, 'lastSeen': 1515620420062,
+             'sightings': 12, 'source': u"honeypot ☃", 'tags': [TAG, TAG],
+             'enclaveIds': ["ac6a0d17-7350-4410-bc57-9699521db992"]}
+
+REPORT = {'id': "1a09f14b-ef8c-443f-b082-9643071c522a", 'title': "Phishing Incident",
+          'reportBody': "Employee reported suspect email from www.evil.com.", 'timeBegan': 1479941278000,
+          'distributionType': "COMMUNITY", 'enclaveIds': ["ac6a0d17-7350-4410-bc57-9699521db992"],
+          'created': 1515571633505, 'updated': 1515620420062}
+
+ENCLAVE = {'id': "ac6a0d17-7350-4410-bc57-9699521db992", 'name': "Research", 'type': "CLOSED"}
+
+
+class CodecTests(unittest.TestCase):
+    """
+    Round-trip tests of the binary codec.
+    """
+
+    def assert_round_trip(self, obj):
+        result = codec.loads(codec.dumps(obj))
+        self.assertIs(type(result), type(obj))
+        self.assertEqual(result.to_dict(), obj.to_dict())
+        return result
+
+    def test_models(self):
+        self.assert_round_trip(Tag.from_dict(TAG))
+        self.assert_round_trip(Indicator.from_dict(INDICATOR))
+        self.assert_round_trip(Report.from_dict(REPORT))
+        self.assert_round_trip(Enclave.from_dict(ENCLAVE))
+        self.assert_round_trip(EnclavePermissions.from_dict(dict(ENCLAVE, read=True, create=False, update=True)))
+        self.assert_round_trip(RequestQuota.from_dict({'guid': "1e5d0f83", 'maxRequests': 1000, 'usedRequests': 12,
+                                                       'timeWindow': 60000, 'lastResetTime': 1515571633505,
+                                                       'nextResetTime': 1515571693505}))
+
+    def test_tag_id(self):
+        # Tag.to_dict writes 'id' but Tag.from_dict reads 'guid'
+        tag = self.assert_round_trip(Tag.from_dict(TAG))
+        self.assertEqual(tag.id, TAG['guid'])
+
+    def test_none_values(self):
+        self.assert_round_trip(Indicator(value="1.2.3.4"))
+        self.assert_round_trip(Report(title="empty"))
+
+    def test_list(self):
+        indicators = [Indicator.from_dict(INDICATOR),
+                      Indicator(value="1.2.3.4", type=IndicatorType.IP, tags=[], enclave_ids=None),
+                      Indicator(value="5.6.7.8", weight=2, sightings=None)]
+
+        result = codec.loads(codec.dumps(indicators))
+        self.assertEqual([i.to_dict() for i in result], [i.to_dict() for i in indicators])
+
+        self.assertEqual(codec.loads(codec.dumps([])), [])
+
+    def test_page(self):
+        page = Page(items=[Report.from_dict(REPORT), Report(title="other", is_enclave=True)],
+                    page_number=2, page_size=25, total_elements=52, has_next=False)
+        result = self.assert_round_trip(page)
+        self.assertEqual(result.page_number, 2)
+        self.assertFalse(result.has_more_pages())
+
+    def test_views(self):
+        page = Page.from_dict({'items': [INDICATOR], 'pageNumber': 0, 'pageSize': 1, 'totalElements': 1,
+                               'hasNext': False}, content_type=IndicatorView)
+        result = codec.loads(codec.dumps(page))
+        self.assertIs(type(result.items[0]), Indicator)
+        self.assertEqual(result.to_dict(), page.to_dict())
+
+    def test_large_int(self):
+        self.assert_round_trip(Indicator(value="big", correlation_count=2 ** 70))
+
+    def test_mixed_classes(self):
+        with self.assertRaises(ValueError):
+            codec.dumps([Tag.from_dict(TAG), Indicator.from_dict(INDICATOR)])
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError):
+            codec.loads(b'JSON' + codec.dumps(Tag.from_dict(TAG))[4:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+from trustar import *
+
+
+# report ID -> indicators extracted from the report
+FIXTURE = {
+    'r1': [Indicator(value="evil.com", type=IndicatorType.URL), Indicator(value="1.2.3.4", type=IndicatorType.IP)],
+    'r2': [Indicator(value="evil.com", type=IndicatorType.URL), Indicator(value="5.6.7.8", type=IndicatorType.IP),
+           Indicator(value="44d88612fea8a8f36de82e1278abb02f", type=IndicatorType.MD5)],
+    'r3': [Indicator(value="1.2.3.4", type=IndicatorType.IP), Indicator(value="5.6.7.8", type=IndicatorType.IP)],
+    'r4': [Indicator(value="unrelated.org", type=IndicatorType.URL)],
+}
+
+
+class CorrelationIndexTests(unittest.TestCase):
+    """
+    Tests of CorrelationIndex on a fixture dataset.
+    """
+
+    def setUp(self):
+        self.index = CorrelationIndex()
+        for report_id in sorted(FIXTURE):
+            self.index.add_report(report_id, FIXTURE[report_id])
+
+    def test_correlated_report_ids(self):
+        self.assertEqual(self.index.get_correlated_report_ids(["evil.com"]), ['r1', 'r2'])
+        self.assertEqual(self.index.get_correlated_report_ids(["evil.com", "5.6.7.8"]), ['r1', 'r2', 'r3'])
+        self.assertEqual(self.index.get_correlated_report_ids(["evil.com", "5.6.7.8"], require_all=True), ['r2'])
+        self.assertEqual(self.index.get_correlated_report_ids(["evil.com", "missing"], require_all=True), [])
+        self.assertEqual(self.index.get_correlated_report_ids(["missing"]), [])
+
+    def test_related_indicators(self):
+        related = self.index.get_related_indicators(["evil.com"])
+        counts = {i.value: i.correlation_count for i in related}
+        self.assertEqual(counts, {"1.2.3.4": 1, "5.6.7.8": 1, "44d88612fea8a8f36de82e1278abb02f": 1})
+
+        # 5.6.7.8 occurs with both evil.com (r2) and 1.2.3.4 (r3)
+        related = self.index.get_related_indicators(["evil.com", "1.2.3.4"], limit=1)
+        self.assertEqual([(i.value, i.type, i.correlation_count) for i in related], [("5.6.7.8", "IP", 2)])
+
+    def test_incremental_updates(self):
+        self.index.add_report('r1', [Indicator(value="5.6.7.8")])
+        self.assertEqual(self.index.get_correlated_report_ids(["evil.com"]), ['r2'])
+        self.assertEqual(self.index.get_correlated_report_ids(["5.6.7.8"]), ['r1', 'r2', 'r3'])
+
+        self.index.remove_report('r2')
+        self.assertEqual(self.index.get_correlated_report_ids(["5.6.7.8"]), ['r1', 'r3'])
+        self.assertIsNone(self.index.get_indicators_for_report('r2'))
+        self.assertEqual(len(self.index), 3)
+
+    def test_save_and_load(self):
+        self.index.remove_report('r3')
+        self.index.synced_to = 1515571633505
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "correlation.idx")
+            self.index.save(path)
+            loaded = CorrelationIndex.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(loaded.synced_to, 1515571633505)
+        self.assertEqual(len(loaded), 3)
+        for value in ["evil.com", "1.2.3.4", "5.6.7.8", "unrelated.org"]:
+            self.assertEqual(loaded.get_correlated_report_ids([value]), self.index.get_correlated_report_ids([value]))
+        self.assertEqual([i.to_dict() for i in loaded.get_indicators_for_report('r2')],
+                         [i.to_dict() for i in self.index.get_indicators_for_report('r2')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from trustar import *
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+from fakes import create_client, page
+
+
+REPORTS = [Report(id="r1", title="First"), Report(id="r2", title="Second"), Report(id="r3", title="Empty")]
+TAGS = {'r1': ["apt", "phishing"], 'r2': [], 'r3': ["noise"]}
+INDICATORS = {
+    'r1': [Indicator(value="evil.com", type=IndicatorType.URL), Indicator(value="1.2.3.4", type=IndicatorType.IP)],
+    'r2': [Indicator(value="5.6.7.8", type=IndicatorType.IP)],
+    'r3': [],
+}
+
+
+def create_exporting_client():
+    """
+    :return: A client that serves the fixture reports, and their tags and indicators.
+    """
+
+    ts = create_client()
+    ts._client.handle("GET", "reports", page([report.to_dict() for report in REPORTS]))
+    ts._client.handle("GET", "reports/([^/]+)/tags",
+                      lambda request: [{'name': name} for name in TAGS[request.match.group(1)]])
+    ts._client.handle("GET", "reports/([^/]+)/indicators",
+                      lambda request: page([indicator.to_dict() for indicator in INDICATORS[request.match.group(1)]]))
+    return ts
+
+
+class ExportTests(unittest.TestCase):
+    """
+    Tests of export_report_indicators and the export sinks.
+    """
+
+    def setUp(self):
+        self.client = create_exporting_client()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_export_csv(self):
+        path = os.path.join(self.directory, "indicators.csv")
+        with CsvSink(path, REPORT_INDICATOR_COLUMNS) as sink:
+            counts = self.client.export_report_indicators(sink, max_workers=2, max_pending=2)
+
+        self.assertEqual(counts, (3, 3))
+        with io.open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, [
+            "report_id,report_title,report_tags,indicator_value,indicator_type",
+            "r1,First,apt;phishing,evil.com,URL",
+            "r1,First,apt;phishing,1.2.3.4,IP",
+            "r2,Second,,5.6.7.8,IP",
+        ])
+
+    def test_export_ndjson(self):
+        path = os.path.join(self.directory, "indicators.ndjson")
+        with NdjsonSink(path) as sink:
+            self.client.export_report_indicators(sink, max_workers=None)
+            self.assertEqual(sink.row_count, 3)
+
+        with io.open(path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['indicator_value'] for row in rows], ["evil.com", "1.2.3.4", "5.6.7.8"])
+        self.assertEqual(rows[0]['report_tags'], ["apt", "phishing"])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_sink(self):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        items = [
+            {'value': "evil.com", 'indicatorType': "URL", 'firstSeen': 1, 'enclaveIds': ["e1", "e2"]},
+            {'value': "1.2.3.4", 'indicatorType': "IP", 'sightings': 3, 'enclaveIds': ["e1"]},
+            {'value': "5.6.7.8", 'indicatorType': "IP", 'enclaveIds': None},
+        ]
+
+        path = os.path.join(self.directory, "indicators.parquet")
+        with ArrowSink(path, INDICATOR_ARROW_COLUMNS, row_group_size=2) as sink:
+            sink.write_rows(items[:1])
+            sink.write_rows(items[1:])
+
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        table = parquet_file.read()
+        self.assertEqual(table.column('value').to_pylist(), ["evil.com", "1.2.3.4", "5.6.7.8"])
+        self.assertEqual(table.column('sightings').to_pylist(), [None, 3, None])
+        self.assertEqual(table.column('enclave_ids').to_pylist(), [["e1", "e2"], ["e1"], None])
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('type').type))
+
+        path = os.path.join(self.directory, "indicators.arrow")
+        with ArrowSink(path, INDICATOR_ARROW_COLUMNS, file_format='arrow') as sink:
+            sink.write_rows(items)
+        table = pyarrow.ipc.open_file(path).read_all()
+        self.assertEqual(table.column('type').to_pylist(), ["URL", "IP", "IP"])
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('enclave_ids').type.value_type))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow_sink_batches(self):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        items = [{'value': "v%d" % i, 'indicatorType': ["URL", "IP", "MD5"][i % 3] if i != 4 else None,
+                  'enclaveIds': ["e%d" % (i % 4), "e%d" % (i % 5)]} for i in range(10)]
+        types = [item['indicatorType'] for item in items]
+        enclave_ids = [item['enclaveIds'] for item in items]
+
+        # the dictionaries gain values in later batches, which the IPC file format records as deltas
+        path = os.path.join(self.directory, "indicators.arrow")
+        with ArrowSink(path, INDICATOR_ARROW_COLUMNS, file_format='arrow', row_group_size=2) as sink:
+            sink.write_rows(items)
+        reader = pyarrow.ipc.open_file(path)
+        self.assertEqual(reader.num_record_batches, 5)
+        table = reader.read_all()
+        self.assertEqual(table.column('type').to_pylist(), types)
+        self.assertEqual(table.column('enclave_ids').to_pylist(), enclave_ids)
+
+        path = os.path.join(self.directory, "indicators.parquet")
+        with ArrowSink(path, INDICATOR_ARROW_COLUMNS, row_group_size=3) as sink:
+            sink.write_rows(items)
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.column('type').to_pylist(), types)
+        self.assertEqual(table.column('enclave_ids').to_pylist(), enclave_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
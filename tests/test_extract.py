@@ -0,0 +1,70 @@
+import io
+import unittest
+from trustar import *
+
+
+TEXT = u"""Callback to hxxp://evil[.]com/a?b=1. from 010.0.0.1 and 192.168.0.0/16 (https://en.wikipedia.org/wiki/Foo_(bar)).
+Mail Bad.Guy@Example.COM or bad[at]evil(dot)com, not report.pdf nor os.path nor 1.2.3.4.5 nor 256.1.1.1
+D41D8CD98F00B204E9800998ECF8427E da39a3ee5e6b4b0d3255bfef95601890afd80709
+e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855 cve-2017-0144
+1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb HKLM\\Software\\Run\\evil. 10.0.0.1
+"""
+
+EXPECTED = [
+    (IndicatorType.URL, "http://evil.com/a?b=1"),
+    (IndicatorType.IP, "10.0.0.1"),
+    (IndicatorType.CIDR_BLOCK, "192.168.0.0/16"),
+    (IndicatorType.URL, "https://en.wikipedia.org/wiki/Foo_(bar)"),
+    (IndicatorType.EMAIL_ADDRESS, "bad.guy@example.com"),
+    (IndicatorType.EMAIL_ADDRESS, "bad@evil.com"),
+    (IndicatorType.MD5, "d41d8cd98f00b204e9800998ecf8427e"),
+    (IndicatorType.SHA1, "da39a3ee5e6b4b0d3255bfef95601890afd80709"),
+    (IndicatorType.SHA256, "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"),
+    (IndicatorType.CVE, "CVE-2017-0144"),
+    (IndicatorType.BITCOIN_ADDRESS, "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"),
+    (IndicatorType.REGISTRY_KEY, "HKEY_LOCAL_MACHINE\\Software\\Run\\evil"),
+]
+
+
+class ExtractTests(unittest.TestCase):
+    """
+    Tests of local indicator extraction.
+    """
+
+    def test_extract(self):
+        self.assertEqual([(i.type, i.value) for i in extract_indicators(TEXT)], EXPECTED)
+
+    def test_types_and_whitelist(self):
+        extractor = IndicatorExtractor(types=[IndicatorType.IP, IndicatorType.MD5],
+                                       whitelist=WhitelistIndex(["10.0.0.1"]))
+        self.assertEqual([(i.type, i.value) for i in extractor.extract(TEXT)],
+                         [(IndicatorType.MD5, "d41d8cd98f00b204e9800998ecf8427e")])
+        self.assertRaises(ValueError, IndicatorExtractor, types=[IndicatorType.MALWARE])
+
+    def test_url_in_query_string(self):
+        text = u"Redirects via http://Example.com/Redirect?u=http://Evil.com/X and Evil.com/r?u=HTTP://Bad.com/Y"
+        self.assertEqual([i.value for i in extract_indicators(text)],
+                         ["http://example.com/Redirect?u=http://Evil.com/X", "evil.com/r?u=HTTP://Bad.com/Y"])
+
+    def test_urls_without_scheme(self):
+        text = u"Go to www.Example.com/Path or Evil.com. Not report.pdf, os.path or notes.txt"
+        self.assertEqual([(i.type, i.value) for i in extract_indicators(text)],
+                         [(IndicatorType.URL, "www.example.com/Path"), (IndicatorType.URL, "evil.com")])
+        self.assertEqual([i.value for i in extract_indicators(u"evil.com")], ["evil.com"])
+
+    def test_extract_stream(self):
+        for chunk_size in (7, 100, 1 << 20):
+            extractor = IndicatorExtractor()
+            indicators = list(extractor.extract_stream(io.StringIO(TEXT * 3), chunk_size=chunk_size))
+            self.assertEqual([(i.type, i.value) for i in indicators], EXPECTED)
+
+        indicators = list(IndicatorExtractor().extract_stream(io.BytesIO(TEXT.encode('utf-8')), chunk_size=5))
+        self.assertEqual([(i.type, i.value) for i in indicators], EXPECTED)
+
+        stats = extractor.get_stats()
+        self.assertEqual(stats['characters'], 3 * len(TEXT))
+        self.assertEqual(stats['indicators'], len(EXPECTED))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import io
+import json
+import unittest
+from trustar import *
+from trustar.fireeye import AlertFilter, read_alerts, alert_to_report
+
+
+ALERTS = [
+    {'displayId': 1, 'message': "Malware Callback", 'createDate': "2018-01-02 03:04:05 +00"},
+    {'displayId': 2, 'message': "Malware Object", 'closedState': "False Positive"},
+    {'displayId': 3, 'message': "Malware Object", 'distinguishers': {'virus': "fetestevent"}},
+    {'displayId': 4, 'message': "WINDOWS METHODOLOGY [Net User Add]"},
+    {'displayId': 5, 'message': "Infection Match", 'closedState': "Closed", 'distinguishers': None},
+]
+
+EXPORT = json.dumps({'appliance': {'name': "fe-nx-01"}, 'alerts': ALERTS, 'alertsCount': len(ALERTS)})
+
+
+class FireEyeTests(unittest.TestCase):
+    """
+    Tests of the FireEye alert ingest helpers.
+    """
+
+    def test_read_alerts(self):
+        for chunk_size in (1, 7, 1 << 16):
+            self.assertEqual(list(read_alerts(io.StringIO(EXPORT), chunk_size=chunk_size)), ALERTS)
+
+    def test_iter_json_array(self):
+        self.assertEqual(list(iter_json_array(io.StringIO(u' [1, "a,]", [2], {"b": 3}] '), chunk_size=2)),
+                         [1, "a,]", [2], {'b': 3}])
+        self.assertEqual(list(iter_json_array(io.StringIO(u'[]'))), [])
+        self.assertRaises(ValueError, list, iter_json_array(io.StringIO(u'{"x": [1]}')))
+        self.assertRaises(ValueError, list, iter_json_array(io.StringIO(u'{"alerts": [1, {'), key='alerts'))
+
+    def test_iter_json_array_numbers(self):
+        numbers = [12.5, -35000000000.0, 1e5, -2.5e-7, 0, 17, True, None]
+        document = u'[12.5, -35000000000.0, 1e5, -2.5E-7, 0, 17, true, null]'
+        for chunk_size in range(1, len(document) + 1):
+            self.assertEqual(list(iter_json_array(io.StringIO(document), chunk_size=chunk_size)), numbers)
+
+    def test_iter_json_array_key(self):
+        document = u'{"other": [0], "alerts"' + u" " * 200 + u':\n  [1, 2]}'
+        for chunk_size in (1, 3, 64, 1 << 16):
+            self.assertEqual(list(iter_json_array(io.StringIO(document), key='alerts', chunk_size=chunk_size)), [1, 2])
+
+    def test_alert_filter(self):
+        alert_filter = AlertFilter()
+        self.assertEqual([alert_filter.get_reason(alert) for alert in ALERTS],
+                         [None, 'false_positive', 'fetest', 'win_methodology', None])
+
+        alert_filter = AlertFilter(closed_states=(), messages={'callbacks': "Callback"})
+        self.assertEqual([alert_filter.get_reason(alert) for alert in ALERTS],
+                         ['callbacks', None, 'fetest', None, None])
+
+    def test_alert_to_report(self):
+        report = alert_to_report(ALERTS[0])
+        self.assertEqual(report.title, "1 Malware Callback")
+        self.assertEqual(report.body, "displayId: 1\nmessage: Malware Callback\ncreateDate: 2018-01-02 03:04:05 +00\n")
+        self.assertEqual(report.time_began, "2018-01-02T03:04:05+00:00")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import math
+import unittest
+from trustar import *
+from trustar.models import indicator_batch
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+ITEMS = [
+    {'value': "evil.com", 'indicatorType': "URL", 'firstSeen': 10, 'sightings': 1, 'enclaveIds': ["e1"]},
+    {'value': "1.2.3.4", 'indicatorType': "IP", 'firstSeen': 20, 'sightings': 5, 'enclaveIds': ["e1", "e2"]},
+    {'value': "evil.com", 'indicatorType': "URL", 'firstSeen': 30, 'enclaveIds': ["e2"]},
+    {'value': "evil.com", 'indicatorType': "DOMAIN", 'enclaveIds': None},
+    {'value': "5.6.7.8", 'indicatorType': "IP", 'firstSeen': 40, 'sightings': 2, 'enclaveIds': ["e1", "e2"]},
+    {'value': "unknown"},
+]
+
+
+def nan_to_none(values):
+    return [None if math.isnan(x) else x for x in values]
+
+
+class IndicatorBatchTestCases(object):
+    """
+    Tests of IndicatorBatch, which are run both with and without NumPy.
+    """
+
+    def setUp(self):
+        self.batch = IndicatorBatch.from_dicts(ITEMS)
+
+    def test_from_dicts(self):
+        self.assertEqual(len(self.batch), 6)
+        self.assertEqual(self.batch.type, ["URL", "IP", "URL", "DOMAIN", "IP", None])
+        self.assertEqual(nan_to_none(self.batch.sightings), [1, 5, None, None, 2, None])
+        self.assertEqual([i.value for i in self.batch], [item['value'] for item in ITEMS])
+        self.assertEqual(self.batch.to_indicators()[1].first_seen, 20)
+        with self.assertRaises(ValueError):
+            IndicatorBatch(value=["a"], type=[])
+
+    def test_take(self):
+        batch = self.batch.take([4, 0, 4])
+        self.assertEqual(batch.value, ["5.6.7.8", "evil.com", "5.6.7.8"])
+        self.assertEqual(list(batch.first_seen), [40, 10, 40])
+        self.assertEqual(batch.enclave_ids, [["e1", "e2"], ["e1"], ["e1", "e2"]])
+        self.assertEqual(self.batch.take(iter([5])).value, ["unknown"])
+        self.assertEqual(len(self.batch.take([])), 0)
+        self.assertEqual(len(IndicatorBatch().take([])), 0)
+
+    def test_filter(self):
+        batch = self.batch.filter([True, False, False, False, True, False])
+        self.assertEqual(batch.value, ["evil.com", "5.6.7.8"])
+        self.assertEqual(list(batch.sightings), [1, 2])
+        with self.assertRaises(ValueError):
+            self.batch.filter([True])
+
+        self.assertEqual(self.batch.filter_types([IndicatorType.IP]).value, ["1.2.3.4", "5.6.7.8"])
+
+    def test_filter_range(self):
+        self.assertEqual(self.batch.filter_range('first_seen', 20, 30).value, ["1.2.3.4", "evil.com"])
+        self.assertEqual(self.batch.filter_range('first_seen', min_value=25).value, ["evil.com", "5.6.7.8"])
+        # missing values are never in range
+        self.assertEqual(self.batch.filter_range('sightings').value, ["evil.com", "1.2.3.4", "5.6.7.8"])
+        with self.assertRaises(ValueError):
+            self.batch.filter_range('value')
+
+    def test_group_by_type(self):
+        groups = self.batch.group_by_type()
+        self.assertEqual(list(groups), ["URL", "IP", "DOMAIN", None])
+        self.assertEqual(groups["URL"].value, ["evil.com", "evil.com"])
+        self.assertEqual(list(groups["URL"].first_seen), [10, 30])
+        self.assertEqual(groups["IP"].value, ["1.2.3.4", "5.6.7.8"])
+        self.assertEqual(groups[None].value, ["unknown"])
+        self.assertEqual(IndicatorBatch().group_by_type(), {})
+
+    def test_dedup(self):
+        batch = self.batch.dedup()
+        self.assertEqual(list(zip(batch.value, batch.type)),
+                         [("evil.com", "URL"), ("1.2.3.4", "IP"), ("evil.com", "DOMAIN"), ("5.6.7.8", "IP"),
+                          ("unknown", None)])
+        # the first occurrence is kept
+        self.assertEqual(list(batch.first_seen)[0], 10)
+        self.assertEqual(len(IndicatorBatch().dedup()), 0)
+
+    def test_concat(self):
+        batch = IndicatorBatch.concat([self.batch, self.batch.take([0])])
+        self.assertEqual(len(batch), 7)
+        self.assertEqual(batch.value[-1], "evil.com")
+
+    def test_to_submission_content(self):
+        self.assertEqual(self.batch.take([2, 5]).to_submission_content(),
+                         [{'value': "evil.com", 'indicatorType': "URL", 'firstSeen': 30}, {'value': "unknown"}])
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class IndicatorBatchTests(IndicatorBatchTestCases, unittest.TestCase):
+    """
+    Tests of IndicatorBatch, using NumPy.
+    """
+
+    def test_numpy(self):
+        self.assertIs(indicator_batch._import_numpy(), numpy)
+        columns = self.batch.filter_range('sightings', 2).to_numpy()
+        self.assertEqual(columns['sightings'].tolist(), [5, 2])
+        self.assertEqual(columns['value'].tolist(), ["1.2.3.4", "5.6.7.8"])
+        self.assertEqual(self.batch.take(numpy.array([1, 0])).value, ["1.2.3.4", "evil.com"])
+        self.assertEqual(self.batch.filter(numpy.array(self.batch.type) == "IP").value, ["1.2.3.4", "5.6.7.8"])
+
+
+class IndicatorBatchWithoutNumpyTests(IndicatorBatchTestCases, unittest.TestCase):
+    """
+    Tests of IndicatorBatch, as though NumPy were not installed.
+    """
+
+    def setUp(self):
+        super(IndicatorBatchWithoutNumpyTests, self).setUp()
+        self.numpy = indicator_batch._import_numpy()
+        indicator_batch._numpy = None
+
+    def tearDown(self):
+        indicator_batch._numpy = self.numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
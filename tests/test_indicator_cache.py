@@ -0,0 +1,116 @@
+import itertools
+import unittest
+from trustar import *
+
+from fakes import create_client
+
+
+def create_tagging_client():
+    """
+    :return: A client with an indicator cache, whose server keeps the tags of indicators in its ``tags`` attribute.
+    """
+
+    ids = itertools.count(1)
+    ts = create_client()
+    ts.indicator_cache = IndicatorCache()
+    ts.tags = {'evil.com': [{'name': "old", 'guid': "t0", 'enclaveId': "e1"}]}
+
+    def get_metadata(request):
+        return [{'value': value, 'indicatorType': "URL", 'tags': ts.tags[value]}
+                for value in request.params['values'] if value in ts.tags]
+
+    def add_tag(request):
+        tag = {'name': request.params['name'], 'guid': "t%d" % next(ids), 'enclaveId': request.params['enclaveId']}
+        ts.tags[request.match.group(1)].append(tag)
+        return tag
+
+    def delete_tag(request):
+        value, tag_id = request.match.groups()
+        ts.tags[value] = [tag for tag in ts.tags[value] if tag['guid'] != tag_id]
+
+    ts._client.handle("GET", "indicators/metadata", get_metadata)
+    ts._client.handle("POST", "indicators/([^/]+)/tags", add_tag)
+    ts._client.handle("DELETE", "indicators/([^/]+)/tags/([^/]+)", delete_tag)
+    return ts
+
+
+class IndicatorCacheTests(unittest.TestCase):
+
+    def test_get_and_put(self):
+        cache = IndicatorCache()
+        key = IndicatorCache.get_key("evil.com", IndicatorType.URL)
+        self.assertEqual(IndicatorCache.get_key("x", enclave_ids=["b", "a"]), ("x", None, ("a", "b")))
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, [Indicator(value="evil.com")])
+        self.assertEqual([i.value for i in cache.get(key)], ["evil.com"])
+        cache.put(IndicatorCache.get_key("unknown.com"), [])
+        self.assertEqual(cache.get(IndicatorCache.get_key("unknown.com")), [])
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['entries'], stats['hits'], stats['negative_hits'], stats['misses']), (2, 1, 1, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 2.0 / 3)
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_expiry(self):
+        cache = IndicatorCache(ttl=60, negative_ttl=-1)
+        cache.put("found", [Indicator(value="found")])
+        cache.put("not found", [])
+        self.assertIsNotNone(cache.get("found"))
+        self.assertIsNone(cache.get("not found"))
+        self.assertEqual(len(cache), 1)
+
+    def test_eviction(self):
+        cache = IndicatorCache(max_entries=2)
+        for value in ("a", "b"):
+            cache.put((value, None, None), [Indicator(value=value)])
+        # "a" is now the most recently used, so "b" is evicted
+        cache.get(("a", None, None))
+        cache.put(("c", None, None), [Indicator(value="c")])
+        self.assertIsNone(cache.get(("b", None, None)))
+        self.assertIsNotNone(cache.get(("a", None, None)))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+        cache = IndicatorCache(max_bytes=1)
+        cache.put(("a", None, None), [Indicator(value="a")])
+        cache.put(("b", None, None), [Indicator(value="b")])
+        self.assertEqual(len(cache), 1)
+
+    def test_remove_and_clear(self):
+        cache = IndicatorCache()
+        cache.put(IndicatorCache.get_key("Evil.com", IndicatorType.URL), [Indicator(value="evil.com")])
+        cache.put(IndicatorCache.get_key("evil.com", enclave_ids=["e1"]), [Indicator(value="evil.com")])
+        cache.put(IndicatorCache.get_key("other.com"), [])
+
+        self.assertEqual(cache.remove("EVIL.COM"), 2)
+        self.assertEqual(cache.remove("evil.com"), 0)
+        self.assertEqual(len(cache), 1)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_stats()['bytes'], 0)
+
+    def test_client_lookups(self):
+        ts = create_tagging_client()
+        for _ in range(3):
+            indicators = ts.get_indicators_metadata([Indicator(value="evil.com"), Indicator(value="unknown.com")])
+            self.assertEqual([i.value for i in indicators], ["evil.com"])
+        self.assertEqual(len(ts._client.get_requests("GET", "indicators/metadata")), 1)
+
+    def test_reconcile_after_tag_changes(self):
+        ts = create_tagging_client()
+        ts.get_indicators_metadata([Indicator(value="evil.com")])
+
+        desired = {'evil.com': [Tag(name="new", enclave_id="e1")]}
+        result = ts.reconcile_indicator_tags(desired)[0]
+        self.assertEqual(([tag.name for tag in result['added']], [tag.name for tag in result['deleted']]),
+                         (["new"], ["old"]))
+
+        # the tag changes evicted the cached metadata, so the current tags are read again
+        result = ts.reconcile_indicator_tags(desired)[0]
+        self.assertEqual((result['added'], result['deleted'], result['error']), ([], [], None))
+        self.assertEqual([tag['name'] for tag in ts.tags['evil.com']], ["new"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+from trustar import *
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+CSV = u"""TrackingNumber,TargetIP,Info,ReportTime,Case
+T1,10.0.0.1, Suspicious ,2017-02-23T23:01:54+0000,42
+T2,,Nothing,1487890914,
+"""
+
+
+@unittest.skipIf(pandas is None, "pandas is not installed")
+class ReadCsvReportsTests(unittest.TestCase):
+    """
+    Tests of read_csv_reports.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "reports.csv")
+        with open(self.path, 'w') as f:
+            f.write(CSV)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_csv_reports(self):
+        reports = list(read_csv_reports(self.path, title_column="TrackingNumber", body_columns=["TargetIP", "Info"],
+                                        time_column="ReportTime", external_id_column="Case", chunk_size=1))
+
+        self.assertEqual([r.title for r in reports], ["T1", "T2"])
+        self.assertEqual(reports[0].body, "TargetIP:\n 10.0.0.1\n \nInfo:\n Suspicious\n \n")
+        self.assertEqual(reports[1].body, "Info:\n Nothing\n \n")
+        self.assertEqual(reports[1].time_began, 1487890914000)
+        self.assertEqual([r.external_id for r in reports], ["42", None])
+
+
+if __name__ == '__main__':
+    unittest.main()
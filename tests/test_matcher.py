@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+import unittest
+from trustar import *
+from trustar import matcher as matcher_module
+
+from fakes import create_client, page
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+INDICATORS = [
+    Indicator(value="1.2.3.4", type=IndicatorType.IP),
+    Indicator(value="10.0.0.0/8", type=IndicatorType.CIDR_BLOCK),
+    Indicator(value="10.1.0.0/16", type=IndicatorType.CIDR_BLOCK),
+    Indicator(value="D41D8CD98F00B204E9800998ECF8427E", type=IndicatorType.MD5),
+    Indicator(value="evil.com", type=IndicatorType.URL),
+    Indicator(value="http://bad.org/x", type=IndicatorType.URL),
+    Indicator(value="Emotet", type=IndicatorType.MALWARE),
+]
+
+TEXT = u"""GET http://sub.evil.com/a from 10.1.2.3 to 1.2.3.4 ok
+notevil.com 1.2.3.45 d41d8cd98f00b204e9800998ecf8427e EMOTET beacon; evil.com.
+http://bad.org/x?q 010.001.002.003 01.2.3.4 11.0.0.1 10.200.0.1 café emotets
+"""
+
+EXPECTED = [
+    ("evil.com", "evil.com", 0),
+    ("10.1.2.3", "10.1.0.0/16", 0),
+    ("1.2.3.4", "1.2.3.4", 0),
+    ("d41d8cd98f00b204e9800998ecf8427e", "D41D8CD98F00B204E9800998ECF8427E", 1),
+    ("EMOTET", "Emotet", 1),
+    ("evil.com", "evil.com", 1),
+    ("http://bad.org/x", "http://bad.org/x", 2),
+    ("010.001.002.003", "10.1.0.0/16", 2),
+    ("01.2.3.4", "1.2.3.4", 2),
+    ("10.200.0.1", "10.0.0.0/8", 2),
+]
+
+
+class MatcherTestCases(object):
+    """
+    Tests of matching indicators in local text, which are run both with and without pyahocorasick.
+    """
+
+    string_matcher = None
+
+    def setUp(self):
+        self.matcher = IndicatorMatcher(INDICATORS)
+        self.lines = TEXT.splitlines()
+
+    def assert_matches(self, matches):
+        self.assertEqual([(m.value, m.indicator.value, self.lines.index(m.line)) for m in matches], EXPECTED)
+
+    def test_match(self):
+        matches = self.matcher.match(TEXT)
+        self.assert_matches(matches)
+        self.assertEqual(TEXT[matches[0].offset:].split("/")[0], "evil.com")
+        self.assertEqual(self.matcher.get_stats()['networks'], 2)
+        self.assertEqual(self.matcher.get_stats()['string_matcher'], self.string_matcher)
+
+    def test_nested_matches(self):
+        matcher = IndicatorMatcher([
+            Indicator(value="bad.org", type=IndicatorType.URL),
+            Indicator(value="http://bad.org/x", type=IndicatorType.URL),
+            Indicator(value="evil.com", type=IndicatorType.URL),
+            Indicator(value="evil.com/a", type=IndicatorType.URL),
+            Indicator(value="evil.com/a/b", type=IndicatorType.URL),
+            Indicator(value="evil.co", type=IndicatorType.URL),
+            Indicator(value="1.2.3.4", type=IndicatorType.IP),
+            Indicator(value="http://1.2.3.4/x", type=IndicatorType.URL),
+        ])
+        text = u"get http://bad.org/x?q evil.com/a/b http://1.2.3.4/x evil.com/ab"
+
+        # every occurrence of every indicator is reported, including those inside longer matches
+        self.assertEqual([(m.offset, m.value) for m in matcher.match(text)], [
+            (4, "http://bad.org/x"),
+            (11, "bad.org"),
+            (23, "evil.com"),
+            (23, "evil.com/a"),
+            (23, "evil.com/a/b"),
+            (36, "http://1.2.3.4/x"),
+            (43, "1.2.3.4"),
+            (53, "evil.com"),
+        ])
+
+    def test_cidr_prefixes(self):
+        matcher = IndicatorMatcher([Indicator(value=value, type=IndicatorType.CIDR_BLOCK) for value in
+                                    ["172.16.0.0/12", "192.168.1.128/25", "10.0.0.0/8", "10.1.0.5/20", "1.2.3.4/30",
+                                     "1.2.3.6/31"]])
+        text = u"172.31.255.255 172.32.0.1 172.15.0.1 192.168.1.200 192.168.1.100 10.1.15.1 10.1.16.1 " \
+               u"1.2.3.5 1.2.3.7 1.2.3.8"
+
+        self.assertEqual([(m.value, m.indicator.value) for m in matcher.match(text)], [
+            ("172.31.255.255", "172.16.0.0/12"),
+            ("192.168.1.200", "192.168.1.128/25"),
+            ("10.1.15.1", "10.1.0.5/20"),
+            ("10.1.16.1", "10.0.0.0/8"),
+            ("1.2.3.5", "1.2.3.4/30"),
+            ("1.2.3.7", "1.2.3.6/31"),
+        ])
+        self.assertEqual(matcher.get_stats()['networks'], 6)
+
+    def test_from_client(self):
+        ts = create_client()
+        ts._client.handle("GET", "indicators", page([{'value': "evil.com", 'indicatorType': "URL"},
+                                                    {'value': "10.0.0.0/8", 'indicatorType': "CIDR_BLOCK"}]))
+
+        matcher = IndicatorMatcher.from_client(ts, from_time=1514764800000, enclave_ids=["e1"],
+                                               included_tag_ids=["t1"], page_size=50)
+        self.assertEqual(len(matcher), 2)
+        self.assertEqual([m.indicator.value for m in matcher.match(u"evil.com 10.9.8.7 1.2.3.4")],
+                         ["evil.com", "10.0.0.0/8"])
+
+        params = ts._client.get_requests("GET", "indicators")[0].params
+        self.assertEqual((params['from'], params['enclaveIds'], params['tagIds'], params['pageSize']),
+                         (1514764800000, ["e1"], ["t1"], 50))
+
+    def test_scan_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "proxy.log")
+            data = TEXT.encode('utf-8')
+            with open(path, 'wb') as f:
+                f.write(data)
+
+            for processes, shard_size, chunk_size in [(None, 1 << 20, 1 << 20), (None, 10, 5), (2, 40, 20)]:
+                matches = list(self.matcher.scan_file(path, processes=processes, shard_size=shard_size,
+                                                      chunk_size=chunk_size))
+                self.assert_matches(matches)
+                for match in matches:
+                    self.assertEqual(match.path, path)
+                    self.assertEqual(data[match.offset:match.offset + len(match.value)].decode('utf-8'),
+                                     match.value)
+        finally:
+            shutil.rmtree(directory)
+
+
+class MatcherTests(MatcherTestCases, unittest.TestCase):
+    """
+    Tests of matching strings with a regular expression, as when pyahocorasick is not installed.
+    """
+
+    string_matcher = 'regex'
+
+    def setUp(self):
+        super(MatcherTests, self).setUp()
+        self.ahocorasick = matcher_module._import_ahocorasick()
+        matcher_module._ahocorasick = None
+
+    def tearDown(self):
+        matcher_module._ahocorasick = self.ahocorasick
+
+
+@unittest.skipIf(ahocorasick is None, "pyahocorasick is not installed")
+class AhoCorasickMatcherTests(MatcherTestCases, unittest.TestCase):
+    """
+    Tests of matching strings with an Aho-Corasick automaton.
+    """
+
+    string_matcher = 'aho-corasick'
+
+
+if __name__ == '__main__':
+    unittest.main()
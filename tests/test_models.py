@@ -0,0 +1,63 @@
+import json
+import unittest
+from trustar import *
+
+from fakes import create_client
+
+
+class ModelDecodingTests(unittest.TestCase):
+
+    def test_intern_strings(self):
+        self.assertIsNone(intern_strings(None))
+        self.assertEqual(intern_strings("e1"), ["e1"])
+        self.assertEqual(intern_strings([]), [])
+
+        first, second = intern_strings(["".join(["enclave", "-1"]), "".join(["enclave", "-1"])])
+        self.assertEqual(first, "enclave-1")
+        self.assertIs(first, second)
+
+    def test_enclave_ids(self):
+        for cls in (Report, Indicator):
+            self.assertEqual(cls.from_dict({'enclaveIds': "e1"}).enclave_ids, ["e1"])
+            self.assertEqual(cls.from_dict({'enclaveIds': ["e1", "e2"]}).enclave_ids, ["e1", "e2"])
+            self.assertIsNone(cls.from_dict({}).enclave_ids)
+
+        reports = [Report.from_dict({'enclaveIds': ["".join(["e", "1"])]}) for _ in range(2)]
+        self.assertIs(reports[0].enclave_ids[0], reports[1].enclave_ids[0])
+
+    def test_enum_lookup(self):
+        self.assertEqual(IndicatorType.from_string("URL"), IndicatorType.URL)
+        self.assertEqual(IndicatorType.from_string("NOT_A_TYPE"), "NOT_A_TYPE")
+        self.assertEqual(EnclaveType.from_string("CLOSED_CONCRETE"), EnclaveType.CLOSED)
+        self.assertEqual(sorted(DistributionType.values()), ["COMMUNITY", "ENCLAVE"])
+        # each subclass has its own table
+        self.assertEqual(sorted(IdType.values()), ["external", "internal"])
+
+        value = IndicatorType.intern("".join(["S", "HA1"]))
+        self.assertIs(value, IndicatorType.SHA1)
+        self.assertEqual(IndicatorType.intern("OTHER"), "OTHER")
+        self.assertIs(Indicator.from_dict({'indicatorType': "".join(["U", "RL"])}).type, IndicatorType.URL)
+
+    def test_report_from_dict(self):
+        # from_dict sets the attributes directly, so its decoders must normalize the values like the constructor
+        for d in ({}, {'distributionType': "COMMUNITY", 'timeBegan': 1479941278, 'enclaveIds': "e1"},
+                  {'distributionType': "enclave", 'timeBegan': 1479941278000, 'enclaveIds': ["e1"], 'id': "r1"}):
+            report = Report.from_dict(d)
+            expected = Report(id=d.get('id'), time_began=d.get('timeBegan'), enclave_ids=d.get('enclaveIds'),
+                              is_enclave=d.get('distributionType', "ENCLAVE").upper() == "ENCLAVE")
+            for attr in ('id', 'is_enclave', 'enclave_ids'):
+                self.assertEqual(getattr(report, attr), getattr(expected, attr))
+            # a missing start time is replaced by the current time
+            if 'timeBegan' in d:
+                self.assertEqual(report.time_began, 1479941278000)
+                self.assertEqual(ReportView(d).to_dict(), report.to_dict())
+
+    def test_submitted_sightings(self):
+        ts = create_client()
+        ts.submit_indicators([Indicator(value="1.2.3.4", sightings=3), Indicator(value="5.6.7.8")])
+        content = json.loads(ts._client.get_requests("POST", "indicators")[0].data)['content']
+        self.assertEqual([indicator['sightings'] for indicator in content], [3, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import unittest
+from trustar import *
+from trustar.pipeline import Pipeline, Stage, dedup_stage, submit_reports_stage
+
+from fakes import create_client
+
+
+def square(x):
+    return x * x
+
+
+def create_submitting_client():
+    """
+    :return: A client that fails to submit reports whose title is "bad", and gives the others an ID.
+    """
+
+    def submit(request):
+        title = json.loads(request.data)['title']
+        if title == "bad":
+            raise ValueError("bad report")
+        return "id-" + title
+
+    ts = create_client()
+    ts._client.handle("POST", "reports", submit)
+    return ts
+
+
+class PipelineTests(unittest.TestCase):
+
+    def test_stages(self):
+        def fail_on_seven(x):
+            if x == 7:
+                raise ValueError("seven")
+            return x
+
+        pipeline = Pipeline(range(20), [
+            Stage(lambda x: [x, x % 10], name='split', flatten=True, workers=3),
+            dedup_stage(),
+            Stage(fail_on_seven, name='check', workers=2),
+            Stage(lambda x: x if x % 2 == 0 else None, name='even', queue_size=1),
+        ], queue_size=2)
+
+        self.assertEqual(sorted(pipeline.run()), [0, 2, 4, 6, 8, 10, 12, 14, 16, 18])
+
+        metrics = pipeline.get_metrics()
+        self.assertEqual([(m['stage'], m['in'], m['out'], m['dropped'], m['errors']) for m in metrics],
+                         [('split', 20, 40, 0, 0),
+                          ('dedup', 40, 20, 20, 0),
+                          ('check', 20, 19, 0, 1),
+                          ('even', 19, 10, 9, 0)])
+
+    def test_on_error(self):
+        def fail_on_odd(x):
+            if x % 2 == 1:
+                raise ValueError(x)
+            return x
+
+        failed = []
+        pipeline = Pipeline(range(10), [
+            Stage(fail_on_odd, workers=2, on_error=lambda item, e: failed.append((item, str(e))))
+        ])
+        self.assertEqual(sorted(pipeline.run()), [0, 2, 4, 6, 8])
+        self.assertEqual(sorted(failed), [(x, str(x)) for x in (1, 3, 5, 7, 9)])
+
+        # an on_error function that fails stops the pipeline
+        def reraise(item, e):
+            raise e
+
+        self.assertRaises(ValueError, list, Pipeline(range(10), [Stage(fail_on_odd, on_error=reraise)]).run())
+
+    def test_processes(self):
+        pipeline = Pipeline(range(10), [Stage(square, workers=2, processes=True)])
+        self.assertEqual(sorted(pipeline.run()), [x * x for x in range(10)])
+        self.assertEqual(pipeline.get_metrics()[0]['stage'], 'square')
+
+    def test_stop(self):
+        pipeline = Pipeline(iter(int, 1), [Stage(lambda x: x, workers=2)])
+        results = pipeline.run()
+        self.assertEqual([next(results) for _ in range(5)], [0] * 5)
+        results.close()
+
+    def test_source_error(self):
+        def source():
+            yield 1
+            raise IOError("unreadable")
+
+        self.assertRaises(IOError, list, Pipeline(source(), [Stage(lambda x: x)]).run())
+
+    def test_submit_reports_stage(self):
+        reports = [Report(title=title, body="body") for title in ("a", "bad", "b")]
+        results = list(Pipeline(reports, [submit_reports_stage(create_submitting_client(), workers=2)]).run())
+
+        self.assertEqual(sorted((result['report'].title, result['report'].id) for result in results),
+                         [("a", "id-a"), ("b", "id-b"), ("bad", None)])
+        self.assertEqual([result['report'].title for result in results if result['error'] is not None], ["bad"])
+
+
+if __name__ == '__main__':
+    unittest.main()
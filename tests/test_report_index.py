@@ -0,0 +1,126 @@
+import itertools
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from trustar import *
+
+from fakes import create_client
+
+
+def create_indexing_client():
+    """
+    :return: A client with a report index, that gives each submitted report a new ID.
+    """
+
+    ids = itertools.count(1)
+    ts = create_client()
+    ts.report_index = ReportIndex()
+    ts._client.handle("POST", "reports", lambda request: "id-%d" % next(ids))
+    return ts
+
+
+class ReportIndexTests(unittest.TestCase):
+    """
+    Tests of skipping reports that were already submitted.
+    """
+
+    def test_fingerprint(self):
+        report = Report(title="Phishing  email", body="line one\r\nline two  \n", enclave_ids=["b", "a"],
+                        is_enclave=True)
+        same = Report(title=" Phishing email", body="line one\nline two", enclave_ids=["a", "b"], is_enclave=True,
+                      external_id="x", time_began=1500000000000)
+        self.assertEqual(ReportIndex.get_fingerprint(report), ReportIndex.get_fingerprint(same))
+
+        for other in [Report(title="Phishing email", body="line one", enclave_ids=["a", "b"], is_enclave=True),
+                      Report(title="Phishing email", body="line one\nline two", enclave_ids=["a"], is_enclave=True),
+                      Report(title="Phishing email", body="line one\nline two", enclave_ids=[], is_enclave=False)]:
+            self.assertNotEqual(ReportIndex.get_fingerprint(report), ReportIndex.get_fingerprint(other))
+
+    def test_submit_report(self):
+        ts = create_indexing_client()
+
+        self.assertEqual(ts.submit_report(Report(title="a", body="body", external_id="ext-a")).id, "id-1")
+        # unchanged, so not submitted again
+        self.assertEqual(ts.submit_report(Report(title="a", body="body", external_id="ext-a")).id, "id-1")
+        self.assertEqual(ts.submit_report(Report(title="a", body="body")).id, "id-1")
+        # a different enclave is a different report
+        self.assertEqual(ts.submit_report(Report(title="a", body="body", enclave_ids=["e2"])).id, "id-2")
+        self.assertEqual(ts._client.get_requests("PUT"), [])
+
+        # changed, so the report with the same external ID is updated
+        self.assertEqual(ts.submit_report(Report(title="a", body="new body", external_id="ext-a")).id, "id-1")
+        self.assertEqual([request.path for request in ts._client.get_requests("PUT")], ["reports/id-1"])
+        self.assertEqual(ts.submit_report(Report(title="a", body="new body", external_id="ext-a")).id, "id-1")
+        self.assertEqual(len(ts._client.get_requests("POST")), 2)
+        self.assertEqual(len(ts._client.get_requests("PUT")), 1)
+
+        self.assertEqual(ts.report_index.get_stats(), {'entries': 2, 'unchanged': 3, 'changed': 1, 'misses': 2})
+
+    def test_submit_reports(self):
+        ts = create_indexing_client()
+        ts.submit_report(Report(title="r0", body="body"))
+
+        reports = [Report(title="r%d" % i, body="body") for i in range(250)]
+        results = list(ts.submit_reports(reports, max_workers=4))
+
+        self.assertTrue(all(result['error'] is None for result in results))
+        self.assertEqual(results[0]['report'].id, "id-1")
+        self.assertEqual(len(ts._client.get_requests("POST")), 250)
+        self.assertEqual(len(ts.report_index), 250)
+
+        results = list(ts.submit_reports([Report(title="r%d" % i, body="body") for i in range(250)]))
+        self.assertEqual(len(ts._client.get_requests("POST")), 250)
+        self.assertEqual(sorted(result['report'].id for result in results),
+                         sorted("id-%d" % i for i in range(1, 251)))
+
+        ts.delete_report("id-1")
+        self.assertEqual(ts.report_index.lookup(Report(title="r0", body="body", enclave_ids=["e1"], is_enclave=True)),
+                         (None, False))
+
+    def test_same_content_different_external_ids(self):
+        ts = create_indexing_client()
+
+        # both reports miss the index, since they are looked up in the same batch
+        reports = [Report(title="a", body="body", external_id=external_id) for external_id in ["ext-a", "ext-b"]]
+        results = list(ts.submit_reports(reports, max_workers=1))
+        self.assertEqual([result['report'].id for result in results], ["id-1", "id-2"])
+        self.assertEqual(len(ts.report_index), 2)
+
+        # each external ID keeps the ID of its own report
+        for external_id, report_id in [("ext-a", "id-1"), ("ext-b", "id-2")]:
+            report = Report(title="a", body="body", external_id=external_id)
+            self.assertEqual(ts.submit_report(report).id, report_id)
+        self.assertEqual(ts.submit_report(Report(title="a", body="new body", external_id="ext-b")).id, "id-2")
+        self.assertEqual([request.path for request in ts._client.get_requests("PUT")], ["reports/id-2"])
+        self.assertEqual(ts.report_index.lookup(Report(title="a", body="body", external_id="ext-a", enclave_ids=["e1"],
+                                                       is_enclave=True)), ("id-1", True))
+        self.assertEqual(len(ts._client.get_requests("POST")), 2)
+
+    def test_schema_version_1(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "submitted.db")
+            connection = sqlite3.connect(path)
+            with connection:
+                connection.execute("CREATE TABLE submitted_reports (fingerprint TEXT PRIMARY KEY, "
+                                   "report_id TEXT NOT NULL, external_id TEXT, submitted INTEGER)")
+                connection.execute("INSERT INTO submitted_reports VALUES (?, 'id-1', 'ext-a', 0)",
+                                   (ReportIndex.get_fingerprint(Report(title="a", body="body", is_enclave=False)),))
+                connection.execute("PRAGMA user_version = 1")
+            connection.close()
+
+            with ReportIndex(path) as index:
+                self.assertEqual(index.lookup(Report(title="a", body="body", is_enclave=False)), ("id-1", True))
+                index.add(Report(title="a", body="body", is_enclave=False, external_id="ext-b", id="id-2"))
+                self.assertEqual(len(index), 2)
+
+            with ReportIndex(path) as index:
+                self.assertEqual(len(index), 2)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+from trustar import *
+
+from fakes import create_client, page
+
+
+FROM_TIME = 1514764800000
+
+
+def create_syncing_client():
+    """
+    :return: A client whose server has the reports in its ``reports`` attribute, their indicators and tags in its
+        ``report_indicators`` and ``report_tags`` attributes, the indicators in its ``indicators`` attribute, the
+        whitelist in its ``whitelist`` attribute, and a few tags and enclaves.  The reports and indicators endpoints
+        filter by the time window of the request, like the API.
+    """
+
+    ts = create_client()
+    ts.reports = [
+        {'id': "r1", 'title': "Phishing", 'reportBody': "evil.com", 'distributionType': "ENCLAVE",
+         'enclaveIds': ["e1"], 'timeBegan': FROM_TIME, 'updated': FROM_TIME + 1000},
+        {'id': "r2", 'title': "Malware", 'reportBody': "1.2.3.4", 'distributionType': "ENCLAVE",
+         'enclaveIds': ["e1", "e2"], 'timeBegan': FROM_TIME, 'updated': FROM_TIME + 2000},
+    ]
+    ts.report_indicators = {'r1': [{'value': "evil.com", 'indicatorType': "URL"}],
+                            'r2': [{'value': "1.2.3.4", 'indicatorType': "IP"},
+                                   {'value': "evil.com", 'indicatorType': "URL"}]}
+    ts.report_tags = {'r1': [{'name': "malicious", 'guid': "t1", 'enclaveId': "e1"}], 'r2': []}
+    ts.indicators = [
+        {'value': "evil.com", 'indicatorType': "URL", 'lastSeen': FROM_TIME + 1000, 'sightings': 3,
+         'tags': [{'name': "c2", 'guid': "t2", 'enclaveId': "e1"}]},
+        {'value': "1.2.3.4", 'indicatorType': "IP", 'lastSeen': FROM_TIME + 2000}
+    ]
+    ts.whitelist = [{'value': "Google.com", 'indicatorType': "URL"}]
+
+    def in_window(request, items, field):
+        params = request.params
+        return [item for item in items if params['from'] <= item[field] <= params['to']]
+
+    ts._client.handle("GET", "reports", lambda request: page(sorted(in_window(request, ts.reports, 'updated'),
+                                                                    key=lambda report: -report['updated'])))
+    ts._client.handle("GET", "reports/([^/]+)/indicators",
+                      lambda request: page(ts.report_indicators.get(request.match.group(1), [])))
+    ts._client.handle("GET", "reports/([^/]+)/tags", lambda request: ts.report_tags.get(request.match.group(1), []))
+    ts._client.handle("GET", "indicators", lambda request: page(in_window(request, ts.indicators, 'lastSeen')))
+    ts._client.handle("GET", "reports/tags", [{'name': "malicious", 'guid': "t1", 'enclaveId': "e1"}])
+    ts._client.handle("GET", "indicators/tags", [{'name': "c2", 'guid': "t2", 'enclaveId': "e1"}])
+    ts._client.handle("GET", "enclaves", [{'id': "e1", 'name': "Research", 'type': "CLOSED", 'read': True,
+                                           'create': True, 'update': False}])
+    ts._client.handle("GET", "whitelist", lambda request: page(ts.whitelist))
+    return ts
+
+
+class LocalStoreTests(unittest.TestCase):
+    """
+    Tests of syncing and querying a LocalStore.
+    """
+
+    def setUp(self):
+        self.client = create_syncing_client()
+        self.store = LocalStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_sync(self):
+        counts = self.store.sync(self.client, from_time=FROM_TIME, max_workers=2)
+        self.assertEqual(counts, {'enclaves': 1, 'tags': 2, 'whitelist': 1, 'reports': 2, 'indicators': 2})
+
+        self.assertEqual([r.id for r in self.store.get_reports()], ["r2", "r1"])
+        self.assertEqual([r.id for r in self.store.get_reports(indicator_values=["evil.com"], tag="malicious")],
+                         ["r1"])
+        self.assertEqual([r.id for r in self.store.get_reports(enclave_ids=["e2"])], ["r2"])
+        self.assertEqual(self.store.get_report("r2").enclave_ids, ["e1", "e2"])
+        self.assertEqual([i.value for i in self.store.get_indicators_for_report("r2")], ["1.2.3.4", "evil.com"])
+        self.assertEqual([t.name for t in self.store.get_tags_for_report("r1")], ["malicious"])
+
+        self.assertEqual([i.value for i in self.store.get_indicators()], ["1.2.3.4", "evil.com"])
+        self.assertEqual(self.store.get_indicators(tag="c2")[0].sightings, 3)
+        self.assertEqual([t.id for t in self.store.get_tags(LocalStore.INDICATOR_TAGS)], ["t2"])
+        self.assertEqual([e.name for e in self.store.get_enclaves()], ["Research"])
+        self.assertTrue(self.store.is_whitelisted(" google.COM"))
+        self.assertFalse(self.store.is_whitelisted("evil.com"))
+
+    def test_incremental_sync(self):
+        self.store.sync_reports(self.client, from_time=FROM_TIME)
+        synced_to = self.store.get_sync_state('reports')
+        self.assertEqual(self.client._client.get_requests("GET", "reports")[0].params['from'], FROM_TIME)
+
+        # the next sync starts where the previous one ended, so only the new report is requested again
+        self.client.reports.append({'id': "r3", 'title': "New", 'enclaveIds': ["e1"], 'updated': synced_to})
+        self.assertEqual(self.store.sync_reports(self.client, from_time=FROM_TIME), 1)
+        self.assertEqual(self.client._client.get_requests("GET", "reports")[-1].params['from'], synced_to)
+        self.assertEqual([r.id for r in self.store.get_reports()], ["r3", "r2", "r1"])
+
+        self.store.remove_report("r3")
+        self.assertIsNone(self.store.get_report("r3"))
+        self.assertEqual(self.store.get_indicators_for_report("r3"), [])
+
+    def test_incremental_sync_of_updated_report(self):
+        self.store.sync_reports(self.client, from_time=FROM_TIME)
+        synced_to = self.store.get_sync_state('reports')
+
+        # an updated report replaces the stored one, along with its enclaves, indicators and tags
+        self.client.reports[0] = dict(self.client.reports[0], title="Spear phishing", enclaveIds=["e2"],
+                                      updated=synced_to)
+        self.client.report_indicators['r1'] = [{'value': "bad.org", 'indicatorType': "URL"}]
+        self.client.report_tags['r1'] = [{'name': "apt", 'guid': "t3", 'enclaveId': "e2"}]
+        self.assertEqual(self.store.sync_reports(self.client, from_time=FROM_TIME), 1)
+
+        self.assertEqual(self.store.get_report("r1").title, "Spear phishing")
+        self.assertEqual(self.store.get_report("r1").enclave_ids, ["e2"])
+        self.assertEqual([i.value for i in self.store.get_indicators_for_report("r1")], ["bad.org"])
+        self.assertEqual([t.name for t in self.store.get_tags_for_report("r1")], ["apt"])
+        self.assertEqual([r.id for r in self.store.get_reports(indicator_values=["evil.com"])], ["r2"])
+        self.assertEqual([r.id for r in self.store.get_reports(tag="malicious")], [])
+        self.assertEqual([r.id for r in self.store.get_reports(enclave_ids=["e2"])], ["r1", "r2"])
+        self.assertEqual(len(self.store.get_reports()), 2)
+
+    def test_incremental_sync_of_indicators(self):
+        self.assertEqual(self.store.sync_indicators(self.client, from_time=FROM_TIME), 2)
+        synced_to = self.store.get_sync_state('indicators')
+
+        # indicators seen again replace the stored ones, and their tags are replaced if the API returns them
+        self.client.indicators = [
+            {'value': "evil.com", 'indicatorType': "URL", 'lastSeen': synced_to, 'sightings': 5,
+             'tags': [{'name': "phishing", 'guid': "t4", 'enclaveId': "e1"}]},
+            {'value': "bad.org", 'indicatorType': "URL", 'lastSeen': synced_to},
+            {'value': "1.2.3.4", 'indicatorType': "IP", 'lastSeen': FROM_TIME + 2000, 'sightings': 9},
+        ]
+        self.assertEqual(self.store.sync_indicators(self.client, from_time=FROM_TIME), 2)
+        self.assertEqual(self.client._client.get_requests("GET", "indicators")[-1].params['from'], synced_to)
+
+        self.assertEqual(sorted(i.value for i in self.store.get_indicators()), ["1.2.3.4", "bad.org", "evil.com"])
+        self.assertEqual(self.store.get_indicators(values=["evil.com"])[0].sightings, 5)
+        self.assertEqual([i.value for i in self.store.get_indicators(tag="phishing")], ["evil.com"])
+        self.assertEqual(self.store.get_indicators(tag="c2"), [])
+        # an indicator last seen before the previous sync is not requested again
+        self.assertIsNone(self.store.get_indicators(values=["1.2.3.4"])[0].sightings)
+
+    def test_removals(self):
+        self.store.sync(self.client, from_time=FROM_TIME)
+
+        # terms, tags and enclaves that were removed from the server are removed from the store by the next sync
+        self.client.whitelist = [{'value': "Example.com", 'indicatorType': "URL"}]
+        self.assertEqual(self.store.sync_whitelist(self.client), 1)
+        self.assertFalse(self.store.is_whitelisted("google.com"))
+        self.assertTrue(self.store.is_whitelisted(" EXAMPLE.com\n"))
+
+        self.client._client.handle("GET", "reports/tags", [])
+        self.client._client.handle("GET", "enclaves", [])
+        self.assertEqual(self.store.sync_tags(self.client), 1)
+        self.assertEqual(self.store.sync_enclaves(self.client), 0)
+        self.assertEqual(self.store.get_tags(LocalStore.REPORT_TAGS), [])
+        self.assertEqual(self.store.get_enclaves(), [])
+
+        # a removed report is no longer found by any query, and the other reports are kept
+        self.store.remove_report("r2")
+        self.store.remove_report("unknown")
+        self.assertIsNone(self.store.get_report("r2"))
+        self.assertEqual([r.id for r in self.store.get_reports()], ["r1"])
+        self.assertEqual(self.store.get_reports(enclave_ids=["e2"]), [])
+        self.assertEqual([r.id for r in self.store.get_reports(indicator_values=["1.2.3.4", "evil.com"])], ["r1"])
+        self.assertEqual(self.store.get_indicators_for_report("r2"), [])
+        self.assertEqual([t.name for t in self.store.get_tags_for_report("r1")], ["malicious"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import itertools
+import threading
+import unittest
+from trustar import *
+
+from fakes import create_client
+
+
+def create_tagging_client():
+    """
+    :return: A client with a tag cache, whose server keeps the tags of reports in its ``tags`` attribute, keyed by
+        report ID, and records the threads that load them in its ``loading_threads`` attribute.
+    """
+
+    ids = itertools.count(1)
+    ts = create_client()
+    ts.tags = {'r1': [{'name': "apt", 'guid': "t0", 'enclaveId': "e1"}]}
+    ts.loading_threads = []
+
+    def get_tags(request):
+        ts.loading_threads.append(threading.current_thread())
+        return [tag for tags in ts.tags.values() for tag in tags]
+
+    def add_tag(request):
+        tag_id = "t%d" % next(ids)
+        ts.tags[request.match.group(1)].append({'name': request.params['name'], 'guid': tag_id,
+                                                'enclaveId': request.params['enclaveId']})
+        return tag_id
+
+    def delete_tag(request):
+        report_id, tag_id = request.match.groups()
+        ts.tags[report_id] = [tag for tag in ts.tags[report_id] if tag['guid'] != tag_id]
+
+    ts._client.handle("GET", "reports/tags", get_tags)
+    ts._client.handle("POST", "reports/([^/]+)/tags", add_tag)
+    ts._client.handle("DELETE", "reports/([^/]+)/tags/([^/]+)", delete_tag)
+    return ts
+
+
+class TagCacheTests(unittest.TestCase):
+
+    def test_lookups(self):
+        ts = create_tagging_client()
+        cache = ts.tag_cache
+        for _ in range(3):
+            self.assertEqual(cache.get_tag_id("apt", "e1"), "t0")
+        self.assertIsNone(cache.get_tag_id("apt", "e2"))
+        self.assertEqual(cache.get_tag_ids(["apt", "unknown"]), ["t0"])
+        self.assertEqual(cache.get_tag_ids(["apt"], enclave_ids=["e2"]), [])
+        self.assertEqual(cache.get_tag("t0").name, "apt")
+        self.assertEqual(len(ts._client.get_requests("GET", "reports/tags")), 1)
+
+    def test_add(self):
+        ts = create_tagging_client()
+        cache = ts.tag_cache
+        cache.get_tag_id("apt", "e1")
+
+        ts.add_enclave_tag("r1", "phishing", "e1")
+        self.assertEqual(cache.get_tag_id("phishing", "e1"), "t1")
+        self.assertEqual(len(ts._client.get_requests("GET", "reports/tags")), 1)
+
+    def test_delete(self):
+        ts = create_tagging_client()
+        cache = ts.tag_cache
+        self.assertEqual(cache.get_tag_id("apt", "e1"), "t0")
+
+        # the lookup right after the deletion reloads the tags, rather than answering with the deleted tag
+        ts.delete_enclave_tag("r1", "t0")
+        self.assertIsNone(cache.get_tag_id("apt", "e1"))
+        self.assertIsNone(cache.get_tag("t0"))
+        self.assertEqual(ts.loading_threads, [threading.current_thread()] * 2)
+
+    def test_refresh(self):
+        ts = create_tagging_client()
+        cache = ts.tag_cache
+        cache.get_tag_id("apt", "e1")
+
+        # a tag added by someone else is only found once the cache has been refreshed
+        ts.tags['r1'].append({'name': "phishing", 'guid': "t9", 'enclaveId': "e1"})
+        self.assertIsNone(cache.get_tag_id("phishing", "e1"))
+        cache.refresh(TagCache.REPORT)
+        self.assertEqual(cache.get_tag_id("phishing", "e1"), "t9")
+
+    def test_load_during_invalidation(self):
+        ts = create_tagging_client()
+        cache = ts.tag_cache
+        cache.get_tag_id("apt", "e1")
+        ts.tags['r1'] = [{'name': "phishing", 'guid': "t1", 'enclaveId': "e1"}]
+        cache.invalidate()
+
+        # tags loaded by a request that was in flight when the cache was invalidated are not kept, and the lookup
+        # loads them again rather than answering from the tags cached before the invalidation
+        def get_tags_and_invalidate(request):
+            ts._client.handle("GET", "reports/tags", lambda request: ts.tags['r1'])
+            cache.invalidate()
+            return [{'name': "stale", 'guid': "t9", 'enclaveId': "e1"}]
+
+        ts._client.handle("GET", "reports/tags", get_tags_and_invalidate)
+        self.assertIsNone(cache.get_tag_id("apt", "e1"))
+        self.assertIsNone(cache.get_tag_id("stale", "e1"))
+        self.assertEqual(cache.get_tag_id("phishing", "e1"), "t1")
+        self.assertIsNotNone(cache._loaded_at[TagCache.REPORT])
+        self.assertEqual(len(ts._client.get_requests("GET", "reports/tags")), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import calendar
+import time
+import unittest
+
+import dateutil.parser
+
+from trustar.utils import ISO_8601_PATTERN, _parse_iso_8601, normalize_timestamp, normalize_timestamps, \
+    datetime_to_millis
+
+
+# timestamps in the formats parsed by ``_parse_iso_8601``, which must give the same result as dateutil
+ISO_8601_TIMESTAMPS = [
+    "2017-02-23T23:01:54Z",
+    "2017-02-23T23:01:54 Z",
+    "2017-02-23T23:01:54+05:30",
+    "2017-02-23T23:01:54 +05:30",
+    "2017-02-23T23:01:54-0530",
+    "2017-02-23T23:01:54 -0530",
+    "2017-02-23T23:01:54+05",
+    "2017-02-23T23:01:54 +05",
+    "2017-02-23T23:01:54+00:00",
+    "2017-02-23T23:01:54+0099",
+    "2017-02-23 23:01:54Z",
+    "2017-02-23T23:01:54.1Z",
+    "2017-02-23T23:01:54.123-08:00",
+    "2017-02-23T23:01:54.123456+0000",
+    "2017-02-23T23:01Z",
+    "2017-02-23T23:01:54",
+    "2017-02-23T23:01:54.5",
+    "2017-02-23 23:01",
+    "2017-02-23",
+    "2016-02-29T12:00:00Z",
+]
+
+# timestamps that match ``ISO_8601_PATTERN`` but have out of range fields, which are left to dateutil
+OUT_OF_RANGE_TIMESTAMPS = [
+    "2017-02-30",
+    "2017-13-01T00:00:00Z",
+    "2017-02-23T24:00:00",
+    "2017-02-23T23:60:00+01:00",
+]
+
+# timestamps that ``_parse_iso_8601`` does not recognize at all
+OTHER_TIMESTAMPS = [
+    "Feb 23 2017 23:01:54 UTC",
+    "2017/02/23 23:01:54",
+    "2017-02-23T23:01:54.1234567Z",
+    "2017-02-23T23:01:54+05:30:00",
+]
+
+
+class TimestampTests(unittest.TestCase):
+    """
+    Tests of timestamp parsing and normalization.
+    """
+
+    def test_parse_iso_8601(self):
+        for date_time in ISO_8601_TIMESTAMPS:
+            self.assertTrue(ISO_8601_PATTERN.match(date_time), date_time)
+            expected = dateutil.parser.parse(date_time)
+            parsed = _parse_iso_8601(date_time)
+
+            self.assertEqual(parsed, expected, date_time)
+            self.assertEqual(parsed.utcoffset(), expected.utcoffset(), date_time)
+            self.assertEqual(datetime_to_millis(parsed), datetime_to_millis(expected), date_time)
+            self.assertEqual(normalize_timestamp(date_time), normalize_timestamp(expected), date_time)
+
+    def test_out_of_range(self):
+        for date_time in OUT_OF_RANGE_TIMESTAMPS:
+            self.assertTrue(ISO_8601_PATTERN.match(date_time), date_time)
+            self.assertIsNone(_parse_iso_8601(date_time), date_time)
+            self.assertRaises(ValueError, dateutil.parser.parse, date_time)
+
+            # dateutil fails too, so the current time is used
+            before = int(time.time())
+            normalized = dateutil.parser.parse(normalize_timestamp(date_time))
+            self.assertTrue(before <= calendar.timegm(normalized.utctimetuple()) <= time.time())
+
+        # offsets of a day or more are left to dateutil too
+        self.assertIsNone(_parse_iso_8601("2017-02-23T23:01:54+25:00"))
+
+    def test_other_formats(self):
+        for date_time in OTHER_TIMESTAMPS:
+            self.assertIsNone(_parse_iso_8601(date_time), date_time)
+
+        date_time = "Feb 23 2017 23:01:54 UTC"
+        self.assertEqual(normalize_timestamp(date_time), "2017-02-23T23:01:54+00:00")
+
+    def test_normalize_timestamps(self):
+        seconds = 1487890914
+        millis = 1487890914000
+        date_times = [seconds, millis, None, "2017-02-23T23:01:54Z", seconds, "2017-02-23T23:01:54+05:30", None]
+
+        before = int(time.time())
+        normalized = normalize_timestamps(date_times)
+        after = time.time()
+
+        self.assertEqual(normalized[0], millis)
+        self.assertEqual(normalized[1], millis)
+        self.assertEqual(normalized[3], "2017-02-23T23:01:54+00:00")
+        self.assertEqual(normalized[4], millis)
+        self.assertEqual(normalized[5], "2017-02-23T23:01:54+05:30")
+
+        # None is normalized to the current time
+        for i in (2, 6):
+            now = dateutil.parser.parse(normalized[i])
+            self.assertEqual(now.utcoffset().total_seconds(), 0)
+            self.assertTrue(before <= calendar.timegm(now.utctimetuple()) <= after)
+
+        self.assertEqual(normalized, [normalize_timestamp(date_time) if date_time is not None else normalized[i]
+                                      for i, date_time in enumerate(date_times)])
+
+
+if __name__ == '__main__':
+    unittest.main()
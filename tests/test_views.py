@@ -0,0 +1,48 @@
+import copy
+import pickle
+import unittest
+from trustar import *
+from trustar.models.view import ReportView, IndicatorView
+from trustar.pipeline import Pipeline, Stage
+
+
+REPORT = {'id': "r1", 'title': "Phishing", 'timeBegan': "2018-01-01T00:00:00+00:00",
+          'distributionType': "COMMUNITY", 'enclaveIds': "e1"}
+INDICATOR = {'value': "evil.com", 'indicatorType': "URL", 'enclaveIds': ["e1"], 'tags': [{'name': "apt"}]}
+
+
+def get_value(view):
+    return type(view).__name__, view.value
+
+
+class ViewTests(unittest.TestCase):
+
+    def test_fields(self):
+        view = ReportView.from_dict(REPORT)
+        model = Report.from_dict(REPORT)
+        self.assertEqual((view.title, view.time_began, view.is_enclave, view.enclave_ids),
+                         (model.title, model.time_began, model.is_enclave, model.enclave_ids))
+        self.assertEqual(view.to_dict(), model.to_dict())
+        self.assertIsInstance(view, Report)
+        self.assertRaises(AttributeError, setattr, view, 'title', "other")
+
+        indicator = IndicatorView.from_dict(INDICATOR).to_model()
+        self.assertNotIsInstance(indicator, IndicatorView)
+        self.assertEqual(indicator.tags[0].name, "apt")
+
+    def test_pickle_and_copy(self):
+        for view in (ReportView.from_dict(REPORT), IndicatorView.from_dict(INDICATOR)):
+            # decode a field first, so that the copies are not affected by what has been decoded
+            view.enclave_ids
+            for other in (pickle.loads(pickle.dumps(view)), copy.copy(view), copy.deepcopy(view)):
+                self.assertIs(type(other), type(view))
+                self.assertEqual(other.to_dict(), view.to_dict())
+
+    def test_process_stage(self):
+        views = [IndicatorView.from_dict(dict(INDICATOR, value="v%d" % i)) for i in range(4)]
+        results = list(Pipeline(views, [Stage(get_value, workers=2, processes=True)]).run())
+        self.assertEqual(sorted(results), [("IndicatorView", "v%d" % i) for i in range(4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+from trustar import *
+
+from fakes import create_client, page
+
+
+def create_whitelisting_client():
+    """
+    :return: A client with a whitelist index, whose server keeps the whitelist in its ``whitelist`` attribute, as a
+        list of indicator dictionaries.
+    """
+
+    ts = create_client()
+    ts.whitelist_index = WhitelistIndex()
+    ts.whitelist = [{'value': "Google.com", 'indicatorType': "URL"}, {'value': "8.8.8.8", 'indicatorType': "IP"}]
+
+    def add_terms(request):
+        added = [{'value': term, 'indicatorType': "URL"} for term in request.json]
+        ts.whitelist.extend(added)
+        return added
+
+    def delete_term(request):
+        ts.whitelist = [term for term in ts.whitelist if term['value'] != request.params['value']]
+
+    ts._client.handle("GET", "whitelist", lambda request: page(ts.whitelist))
+    ts._client.handle("POST", "whitelist", add_terms)
+    ts._client.handle("DELETE", "whitelist", delete_term)
+    return ts
+
+
+class WhitelistIndexTests(unittest.TestCase):
+
+    def test_lookups(self):
+        index = WhitelistIndex([Indicator(value="Google.com", type=IndicatorType.URL), "8.8.8.8"])
+        self.assertEqual(len(index), 2)
+        for value in ("google.com", " GOOGLE.COM\n", Indicator(value="google.com"), "8.8.8.8"):
+            self.assertTrue(index.is_whitelisted(value))
+            self.assertIn(value, index)
+        self.assertFalse(index.is_whitelisted("evil.com"))
+
+        indicators = [Indicator(value="evil.com"), Indicator(value="google.com"), "8.8.8.8", "1.2.3.4"]
+        self.assertEqual(list(index.filter(indicators)), [indicators[0], "1.2.3.4"])
+
+        index.remove(" Google.COM")
+        index.remove("unknown.com")
+        self.assertFalse(index.is_whitelisted("google.com"))
+        self.assertEqual(len(index), 1)
+
+    def test_sync(self):
+        ts = create_whitelisting_client()
+        index = ts.whitelist_index
+        self.assertIsNone(index.synced_at)
+
+        self.assertEqual(index.sync(ts), (2, 0))
+        self.assertTrue(index.is_whitelisted("google.com"))
+        self.assertIsNotNone(index.synced_at)
+
+        # terms changed elsewhere are picked up by the next sync
+        ts.whitelist = [{'value': "8.8.8.8", 'indicatorType': "IP"}, {'value': "example.com", 'indicatorType': "URL"}]
+        self.assertEqual(index.sync(ts), (1, 1))
+        self.assertFalse(index.is_whitelisted("google.com"))
+        self.assertTrue(index.is_whitelisted("example.com"))
+        self.assertEqual(index.sync(ts), (0, 0))
+
+    def test_client_changes(self):
+        ts = create_whitelisting_client()
+        index = ts.whitelist_index
+        index.sync(ts)
+
+        # the index is kept in step with the terms added and deleted through the client, without syncing
+        ts.add_terms_to_whitelist(["Example.com"])
+        self.assertTrue(index.is_whitelisted("example.com"))
+        ts.delete_indicator_from_whitelist(Indicator(value="Google.com", type=IndicatorType.URL))
+        self.assertFalse(index.is_whitelisted("google.com"))
+        self.assertEqual(len(ts._client.get_requests("GET", "whitelist")), 1)
+
+        # and agrees with the server when it is synced
+        self.assertEqual(index.sync(ts), (0, 0))
+        self.assertEqual(sorted(index.filter(["example.com", "8.8.8.8", "google.com"])), ["google.com"])
+
+    def test_changes_during_sync(self):
+        ts = create_whitelisting_client()
+        index = ts.whitelist_index
+
+        # terms added and removed while the whitelist is being paged through are not lost when the sync finishes
+        def get_whitelist(request):
+            index.add(["Example.com"])
+            index.remove("8.8.8.8")
+            return page(ts.whitelist)
+
+        ts._client.handle("GET", "whitelist", get_whitelist)
+        self.assertEqual(index.sync(ts), (1, 0))
+        self.assertEqual(sorted(index.filter(["example.com", "8.8.8.8", "google.com"])), ["8.8.8.8"])
+        self.assertEqual(index._sync_changes, [])
+
+        # and are not applied to later syncs
+        ts._client.handle("GET", "whitelist", lambda request: page(ts.whitelist))
+        self.assertEqual(index.sync(ts), (1, 1))
+        self.assertEqual(sorted(index.filter(["example.com", "8.8.8.8", "google.com"])), ["example.com"])
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            ts = create_whitelisting_client()
+            ts.whitelist_index.sync(ts)
+            path = os.path.join(directory, "whitelist.json")
+            ts.whitelist_index.save(path)
+
+            index = WhitelistIndex.load(path)
+            self.assertEqual(len(index), 2)
+            self.assertTrue(index.is_whitelisted("GOOGLE.com"))
+            self.assertEqual(index.synced_at, ts.whitelist_index.synced_at)
+            self.assertFalse(os.path.exists(path + ".tmp"))
+
+            with open(path, 'w') as f:
+                f.write('{"version": 0, "terms": []}')
+            self.assertRaises(ValueError, WhitelistIndex.load, path)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
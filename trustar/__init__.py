@@ -1,6 +1,17 @@
 from __future__ import absolute_import
 
 from .trustar import TruStar
+from .correlation import CorrelationIndex
+from .export import ExportSink, CsvSink, NdjsonSink, ArrowSink, REPORT_INDICATOR_COLUMNS, INDICATOR_ARROW_COLUMNS, \
+    REPORT_ARROW_COLUMNS
+from .extract import IndicatorExtractor, extract_indicators, EXTRACTABLE_TYPES
+from .indicator_cache import IndicatorCache
+from .ingest import read_csv_reports
+from .matcher import IndicatorMatcher, IndicatorMatch
+from .report_index import ReportIndex
+from .store import LocalStore
+from .tag_cache import TagCache
+from .whitelist import WhitelistIndex
 from .models import *
 from .utils import *
 
@@ -190,7 +190,7 @@ class ApiClient(object):
             # if "too many requests" status code received, wait until next request will be allowed and retry
             elif retry and response.status_code == 429:
                 wait_time = ceil(response.json().get('waitTime') / 1000)
-                logger.debug("Waiting %d seconds until next request allowed." % wait_time)
+                logger.debug("Waiting %d seconds until next request allowed.", wait_time)
 
                 # if wait time exceeds max wait time, allow the exception to be thrown
                 if wait_time <= self.max_wait_time:
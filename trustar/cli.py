@@ -0,0 +1,325 @@
+"""
+The ``trustar`` command, which streams reports, indicators and the whitelist between TruSTAR and newline-delimited
+JSON (NDJSON) files.
+
+Examples::
+
+    trustar export reports --from 2018-01-01 --to 2018-02-01 | gzip > reports.ndjson.gz
+    trustar export indicators --enclave-ids <enclave ID> -o indicators.ndjson
+    gunzip -c reports.ndjson.gz | trustar import reports --enclave-ids <enclave ID>
+
+Exports are written page by page and imports are read line by line, so memory use does not depend on the number of
+records.  Progress and throughput are written to STDERR, so that STDOUT only contains records.
+"""
+
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str, super
+from future import standard_library
+
+# external imports
+import argparse
+import errno
+import io
+import json
+import sys
+import time
+import dateutil.parser
+
+# package imports
+from .export import ExportSink, NdjsonSink
+from .models import Indicator, Report
+from .report_index import ReportIndex
+from .trustar import TruStar
+from .utils import get_logger, datetime_to_millis, parallel_imap, DEFAULT_MAX_WORKERS
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+class Progress(object):
+    """
+    Writes the number of records processed so far, and the rate at which they are being processed, to a stream.  The
+    line is rewritten at most once per ``interval`` seconds.
+    """
+
+    def __init__(self, description, quiet=False, stream=None, interval=1.0):
+        """
+        Constructs a Progress object.
+
+        :param str description: What is being counted, such as "reports exported".
+        :param bool quiet: Whether to only count, without writing anything.
+        :param stream: The stream to write to (defaults to STDERR).
+        :param float interval: The minimum number of seconds between updates.
+        """
+
+        self.description = description
+        self.stream = None if quiet else (stream if stream is not None else sys.stderr)
+        self.interval = interval
+        self.count = 0
+        self.failed = 0
+        self._start = time.time()
+        self._last_write = 0
+
+    def update(self, count=1, failed=0):
+        """
+        Adds to the counts, writing the line if ``interval`` seconds have passed since it was last written.
+
+        :param int count: The number of records that were processed.
+        :param int failed: The number of records that failed.
+        """
+
+        self.count += count
+        self.failed += failed
+        now = time.time()
+        if now - self._last_write >= self.interval:
+            self._last_write = now
+            self._write("\r")
+
+    def finish(self):
+        """
+        Writes the final counts, followed by a newline.
+        """
+
+        self._write("\r", "\n")
+
+    def _write(self, prefix, suffix=""):
+        if self.stream is None:
+            return
+        elapsed = max(time.time() - self._start, 1e-6)
+        line = "%s%d %s (%.0f/s)" % (prefix, self.count, self.description, self.count / elapsed)
+        if self.failed > 0:
+            line += ", %d failed" % self.failed
+        self.stream.write(line + suffix)
+        self.stream.flush()
+
+
+class _ProgressSink(ExportSink):
+    """
+    Passes rows on to another sink, counting them with a |Progress| object.
+    """
+
+    def __init__(self, sink, progress):
+        super().__init__()
+        self._sink = sink
+        self._progress = progress
+
+    def write_rows(self, rows):
+        self._sink.write_rows(rows)
+        self._progress.update(len(rows))
+        self.row_count += len(rows)
+
+    def close(self):
+        self._sink.close()
+
+
+def _parse_time(value):
+    """
+    :return: A time given on the command line, either in milliseconds since epoch or as a date, in milliseconds since
+        epoch.
+    """
+
+    if value.isdigit():
+        return int(value)
+    try:
+        return datetime_to_millis(dateutil.parser.parse(value))
+    except ValueError:
+        raise argparse.ArgumentTypeError("not a date or a time in milliseconds since epoch: %s" % value)
+
+
+def _parse_list(value):
+    """
+    :return: The items of a comma-separated list given on the command line.
+    """
+
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _read_ndjson(stream):
+    """
+    :return: A generator of the objects on the non-empty lines of an NDJSON stream.
+    """
+
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _chunks(items, size):
+    """
+    :return: A generator of lists of up to ``size`` consecutive items.
+    """
+
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def export_command(ts, args):
+    """
+    Writes reports, indicators or the whitelist to an NDJSON file or STDOUT.
+
+    :return: The exit status.
+    """
+
+    progress = Progress("%s exported" % args.type, quiet=args.quiet)
+    output = args.output if args.output is not None else sys.stdout
+
+    with _ProgressSink(NdjsonSink(output), progress) as sink:
+        if args.type == 'reports':
+            ts.export_reports(sink, is_enclave=args.is_enclave, enclave_ids=args.enclave_ids, tag=args.tag,
+                              from_time=args.from_time, to_time=args.to_time)
+        elif args.type == 'indicators':
+            ts.export_indicators(sink, from_time=args.from_time, to_time=args.to_time, enclave_ids=args.enclave_ids,
+                                 page_size=args.page_size)
+        else:
+            ts.export_whitelist(sink, page_size=args.page_size)
+
+    progress.finish()
+    return 0
+
+
+def import_command(ts, args):
+    """
+    Submits the reports or indicators in an NDJSON file or STDIN, such as the output of ``export``.
+
+    :return: The exit status: 0 if everything was submitted, otherwise 1.
+    """
+
+    progress = Progress("%s imported" % args.type, quiet=args.quiet)
+
+    if args.input is not None:
+        stream = io.open(args.input, 'r', encoding='utf-8')
+    else:
+        stream = sys.stdin
+
+    try:
+        records = _read_ndjson(stream)
+
+        if args.type == 'reports':
+            if args.index is not None:
+                ts.report_index = ReportIndex(args.index)
+
+            def get_reports():
+                for report_dict in records:
+                    report = Report.from_dict(report_dict)
+                    # the report gets a new ID when it is submitted
+                    report.id = None
+                    if args.enclave_ids is not None:
+                        report.enclave_ids = args.enclave_ids
+                    yield report
+
+            results = ((1, 0) if result['error'] is None else (0, 1)
+                       for result in ts.submit_reports(get_reports(), max_workers=args.max_workers))
+        else:
+            def submit(indicator_dicts):
+                indicators = [Indicator.from_dict(d) for d in indicator_dicts]
+                try:
+                    ts.submit_indicators(indicators, enclave_ids=args.enclave_ids)
+                    return len(indicators), 0
+                except Exception as e:
+                    logger.error("Failed to submit %d indicators: %s", len(indicators), e)
+                    return 0, len(indicators)
+
+            results = parallel_imap(submit, _chunks(records, args.batch_size), max_workers=args.max_workers)
+
+        for count, failed in results:
+            progress.update(count, failed)
+
+        stats = ts.report_index.get_stats() if ts.report_index is not None else None
+
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if ts.report_index is not None:
+            ts.report_index.close()
+
+    progress.finish()
+
+    if stats is not None and not args.quiet:
+        print("%d reports were already submitted unchanged, %d changed reports were updated"
+              % (stats['unchanged'], stats['changed']), file=sys.stderr)
+
+    return 1 if progress.failed > 0 else 0
+
+
+def get_parser():
+    """
+    :return: The ``argparse.ArgumentParser`` of the ``trustar`` command.
+    """
+
+    parser = argparse.ArgumentParser(prog='trustar', description="Stream data between TruSTAR and NDJSON files.")
+    parser.add_argument('--config-file', default="trustar.conf", help="the config file (default: trustar.conf)")
+    parser.add_argument('--config-role', default="trustar", help="the section of the config file (default: trustar)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="do not write progress to STDERR")
+
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    export_parser = commands.add_parser('export', help="write reports, indicators or the whitelist as NDJSON")
+    export_parser.add_argument('type', choices=('reports', 'indicators', 'whitelist'))
+    export_parser.add_argument('-o', '--output', help="the file to write to (default: STDOUT)")
+    export_parser.add_argument('--from', dest='from_time', type=_parse_time,
+                               help="the start of the time window, as a date or milliseconds since epoch")
+    export_parser.add_argument('--to', dest='to_time', type=_parse_time,
+                               help="the end of the time window, as a date or milliseconds since epoch")
+    export_parser.add_argument('--enclave-ids', type=_parse_list, help="a comma-separated list of enclave IDs")
+    export_parser.add_argument('--tag', help="only export reports with this tag")
+    export_parser.add_argument('--community', dest='is_enclave', action='store_false', default=None,
+                               help="export community reports instead of enclave reports")
+    export_parser.add_argument('--enclave', dest='is_enclave', action='store_true',
+                               help="only export enclave reports")
+    export_parser.add_argument('--page-size', type=int, default=1000,
+                               help="the number of records to request at a time (default: 1000)")
+    export_parser.set_defaults(func=export_command)
+
+    import_parser = commands.add_parser('import', help="submit reports or indicators from NDJSON")
+    import_parser.add_argument('type', choices=('reports', 'indicators'))
+    import_parser.add_argument('-i', '--input', help="the file to read from (default: STDIN)")
+    import_parser.add_argument('--enclave-ids', type=_parse_list,
+                               help="a comma-separated list of enclave IDs to submit to (default: the enclaves of each "
+                                    "report, or the configured enclaves for indicators)")
+    import_parser.add_argument('--batch-size', type=int, default=1000,
+                               help="the number of indicators to submit in each request (default: 1000)")
+    import_parser.add_argument('--index',
+                               help="a SQLite file recording the reports submitted, so that reports already submitted "
+                                    "unchanged are skipped and changed reports with the same external ID are updated")
+    import_parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                               help="the maximum number of concurrent requests (default: %d)" % DEFAULT_MAX_WORKERS)
+    import_parser.set_defaults(func=import_command)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    The entry point of the ``trustar`` command.
+
+    :param argv: The command line arguments (defaults to ``sys.argv[1:]``).
+    :return: The exit status.
+    """
+
+    args = get_parser().parse_args(argv)
+    ts = TruStar(config_file=args.config_file, config_role=args.config_role)
+
+    try:
+        return args.func(ts, args)
+    except IOError as e:
+        # the reader of STDOUT went away, for example "trustar export reports | head"
+        if e.errno == errno.EPIPE:
+            return 0
+        raise
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
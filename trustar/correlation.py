@@ -0,0 +1,381 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, range
+from future import standard_library
+
+# external imports
+import bisect
+import io
+import os
+import struct
+import threading
+from array import array
+from collections import Counter
+
+# package imports
+from .models import Indicator
+from .utils import get_logger, get_current_time_millis, parallel_map, DEFAULT_MAX_WORKERS
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+class CorrelationIndex(object):
+    """
+    An in-process inverted index from indicators to the reports they were extracted from, used to answer correlation
+    questions without a chain of paginated API requests per question.  It answers "which reports contain these
+    indicators" (like |get_correlated_report_ids|) and "which indicators occur in the same reports as these" (like
+    |get_related_indicators|).
+
+    Report IDs and indicator values are each mapped to consecutive integers.  Every indicator has a posting list of
+    the integers of the reports containing it, and every report a list of the integers of its indicators, both held as
+    sorted ``array('I')`` buffers.  Reports can be added, re-indexed and removed incrementally, and ``sync`` adds the
+    reports updated since the previous sync.
+
+    Example:
+
+    >>> index = CorrelationIndex.load("correlation.idx") if os.path.exists("correlation.idx") else CorrelationIndex()
+    >>> index.sync(ts, from_time=from_time)
+    >>> index.save("correlation.idx")
+    >>> report_ids = index.get_correlated_report_ids(["evil.com", "1.2.3.4"])
+    >>> related = index.get_related_indicators(["evil.com"], limit=20)
+    """
+
+    MAGIC = b'TSCI'
+
+    # the version of the format written by ``save``
+    FORMAT_VERSION = 1
+
+    def __init__(self):
+        """
+        Constructs an empty CorrelationIndex object.
+        """
+
+        #: the time that the last sync ended at, in milliseconds since epoch
+        self.synced_to = None
+
+        self._lock = threading.RLock()
+
+        self._report_ids = []
+        self._report_numbers = {}
+        self._report_indicators = []
+
+        self._values = []
+        self._types = []
+        self._value_numbers = {}
+        self._postings = []
+
+    def __len__(self):
+        """
+        :return: The number of reports in the index.
+        """
+
+        return len(self._report_numbers)
+
+    def get_indicator_count(self):
+        """
+        :return: The number of distinct indicators in the index.
+        """
+
+        return len(self._value_numbers)
+
+    def _get_value_number(self, value, indicator_type):
+        number = self._value_numbers.get(value)
+        if number is None:
+            number = self._value_numbers[value] = len(self._values)
+            self._values.append(value)
+            self._types.append(indicator_type)
+            self._postings.append(array('I'))
+        elif indicator_type is not None:
+            self._types[number] = indicator_type
+        return number
+
+    def add_report(self, report_id, indicators):
+        """
+        Adds a report to the index, or replaces the indicators of a report that is already in it.
+
+        :param str report_id: The ID of the report.
+        :param indicators: An iterable of the |Indicator| objects (or indicator values) extracted from the report.
+        """
+
+        with self._lock:
+            number = self._report_numbers.get(report_id)
+            if number is not None:
+                self._remove_postings(number)
+            else:
+                number = self._report_numbers[report_id] = len(self._report_ids)
+                self._report_ids.append(report_id)
+                self._report_indicators.append(None)
+
+            numbers = set()
+            for indicator in indicators:
+                if isinstance(indicator, Indicator):
+                    numbers.add(self._get_value_number(indicator.value, indicator.type))
+                else:
+                    numbers.add(self._get_value_number(indicator, None))
+
+            self._report_indicators[number] = array('I', sorted(numbers))
+
+            for value_number in numbers:
+                postings = self._postings[value_number]
+                # new reports have the highest number, so appending usually keeps the posting list sorted
+                if len(postings) == 0 or postings[-1] < number:
+                    postings.append(number)
+                else:
+                    postings.insert(bisect.bisect_left(postings, number), number)
+
+    def remove_report(self, report_id):
+        """
+        Removes a report from the index.
+
+        :param str report_id: The ID of the report.
+        """
+
+        with self._lock:
+            number = self._report_numbers.pop(report_id, None)
+            if number is not None:
+                self._remove_postings(number)
+                self._report_indicators[number] = None
+
+    def _remove_postings(self, number):
+        for value_number in self._report_indicators[number] or ():
+            postings = self._postings[value_number]
+            position = bisect.bisect_left(postings, number)
+            if position < len(postings) and postings[position] == number:
+                postings.pop(position)
+
+    def _get_postings(self, values):
+        """
+        :return: The posting lists of the indicator values that are in the index.
+        """
+
+        postings = []
+        for value in values:
+            if isinstance(value, Indicator):
+                value = value.value
+            number = self._value_numbers.get(value)
+            if number is not None:
+                postings.append(self._postings[number])
+        return postings
+
+    def _get_report_numbers(self, values, require_all):
+        postings = self._get_postings(values)
+
+        if require_all:
+            if len(postings) < len(values) or len(postings) == 0:
+                return []
+            # intersect starting from the shortest posting list
+            postings.sort(key=len)
+            numbers = set(postings[0])
+            for p in postings[1:]:
+                numbers.intersection_update(p)
+                if not numbers:
+                    break
+        else:
+            numbers = set()
+            for p in postings:
+                numbers.update(p)
+
+        return sorted(numbers)
+
+    def get_correlated_report_ids(self, indicators, require_all=False):
+        """
+        Finds the reports containing any (or all) of the given indicators.
+
+        :param indicators: A list of indicator values or |Indicator| objects.
+        :param bool require_all: Whether reports must contain all of the indicators, rather than any of them.
+        :return: The list of IDs of the reports, in the order they were added to the index.
+        """
+
+        with self._lock:
+            return [self._report_ids[n] for n in self._get_report_numbers(list(indicators), require_all)]
+
+    def get_related_indicators(self, indicators, limit=None):
+        """
+        Finds the indicators that occur in the same reports as any of the given indicators.
+
+        :param indicators: A list of indicator values or |Indicator| objects.
+        :param int limit: The maximum number of indicators to return (optional).
+        :return: A list of |Indicator| objects, each with ``correlation_count`` set to the number of reports in which
+            it occurs with the given indicators, ordered by that count (highest first).
+        """
+
+        with self._lock:
+            indicators = list(indicators)
+            excluded = set(n for n in (self._value_numbers.get(i.value if isinstance(i, Indicator) else i)
+                                       for i in indicators) if n is not None)
+
+            counts = Counter()
+            for report_number in self._get_report_numbers(indicators, require_all=False):
+                counts.update(self._report_indicators[report_number])
+
+            for number in excluded:
+                counts.pop(number, None)
+
+            return [Indicator(value=self._values[n], type=self._types[n], correlation_count=count)
+                    for n, count in counts.most_common(limit)]
+
+    def get_indicators_for_report(self, report_id):
+        """
+        :param str report_id: The ID of the report.
+        :return: The list of |Indicator| objects extracted from the report, with only ``value`` and ``type``, or
+            ``None`` if the report is not in the index.
+        """
+
+        with self._lock:
+            number = self._report_numbers.get(report_id)
+            if number is None:
+                return None
+            return [Indicator(value=self._values[n], type=self._types[n]) for n in self._report_indicators[number]]
+
+    def sync(self, client, from_time=None, to_time=None, enclave_ids=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Adds the reports updated in a time window to the index, fetching the indicators of each page of reports
+        concurrently with |get_indicators_for_report|.
+
+        :param client: The |TruStar| object to sync from.
+        :param int from_time: The start of the time window, in milliseconds since epoch.  Defaults to the end of the
+            previous sync, and must be given for the first sync.
+        :param int to_time: The end of the time window, in milliseconds since epoch (defaults to the current time).
+        :param list(str) enclave_ids: The enclaves to get reports from (optional).
+        :param int max_workers: The maximum number of concurrent requests.
+        :return: The number of reports added or re-indexed.
+        """
+
+        if from_time is None:
+            from_time = self.synced_to
+        if from_time is None:
+            raise ValueError("from_time is required for the first sync.")
+        if to_time is None:
+            to_time = get_current_time_millis()
+
+        def get_indicators(report_id):
+            return report_id, list(client.get_indicators_for_report(report_id))
+
+        count = 0
+        report_ids = []
+        reports = client.get_reports(enclave_ids=enclave_ids, from_time=from_time, to_time=to_time)
+        for report in reports:
+            report_ids.append(report.id)
+            if len(report_ids) >= 100:
+                count += self._add_reports(parallel_map(get_indicators, report_ids, max_workers))
+                report_ids = []
+        count += self._add_reports(parallel_map(get_indicators, report_ids, max_workers))
+
+        self.synced_to = to_time
+        logger.debug("Indexed %d reports.", count)
+
+        return count
+
+    def _add_reports(self, reports):
+        for report_id, indicators in reports:
+            self.add_report(report_id, indicators)
+        return len(reports)
+
+    def save(self, path):
+        """
+        Writes the index to a file.  Only the indicators of each report are written; the posting lists are rebuilt by
+        ``load``.  The file is replaced atomically.
+
+        :param str path: The path of the file.
+        """
+
+        with self._lock:
+            # renumber the reports, leaving out removed ones
+            numbers = sorted(self._report_numbers.values())
+            chunks = [self.MAGIC, struct.pack('<Bq', self.FORMAT_VERSION,
+                                              self.synced_to if self.synced_to is not None else -1)]
+
+            chunks.extend(_pack_strings([self._report_ids[n] for n in numbers]))
+            chunks.extend(_pack_strings(self._values))
+            chunks.extend(_pack_strings([t or u"" for t in self._types]))
+
+            lengths = [len(self._report_indicators[n]) for n in numbers]
+            indicators = [i for n in numbers for i in self._report_indicators[n]]
+            chunks.append(struct.pack('<%dI' % len(lengths), *lengths))
+            chunks.append(struct.pack('<%dI' % len(indicators), *indicators))
+
+        tmp_path = path + ".tmp"
+        with io.open(tmp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+
+        # os.replace is not available in python 2
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads an index from a file written by ``save``.
+
+        :param str path: The path of the file.
+        :return: The |CorrelationIndex| object.
+        """
+
+        with io.open(path, 'rb') as f:
+            data = f.read()
+
+        if data[:4] != cls.MAGIC:
+            raise ValueError("Not a correlation index file: %s" % path)
+        version, synced_to = struct.unpack_from('<Bq', data, 4)
+        if version != cls.FORMAT_VERSION:
+            raise ValueError("Unsupported correlation index format version: %s" % version)
+        offset = 4 + struct.calcsize('<Bq')
+
+        report_ids, offset = _unpack_strings(data, offset)
+        values, offset = _unpack_strings(data, offset)
+        types, offset = _unpack_strings(data, offset)
+
+        lengths = struct.unpack_from('<%dI' % len(report_ids), data, offset)
+        offset += 4 * len(report_ids)
+        indicators = struct.unpack_from('<%dI' % sum(lengths), data, offset)
+
+        index = cls()
+        index.synced_to = synced_to if synced_to >= 0 else None
+        index._values = values
+        index._types = [t or None for t in types]
+        index._value_numbers = {value: number for number, value in enumerate(values)}
+        index._postings = [array('I') for _ in values]
+
+        index._report_ids = report_ids
+        index._report_numbers = {report_id: number for number, report_id in enumerate(report_ids)}
+        position = 0
+        for number, length in enumerate(lengths):
+            report_indicators = array('I', indicators[position:position + length])
+            position += length
+            index._report_indicators.append(report_indicators)
+            # reports are added in order, so the posting lists stay sorted
+            for value_number in report_indicators:
+                index._postings[value_number].append(number)
+
+        return index
+
+
+def _pack_strings(strings):
+    """
+    :return: A list of chunks holding a length-prefixed table of UTF-8 strings.
+    """
+
+    encoded = [s.encode('utf-8') for s in strings]
+    return [struct.pack('<I', len(encoded)),
+            struct.pack('<%dI' % len(encoded), *[len(s) for s in encoded]),
+            b''.join(encoded)]
+
+
+def _unpack_strings(data, offset):
+    """
+    :return: The list of strings in a table written by ``_pack_strings``, and the offset after the table.
+    """
+
+    count = struct.unpack_from('<I', data, offset)[0]
+    offset += 4
+    lengths = struct.unpack_from('<%dI' % count, data, offset)
+    offset += 4 * count
+
+    strings = []
+    for length in lengths:
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+
+    return strings, offset
@@ -93,7 +93,7 @@ def main():
                 logger.info(report)
 
         except Exception as e:
-            logger.error('Could not get latest reports, error: %s' % e)
+            logger.error('Could not get latest reports, error: %s', e)
 
         print('')
 
@@ -111,7 +111,7 @@ def main():
                 logger.info(report)
 
         except Exception as e:
-            logger.error('Could not get community reports, error: %s' % e)
+            logger.error('Could not get community reports, error: %s', e)
 
         print('')
 
@@ -130,7 +130,7 @@ def main():
                 logger.info(report)
 
         except Exception as e:
-            logger.error('Could not get community reports, error: %s' % e)
+            logger.error('Could not get community reports, error: %s', e)
 
         print('')
 
@@ -140,10 +140,10 @@ def main():
             report_ids = ts.get_correlated_report_ids(search_string)
 
             logger.info(report_ids)
-            logger.info("%d report(s) correlated with indicators '%s':\n" % (len(report_ids), search_string))
+            logger.info("%d report(s) correlated with indicators '%s':\n", len(report_ids), search_string)
             logger.info("\n".join(report_ids))
         except Exception as e:
-            logger.error('Could not get correlated reports, error: %s' % e)
+            logger.error('Could not get correlated reports, error: %s', e)
 
         print('')
 
@@ -156,7 +156,7 @@ def main():
             for indicator in indicators:
                 logger.info(indicator)
         except Exception as e:
-            logger.error('Could not get community trends, error: %s' % e)
+            logger.error('Could not get community trends, error: %s', e)
 
         print('')
 
@@ -167,7 +167,7 @@ def main():
             for indicator in indicators:
                 logger.info(indicator)
         except Exception as e:
-            logger.error('Could not get related indicators, error: %s' % e)
+            logger.error('Could not get related indicators, error: %s', e)
 
     # Submit simple test report to community
     if do_comm_submissions:
@@ -178,10 +178,10 @@ def main():
                             time_began="2017-02-01T01:23:45",
                             is_enclave=False)
             report = ts.submit_report(report)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
 
         except Exception as e:
-            logger.error('Could not submit community report, error: %s' % e)
+            logger.error('Could not submit community report, error: %s', e)
 
         print('')
 
@@ -195,12 +195,12 @@ def main():
                             time_began="2017-02-01T01:23:45",
                             enclave_ids=ts.enclave_ids)
             report = ts.submit_report(report)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
 
             logger.info(report)
 
         except Exception as e:
-            logger.error('Could not submit enclave report, error: %s' % e)
+            logger.error('Could not submit enclave report, error: %s', e)
 
         print('')
 
@@ -218,10 +218,10 @@ def main():
             report = ts.submit_report(report)
 
             logger.info("Report Submitted")
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
         except Exception as e:
-            logger.error('Could not submit report, error: %s' % e)
+            logger.error('Could not submit report, error: %s', e)
 
         print('')
 
@@ -231,12 +231,12 @@ def main():
         try:
             report = ts.get_report_details(report_id=external_id, id_type=Report.ID_TYPE_EXTERNAL)
 
-            logger.info("\ttitle: %s" % report.title)
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\ttitle: %s", report.title)
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
             report_guid = report.id
         except Exception as e:
-            logger.error('Could not get report, error: %s' % e)
+            logger.error('Could not get report, error: %s', e)
 
         print('')
 
@@ -250,10 +250,10 @@ def main():
                             enclave_ids=ts.enclave_ids)
             report = ts.update_report(report)
 
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
         except Exception as e:
-            logger.error('Could not update report, error: %s' % e)
+            logger.error('Could not update report, error: %s', e)
 
         print('')
 
@@ -264,11 +264,11 @@ def main():
         try:
             report = ts.get_report_details(report_guid)
 
-            logger.info("\ttitle: %s" % report.title)
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\ttitle: %s", report.title)
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
         except Exception as e:
-            logger.error('Could not get report, error: %s' % e)
+            logger.error('Could not get report, error: %s', e)
 
         print('')
 
@@ -283,10 +283,10 @@ def main():
             report = ts.update_report(report)
 
             logger.info("Updated Report using GUID")
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
         except Exception as e:
-            logger.error('Could not update report, error: %s' % e)
+            logger.error('Could not update report, error: %s', e)
 
         print('')
 
@@ -296,11 +296,11 @@ def main():
         try:
             report = ts.get_report_details(report_guid)
 
-            logger.info("\ttitle: %s" % report.title)
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\ttitle: %s", report.title)
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
         except Exception as e:
-            logger.error('Could not get report, error: %s' % e)
+            logger.error('Could not get report, error: %s', e)
 
         print('')
 
@@ -313,10 +313,10 @@ def main():
             report = ts.update_report(report)
 
             logger.info("Report Released using External ID:")
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
         except Exception as e:
-            logger.error('Could not release report, error: %s' % e)
+            logger.error('Could not release report, error: %s', e)
 
         print('')
 
@@ -327,11 +327,11 @@ def main():
         try:
             report = ts.get_report_details(report_id=external_id, id_type=Report.ID_TYPE_EXTERNAL)
 
-            logger.info("\ttitle: %s" % report.title)
-            logger.info("\texternalTrackingId: %s" % report.external_id)
-            logger.info("\tURL: %s\n" % ts.get_report_url(report.id))
+            logger.info("\ttitle: %s", report.title)
+            logger.info("\texternalTrackingId: %s", report.external_id)
+            logger.info("\tURL: %s\n", ts.get_report_url(report.id))
         except Exception as e:
-            logger.error('Could not get report, error: %s' % e)
+            logger.error('Could not get report, error: %s', e)
 
         print('')
 
@@ -343,7 +343,7 @@ def main():
             logger.info("Report Deleted using External ID\n")
 
         except Exception as e:
-            logger.error('Could not delete report, error: %s' % e)
+            logger.error('Could not delete report, error: %s', e)
 
         print('')
 
@@ -358,7 +358,7 @@ def main():
                             is_enclave=True,
                             enclave_ids=ts.enclave_ids)
             report = ts.submit_report(report)
-            logger.info("\tId of new report %s\n" % report.id)
+            logger.info("\tId of new report %s\n", report.id)
 
             # get back report details, including the enclave it's in
             report = ts.get_report_details(report_id=report.id)
@@ -367,25 +367,25 @@ def main():
             # add an enclave tag
             tag_id = ts.add_enclave_tag(report_id=report.id, name="triage", enclave_id=enclave_id)
             # logger.info the added enclave tag
-            logger.info("\tId of new enclave tag %s\n" % tag_id)
+            logger.info("\tId of new enclave tag %s\n", tag_id)
 
             # add another enclave tag
             tag_id = ts.add_enclave_tag(report_id=report.id, name="resolved", enclave_id=enclave_id)
             # logger.info the added enclave tag
-            logger.info("\tId of new enclave tag %s\n" % tag_id)
+            logger.info("\tId of new enclave tag %s\n", tag_id)
 
             # Get enclave tag info
             if do_get_enclave_tags:
                 logger.info("Get enclave tags for report")
                 tags = ts.get_enclave_tags(report.id)
-                logger.info("\tEnclave tags for report %s\n" % report.id)
+                logger.info("\tEnclave tags for report %s\n", report.id)
                 logger.info(tags)
 
             # delete enclave tag by name
             if do_delete_enclave_tag:
                 logger.info("Delete enclave tag from report")
                 response = ts.delete_enclave_tag(report.id, tag_id)
-                logger.info("\tDeleted enclave tag for report %s\n" % report.id)
+                logger.info("\tDeleted enclave tag for report %s\n", report.id)
                 logger.info(response)
 
             # add it back
@@ -393,7 +393,7 @@ def main():
 
             # List all enclave tags
             tags = ts.get_all_enclave_tags(enclave_ids=ts.enclave_ids)
-            logger.info("List of enclave tags for enclave %s\n" % enclave_id)
+            logger.info("List of enclave tags for enclave %s\n", enclave_id)
             logger.info(tags)
 
             # Search report by tag
@@ -407,7 +407,7 @@ def main():
                 logger.info(report)
 
         except Exception as e:
-            logger.error('Could not handle enclave tag operation, error: %s' % e)
+            logger.error('Could not handle enclave tag operation, error: %s', e)
 
         print('')
 
@@ -422,7 +422,7 @@ def main():
                 logger.info(report)
 
         except Exception as e:
-            logger.error("Could not search reports, error: %s" % e)
+            logger.error("Could not search reports, error: %s", e)
 
         print('')
 
@@ -437,7 +437,7 @@ def main():
                 logger.info(indicator)
 
         except Exception as e:
-            logger.error("Could not search indicators, error: %s" % e)
+            logger.error("Could not search indicators, error: %s", e)
 
         print('')
 
@@ -3,6 +3,15 @@
 """
 Submit one or more reports from local files (txt, pdf)
 
+The files are passed through a pipeline: text is extracted by a pool of processes, files with the same contents as a
+submitted file are dropped, and a pool of threads submits the extracted reports, so extraction and submission overlap.
+No more than ``--queue-size`` files wait in front of each stage, and submissions are limited to ``--rate`` per second.
+The metrics of each stage are printed at the end.
+
+Submitted files are recorded in a manifest in the directory, keyed by the SHA-256 hash of their contents.  When the
+script is run again, files whose size and modification time have not changed are skipped without being read, and files
+with the same contents as a submitted file are not submitted again.
+
 Requirements
 pip install trustar, pdfminer
 
@@ -12,23 +21,35 @@ python bulk_upload.py --dir ./files_to_upload_dir/ --ts_conf ./trustar_api.conf
 from __future__ import print_function
 
 import argparse
+import hashlib
+import io
+import multiprocessing
 import os
-import time
-import json
+import threading
+from six import StringIO
 import pdfminer.pdfinterp
 from pdfminer.pdfpage import PDFPage
 from pdfminer.converter import TextConverter
 from pdfminer.layout import LAParams
-from cStringIO import StringIO
-from trustar import TruStar, Report, get_logger
+from trustar import TruStar, Report, RateLimiter, get_logger
+from trustar.pipeline import Pipeline, Stage
 
 logger = get_logger(__name__)
 
+MANIFEST_FILE = "manifest.tsv"
+SKIPPED_FILE = "skipped_files.log"
+
+PDF_EXTENSIONS = ('.pdf', '.PDF')
+TEXT_EXTENSIONS = ('.txt', '.eml', '.csv', '.json')
 
-def extract_pdf(file_name):
+# the digests of files that have already been submitted, set in each extraction process by init_worker
+known_digests = frozenset()
+
+
+def extract_pdf(data):
     """
     Extract text from a pdf file
-    :param file_name path to pdf to read
+    :param data contents of the pdf file
     :return text from pdf
     """
 
@@ -39,9 +60,8 @@ def extract_pdf(file_name):
     interpreter = pdfminer.pdfinterp.PDFPageInterpreter(rsrcmgr, device)
 
     # Extract text from pdf file
-    with open(file_name, 'rb') as fp:
-        for page in PDFPage.get_pages(fp, maxpages=20):
-            interpreter.process_page(page)
+    for page in PDFPage.get_pages(io.BytesIO(data), maxpages=20):
+        interpreter.process_page(page)
 
     text = sio.getvalue()
 
@@ -52,21 +72,113 @@ def extract_pdf(file_name):
     return text
 
 
+def init_worker(digests):
+    """
+    Initializes an extraction process.
+    :param digests the digests of files that have already been submitted
+    """
+
+    global known_digests
+    known_digests = digests
+
+
 def process_file(source_file):
     """
-    Extract text from a file (pdf, txt, eml, csv, json)
+    Hash a file (pdf, txt, eml, csv, json) and extract its text.  Runs in an extraction process.
     :param source_file path to file to read
-    :return text from file
+    :return tuple of the path, size, modification time and digest of the file, and its text (None if a file with
+    the same digest has already been submitted) or the error that occurred while reading it
     """
-    if source_file.endswith(('.pdf', '.PDF')):
-        txt = extract_pdf(source_file)
-    elif source_file.endswith(('.txt', '.eml', '.csv', '.json')):
-        with open(source_file, 'r') as f:
-            txt = f.read()
-    else:
-        logger.info("Unsupported file extension for file {}".format(source_file))
-        return ""
-    return txt
+
+    stat = os.stat(source_file)
+    try:
+        with open(source_file, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        if digest in known_digests:
+            return source_file, stat.st_size, stat.st_mtime, digest, None, None
+
+        if source_file.endswith(PDF_EXTENSIONS):
+            txt = extract_pdf(data)
+        else:
+            txt = data.decode('utf-8', 'replace')
+
+        return source_file, stat.st_size, stat.st_mtime, digest, txt, None
+
+    except Exception as e:
+        return source_file, stat.st_size, stat.st_mtime, None, None, "%s" % e
+
+
+class Manifest(object):
+    """
+    Records the files that have been submitted, one tab-separated line per file: the SHA-256 digest, size and
+    modification time of the file, the ID of the report it was submitted as, and its path.  Lines are only ever
+    appended, and are flushed as they are written, so an interrupted run loses nothing.
+    """
+
+    def __init__(self, path, ignore=False):
+        """
+        :param path path of the manifest file
+        :param ignore whether to ignore the entries already in the file
+        """
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.report_ids = {}
+        self._claimed = set()
+
+        if os.path.isfile(path) and not ignore:
+            with io.open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    fields = line.rstrip('\n').split('\t', 4)
+                    if len(fields) == 5:
+                        digest, size, mtime, report_id, file_path = fields
+                        self._stats[file_path] = (int(size), float(mtime))
+                        self.report_ids[digest] = report_id
+
+        self._file = io.open(path, 'a', encoding='utf-8')
+
+    def is_unchanged(self, path, size, mtime):
+        """
+        :return whether the file at a path was submitted, and has the same size and modification time as it did then
+        """
+
+        return self._stats.get(path) == (size, float(mtime))
+
+    def claim(self, digest):
+        """
+        Claims the digest of a file that is about to be submitted.
+        :return False if a file with the same digest has already been submitted or claimed
+        """
+
+        with self._lock:
+            if digest in self.report_ids or digest in self._claimed:
+                return False
+            self._claimed.add(digest)
+            return True
+
+    def release(self, digest):
+        """
+        Releases the claim on a digest whose file could not be submitted.
+        """
+
+        with self._lock:
+            self._claimed.discard(digest)
+
+    def add(self, digest, path, size, mtime, report_id):
+        """
+        Records a submitted file.
+        """
+
+        with self._lock:
+            self._stats[path] = (size, float(mtime))
+            self.report_ids.setdefault(digest, report_id)
+            self._file.write(u"%s\t%d\t%r\t%s\t%s\n" % (digest, size, float(mtime), report_id, path))
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
 
 
 def main():
@@ -80,6 +192,14 @@ def main():
     parser.add_argument('--ts_config', '-c', help='Path containing trustar api config', nargs='?', default="./trustar.conf")
     parser.add_argument('-i', '--ignore', dest='ignore', action='store_true',
                         help='Ignore history and resubmit already procesed files')
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                        help='Number of processes extracting text (default: number of CPUs)')
+    parser.add_argument('--submitters', type=int, default=4,
+                        help='Number of threads submitting reports (default: 4)')
+    parser.add_argument('--rate', type=float, default=5,
+                        help='Maximum number of reports submitted per second (default: 5)')
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help='Maximum number of files waiting in front of each stage (default: 64)')
 
     args = parser.parse_args()
     source_report_dir = args.dir
@@ -88,68 +208,104 @@ def main():
     ts = TruStar(config_file=ts_config)
 
     # process all files in directory
-    logger.info("Processing and submitting each source file in %s as a TruSTAR Incident Report" % source_report_dir)
+    logger.info("Processing and submitting each source file in %s as a TruSTAR Incident Report", source_report_dir)
 
-    processed_files = set()
+    manifest = Manifest(os.path.join(source_report_dir, MANIFEST_FILE), ignore=args.ignore)
+    skipped_files = io.open(os.path.join(source_report_dir, SKIPPED_FILE), 'a', encoding='utf-8')
+    skipped_lock = threading.Lock()
 
-    processed_files_file = os.path.join(source_report_dir, "processed_files.log")
-    if os.path.isfile(processed_files_file) and not args.ignore:
-        processed_files = set(line.strip() for line in open(processed_files_file))
+    limiter = RateLimiter(args.rate)
 
-    skipped_files_file = os.path.join(source_report_dir, "skipped_files.log")
+    def skip(source_file, reason):
+        logger.error("Problem with file %s: %s", source_file, reason)
+        with skipped_lock:
+            skipped_files.write(u"%s\n" % source_file)
+            skipped_files.flush()
 
-    with open(processed_files_file, 'a', 0) as pf:
+    def get_source_files():
         for (dirpath, dirnames, filenames) in os.walk(source_report_dir):
             for source_file in filenames:
 
-                if (source_file == "processed_files.log" or
-                    source_file == "skipped_files.log"):
+                if source_file == MANIFEST_FILE or source_file == SKIPPED_FILE:
                     continue
 
-                if source_file in processed_files:
-                    logger.debug("File {} was already processed. Ignoring."
-                                 .format(source_file))
+                path = os.path.join(dirpath, source_file)
+
+                if not source_file.endswith(PDF_EXTENSIONS + TEXT_EXTENSIONS):
+                    logger.info("Unsupported file extension for file %s", path)
                     continue
 
-                logger.info("Processing source file %s " % source_file)
-                try:
-                    path = os.path.join(source_report_dir, source_file)
-                    report_body = process_file(path)
-                    if not report_body:
-                        logger.debug("File {} ignored for no data".format(source_file))
-                        raise
-
-                    # response_json = ts.submit_report(token, report_body, "COMMUNITY: " + file)
-                    logger.info("Report {}".format(report_body))
-                    try:
-                        report = Report(title="ENCLAVE: %s" % source_file,
-                                        body=report_body,
-                                        is_enclave=True,
-                                        enclave_ids=ts.enclave_ids)
-                        report = ts.submit_report(report)
-                        logger.info("SUCCESSFULLY SUBMITTED REPORT, " +
-                                    "TRUSTAR REPORT as Incident Report ID %s" % report.id)
-                        pf.write("%s\n" % source_file)
-
-                        if report.indicators is not None:
-                            print("Extracted the following indicators: {}"
-                                  .format(json.dumps([x.to_dict() for x in report.indicators], indent=2)))
-                        else:
-                            print("No indicators returned from  report id {0}".format(report.id))
-                    except Exception as e:
-                        if '413' in e.message:
-                            logger.warn("Could not submit file {}. Contains more indicators than currently supported."
-                                        .format(source_file))
-                        else:
-                            raise
-
-                except Exception as e:
-                    logger.error("Problem with file %s, exception: %s " % (source_file, e))
-                    with open(skipped_files_file, 'w', 0) as sf:
-                        sf.write("{}\n".format(source_file))
+                stat = os.stat(path)
+                if manifest.is_unchanged(path, stat.st_size, stat.st_mtime):
+                    logger.debug("File %s was already processed. Ignoring.", path)
                     continue
 
-                time.sleep(2)
+                yield path
+
+    def dedup(result):
+        source_file, size, mtime, digest, report_body, error = result
+
+        if error is not None:
+            skip(source_file, error)
+            return None
+
+        if report_body is None or not manifest.claim(digest):
+            logger.info("File %s has the same contents as a file that was already submitted.", source_file)
+            report_id = manifest.report_ids.get(digest)
+            if report_id is not None:
+                manifest.add(digest, source_file, size, mtime, report_id)
+            return None
+
+        if not report_body.strip():
+            manifest.release(digest)
+            skip(source_file, "no data")
+            return None
+
+        return result
+
+    def submit(result):
+        source_file, size, mtime, digest, report_body, error = result
+
+        try:
+            report = Report(title="ENCLAVE: %s" % os.path.basename(source_file),
+                            body=report_body,
+                            is_enclave=True,
+                            enclave_ids=ts.enclave_ids)
+            limiter.acquire()
+            report = ts.submit_report(report)
+        except Exception as e:
+            manifest.release(digest)
+            if '413' in str(e):
+                skip(source_file, "contains more indicators than currently supported")
+            else:
+                skip(source_file, e)
+            return None
+
+        manifest.add(digest, source_file, size, mtime, report.id)
+        logger.info("SUCCESSFULLY SUBMITTED REPORT, TRUSTAR REPORT as Incident Report ID %s for file %s",
+                    report.id, source_file)
+        return report
+
+    def skip_failed(result, error):
+        skip(result[0], error)
+
+    # files that a stage fails on unexpectedly (e.g. files removed while the script runs) are recorded as skipped
+    pipeline = Pipeline(get_source_files(), [
+        Stage(process_file, name='extract', workers=args.processes, processes=True, initializer=init_worker,
+              initargs=(frozenset(manifest.report_ids),), on_error=skip),
+        Stage(dedup, name='dedup', on_error=skip_failed),
+        Stage(submit, name='submit', workers=args.submitters, on_error=skip_failed),
+    ], queue_size=args.queue_size)
+
+    try:
+        for _ in pipeline.run():
+            pass
+
+    finally:
+        manifest.close()
+        skipped_files.close()
+
+    print(pipeline.format_metrics())
 
 
 if __name__ == '__main__':
@@ -40,11 +40,11 @@ while reports is None or len(reports) > 0:
 
         # delete each report in the page
         for report in reports:
-            logger.info("Deleting report %s" % report.id)
+            logger.info("Deleting report %s", report.id)
             ts.delete_report(report_id=report.id)
             count += 1
 
     except Exception as e:
-        logger.error("Error: %s" % e)
+        logger.error("Error: %s", e)
 
-logger.info("Deleted %d reports." % count)
+logger.info("Deleted %d reports.", count)
@@ -2,22 +2,21 @@
 
 """
 Converts each row in a CSV file into an incident report and submits to TruSTAR.
+
+The rows are read a chunk at a time and passed through a pipeline that drops rows identical to an earlier row (in the
+included columns) and submits several reports at a time.  The metrics of each stage are printed at the end.
+
 Requirements:
-    pip install trustar cef
+    pip install trustar cef pandas
 """
 from __future__ import print_function
 
 from cef import log_cef
 
-import pandas as pd
-from builtins import range
-
-from trustar import TruStar, Report
+from trustar import TruStar, RateLimiter, read_csv_reports
+from trustar.pipeline import Pipeline, dedup_stage, submit_reports_stage
 
 import argparse
-import sys
-import time
-import traceback
 
 import cef
 
@@ -46,117 +45,83 @@ def main():
                         help='Common Event Format (CEF) output log file, one event is generated per successful submission')
     parser.add_argument('-ci', '--case-id', required=False, dest='caseid_col',
                         help='Name of column to use as report case ID for CEF export')
+    parser.add_argument('-w', '--workers', required=False, dest='workers', type=int, default=4,
+                        help='Number of reports to submit concurrently')
+    parser.add_argument('-r', '--rate', required=False, dest='rate', type=float, default=2,
+                        help='Maximum number of reports to submit per second')
     args = parser.parse_args()
 
-    allowed_keys_content = []
+    body_columns = None
 
     if args.cols:
-        allowed_keys_content = args.cols.split(",")
+        body_columns = args.cols.split(",")
 
     ts = TruStar(config_role="trustar")
 
-    df = pd.read_csv(args.file_name, nrows=args.num_reports, encoding="latin1")
-
-    # Create title and report content from the provided column names (if any)
-    all_reports = []
-
-    for report_num in range(0, len(df)):
-        current_content = ''
-        current_title = ''
-        current_datetime = None
-        current_case_id = 0
-
-        for key in df:
-            # ignore empty cells, which are float64 NaNs
-            cell_value = df[key][report_num]
-
-            if pd.isnull(cell_value):
-                continue
-
-            cell_value = "%s" % cell_value
-
-            # encode any unicode chars
-            string_value = cell_value.encode('utf-8').strip()
-            if string_value == "nan":
-                print("%s -> %s" % (key, string_value))
-                continue
-
-            content = "{}:\n {}\n \n".format(key, string_value)
-
-            if not allowed_keys_content or key in allowed_keys_content:
-                current_content += content
-            if key == args.title_col:
-                current_title = str(df[key][report_num])
-            if key == args.datetime_col:
-                current_datetime = str(df[key][report_num])
-            if key == args.caseid_col:
-                current_case_id = str(df[key][report_num])
-
-        report = Report(title=current_title,
-                        time_began=current_datetime,
-                        body=current_content,
-                        external_id=current_case_id,
-                        is_enclave=True,
-                        enclave_ids=ts.enclave_ids)
-
-        all_reports.append(report)
-
-    if do_enclave_submissions:
-        num_submitted = 0
-        for staged_report in all_reports:
-
-            successful = False
-            attempts = 0
-            while not successful and attempts < 5:
-                attempts += 1
-                try:
-                    report = ts.submit_report(report=staged_report)
-                    num_submitted += 1
-                    successful = True
-
-                    print("Submitted report #%s-%s title %s as TruSTAR IR %s with case ID: %s" % (
-                        num_submitted, attempts,
-                        report.title,
-                        report.id,
-                        report.external_id))
-
-                    print("URL: %s" % ts.get_report_url(report.id))
-
-                    # Build CEF output:
-                    # - HTTP_USER_AGENT is the cs1 field
-                    # - example CEF output: CEF:version|vendor|product|device_version|signature|name|severity|cs1=(num_submitted) cs2=(report_url)
-                    config = {
-                        'cef.version': '0.5',
-                        'cef.vendor': 'TruSTAR',
-                        'cef.device_version': '2.0',
-                        'cef.product': 'API',
-                        'cef': True,
-                        'cef.file': args.cef_output_file
-                    }
-
-                    environ = {
-                        'REMOTE_ADDR': '127.0.0.1',
-                        'HTTP_HOST': '127.0.0.1',
-                        'HTTP_USER_AGENT': report.title
-                    }
-
-                    log_cef('SUBMISSION', 1, environ, config, signature="INFO",
-                            cs2=report.external_id,
-                            cs3=ts.get_report_url(report.id))
-
-                    ####
-                    # TODO: ADD YOUR CUSTOM POST-PROCESSING CODE FOR THIS SUBMISSION HERE
-                    ####
-
-                    print()
-
-                except Exception as e:
-                    traceback.print_exc(file=sys.stdout)
-                    print("Problem submitting report: %s" % e)
-                    time.sleep(5)
-
-            # Sleep between submissions
-            time.sleep(5)
+    # read the CSV a chunk of rows at a time, creating a report per row
+    reports = read_csv_reports(args.file_name,
+                               title_column=args.title_col,
+                               body_columns=body_columns,
+                               time_column=args.datetime_col,
+                               external_id_column=args.caseid_col,
+                               is_enclave=do_enclave_submissions,
+                               enclave_ids=ts.enclave_ids,
+                               max_rows=args.num_reports,
+                               encoding="latin1")
+
+    # submit several reports at a time, as they are read
+    pipeline = Pipeline(reports, [
+        dedup_stage(key=lambda report: (report.title, report.body)),
+        submit_reports_stage(ts, workers=args.workers, rate_limiter=RateLimiter(args.rate)),
+    ])
+
+    num_submitted = 0
+    for result in pipeline.run():
+        report = result['report']
+
+        if result['error'] is not None:
+            print("Problem submitting report %s: %s" % (report.title, result['error']))
+            continue
+
+        num_submitted += 1
+
+        print("Submitted report #%s title %s as TruSTAR IR %s with case ID: %s" % (
+            num_submitted,
+            report.title,
+            report.id,
+            report.external_id))
+
+        print("URL: %s" % ts.get_report_url(report.id))
+
+        # Build CEF output:
+        # - HTTP_USER_AGENT is the cs1 field
+        # - example CEF output: CEF:version|vendor|product|device_version|signature|name|severity|cs1=(num_submitted) cs2=(report_url)
+        config = {
+            'cef.version': '0.5',
+            'cef.vendor': 'TruSTAR',
+            'cef.device_version': '2.0',
+            'cef.product': 'API',
+            'cef': True,
+            'cef.file': args.cef_output_file
+        }
+
+        environ = {
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': '127.0.0.1',
+            'HTTP_USER_AGENT': report.title
+        }
+
+        log_cef('SUBMISSION', 1, environ, config, signature="INFO",
+                cs2=report.external_id,
+                cs3=ts.get_report_url(report.id))
+
+        ####
+        # TODO: ADD YOUR CUSTOM POST-PROCESSING CODE FOR THIS SUBMISSION HERE
+        ####
+
+        print()
+
+    print(pipeline.format_metrics())
 
 
 if __name__ == '__main__':
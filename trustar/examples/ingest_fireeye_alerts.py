@@ -3,205 +3,83 @@
 from __future__ import print_function
 
 """
-Process a FireEye alerts API export csv and convert each row to an incident report and submitting to TruSTAR:
+Process a FireEye alerts API export and submit each alert to TruSTAR as an incident report.
 
+Alerts are parsed from the export one at a time and passed through a pipeline that filters them, converts them to
+reports, and submits several reports at a time.  Skipped alerts (false positives, FireEye test events, and Windows
+methodology, Shellshock and web app attack alerts) are written to a tracking file per reason.  The metrics of each stage
+are printed at the end.
+
+Run
+python ingest_fireeye_alerts.py alerts.json
 """
-import json
-import sys
+import argparse
+import functools
+import io
 import time
 
-import pandas as pd
-
-from trustar import TruStar, Report
+from trustar import TruStar, RateLimiter
+from trustar.fireeye import AlertFilter, alert_to_report, read_alerts
+from trustar.pipeline import Pipeline, Stage, submit_reports_stage
 
 # Set to false to submit to community
 do_enclave_submissions = True
 
 
-def filter_false_positive(df, process_time):
-    """
-    method that takes in FireEye (FE) alerts and filters FE-tests and False Positives
-    :param process_time:
-    :param df:
-    :return:
-    """
-    result = []
-    track = []
-    count = 0
-    for o in df['alerts']:
-        count += 1
-        if 'closedState' in o:
-            if o['closedState'] != 'False Positive':
-                if 'distinguishers' in o:
-                    try:
-                        if 'virus' in o['distinguishers']:
-                            if o['distinguishers']['virus'] != 'fetestevent':
-                                result.append(o)
-                            else:
-                                track.append(o)  # Track fetestevents that are skipped
-                        else:
-                            result.append(o)
-                    except TypeError:
-                        result.append(o)
-                else:
-                    result.append(o)
-            else:
-                track.append(o)  # Track false positives that are skipped
-        elif 'distinguishers' in o:
-            try:
-                if 'virus' in o['distinguishers']:
-                    if o['distinguishers']['virus'] != 'fetestevent':
-                        result.append(o)
-                    else:
-                        track.append(o)  # Track fetestevents that are skipped
-                else:
-                    result.append(o)
-            except TypeError:
-                result.append(o)
-
-    trackfile = open('tracking_fetest_' + process_time + '.txt', 'w')
-    numskip = 1
-    for item in track:
-        trackfile.write("\n\n**** {:d}: Display ID {} ****\n\n{}".format(numskip, item['displayId'], item))
-        numskip += 1
-    return result
-
-
-def filter_win_methodology(df, process_time):
-    """
-    A function that filters out the windows methodology alert data obtained from FireEye
-    :param df: a DataFrame object
-    :param process_time:
-    :return:
-    """
-    result = []
-    track = []
-    for o in df:
-        if 'WINDOWS METHODOLOGY' in o['message']:
-            track.append(o)
-        else:
-            result.append(o)
-    trackfile = open('tracking_winMethodology_' + process_time + '.txt', 'w')
-    numskip = 1
-    for item in track:
-        trackfile.write("\n\n**** {:d}: Display ID {} ****\n\n{}".format(numskip, item['displayId'], item))
-        numskip += 1
-    return result
-
-
-def filter_bash_shellshock(df, process_time):
-    """
-    A function that filters out the BASH SHELLSHOCK alert data obtained from FireEye
-    :param df: a DataFrame object
-    :param process_time:
-    :return:
-    """
-    result = []
-    track = []
-    for o in df:
-        if 'BASH [Shellshock HTTP]' in o['message']:
-            track.append(o)
-        else:
-            result.append(o)
-    trackfile = open('tracking_bashShellShock_' + process_time + '.txt', 'w')
-    numskip = 1
-    for item in track:
-        trackfile.write("\n\n**** {:d}: Display ID {} ****\n\n{}".format(numskip, item['displayId'], item))
-        numskip += 1
-    return result
-
-
-def filter_webapp_attack(df, process_time):
-    """
-    A function that filters out the BASH SHELLSHOCK alert data obtained from FireEye
-    :param df: a DataFrame object
-    :param process_time:
-    :return:
-    """
-    result = []
-    track = []
-    for o in df:
-        if 'METHODOLOGY - WEB APP ATTACK' in o['message']:
-            track.append(o)
-        else:
-            result.append(o)
-    trackfile = open('tracking_webAppAttack_' + process_time + '.txt', 'w')
-    numskip = 1
-    for item in track:
-        trackfile.write("\n\n**** {:d}: Display ID {} ****\n\n{}".format(numskip, item['displayId'], item))
-        numskip += 1
-    return result
-
-
-def process_alert(file_name):
-    """
-    A function that removes the alerts property from the FireEye alert and transform the data into a JSON ready format
-    :param file_name:
-    :return:
-    """
-
-    processed_line = open(file_name, 'r').read()
-    char_pos = processed_line.find("}")
-    new_line = "{" + processed_line[char_pos + 2:]
-    return new_line
-
-
-def main(inputfile):
-    ts = TruStar()
+def main():
+    parser = argparse.ArgumentParser(description="Submit the alerts in a FireEye alerts API export to TruSTAR.")
+    parser.add_argument('inputfile', help="the FireEye alerts export")
+    parser.add_argument('-w', '--workers', type=int, default=4, help="number of reports to submit concurrently")
+    parser.add_argument('-r', '--rate', type=float, default=2, help="maximum number of reports to submit per second")
+    args = parser.parse_args()
 
-    df = pd.read_json(process_alert(inputfile))
+    ts = TruStar()
 
     process_time = time.strftime('%Y-%m-%d %H:%M', time.localtime(time.time()))
-    filtered_falsepositive = filter_false_positive(df, process_time)
-    filtered_winmethodology = filter_win_methodology(filtered_falsepositive, process_time)
-
-    filtered_bashshellshock = filter_bash_shellshock(filtered_winmethodology, process_time)
-
-    filtered_data = filter_webapp_attack(filtered_bashshellshock, process_time)
-
-    all_reports = []
-    for alert in filtered_data:
-
-        # construct report body
-        content = ""
-        for key in alert:
-            type_value = type(alert[key])
-            if type_value == list or type_value == int or type_value == long or type_value == bool \
-                    or type_value == dict or alert[key] is None:
-                content += key + ': ' + str(alert[key]).replace('u\'', '\'') + '\n'
-            else:
-                content += key + ': ' + str(alert[key].encode('ascii', 'ignore')) + '\n'
-
-        # construct and append report
-        current_report = Report(title=str(alert['displayId']) + ' ' + str(alert['message'].encode('utf-8')),
-                                body=content,
-                                time_began=str(alert['createDate']),
-                                is_enclave=True,
-                                enclave_ids=ts.enclave_ids)
-        all_reports.append(current_report)
-
-    if do_enclave_submissions:
-        for staged_report in all_reports:
-            start_time = time.time()
-            try:
-                report = ts.submit_report(report=staged_report)
-                print(report)
-            except Exception as e:
-                print("Submission failed with error: {}".format(str(e)))
-                raise
-
-            end_time = time.time()
-            delta_time = end_time - start_time
-            print("Submitted report title {} as TruSTAR IR {}".format(report.title, report.id) +
-                  " Time: " + str(delta_time))
-
-            if report.indicators is not None:
-                print("Extracted the following indicators: {}"
-                      .format(json.dumps([indicator.to_dict() for indicator in report.indicators], indent=2)))
-
-            print()
-            time.sleep(3)
+
+    # tracking files for skipped alerts, opened when the first alert is skipped for each reason
+    tracking_files = {}
+    skipped_counts = {}
+    alert_filter = AlertFilter()
+
+    def filter_alert(alert):
+        reason = alert_filter.get_reason(alert)
+        if reason is None:
+            return alert
+
+        if reason not in tracking_files:
+            tracking_files[reason] = io.open('tracking_%s_%s.txt' % (reason, process_time), 'w', encoding='utf-8')
+        skipped_counts[reason] = skipped_counts.get(reason, 0) + 1
+        tracking_files[reason].write(u"\n\n**** %d: Display ID %s ****\n\n%s" % (skipped_counts[reason],
+                                                                              alert.get('displayId'), alert))
+        return None
+
+    try:
+        with io.open(args.inputfile, 'r', encoding='utf-8') as f:
+            pipeline = Pipeline(read_alerts(f), [
+                Stage(filter_alert, name='filter'),
+                Stage(functools.partial(alert_to_report, is_enclave=do_enclave_submissions,
+                                        enclave_ids=ts.enclave_ids), name='convert'),
+                submit_reports_stage(ts, workers=args.workers, rate_limiter=RateLimiter(args.rate)),
+            ])
+
+            for result in pipeline.run():
+                report = result['report']
+                if result['error'] is not None:
+                    print("Submission of report title {} failed with error: {}".format(report.title, result['error']))
+                    continue
+
+                print("Submitted report title {} as TruSTAR IR {}".format(report.title, report.id))
+
+    finally:
+        for tracking_file in tracking_files.values():
+            tracking_file.close()
+
+    for reason, count in sorted(skipped_counts.items()):
+        print("Skipped {} alerts: {}".format(reason, count))
+
+    print(pipeline.format_metrics())
 
 
 if __name__ == '__main__':
-    main(sys.argv[1])
+    main()
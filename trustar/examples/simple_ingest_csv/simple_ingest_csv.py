@@ -40,4 +40,4 @@ with open(CSV_PATH, 'r') as f:
         # submit report
         ts.submit_report(report)
 
-        logger.info("Submitted report: %s" % report)
+        logger.info("Submitted report: %s", report)
@@ -0,0 +1,327 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str, super
+from future import standard_library
+from six import string_types
+
+# external imports
+import io
+import json
+import unicodecsv
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+
+# the columns of the rows written by |export_report_indicators|
+REPORT_INDICATOR_COLUMNS = ('report_id', 'report_title', 'report_tags', 'indicator_value', 'indicator_type')
+
+# the columns that |ArrowSink| writes from the items of pages of indicators, as (column name, key, type) tuples
+INDICATOR_ARROW_COLUMNS = (
+    ('value', 'value', 'string'),
+    ('type', 'indicatorType', 'dictionary'),
+    ('priority_level', 'priorityLevel', 'dictionary'),
+    ('first_seen', 'firstSeen', 'int64'),
+    ('last_seen', 'lastSeen', 'int64'),
+    ('sightings', 'sightings', 'int64'),
+    ('enclave_ids', 'enclaveIds', 'list<dictionary>'),
+)
+
+# the columns that |ArrowSink| writes from the items of pages of reports, as (column name, key, type) tuples
+REPORT_ARROW_COLUMNS = (
+    ('id', 'id', 'string'),
+    ('title', 'title', 'string'),
+    ('body', 'reportBody', 'string'),
+    ('time_began', 'timeBegan', 'int64'),
+    ('created', 'created', 'int64'),
+    ('updated', 'updated', 'int64'),
+    ('distribution_type', 'distributionType', 'dictionary'),
+    ('external_id', 'externalTrackingId', 'string'),
+    ('external_url', 'externalUrl', 'string'),
+    ('enclave_ids', 'enclaveIds', 'list<dictionary>'),
+)
+
+# the number of rows in each row group (or record batch) written by |ArrowSink|
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+
+class ExportSink(object):
+    """
+    Base class of the destinations that exports write rows to.  A row is a dictionary whose values are strings,
+    numbers, booleans, ``None``, or lists of those.  Sinks are context managers; leaving the context closes the sink.
+
+    :ivar row_count: The number of rows written so far.
+    """
+
+    def __init__(self):
+        self.row_count = 0
+
+    def write_rows(self, rows):
+        """
+        Writes rows.
+
+        :param rows: An iterable of dictionaries.
+        """
+
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Flushes and closes the sink.
+        """
+
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _open(output, mode, encoding=None):
+    """
+    :return: A tuple containing the file object for ``output``, which is either a path or a file object, and whether
+        it was opened here (and so must be closed by the caller).
+    """
+
+    if isinstance(output, string_types):
+        return io.open(output, mode, encoding=encoding), True
+    return output, False
+
+
+class CsvSink(ExportSink):
+    """
+    Writes rows to a CSV file, with a header row.  List values are joined with ``list_separator``.
+    """
+
+    def __init__(self, output, columns, list_separator=";"):
+        """
+        Constructs a CsvSink object.
+
+        :param output: The path of the file, or a file object opened in binary mode.
+        :param columns: The keys of the row dictionaries to write, in order.
+        :param str list_separator: The separator placed between the items of list values.
+        """
+
+        super().__init__()
+
+        self._file, self._owned = _open(output, 'wb')
+        self._columns = list(columns)
+        self._list_separator = list_separator
+
+        self._writer = unicodecsv.writer(self._file, encoding='utf-8')
+        self._writer.writerow(self._columns)
+
+    def write_rows(self, rows):
+        separator = self._list_separator
+        lines = []
+        for row in rows:
+            line = []
+            for column in self._columns:
+                value = row.get(column)
+                if isinstance(value, list):
+                    value = separator.join(str(v) for v in value)
+                line.append(value)
+            lines.append(line)
+
+        self._writer.writerows(lines)
+        self.row_count += len(lines)
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class NdjsonSink(ExportSink):
+    """
+    Writes rows to a newline-delimited JSON file: one compact JSON object per line.
+    """
+
+    def __init__(self, output):
+        """
+        Constructs an NdjsonSink object.
+
+        :param output: The path of the file, or a file object opened in text mode (such as ``sys.stdout``).
+        """
+
+        super().__init__()
+
+        self._file, self._owned = _open(output, 'w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        lines = [json.dumps(row, separators=(',', ':')) for row in rows]
+        if len(lines) > 0:
+            self._file.write(str("\n".join(lines) + "\n"))
+        self.row_count += len(lines)
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class ArrowSink(ExportSink):
+    """
+    Writes rows to a Parquet file or an Arrow IPC file, for loading into pandas, Spark and the like.  Requires pyarrow.
+
+    Each column is read from a key of the row dictionaries and has one of these types:
+
+    - ``string``, ``int64``, ``double`` or ``bool``
+    - ``dictionary``: dictionary-encoded strings, for columns with few distinct values such as indicator types
+    - ``list<string>`` or ``list<dictionary>``: lists of strings, such as enclave IDs
+
+    Rows are buffered column by column and written as a row group (or record batch) every ``row_group_size`` rows, so
+    memory use is bounded by the row group size rather than the size of the export.  Each dictionary-encoded column
+    keeps one dictionary for the whole file, which grows as new values are written; Arrow IPC files record the new
+    values of each batch as dictionary deltas.  The columns are read straight from
+    dictionaries, so the items of pages returned by the API can be written without creating models; see
+    |export_indicators| and |export_reports|.
+
+    Example:
+
+    >>> with ArrowSink("indicators.parquet", INDICATOR_ARROW_COLUMNS) as sink:
+    >>>     ts.export_indicators(sink, from_time=from_time, to_time=to_time)
+    """
+
+    FILE_FORMATS = ('parquet', 'arrow')
+
+    def __init__(self, output, columns, file_format='parquet', row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                 compression='snappy'):
+        """
+        Constructs an ArrowSink object.
+
+        :param output: The path of the file, or a file object opened in binary mode.
+        :param columns: The columns to write, as (column name, key, type) tuples, such as ``INDICATOR_ARROW_COLUMNS``.
+        :param str file_format: ``parquet`` or ``arrow`` (the Arrow IPC file format).
+        :param int row_group_size: The number of rows in each row group.
+        :param str compression: The compression codec of Parquet files.
+        """
+
+        super().__init__()
+
+        try:
+            import pyarrow as pa
+            import pyarrow.compute
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required to write Parquet or Arrow files.")
+
+        if file_format not in self.FILE_FORMATS:
+            raise ValueError("file_format must be one of %s." % (self.FILE_FORMATS,))
+
+        self._pa = pa
+        self._keys = [key for _, key, _ in columns]
+        self._types = [column_type for _, _, column_type in columns]
+        self._schema = pa.schema([pa.field(name, _get_arrow_type(pa, column_type))
+                                  for name, _, column_type in columns])
+        self._row_group_size = row_group_size
+        self._buffers = [[] for _ in columns]
+        self._buffered = 0
+        # the dictionary of each dictionary-encoded column, shared by all of its batches
+        self._dictionaries = [pa.array([], type=pa.string()) for _ in columns]
+
+        self._file, self._owned = _open(output, 'wb')
+        if file_format == 'parquet':
+            self._writer = pyarrow.parquet.ParquetWriter(self._file, self._schema, compression=compression)
+        else:
+            # the IPC file format does not allow a dictionary to be replaced, only extended
+            self._writer = pyarrow.ipc.new_file(self._file, self._schema,
+                                                options=pyarrow.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    def write_rows(self, rows):
+        columns = list(zip(self._keys, self._buffers))
+        for row in rows:
+            for key, buffer in columns:
+                buffer.append(row.get(key))
+            self._buffered += 1
+            self.row_count += 1
+            if self._buffered >= self._row_group_size:
+                self._flush()
+
+    def _flush(self):
+        """
+        Writes the buffered rows as a row group.
+        """
+
+        if self._buffered == 0:
+            return
+
+        pa = self._pa
+        arrays = [self._to_arrow_array(i, values, column_type, field.type)
+                  for i, (values, column_type, field) in enumerate(zip(self._buffers, self._types, self._schema))]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+        if isinstance(self._writer, pa.ipc.RecordBatchFileWriter):
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write_table(pa.Table.from_batches([batch]))
+
+        for buffer in self._buffers:
+            del buffer[:]
+        self._buffered = 0
+
+    def _to_arrow_array(self, column, values, column_type, arrow_type):
+        """
+        :return: A pyarrow array of the buffered values of a column.
+        """
+
+        pa = self._pa
+        if column_type == 'dictionary':
+            return self._encode_dictionary(column, pa.array(values, type=pa.string()))
+        if column_type == 'list<dictionary>':
+            lists = pa.array(values, type=pa.list_(pa.string()))
+            return pa.ListArray.from_arrays(lists.offsets, self._encode_dictionary(column, lists.values),
+                                            mask=lists.is_null())
+        return pa.array(values, type=arrow_type)
+
+    def _encode_dictionary(self, column, strings):
+        """
+        Dictionary-encodes strings with the dictionary of a column, adding the strings that are not in it yet.
+
+        :return: A pyarrow DictionaryArray.
+        """
+
+        pa = self._pa
+        compute = pa.compute
+        dictionary = self._dictionaries[column]
+
+        unique = compute.unique(strings).drop_null()
+        new = unique.filter(compute.invert(compute.is_in(unique, value_set=dictionary)))
+        if len(new) > 0:
+            dictionary = pa.concat_arrays([dictionary, new])
+            self._dictionaries[column] = dictionary
+
+        indices = compute.index_in(strings, value_set=dictionary).cast(pa.int32())
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+def _get_arrow_type(pa, column_type):
+    """
+    :return: The pyarrow type of an |ArrowSink| column type.
+    """
+
+    types = {
+        'string': pa.string(),
+        'int64': pa.int64(),
+        'double': pa.float64(),
+        'bool': pa.bool_(),
+        'dictionary': pa.dictionary(pa.int32(), pa.string()),
+        'list<string>': pa.list_(pa.string()),
+        'list<dictionary>': pa.list_(pa.dictionary(pa.int32(), pa.string())),
+    }
+    if column_type not in types:
+        raise ValueError("Unknown column type: %s" % column_type)
+    return types[column_type]
@@ -0,0 +1,391 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str
+from future import standard_library
+from six import string_types
+
+# external imports
+import codecs
+import hashlib
+import re
+import threading
+import time
+
+# package imports
+from .models import Indicator, IndicatorType
+from .utils import get_logger
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+# the default number of characters read from a stream at a time
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# text without whitespace longer than this is scanned without waiting for the rest of it
+_MAX_CARRY = 1 << 16
+
+_OCTET = r"(?:25[0-5]|2[0-4]\d|[01]?\d?\d)"
+_IPV4 = r"%s(?:\.%s){3}" % (_OCTET, _OCTET)
+_DOMAIN = r"(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,24}"
+# the pattern is case-insensitive, so the characters missing from Base58 (0, I, O and l) are rejected by the checksum
+_BASE58 = r"[1-9a-z]"
+
+# the pattern of each type of indicator, in the order they are tried at each position of the text
+_PATTERNS = [
+    (IndicatorType.URL, r"(?:(?:https?|ftp)://|www\.)[^\s<>\"'`{}|\\^\[\]]+"),
+    (IndicatorType.EMAIL_ADDRESS, r"(?<![\w.+-])[\w.+-]+@%s(?![\w-])" % _DOMAIN),
+    (IndicatorType.CIDR_BLOCK, r"(?<![\w.])%s/(?:3[0-2]|[12]?\d)(?![\w/])" % _IPV4),
+    (IndicatorType.IP, r"(?<![\w.])%s(?!\w|\.\d|/\d)" % _IPV4),
+    (IndicatorType.SHA256, r"\b[0-9a-f]{64}\b"),
+    (IndicatorType.SHA1, r"\b[0-9a-f]{40}\b"),
+    (IndicatorType.MD5, r"\b[0-9a-f]{32}\b"),
+    (IndicatorType.CVE, r"\bCVE-\d{4}-\d{4,7}\b"),
+    (IndicatorType.BITCOIN_ADDRESS, r"\b(?:[13]%s{25,34}|bc1[ac-hj-np-z02-9]{11,71})\b" % _BASE58),
+    (IndicatorType.REGISTRY_KEY, r"\b(?:HKEY_LOCAL_MACHINE|HKEY_CURRENT_USER|HKEY_CLASSES_ROOT|HKEY_USERS|"
+                                 r"HKEY_CURRENT_CONFIG|HKLM|HKCU|HKCR|HKU|HKCC)\\[^\s\"'<>|]+"),
+    # domains without a scheme are URL indicators too; this comes last, so that e-mail addresses are found first
+    (IndicatorType.URL, r"(?<![\w.@/-])%s(?::\d{1,5})?(?:/[^\s<>\"'`{}|\\^\[\]]*)?(?![\w@-])" % _DOMAIN),
+]
+
+# whitespace-delimited tokens that may contain an indicator: every indicator contains a digit, ".", "@" or "\\" (only a
+# hash made of the letters a-f alone would not), and defanged ones may contain brackets instead
+_CANDIDATE_PATTERN = re.compile(r"(?<!\S)\S*[\d@.\\\[(]\S*")
+
+# the types of indicator that can be extracted
+EXTRACTABLE_TYPES = tuple(sorted(set(indicator_type for indicator_type, _ in _PATTERNS)))
+
+# defanged forms of indicators, such as "hxxp://evil[.]com", and the text they stand for
+_DEFANGED = {
+    u'[.]': u'.', u'(.)': u'.', u'[dot]': u'.', u'(dot)': u'.',
+    u'[@]': u'@', u'[at]': u'@', u'(at)': u'@',
+    u'[:]': u':', u'[://]': u'://',
+    u'hxxp': u'http', u'hxxps': u'https', u'fxp': u'ftp',
+}
+_DEFANGED_PATTERN = re.compile(u"|".join(re.escape(k) for k in sorted(_DEFANGED, key=len, reverse=True)),
+                               re.IGNORECASE)
+
+# common file extensions, so that file names are not taken for domains
+_FILE_EXTENSIONS = frozenset([
+    'bat', 'bin', 'cmd', 'csv', 'dat', 'dll', 'doc', 'docm', 'docx', 'exe', 'gif', 'gz', 'htm', 'html', 'ini', 'jar',
+    'jpeg', 'jpg', 'js', 'json', 'lnk', 'log', 'msi', 'pdf', 'php', 'png', 'ps1', 'py', 'rar', 'rtf', 'scr', 'sh',
+    'sys', 'tmp', 'txt', 'vbs', 'xls', 'xlsm', 'xlsx', 'xml', 'zip',
+])
+
+# generic top-level domains that domains without a scheme may have (any two-letter country code is accepted too), so
+# that dotted names such as "os.path" are not taken for domains
+_GENERIC_TLDS = frozenset([
+    'aero', 'app', 'asia', 'biz', 'blog', 'cat', 'click', 'cloud', 'club', 'com', 'coop', 'dev', 'edu', 'email', 'gov',
+    'icu', 'info', 'int', 'jobs', 'link', 'live', 'mil', 'mobi', 'museum', 'name', 'net', 'news', 'online', 'org',
+    'pro', 'shop', 'site', 'space', 'store', 'tech', 'tel', 'top', 'travel', 'vip', 'website', 'work', 'xyz',
+])
+
+_REGISTRY_HIVES = {
+    'HKLM': 'HKEY_LOCAL_MACHINE',
+    'HKCU': 'HKEY_CURRENT_USER',
+    'HKCR': 'HKEY_CLASSES_ROOT',
+    'HKU': 'HKEY_USERS',
+    'HKCC': 'HKEY_CURRENT_CONFIG',
+}
+
+_BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+# punctuation that usually ends the sentence around a URL rather than the URL itself
+_TRAILING_PUNCTUATION = u".,;:!?'\")]}>"
+
+_SCHEME_PATTERN = re.compile(r"^[a-z][a-z0-9+.-]*$", re.IGNORECASE)
+
+
+def _refang(text):
+    """
+    :return: The text, with defanged indicators restored.
+    """
+
+    return _DEFANGED_PATTERN.sub(lambda match: _DEFANGED[match.group().lower()], text)
+
+
+def _normalize_ip(value):
+    return u".".join(str(int(octet)) for octet in value.split(u"."))
+
+
+def _normalize_cidr_block(value):
+    address, prefix = value.split(u"/")
+    return u"%s/%d" % (_normalize_ip(address), int(prefix))
+
+
+def _normalize_url(value):
+    stripped = value.rstrip(_TRAILING_PUNCTUATION)
+    # keep a closing parenthesis that belongs to the URL, as in Wikipedia links
+    if stripped.count(u"(") > stripped.count(u")") and value[len(stripped):].startswith(u")"):
+        stripped += u")"
+    value = stripped
+
+    # split at the first "://", since the query string may contain other URLs
+    scheme, separator, rest = value.partition(u"://")
+    if not separator or not _SCHEME_PATTERN.match(scheme):
+        scheme, separator, rest = u"", u"", value
+    host, slash, path = rest.partition(u"/")
+    host = host.lower()
+
+    if not separator:
+        # a domain without a scheme: skip file names and other dotted names
+        tld = host.rsplit(u":", 1)[0].rsplit(u".", 1)[-1]
+        if tld in _FILE_EXTENSIONS or (len(tld) > 2 and tld not in _GENERIC_TLDS):
+            return None
+        return host + slash + path
+
+    return scheme.lower() + separator + host + slash + path
+
+
+def _normalize_email_address(value):
+    return value.lower()
+
+
+def _normalize_hash(value):
+    return value.lower()
+
+
+def _normalize_cve(value):
+    return value.upper()
+
+
+def _normalize_bitcoin_address(value):
+    if value[:3].lower() == u"bc1":
+        return value.lower()
+
+    # check the Base58Check checksum, so that other identifiers that look like addresses are skipped
+    number = 0
+    for char in value:
+        index = _BASE58_ALPHABET.find(char)
+        if index < 0:
+            return None
+        number = number * 58 + index
+
+    data = bytearray()
+    while number > 0:
+        number, remainder = divmod(number, 256)
+        data.append(remainder)
+    data.extend(b"\0" * (len(value) - len(value.lstrip(u"1"))))
+    data.reverse()
+    data = bytes(data)
+
+    if len(data) != 25 or hashlib.sha256(hashlib.sha256(data[:-4]).digest()).digest()[:4] != data[-4:]:
+        return None
+    return value
+
+
+def _normalize_registry_key(value):
+    value = value.rstrip(_TRAILING_PUNCTUATION)
+    hive, separator, path = value.partition(u"\\")
+    hive = hive.upper()
+    return _REGISTRY_HIVES.get(hive, hive) + separator + path
+
+
+_NORMALIZERS = {
+    IndicatorType.IP: _normalize_ip,
+    IndicatorType.CIDR_BLOCK: _normalize_cidr_block,
+    IndicatorType.URL: _normalize_url,
+    IndicatorType.EMAIL_ADDRESS: _normalize_email_address,
+    IndicatorType.MD5: _normalize_hash,
+    IndicatorType.SHA1: _normalize_hash,
+    IndicatorType.SHA256: _normalize_hash,
+    IndicatorType.CVE: _normalize_cve,
+    IndicatorType.BITCOIN_ADDRESS: _normalize_bitcoin_address,
+    IndicatorType.REGISTRY_KEY: _normalize_registry_key,
+}
+
+
+class IndicatorExtractor(object):
+    """
+    Finds indicators in text locally, such as the body of a report before it is submitted, so that reports can be
+    screened (for instance, skipped if every indicator in them is whitelisted) without a request to the server.
+
+    The patterns of all of the types of indicator are combined into a single precompiled regular expression, so the
+    text is scanned once however many types are extracted, and only the words that could contain an indicator are
+    scanned with it.  Defanged indicators, such as ``hxxp://evil[.]com`` or
+    ``1.2.3[.]4``, are found too.  Values are normalized: IP addresses and CIDR blocks lose leading zeros, hashes,
+    e-mail addresses and the scheme and host of URLs are lowercased, CVEs are uppercased, and abbreviated registry
+    hives are expanded (``HKLM`` becomes ``HKEY_LOCAL_MACHINE``).  Bitcoin addresses must have a valid checksum.
+
+    The types that can be extracted are listed in ``EXTRACTABLE_TYPES``: IP (IPv4 only), CIDR_BLOCK, URL (including
+    domains without a scheme, if their top-level domain is a country code or a common generic one), EMAIL_ADDRESS, MD5,
+    SHA1, SHA256, CVE, BITCOIN_ADDRESS and REGISTRY_KEY.  MALWARE and SOFTWARE indicators are names, which cannot be
+    recognized by a pattern.  The server's extraction remains the authority on what a report contains; this extractor
+    is for deciding what to submit.
+
+    The extractor keeps statistics of the amount of text it has scanned and the time it took.  It can be shared between
+    threads.
+
+    Example:
+
+    >>> extractor = IndicatorExtractor(whitelist=ts.whitelist_index)
+    >>> indicators = extractor.extract(report.body)
+    >>> if len(indicators) > 0:
+    >>>     ts.submit_report(report)
+    >>> print(extractor.get_stats()['mb_per_second'])
+    """
+
+    def __init__(self, types=None, whitelist=None):
+        """
+        Constructs an IndicatorExtractor object.
+
+        :param types: The types of indicator to extract (defaults to ``EXTRACTABLE_TYPES``).
+        :param whitelist: A |WhitelistIndex|; whitelisted indicators are not returned (optional).
+        """
+
+        if types is None:
+            types = EXTRACTABLE_TYPES
+
+        unknown = set(types) - set(EXTRACTABLE_TYPES)
+        if len(unknown) > 0:
+            raise ValueError("Indicators of these types cannot be extracted: %s" % ", ".join(sorted(unknown)))
+
+        self.types = frozenset(types)
+        self.whitelist = whitelist
+
+        # each pattern gets its own named group, so that the type of a match is the name of the group that matched
+        self._group_types = {}
+        groups = []
+        for indicator_type, pattern in _PATTERNS:
+            if indicator_type in self.types:
+                name = "g%d" % len(groups)
+                self._group_types[name] = indicator_type
+                groups.append(u"(?P<%s>%s)" % (name, pattern))
+        # no indicator starts in the middle of a word, so the lookbehind rejects most positions before any pattern is
+        # tried
+        self._pattern = re.compile(u"(?<!\\w)(?:%s)" % u"|".join(groups), re.IGNORECASE)
+
+        self._lock = threading.Lock()
+        self.characters = 0
+        self.seconds = 0.0
+        self.indicators = 0
+
+    def find(self, text):
+        """
+        Finds every occurrence of an indicator in text, without removing duplicates or whitelisted indicators.
+
+        :param str text: The text.
+        :return: A generator of tuples of the type and normalized value of each indicator found, in order.
+        """
+
+        # scanning only the candidate tokens is several times faster than scanning all of the text
+        text = u"\n".join(_CANDIDATE_PATTERN.findall(text))
+
+        if u"[" in text or u"(" in text or u"xx" in text or u"XX" in text or u"fxp" in text:
+            text = _refang(text)
+
+        group_types = self._group_types
+        for match in self._pattern.finditer(text):
+            indicator_type = group_types[match.lastgroup]
+            value = _NORMALIZERS[indicator_type](match.group())
+            if value:
+                yield indicator_type, value
+
+    def extract(self, text):
+        """
+        Extracts the distinct indicators in text.
+
+        :param str text: The text.
+        :return: A list of |Indicator| objects, in the order they first appear in the text.
+        """
+
+        return list(self._extract_chunks([text], set()))
+
+    def extract_stream(self, stream, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Extracts the distinct indicators in a stream, such as a large file, reading ``chunk_size`` characters at a time.
+        Chunks are split at whitespace, so indicators that span two reads are still found.
+
+        :param stream: A file object, opened in text mode, or in binary mode to read UTF-8 text.
+        :param int chunk_size: The number of characters to read at a time.
+        :return: A generator of |Indicator| objects, in the order they first appear in the stream.
+        """
+
+        def read_chunks():
+            decoder = None
+            carry = u""
+            while True:
+                chunk = stream.read(chunk_size)
+                if not isinstance(chunk, string_types):
+                    if decoder is None:
+                        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                    chunk = decoder.decode(chunk, final=len(chunk) == 0)
+
+                if len(chunk) == 0:
+                    break
+
+                text = carry + chunk
+                # keep the text after the last whitespace for the next chunk, since it may continue there
+                end = max(text.rfind(u" "), text.rfind(u"\n"), text.rfind(u"\t"))
+                if end < 0 or len(text) - end > _MAX_CARRY:
+                    end = len(text)
+                carry = text[end:]
+                yield text[:end]
+
+            if carry:
+                yield carry
+
+        return self._extract_chunks(read_chunks(), set())
+
+    def _extract_chunks(self, chunks, seen):
+        """
+        :param chunks: An iterable of text.
+        :param set seen: The (type, value) tuples of the indicators already returned.
+        :return: A generator of |Indicator| objects that are not in ``seen`` or the whitelist.
+        """
+
+        whitelist = self.whitelist
+
+        for chunk in chunks:
+            start = time.time()
+            indicators = []
+            for key in self.find(chunk):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if whitelist is not None and whitelist.is_whitelisted(key[1]):
+                    continue
+                indicators.append(Indicator(value=key[1], type=key[0]))
+
+            with self._lock:
+                self.characters += len(chunk)
+                self.seconds += time.time() - start
+                self.indicators += len(indicators)
+
+            for indicator in indicators:
+                yield indicator
+
+    def get_stats(self):
+        """
+        :return: A dict containing the number of 'characters' scanned, the number of 'seconds' spent scanning them, the
+            throughput in 'mb_per_second' (millions of characters per second), and the number of distinct
+            'indicators' returned.
+        """
+
+        with self._lock:
+            return {
+                'characters': self.characters,
+                'seconds': self.seconds,
+                'mb_per_second': self.characters / 1e6 / self.seconds if self.seconds > 0 else 0.0,
+                'indicators': self.indicators,
+            }
+
+
+def extract_indicators(text, types=None, whitelist=None):
+    """
+    Extracts the distinct indicators in text with an |IndicatorExtractor|.
+
+    :param str text: The text.
+    :param types: The types of indicator to extract (defaults to ``EXTRACTABLE_TYPES``).
+    :param whitelist: A |WhitelistIndex|; whitelisted indicators are not returned (optional).
+    :return: A list of |Indicator| objects, in the order they first appear in the text.
+
+    Example:
+
+    >>> [(i.type, i.value) for i in extract_indicators(u"Callback to hxxp://evil[.]com/a from 10.0.0.1")]
+    [('URL', 'http://evil.com/a'), ('IP', '10.0.0.1')]
+    """
+
+    return IndicatorExtractor(types=types, whitelist=whitelist).extract(text)
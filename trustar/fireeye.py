@@ -0,0 +1,162 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str
+from future import standard_library
+from six import string_types
+
+# external imports
+import re
+
+# package imports
+from .models import Report
+from .utils import get_logger, iter_json_array, DEFAULT_MAX_WORKERS
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+class AlertFilter(object):
+    """
+    Decides which FireEye alerts should not be submitted as reports.  All of the conditions are checked in a single
+    pass over each alert, and the message conditions are compiled into a single regular expression, so the cost of
+    filtering an alert does not grow with the number of message conditions.
+
+    The default filter skips the alerts that were closed as false positives, FireEye test events, and alerts about
+    Windows methodology, Shellshock and web application attacks.
+
+    Example:
+
+    >>> alert_filter = AlertFilter(messages={'scans': "PORT SCAN"})
+    >>> alert_filter.get_reason({'displayId': 1, 'message': "Possible PORT SCAN"})
+    'scans'
+    """
+
+    DEFAULT_CLOSED_STATES = ('False Positive',)
+    DEFAULT_VIRUSES = ('fetestevent',)
+    DEFAULT_MESSAGES = {
+        'win_methodology': "WINDOWS METHODOLOGY",
+        'bash_shellshock': "BASH [Shellshock HTTP]",
+        'web_app_attack': "METHODOLOGY - WEB APP ATTACK",
+    }
+
+    def __init__(self, closed_states=DEFAULT_CLOSED_STATES, viruses=DEFAULT_VIRUSES, messages=None):
+        """
+        Constructs an AlertFilter object.
+
+        :param closed_states: Alerts with any of these values of ``closedState`` are skipped, with the reason
+            ``false_positive``.
+        :param viruses: Alerts with any of these values of ``distinguishers.virus`` are skipped, with the reason
+            ``fetest``.
+        :param dict messages: A dictionary mapping reasons to substrings; alerts whose ``message`` contains a substring
+            are skipped with the corresponding reason (defaults to ``DEFAULT_MESSAGES``).
+        """
+
+        if messages is None:
+            messages = self.DEFAULT_MESSAGES
+
+        self.closed_states = frozenset(closed_states)
+        self.viruses = frozenset(viruses)
+
+        self._message_reasons = {substring: reason for reason, substring in messages.items()}
+        if len(messages) > 0:
+            # longest first, so that a substring that contains another one is matched as itself
+            substrings = sorted(self._message_reasons, key=len, reverse=True)
+            self._message_pattern = re.compile(u"|".join(re.escape(s) for s in substrings))
+        else:
+            self._message_pattern = None
+
+    def get_reason(self, alert):
+        """
+        :param dict alert: The alert.
+        :return: The reason the alert should be skipped, or ``None`` if it should be submitted.
+        """
+
+        if alert.get('closedState') in self.closed_states:
+            return 'false_positive'
+
+        distinguishers = alert.get('distinguishers')
+        if isinstance(distinguishers, dict) and distinguishers.get('virus') in self.viruses:
+            return 'fetest'
+
+        if self._message_pattern is not None:
+            message = alert.get('message')
+            if isinstance(message, string_types):
+                match = self._message_pattern.search(message)
+                if match is not None:
+                    return self._message_reasons[match.group()]
+
+        return None
+
+
+def read_alerts(stream, chunk_size=1 << 16):
+    """
+    Parses the alerts in a FireEye alerts API export (a JSON object with an ``alerts`` array) one at a time, without
+    reading the whole export into memory.
+
+    :param stream: The export, as a file object opened in text mode.
+    :param int chunk_size: The number of characters to read at a time.
+    :return: A generator of the alerts, as dictionaries.
+    """
+
+    return iter_json_array(stream, key='alerts', chunk_size=chunk_size)
+
+
+def alert_to_report(alert, is_enclave=True, enclave_ids=None):
+    """
+    Creates a report from a FireEye alert.  The title is the display ID and message of the alert, and the body lists
+    every field of the alert on its own line.
+
+    :param dict alert: The alert.
+    :param boolean is_enclave: Whether the report is submitted to enclaves or to the community.
+    :param list(str) enclave_ids: The enclaves to submit the report to (optional - by default the enclaves of the
+        |TruStar| object submitting it are used).
+    :return: The |Report| object.
+    """
+
+    body = u"".join(u"%s: %s\n" % (key, value) for key, value in alert.items())
+
+    return Report(title=u"%s %s" % (alert.get('displayId'), alert.get('message')),
+                  body=body,
+                  time_began=alert.get('createDate'),
+                  is_enclave=is_enclave,
+                  enclave_ids=enclave_ids)
+
+
+def ingest_alerts(client, alerts, alert_filter=None, on_skip=None, is_enclave=True, enclave_ids=None,
+                  max_workers=DEFAULT_MAX_WORKERS, rate_limiter=None):
+    """
+    Submits FireEye alerts as reports.  Alerts are filtered and converted as they are taken from ``alerts``, and the
+    reports are submitted concurrently with |submit_reports|, so memory use does not depend on the number of alerts.
+
+    :param client: The |TruStar| object to submit the reports with.
+    :param alerts: An iterable of alerts, such as the generator returned by ``read_alerts``.
+    :param alert_filter: The |AlertFilter| that decides which alerts are skipped (defaults to ``AlertFilter()``).
+    :param on_skip: A function called with each skipped alert and the reason it was skipped (optional).
+    :param boolean is_enclave: Whether the reports are submitted to enclaves or to the community.
+    :param list(str) enclave_ids: The enclaves to submit the reports to (optional).
+    :param int max_workers: The maximum number of reports to submit concurrently.
+    :param rate_limiter: A |RateLimiter| to acquire before each submission (optional).
+    :return: A generator of the results of |submit_reports|, one per submitted alert.
+
+    Example:
+
+    >>> with io.open("alerts.json", 'r', encoding='utf-8') as f:
+    >>>     for result in ingest_alerts(ts, read_alerts(f), rate_limiter=RateLimiter(rate=5)):
+    >>>         print(result['report'].id)
+    """
+
+    if alert_filter is None:
+        alert_filter = AlertFilter()
+
+    def get_reports():
+        for alert in alerts:
+            reason = alert_filter.get_reason(alert)
+            if reason is not None:
+                if on_skip is not None:
+                    on_skip(alert, reason)
+                continue
+            yield alert_to_report(alert, is_enclave=is_enclave, enclave_ids=enclave_ids)
+
+    return client.submit_reports(get_reports(), max_workers=max_workers, rate_limiter=rate_limiter)
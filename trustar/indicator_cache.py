@@ -0,0 +1,210 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str
+from future import standard_library
+from six import string_types
+
+# external imports
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+
+class IndicatorCache(object):
+    """
+    An in-process cache of indicator lookups, used by |get_indicators_metadata| and |get_indicator_details| when
+    assigned to the ``indicator_cache`` attribute of a |TruStar| object.  Only the indicators that are not in the
+    cache are requested from the server.
+
+    Entries are keyed by indicator value, type, and enclave IDs, and expire ``ttl`` seconds after they are stored.
+    Lookups that found nothing on the server are cached too (for ``negative_ttl`` seconds), so that repeated lookups
+    of unknown indicators do not keep reaching the server.  Once the cache holds more than ``max_entries`` entries, or
+    more than approximately ``max_bytes`` bytes, the least recently used entries are evicted.
+
+    Cached |Indicator| objects are shared between all callers, so they should not be modified.
+
+    Example:
+
+    >>> ts.indicator_cache = IndicatorCache(ttl=15 * 60)
+    >>> ts.get_indicators_metadata([Indicator(value="evil.com")])
+    >>> ts.get_indicators_metadata([Indicator(value="evil.com")])
+    >>> print(ts.indicator_cache.get_stats()['hit_rate'])
+    0.5
+    """
+
+    def __init__(self, max_entries=100000, max_bytes=64 * 1024 * 1024, ttl=60 * 60, negative_ttl=5 * 60):
+        """
+        Constructs an IndicatorCache object.
+
+        :param int max_entries: The maximum number of entries to keep.
+        :param int max_bytes: The approximate maximum amount of memory used by the cached indicators.
+        :param ttl: The number of seconds that indicators found on the server are cached for.
+        :param negative_ttl: The number of seconds that lookups which found no indicators are cached for.
+        """
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_value = {}
+        self._size = 0
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(value, indicator_type=None, enclave_ids=None):
+        """
+        :return: The cache key for a lookup of an indicator value, with an optional type and enclave IDs.
+        """
+
+        if enclave_ids is not None:
+            enclave_ids = tuple(sorted(enclave_ids))
+
+        return value, indicator_type, enclave_ids
+
+    def get(self, key):
+        """
+        Gets the indicators cached for a lookup.
+
+        :param key: The key returned by ``get_key``.
+        :return: The list of |Indicator| objects found by the lookup (empty if nothing was found), or ``None`` if the
+            lookup is not in the cache or has expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] < time.time():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # mark entry as most recently used
+            self._entries.pop(key)
+            self._entries[key] = entry
+
+            indicators = entry[2]
+            if len(indicators) > 0:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+
+            return indicators
+
+    def put(self, key, indicators):
+        """
+        Stores the indicators found by a lookup.
+
+        :param key: The key returned by ``get_key``.
+        :param indicators: The list of |Indicator| objects found.  An empty list records that nothing was found.
+        """
+
+        ttl = self.ttl if len(indicators) > 0 else self.negative_ttl
+        size = self._get_size(key, indicators)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.time() + ttl, size, list(indicators))
+            self._keys_by_value.setdefault(self._normalize_value(key[0]), set()).add(key)
+            self._size += size
+
+            # evict least recently used entries
+            while len(self._entries) > self.max_entries or (self._size > self.max_bytes and len(self._entries) > 1):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def remove(self, value):
+        """
+        Removes all entries for an indicator value, whatever their type and enclave IDs, such as after the indicator's
+        tags have changed.
+
+        :param value: The indicator value.  It is compared case-insensitively.
+        :return: The number of entries removed.
+        """
+
+        with self._lock:
+            keys = list(self._keys_by_value.get(self._normalize_value(value), ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.  The statistics are kept.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_value.clear()
+            self._size = 0
+
+    def get_stats(self):
+        """
+        :return: A dict containing the number of 'entries' in the cache, their approximate size in 'bytes', the number
+            of 'hits', 'negative_hits' (hits for lookups that found nothing), 'misses', and 'evictions', and the
+            'hit_rate' (the fraction of lookups that were answered by the cache).
+        """
+
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': float(self.hits + self.negative_hits) / lookups if lookups > 0 else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        """
+        Removes an entry.  The lock must be held by the caller.
+        """
+
+        entry = self._entries.pop(key)
+        self._size -= entry[1]
+
+        value = self._normalize_value(key[0])
+        keys = self._keys_by_value[value]
+        keys.discard(key)
+        if len(keys) == 0:
+            del self._keys_by_value[value]
+
+    @staticmethod
+    def _normalize_value(value):
+        # the server may normalize the case of values
+        return value.lower() if isinstance(value, string_types) else value
+
+    @staticmethod
+    def _get_size(key, indicators):
+        """
+        :return: An estimate of the memory used by a cache entry.
+        """
+
+        size = sys.getsizeof(key) + sum(sys.getsizeof(k) for k in key if k is not None)
+        for indicator in indicators:
+            size += sys.getsizeof(indicator)
+            for value in indicator.to_dict(remove_nones=True).values():
+                size += sys.getsizeof(value)
+
+        return size
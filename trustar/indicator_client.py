@@ -9,8 +9,8 @@ import functools
 import json
 
 # package imports
-from .models import Indicator, Page, Tag
-from .utils import get_logger
+from .models import Indicator, IndicatorBatch, IndicatorView, Page, Tag
+from .utils import get_logger, chunk_query_params, parallel_map, DEFAULT_MAX_WORKERS
 
 # python 2 backwards compatibility
 standard_library.install_aliases()
@@ -20,6 +20,15 @@ logger = get_logger(__name__)
 
 class IndicatorClient(object):
 
+    @property
+    def _indicator_model(self):
+        """
+        :return: The class of the items of pages of indicators: |IndicatorView| if the ``lazy_models`` config value is
+            ``True``, otherwise |Indicator|.
+        """
+
+        return IndicatorView if self.lazy_models else Indicator
+
     def get_indicators_for_report_page(self, report_id, page_number=None, page_size=None):
         """
         Get a page of the indicators that were extracted from a report.
@@ -35,7 +44,7 @@ class IndicatorClient(object):
             'pageSize': page_size
         }
         resp = self._client.get("reports/%s/indicators" % report_id, params=params)
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(resp.json(), content_type=self._indicator_model)
 
     def get_community_trends(self, indicator_type=None, days_back=None):
         """
@@ -78,7 +87,7 @@ class IndicatorClient(object):
 
         resp = self._client.get("indicators/related", params=params)
 
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(resp.json(), content_type=self._indicator_model)
 
     def search_indicators_page(self, search_term, enclave_ids=None, page_size=None, page_number=None):
         """
@@ -101,7 +110,7 @@ class IndicatorClient(object):
 
         resp = self._client.get("indicators/search", params=params)
 
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(resp.json(), content_type=self._indicator_model)
 
     def submit_indicators(self, indicators, enclave_ids=None, tags=None):
         """
@@ -111,7 +120,7 @@ class IndicatorClient(object):
         each Indicator (which will take precedence over the submission tags). The tags can be existing or new,
         and are identified by name and enclaveId.
 
-        :param list(Indicator) indicators: a list of |Indicator| objects.
+        :param list(Indicator) indicators: a list of |Indicator| objects, or an |IndicatorBatch|.
         :param list(string) enclave_ids: a list of enclave IDs.
         :param list(string) tags: a list of |Tag| objects that will be applied to all indicators in the submission.
         """
@@ -122,9 +131,14 @@ class IndicatorClient(object):
         if tags is not None:
             tags = [tag.to_dict() for tag in tags]
 
+        if isinstance(indicators, IndicatorBatch):
+            content = indicators.to_submission_content()
+        else:
+            content = [indicator.to_dict() for indicator in indicators]
+
         body = {
             "enclaveIds": enclave_ids,
-            "content": [indicator.to_dict() for indicator in indicators],
+            "content": content,
             "tags": tags
         }
         self._client.post("indicators", data=json.dumps(body))
@@ -144,6 +158,21 @@ class IndicatorClient(object):
         :return: a |Page| of indicators
         """
 
+        page = self._get_indicators_page_json(from_time=from_time, to_time=to_time, page_number=page_number,
+                                              page_size=page_size, enclave_ids=enclave_ids,
+                                              included_tag_ids=included_tag_ids, excluded_tag_ids=excluded_tag_ids)
+
+        return Page.from_dict(page, content_type=self._indicator_model)
+
+    def _get_indicators_page_json(self, from_time=None, to_time=None, page_number=None, page_size=None,
+                                  enclave_ids=None, included_tag_ids=None, excluded_tag_ids=None):
+        """
+        Gets the body of a response from the indicators endpoint, without converting the indicators to |Indicator|
+        objects.  See |get_indicators_page|.
+
+        :return: The response body, as a dictionary.
+        """
+
         params = {
             'from': from_time,
             'to': to_time,
@@ -156,7 +185,7 @@ class IndicatorClient(object):
 
         resp = self._client.get("indicators", params=params)
 
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return resp.json()
 
     def get_indicator_metadata(self, value):
         """
@@ -182,31 +211,57 @@ class IndicatorClient(object):
         else:
             return None
 
-    def get_indicators_metadata(self, indicators):
+    def get_indicators_metadata(self, indicators, max_workers=DEFAULT_MAX_WORKERS):
         """
         Provide metadata associated with an list of indicators, including value, indicatorType, noteCount, sightings,
         lastSeen, enclaveIds, and tags. The metadata is determined based on the enclaves the user making the request has
         READ access to.
 
+        If the query string for all of the indicators would be too long for a single request, the indicators are split
+        into several requests, which are made concurrently.
+
         :param indicators: a list of |Indicator| objects to query.  Values are required, types are optional.  Types
             might be required to distinguish in a case where one indicator value has been associated with multiple types
             based on different contexts.
-        :return: A list of |Indicator| objects.
+        :param int max_workers: the maximum number of requests to make concurrently.
+        :return: A list of |Indicator| objects, in the same order as the indicators that were queried.
+        """
+
+        if self.indicator_cache is not None:
+            return self._get_cached_indicators(
+                queries=indicators,
+                get_key=lambda i: self.indicator_cache.get_key(i.value, i.type),
+                get_value=lambda i: i.value,
+                get_type=lambda i: i.type,
+                fetch=lambda misses: self._get_indicators_metadata(misses, max_workers=max_workers))
+
+        return self._get_indicators_metadata(indicators, max_workers=max_workers)
+
+    def _get_indicators_metadata(self, indicators, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Requests the metadata of a list of indicators from the server, bypassing the ``indicator_cache``.  See
+        |get_indicators_metadata|.
         """
 
+        values = [i.value for i in indicators]
+
         params = {
-            'values': [i.value for i in indicators],
+            'values': values,
             'types': [i.type for i in indicators]
         }
 
         if len(params.get('types')) == 0:
             params['types'] = None
 
-        resp = self._client.get("indicators/metadata", params=params)
+        def get_chunk(chunk_params):
+            resp = self._client.get("indicators/metadata", params=chunk_params)
+            return [Indicator.from_dict(x) for x in resp.json()]
+
+        chunks = parallel_map(get_chunk, chunk_query_params(params, ['values', 'types']), max_workers=max_workers)
 
-        return [Indicator.from_dict(x) for x in resp.json()]
+        return _merge_in_input_order(chunks, values)
 
-    def get_indicator_details(self, indicators, enclave_ids=None):
+    def get_indicator_details(self, indicators, enclave_ids=None, max_workers=DEFAULT_MAX_WORKERS):
         """
         NOTE: This method uses an API endpoint that is intended for internal use only, and is not officially supported.
 
@@ -217,21 +272,100 @@ class IndicatorClient(object):
 
         :param indicators: A list of indicator values of any type.
         :param enclave_ids: Only find details for indicators in these enclaves.
+        :param int max_workers: the maximum number of requests to make concurrently, if the indicators have to be split
+            into several requests to keep the query string short enough.
 
-        :return: a list of |Indicator| objects with all fields (except possibly ``reason``) filled out
+        :return: a list of |Indicator| objects with all fields (except possibly ``reason``) filled out, in the same order
+            as the indicator values that were queried
         """
 
         # if the indicators parameter is a string, make it a singleton
         if isinstance(indicators, string_types):
             indicators = [indicators]
 
+        if self.indicator_cache is not None:
+            return self._get_cached_indicators(
+                queries=indicators,
+                get_key=lambda value: self.indicator_cache.get_key(value, enclave_ids=enclave_ids),
+                get_value=lambda value: value,
+                get_type=lambda value: None,
+                fetch=lambda misses: self._get_indicator_details(misses, enclave_ids, max_workers=max_workers))
+
+        return self._get_indicator_details(indicators, enclave_ids, max_workers=max_workers)
+
+    def _get_indicator_details(self, indicators, enclave_ids=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Requests the details of a list of indicator values from the server, bypassing the ``indicator_cache``.  See
+        |get_indicator_details|.
+        """
+
         params = {
             'enclaveIds': enclave_ids,
             'indicatorValues': indicators
         }
-        resp = self._client.get("indicators/details", params=params)
 
-        return [Indicator.from_dict(indicator) for indicator in resp.json()]
+        def get_chunk(chunk_params):
+            resp = self._client.get("indicators/details", params=chunk_params)
+            return [Indicator.from_dict(indicator) for indicator in resp.json()]
+
+        chunks = parallel_map(get_chunk, chunk_query_params(params, ['indicatorValues']), max_workers=max_workers)
+
+        return _merge_in_input_order(chunks, indicators)
+
+    def _get_cached_indicators(self, queries, get_key, get_value, get_type, fetch):
+        """
+        Answers a batch of indicator lookups from the ``indicator_cache`` where possible, fetches the rest with a single
+        call to ``fetch``, and caches the results, including lookups that found nothing.
+
+        :param queries: The list of lookups.
+        :param get_key: Takes a lookup and returns its cache key.
+        :param get_value: Takes a lookup and returns the indicator value it is for.
+        :param get_type: Takes a lookup and returns the indicator type it is restricted to, or ``None``.
+        :param fetch: Takes a list of lookups and returns the list of |Indicator| objects found for them.
+        :return: The list of |Indicator| objects found, in the same order as ``queries``.
+        """
+
+        cache = self.indicator_cache
+
+        found = {}
+        misses = []
+        for query in queries:
+            key = get_key(query)
+            if key not in found:
+                found[key] = cache.get(key)
+                if found[key] is None:
+                    misses.append(query)
+
+        if len(misses) > 0:
+
+            # group fetched indicators by value; the server may normalize the case of values
+            by_value = {}
+            for indicator in fetch(misses):
+                value = indicator.value
+                if isinstance(value, string_types):
+                    value = value.lower()
+                by_value.setdefault(value, []).append(indicator)
+
+            for query in misses:
+                value = get_value(query)
+                if isinstance(value, string_types):
+                    value = value.lower()
+                indicator_type = get_type(query)
+                indicators = [i for i in by_value.get(value, []) if indicator_type is None or i.type == indicator_type]
+
+                key = get_key(query)
+                cache.put(key, indicators)
+                found[key] = indicators
+
+        seen = set()
+        result = []
+        for query in queries:
+            for indicator in found[get_key(query)]:
+                if (indicator.value, indicator.type) not in seen:
+                    seen.add((indicator.value, indicator.type))
+                    result.append(indicator)
+
+        return result
 
     def get_whitelist_page(self, page_number=None, page_size=None):
         """
@@ -247,7 +381,7 @@ class IndicatorClient(object):
             'pageSize': page_size
         }
         resp = self._client.get("whitelist", params=params)
-        return Page.from_dict(resp.json(), content_type=Indicator)
+        return Page.from_dict(resp.json(), content_type=self._indicator_model)
 
     def add_terms_to_whitelist(self, terms):
         """
@@ -258,7 +392,12 @@ class IndicatorClient(object):
         """
 
         resp = self._client.post("whitelist", json=terms)
-        return [Indicator.from_dict(indicator) for indicator in resp.json()]
+        indicators = [Indicator.from_dict(indicator) for indicator in resp.json()]
+
+        if self.whitelist_index is not None:
+            self.whitelist_index.add(indicators)
+
+        return indicators
 
     def delete_indicator_from_whitelist(self, indicator):
         """
@@ -270,6 +409,9 @@ class IndicatorClient(object):
         params = indicator.to_dict()
         self._client.delete("whitelist", params=params)
 
+        if self.whitelist_index is not None:
+            self.whitelist_index.remove(indicator)
+
     def _get_indicators_for_report_page_generator(self, report_id, start_page=0, page_size=None):
         """
         Creates a generator from the |get_indicators_for_report_page| method that returns each successive page.
@@ -343,6 +485,90 @@ class IndicatorClient(object):
                                                                                      page_number=start_page,
                                                                                      page_size=page_size))
 
+    def get_indicator_batches(self, from_time=None, to_time=None, enclave_ids=None,
+                              included_tag_ids=None, excluded_tag_ids=None,
+                              start_page=0, page_size=None):
+        """
+        Creates a generator that returns each successive page of indicators matching the provided filters as an
+        |IndicatorBatch|.  The batches are built directly from the response bodies, without creating an |Indicator|
+        object per indicator.  Takes the same parameters as |get_indicators|.
+
+        :param int from_time: start of time window in milliseconds since epoch (defaults to 7 days ago).
+        :param int to_time: end of time window in milliseconds since epoch (defaults to current time).
+        :param list(string) enclave_ids: a list of enclave IDs from which to get indicators from.
+        :param list(string) included_tag_ids: only indicators containing ALL of these tag GUIDs will be returned.
+        :param list(string) excluded_tag_ids: only indicators containing NONE of these tags GUIDs be returned.
+        :param int start_page: the page to start on.
+        :param int page_size: the number of indicators in each batch.
+        :return: A generator of |IndicatorBatch| objects.
+
+        Example:
+
+        >>> batch = IndicatorBatch.concat(ts.get_indicator_batches(from_time=from_time, page_size=1000)).dedup()
+        >>> ips = batch.group_by_type().get(IndicatorType.IP)
+        """
+
+        def get_page(page_number, page_size):
+            return Page.from_dict(self._get_indicators_page_json(from_time=from_time, to_time=to_time,
+                                                                 page_number=page_number, page_size=page_size,
+                                                                 enclave_ids=enclave_ids,
+                                                                 included_tag_ids=included_tag_ids,
+                                                                 excluded_tag_ids=excluded_tag_ids))
+
+        for page in Page.get_page_generator(get_page, start_page, page_size):
+            yield IndicatorBatch.from_dicts(page.items)
+
+    def export_indicators(self, sink, from_time=None, to_time=None, enclave_ids=None,
+                          included_tag_ids=None, excluded_tag_ids=None, page_size=1000):
+        """
+        Writes the indicators matching the provided filters to a sink, such as an |ArrowSink| with
+        ``INDICATOR_ARROW_COLUMNS``.  The items of each page are written as they are returned by the API, without
+        creating an |Indicator| object per item, so the rows have the keys of the indicator JSON (``value``,
+        ``indicatorType``, ``firstSeen``, ...).  Takes the same filters as |get_indicators|.
+
+        :param sink: The |ExportSink| to write the rows to.  It is not closed by this method.
+        :param int from_time: start of time window in milliseconds since epoch (defaults to 7 days ago).
+        :param int to_time: end of time window in milliseconds since epoch (defaults to current time).
+        :param list(string) enclave_ids: a list of enclave IDs from which to get indicators from.
+        :param list(string) included_tag_ids: only indicators containing ALL of these tag GUIDs will be returned.
+        :param list(string) excluded_tag_ids: only indicators containing NONE of these tags GUIDs be returned.
+        :param int page_size: the number of indicators to request at a time.
+        :return: The number of indicators written.
+        """
+
+        def get_page(page_number, page_size):
+            return Page.from_dict(self._get_indicators_page_json(from_time=from_time, to_time=to_time,
+                                                                 page_number=page_number, page_size=page_size,
+                                                                 enclave_ids=enclave_ids,
+                                                                 included_tag_ids=included_tag_ids,
+                                                                 excluded_tag_ids=excluded_tag_ids))
+
+        count = 0
+        for page in Page.get_page_generator(get_page, 0, page_size):
+            sink.write_rows(page.items)
+            count += len(page.items)
+
+        logger.debug("Exported %d indicators.", count)
+
+        return count
+
+    def export_whitelist(self, sink, page_size=None):
+        """
+        Writes the indicators that the user's company has whitelisted to a sink, one row per indicator, as returned by
+        |Indicator.to_dict| (without ``None`` values).
+
+        :param sink: The |ExportSink| to write the rows to.  It is not closed by this method.
+        :param int page_size: the number of indicators to request at a time.
+        :return: The number of indicators written.
+        """
+
+        count = 0
+        for page in self._get_whitelist_page_generator(page_size=page_size):
+            sink.write_rows([indicator.to_dict(remove_nones=True) for indicator in page.items])
+            count += len(page.items)
+
+        return count
+
     def _get_related_indicators_page_generator(self, indicators=None, enclave_ids=None, start_page=0, page_size=None):
         """
         Creates a generator from the |get_related_indicators_page| method that returns each
@@ -415,3 +641,41 @@ class IndicatorClient(object):
         """
 
         return Page.get_generator(page_generator=self._search_indicators_page_generator(search_term, enclave_ids))
+
+
+def _merge_in_input_order(chunks, values):
+    """
+    Merges the lists of indicators returned for each chunk of a split request into a single list, removing duplicates
+    and sorting the indicators in the order that their values appear in ``values``.  Indicators whose values were
+    normalized by the server (i.e. lowercased) are matched case-insensitively, and any that cannot be matched are
+    placed last.
+
+    :param chunks: A list of lists of |Indicator| objects.
+    :param values: The list of indicator values that were queried.
+    :return: The merged list of |Indicator| objects.
+    """
+
+    positions = {}
+    for i, value in enumerate(values):
+        positions.setdefault(value, i)
+        if isinstance(value, string_types):
+            positions.setdefault(value.lower(), i)
+
+    def position(indicator):
+        value = indicator.value
+        if value in positions:
+            return positions[value]
+        if isinstance(value, string_types) and value.lower() in positions:
+            return positions[value.lower()]
+        return len(values)
+
+    seen = set()
+    merged = []
+    for chunk in chunks:
+        for indicator in chunk:
+            key = (indicator.value, indicator.type)
+            if key not in seen:
+                seen.add(key)
+                merged.append(indicator)
+
+    return sorted(merged, key=position)
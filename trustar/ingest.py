@@ -0,0 +1,96 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from future import standard_library
+
+# package imports
+from .models import Report
+from .utils import get_logger, normalize_timestamps
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+# the default number of rows read from a CSV file at a time
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def read_csv_reports(path, title_column, body_columns=None, time_column=None, external_id_column=None,
+                     is_enclave=True, enclave_ids=None, chunk_size=DEFAULT_CHUNK_SIZE, max_rows=None,
+                     encoding='utf-8'):
+    """
+    Reads a CSV file in which each row describes a report, creating a generator of |Report| objects that can be passed
+    to |submit_reports|.  Requires pandas.
+
+    The file is read ``chunk_size`` rows at a time, so memory use does not depend on the size of the file.  The body of
+    each report lists the non-empty cells of the row under their column names, like::
+
+        TargetIP:
+         10.0.0.1
+
+        Info:
+         Suspicious traffic
+
+    The bodies of each chunk are built with vectorized pandas string operations, one column at a time, and the
+    timestamps of each chunk are normalized with ``normalize_timestamps``.
+
+    :param str path: The path of the CSV file.
+    :param str title_column: The column containing the title of each report.
+    :param list(str) body_columns: The columns to include in the body of each report (defaults to all columns).
+    :param str time_column: The column containing the time each report began (optional).
+    :param str external_id_column: The column containing the external ID of each report (optional).
+    :param boolean is_enclave: Whether the reports are submitted to enclaves or to the community.
+    :param list(str) enclave_ids: The enclaves to submit the reports to (optional - by default the enclaves of the
+        |TruStar| object submitting them are used).
+    :param int chunk_size: The number of rows to read at a time.
+    :param int max_rows: The maximum number of rows to read (optional).
+    :param str encoding: The encoding of the file.
+    :return: The generator.
+
+    Example:
+
+    >>> reports = read_csv_reports("reports.csv", title_column="TrackingNumber", time_column="ReportTime",
+    >>>                            enclave_ids=ts.enclave_ids)
+    >>> for result in ts.submit_reports(reports):
+    >>>     print(result['report'].id)
+    """
+
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("pandas is required to read reports from a CSV file.")
+
+    # read every cell as a string, so that numbers are kept as they were written and empty cells are NaN
+    chunks = pd.read_csv(path, dtype=str, chunksize=chunk_size, nrows=max_rows, encoding=encoding)
+
+    for chunk in chunks:
+        columns = body_columns if body_columns is not None else list(chunk.columns)
+
+        bodies = pd.Series("", index=chunk.index, dtype=object)
+        for column in columns:
+            values = chunk[column].str.strip()
+            present = values.notnull() & (values != "")
+            bodies = bodies + ("%s:\n " % column + values + "\n \n").where(present, "")
+
+        titles = chunk[title_column].where(chunk[title_column].notnull(), "")
+
+        if time_column is not None:
+            # times in seconds or milliseconds since epoch are read as strings too
+            times = normalize_timestamps(None if pd.isnull(value) else int(value) if value.isdigit() else value
+                                         for value in chunk[time_column].str.strip())
+        else:
+            times = [None] * len(chunk)
+
+        if external_id_column is not None:
+            external_ids = [None if pd.isnull(value) else value for value in chunk[external_id_column]]
+        else:
+            external_ids = [None] * len(chunk)
+
+        for title, body, time_began, external_id in zip(titles, bodies, times, external_ids):
+            yield Report(title=title,
+                         body=body,
+                         time_began=time_began,
+                         external_id=external_id,
+                         is_enclave=is_enclave,
+                         enclave_ids=enclave_ids)
@@ -0,0 +1,667 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, range, str
+from future import standard_library
+
+# external imports
+import mmap
+import multiprocessing
+import os
+import re
+
+# package imports
+from .models import IndicatorType
+from .utils import get_logger
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+# the default number of bytes of a file scanned by each process at a time
+DEFAULT_SHARD_SIZE = 64 * 1024 * 1024
+
+# the default number of bytes of a shard decoded and scanned at a time
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# string indicators shorter than this are ignored, since they would match almost any text
+MIN_STRING_LENGTH = 3
+
+# the number of characters of text checked for matches at a time, before the matches in it are located
+_BLOCK_SIZE = 16 * 1024
+
+# the maximum number of distinct IP addresses whose CIDR lookups are remembered
+_MAX_CACHED_ADDRESSES = 100000
+
+_IPV4_PATTERN = re.compile(r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$")
+_CIDR_PATTERN = re.compile(r"^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})/(\d{1,2})$")
+_HASH_PATTERN = re.compile(r"^(?:[0-9a-f]{32}|[0-9a-f]{40}|[0-9a-f]{64})$")
+
+_HASH_TYPES = (IndicatorType.MD5, IndicatorType.SHA1, IndicatorType.SHA256)
+
+# the ahocorasick module, imported by _import_ahocorasick
+_ahocorasick = False
+
+
+def _import_ahocorasick():
+    """
+    :return: The ``ahocorasick`` module, or ``None`` if it is not installed.  The import is only attempted once.
+    """
+
+    global _ahocorasick
+    if _ahocorasick is False:
+        try:
+            import ahocorasick as _ahocorasick
+        except ImportError:
+            _ahocorasick = None
+    return _ahocorasick
+
+
+def _is_word_char(char):
+    """
+    :return: Whether a character can be part of the same word as an indicator, so that an indicator next to it does
+        not match.
+    """
+
+    return char.isalnum() or char in u"_-"
+
+
+def _parse_ipv4(value):
+    """
+    :return: An IPv4 address as an integer, or ``None`` if ``value`` is not an IPv4 address.
+    """
+
+    match = _IPV4_PATTERN.match(value)
+    if match is None:
+        return None
+
+    address = 0
+    for octet in match.groups():
+        octet = int(octet)
+        if octet > 255:
+            return None
+        address = (address << 8) | octet
+    return address
+
+
+def _format_ipv4(address):
+    return u".".join(str((address >> shift) & 255) for shift in (24, 16, 8, 0))
+
+
+class _CidrTrie(object):
+    """
+    A radix trie of CIDR blocks with one level per octet, for finding the most specific block that contains an IPv4
+    address in at most 4 steps, however many blocks there are.  A block whose prefix length is not a multiple of 8 is
+    stored at each of the nodes of the next octet that it covers.  Each node is a list of a dict of its children by
+    octet, the value stored at it, and the prefix length of the block the value belongs to.
+    """
+
+    def __init__(self):
+        self._root = [{}, None, -1]
+        self._blocks = set()
+        self.count = 0
+
+    def add(self, network, prefix_length, value):
+        self._blocks.add((network, prefix_length))
+        self.count = len(self._blocks)
+        octets = [(network >> shift) & 255 for shift in (24, 16, 8, 0)]
+
+        node = self._root
+        for octet in octets[:prefix_length // 8]:
+            node = node[0].setdefault(octet, [{}, None, -1])
+
+        if prefix_length % 8 == 0:
+            nodes = [node]
+        else:
+            first = octets[prefix_length // 8]
+            nodes = [node[0].setdefault(octet, [{}, None, -1])
+                     for octet in range(first, first + (1 << (8 - prefix_length % 8)))]
+
+        for node in nodes:
+            # a longer prefix expanded to the same node is more specific
+            if node[2] <= prefix_length:
+                node[1] = value
+                node[2] = prefix_length
+
+    def lookup(self, octets):
+        """
+        :param octets: The four octets of the address, as integers.
+        :return: The value of the most specific block containing the address, or ``None``.
+        """
+
+        node = self._root
+        found = node[1]
+        for octet in octets:
+            node = node[0].get(octet)
+            if node is None:
+                break
+            if node[1] is not None:
+                found = node[1]
+        return found
+
+
+def _get_trie_pattern(strings):
+    """
+    Compiles strings into a regular expression that follows a trie of them, so that at each position of the text the
+    regular expression engine follows a single path through the trie, like an Aho-Corasick automaton, instead of trying
+    each string in turn.  Longer strings are tried before their prefixes.
+
+    :param strings: The strings.
+    :return: The pattern, as a string.
+    """
+
+    root = {}
+    for string in strings:
+        node = root
+        for char in string:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def to_pattern(node):
+        branches = []
+        for char in sorted(k for k in node if k):
+            # follow chains of nodes with a single child without nesting, so that long strings do not nest deeply
+            chars = [char]
+            child = node[char]
+            while len(child) == 1 and '' not in child:
+                next_char = next(iter(child))
+                chars.append(next_char)
+                child = child[next_char]
+            branches.append(re.escape(u"".join(chars)) + to_pattern(child))
+
+        if len(branches) == 0:
+            return u""
+        pattern = branches[0] if len(branches) == 1 else u"(?:%s)" % u"|".join(branches)
+        if '' in node:
+            pattern = u"(?:%s)?" % pattern
+        return pattern
+
+    return to_pattern(root)
+
+
+class IndicatorMatch(object):
+    """
+    An occurrence of a known indicator in scanned text.
+
+    :ivar indicator: The |Indicator| that matched.
+    :ivar value: The text that matched, as it appears in the scanned text.
+    :ivar offset: The position of the match: the byte offset in a file scanned with ``scan_file``, or the character
+        offset in text scanned with ``match``.
+    :ivar line: The line containing the match.
+    :ivar path: The path of the scanned file, or ``None``.
+    """
+
+    def __init__(self, indicator, value, offset, line, path=None):
+        self.indicator = indicator
+        self.value = value
+        self.offset = offset
+        self.line = line
+        self.path = path
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'offset': self.offset,
+            'value': self.value,
+            'line': self.line,
+            'indicator': self.indicator.to_dict(remove_nones=True),
+        }
+
+    def __repr__(self):
+        return "IndicatorMatch(%r, %r, %d)" % (self.indicator.value, self.path, self.offset)
+
+
+class IndicatorMatcher(object):
+    """
+    Finds known indicators, such as those returned by |get_indicators|, in local text like firewall and proxy logs,
+    without a request to the server per line.  Each kind of indicator is matched with a structure suited to it:
+
+    * IP addresses are looked up in a hash table, and CIDR blocks in a radix trie with one level per octet, so an
+      address found in the text matches the most specific block that contains it.
+    * MD5, SHA1 and SHA256 hashes are looked up in a hash set.
+    * All other indicators (URLs, domains, e-mail addresses, CVEs, malware names, and so on) are matched as strings,
+      case-insensitively, wherever they occur between non-word characters.  If the ``pyahocorasick`` package is
+      installed, they are matched with an Aho-Corasick automaton; otherwise they are compiled into a single regular
+      expression that follows a trie of the strings.
+
+    Every occurrence of every indicator is reported, including occurrences inside the match of another indicator, so
+    ``http://bad.org/x`` in the text matches both ``http://bad.org/x`` and ``bad.org``, and ``http://1.2.3.4/x``
+    matches both the URL and the IP address ``1.2.3.4``.  Matches are reported in order of offset, and matches at the
+    same offset in order of length.
+
+    The IP addresses and hashes in the text are found with one precompiled regular expression.  Each block of lines is
+    first checked for indicators by comparing the values found in it with the indicators as sets, and only blocks that
+    contain indicators are scanned again to locate them.
+
+    Files are scanned with ``scan_file``, which memory-maps the file and can split it into shards at line boundaries
+    that are scanned by several processes.
+
+    Example:
+
+    >>> matcher = IndicatorMatcher.from_client(ts, enclave_ids=ts.enclave_ids)
+    >>> for match in matcher.scan_file("proxy.log", processes=4):
+    >>>     print(match.offset, match.indicator.value, match.line)
+    """
+
+    def __init__(self, indicators=None):
+        """
+        Constructs an IndicatorMatcher object.
+
+        :param indicators: An iterable of |Indicator| objects to match (optional).
+        """
+
+        self._indicators = {}
+        self._addresses = {}
+        self._networks = _CidrTrie()
+        self._hashes = set()
+        self._strings = {}
+
+        self._pattern = None
+        self._group_names = []
+        self._automaton = None
+        self._string_pattern = None
+        self._string_prefixes = {}
+        self._compiled = False
+        self._address_cache = {}
+
+        if indicators is not None:
+            self.add(indicators)
+
+    @classmethod
+    def from_client(cls, client, from_time=None, to_time=None, enclave_ids=None, included_tag_ids=None,
+                    excluded_tag_ids=None, page_size=1000):
+        """
+        Creates a matcher of the indicators returned by |get_indicators|.
+
+        :param client: The |TruStar| object to get the indicators with.
+        :param int from_time: start of time window in milliseconds since epoch (defaults to 7 days ago).
+        :param int to_time: end of time window in milliseconds since epoch (defaults to current time).
+        :param list(str) enclave_ids: The enclaves to get indicators from.
+        :param list(str) included_tag_ids: only indicators containing ALL of these tag GUIDs are matched.
+        :param list(str) excluded_tag_ids: only indicators containing NONE of these tags GUIDs are matched.
+        :param int page_size: The number of indicators to request at a time.
+        :return: The |IndicatorMatcher|.
+        """
+
+        return cls(client.get_indicators(from_time=from_time, to_time=to_time, enclave_ids=enclave_ids,
+                                         included_tag_ids=included_tag_ids, excluded_tag_ids=excluded_tag_ids,
+                                         page_size=page_size))
+
+    def add(self, indicators):
+        """
+        Adds indicators to match.
+
+        :param indicators: An iterable of |Indicator| objects.
+        """
+
+        for indicator in indicators:
+            if indicator.value is None:
+                continue
+            value = indicator.value.strip()
+
+            if indicator.type in (IndicatorType.IP, None):
+                address = _parse_ipv4(value)
+                if address is not None:
+                    key = _format_ipv4(address)
+                    self._indicators[key] = indicator
+                    self._addresses[key] = key
+                    continue
+
+            if indicator.type in (IndicatorType.CIDR_BLOCK, None):
+                match = _CIDR_PATTERN.match(value)
+                if match is not None:
+                    address = _parse_ipv4(match.group(1))
+                    prefix_length = int(match.group(2))
+                    if address is not None and prefix_length <= 32:
+                        network = address & ~((1 << (32 - prefix_length)) - 1) & 0xffffffff
+                        key = u"%s/%d" % (_format_ipv4(network), prefix_length)
+                        self._indicators[key] = indicator
+                        self._networks.add(network, prefix_length, key)
+                        continue
+
+            lowered = value.lower()
+            if indicator.type in _HASH_TYPES + (None,) and _HASH_PATTERN.match(lowered):
+                self._indicators[lowered] = indicator
+                self._hashes.add(lowered)
+                continue
+
+            if len(lowered) >= MIN_STRING_LENGTH:
+                # text is scanned as Latin-1, so that each byte of a file is one character
+                key = lowered.encode('utf-8').decode('latin-1')
+                self._indicators[key] = indicator
+                self._strings[key] = key
+
+        self._compiled = False
+
+    def __len__(self):
+        return len(self._indicators)
+
+    def get_stats(self):
+        """
+        :return: A dict containing the number of 'addresses', 'networks', 'hashes' and 'strings' being matched, and the
+            'string_matcher' used ('aho-corasick' or 'regex').
+        """
+
+        self._compile()
+        return {
+            'addresses': len(self._addresses),
+            'networks': self._networks.count,
+            'hashes': len(self._hashes),
+            'strings': len(self._strings),
+            'string_matcher': 'aho-corasick' if self._automaton is not None else 'regex',
+        }
+
+    def _compile(self):
+        """
+        Builds the regular expressions (and the Aho-Corasick automaton) after indicators have been added.
+        """
+
+        if self._compiled:
+            return
+
+        ahocorasick = _import_ahocorasick()
+
+        self._automaton = None
+        self._string_pattern = None
+        self._string_prefixes = {}
+        groups = []
+
+        if len(self._strings) > 0:
+            if ahocorasick is not None:
+                automaton = ahocorasick.Automaton()
+                for key in self._strings:
+                    automaton.add_word(key, key)
+                automaton.make_automaton()
+                self._automaton = automaton
+            else:
+                # the lookahead matches the longest string at each position without consuming it, so that strings
+                # starting inside it are matched too; the shorter strings at the same position are its prefixes
+                self._string_pattern = re.compile(u"(?<![\\w-])(?=(%s)(?![\\w-]))"
+                                                  % _get_trie_pattern(self._strings))
+                self._string_prefixes = self._get_string_prefixes()
+
+        if len(self._addresses) > 0 or self._networks.count > 0:
+            groups.append(u"(?P<ip>(?<!\\.)\\d{1,3}\\.\\d{1,3}\\.\\d{1,3}\\.\\d{1,3})(?!\\d|\\.\\d)")
+
+        if len(self._hashes) > 0:
+            # a single run of hex digits, rather than an alternative per length, so that each word is only read once
+            groups.append(u"(?P<h>[0-9a-f]{32}(?:[0-9a-f]{8}(?:[0-9a-f]{24})?)?)(?!\\w)")
+
+        # no indicator starts in the middle of a word, so the lookbehind rejects most positions before any group is
+        # tried
+        self._pattern = re.compile(u"(?<![\\w-])(?:%s)" % u"|".join(groups)) if len(groups) > 0 else None
+        self._group_names = []
+        if self._pattern is not None:
+            self._group_names = sorted(self._pattern.groupindex, key=self._pattern.groupindex.get)
+        self._address_cache = {}
+        self._compiled = True
+
+    def _get_string_prefixes(self):
+        """
+        :return: A dict mapping each string indicator to the other string indicators that are its prefixes and end
+            before a non-word character of it, so they match wherever it does, shortest first.
+        """
+
+        prefixes = {}
+        for key in self._strings:
+            found = [key[:i] for i in range(MIN_STRING_LENGTH, len(key))
+                     if not _is_word_char(key[i]) and key[:i] in self._strings]
+            if len(found) > 0:
+                prefixes[key] = found
+        return prefixes
+
+    def _lookup_address(self, text):
+        """
+        :return: The key of the IP address or most specific CIDR block matching an address found in the text.
+        """
+
+        key = self._addresses.get(text)
+        if key is not None:
+            return key
+
+        # addresses written with leading zeros are normalized before they are looked up
+        leading_zeros = text.startswith(u"0") or u".0" in text
+        if self._networks.count == 0 and not leading_zeros:
+            return None
+
+        cache = self._address_cache
+        if text in cache:
+            return cache[text]
+
+        octets = [int(octet) for octet in text.split(u".")]
+        if max(octets) > 255:
+            key = None
+        else:
+            if leading_zeros:
+                key = self._addresses.get(u"%d.%d.%d.%d" % tuple(octets))
+            if key is None:
+                key = self._networks.lookup(octets)
+
+        if len(cache) >= _MAX_CACHED_ADDRESSES:
+            cache.clear()
+        cache[text] = key
+        return key
+
+    def _has_match(self, lowered, start, end):
+        """
+        Checks whether part of the text contains any indicators, without locating them.  The values captured by the
+        pattern are compared with the indicators as sets, which is much faster than handling each match in turn when,
+        as in most logs, almost none of the IP addresses and hashes in the text are indicators.
+
+        :return: Whether the part of the text from ``start`` to ``end`` contains any indicators.
+        """
+
+        values = self._pattern.findall(lowered, start, end)
+        if len(values) == 0:
+            return False
+
+        if len(self._group_names) == 1:
+            columns = {self._group_names[0]: values}
+        else:
+            columns = dict(zip(self._group_names, zip(*values)))
+
+        hashes = columns.get('h')
+        if hashes is not None and not self._hashes.isdisjoint(hashes):
+            return True
+
+        addresses = columns.get('ip')
+        if addresses is not None:
+            for address in set(addresses):
+                if address and self._lookup_address(address) is not None:
+                    return True
+
+        return False
+
+    def _scan(self, text, base_offset=0):
+        """
+        Finds the indicators in text.
+
+        :param str text: The text.
+        :param int base_offset: The offset of the start of the text, added to the offsets of the matches.
+        :return: A list of (offset, matched text, line, key) tuples, in order of offset.
+        """
+
+        self._compile()
+
+        lowered = text.lower()
+        found = []
+
+        position = 0
+        while self._pattern is not None and position < len(lowered):
+            end = lowered.find(u"\n", position + _BLOCK_SIZE)
+            end = len(lowered) if end < 0 else end + 1
+
+            # most blocks of a log contain no indicators, so each block is checked before the matches are located
+            if self._has_match(lowered, position, end):
+                for match in self._pattern.finditer(lowered, position, end):
+                    if match.lastgroup == 'ip':
+                        key = self._lookup_address(match.group())
+                    elif match.group() in self._hashes:
+                        key = match.group()
+                    else:
+                        key = None
+
+                    if key is not None:
+                        found.append((match.start(), match.end(), key))
+
+            position = end
+
+        if self._automaton is not None:
+            for end, key in self._automaton.iter(lowered):
+                start = end + 1 - len(key)
+                end += 1
+                if (start > 0 and _is_word_char(lowered[start - 1])) or \
+                        (end < len(lowered) and _is_word_char(lowered[end])):
+                    continue
+                found.append((start, end, key))
+            found.sort()
+        elif self._string_pattern is not None:
+            prefixes = self._string_prefixes
+            for match in self._string_pattern.finditer(lowered):
+                start = match.start()
+                key = match.group(1)
+                for prefix in prefixes.get(key, ()):
+                    found.append((start, start + len(prefix), prefix))
+                found.append((start, start + len(key), key))
+            found.sort()
+
+        results = []
+        for start, end, key in found:
+            line_start = text.rfind(u"\n", 0, start) + 1
+            line_end = text.find(u"\n", end)
+            if line_end < 0:
+                line_end = len(text)
+            results.append((base_offset + start, text[start:end], text[line_start:line_end].rstrip(u"\r"), key))
+
+        return results
+
+    def match(self, text):
+        """
+        Finds the indicators in text.
+
+        :param str text: The text.
+        :return: A list of |IndicatorMatch| objects, in order of offset.
+        """
+
+        if not isinstance(text, str):
+            text = str(text)
+
+        # match the Latin-1 form that the indicators were stored in
+        latin1 = text.encode('utf-8').decode('latin-1')
+        return [self._to_match(result) for result in self._scan(latin1)]
+
+    def scan_file(self, path, processes=None, shard_size=DEFAULT_SHARD_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Finds the indicators in a file, such as a log.  The file is memory-mapped and split into shards of about
+        ``shard_size`` bytes at line boundaries.  With ``processes``, the shards are scanned by a pool of processes,
+        each mapping the file itself, so no file contents pass between processes.  Each shard is decoded and scanned
+        ``chunk_size`` bytes at a time.
+
+        The file is scanned as bytes: text in an encoding other than ASCII or UTF-8 only matches ASCII indicators.
+
+        :param str path: The path of the file.
+        :param int processes: The number of processes to scan shards in (optional - by default the file is scanned in
+            this process).
+        :param int shard_size: The approximate number of bytes in each shard.
+        :param int chunk_size: The approximate number of bytes to decode and scan at a time.
+        :return: A generator of |IndicatorMatch| objects, in order of offset.
+        """
+
+        self._compile()
+        shards = _get_shards(path, shard_size)
+        tasks = [(path, start, end, chunk_size) for start, end in shards]
+
+        if processes is None or processes < 2 or len(tasks) < 2:
+            for task in tasks:
+                for result in _scan_shard(self, *task):
+                    yield self._to_match(result, path)
+            return
+
+        pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(self,))
+        try:
+            for results in pool.imap(_scan_shard_in_worker, tasks):
+                for result in results:
+                    yield self._to_match(result, path)
+            pool.close()
+        finally:
+            pool.terminate()
+
+    def _to_match(self, result, path=None):
+        offset, value, line, key = result
+        return IndicatorMatch(indicator=self._indicators[key],
+                              value=value.encode('latin-1').decode('utf-8', 'replace'),
+                              offset=offset,
+                              line=line.encode('latin-1').decode('utf-8', 'replace'),
+                              path=path)
+
+    def __getstate__(self):
+        # the compiled pattern and automaton are rebuilt, rather than pickled, when sent to a process
+        return {'indicators': list(self._indicators.values())}
+
+    def __setstate__(self, state):
+        self.__init__(state['indicators'])
+
+
+def _get_shards(path, shard_size):
+    """
+    :return: A list of (start, end) byte offsets that split a file into parts of about ``shard_size`` bytes, ending
+        at line boundaries.
+    """
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            shards = []
+            start = 0
+            while start < size:
+                end = mapped.find(b"\n", min(start + shard_size, size) - 1)
+                end = size if end < 0 else end + 1
+                shards.append((start, end))
+                start = end
+            return shards
+        finally:
+            mapped.close()
+
+
+def _scan_shard(matcher, path, start, end, chunk_size):
+    """
+    Scans the bytes of a file from ``start`` to ``end``, ``chunk_size`` bytes (rounded up to a line boundary) at a time.
+
+    :return: A list of the results of ``IndicatorMatcher._scan``.
+    """
+
+    results = []
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            position = start
+            while position < end:
+                stop = mapped.find(b"\n", min(position + chunk_size, end) - 1, end)
+                stop = end if stop < 0 else stop + 1
+                # Latin-1 maps each byte to one character, so offsets in the text are offsets in the file
+                text = mapped[position:stop].decode('latin-1')
+                results.extend(matcher._scan(text, position))
+                position = stop
+        finally:
+            mapped.close()
+
+    return results
+
+
+# the matcher of a worker process, set by _init_worker
+_worker_matcher = None
+
+
+def _init_worker(matcher):
+    global _worker_matcher
+    _worker_matcher = matcher
+    _worker_matcher._compile()
+
+
+def _scan_shard_in_worker(task):
+    return _scan_shard(_worker_matcher, *task)
@@ -1,7 +1,9 @@
 from .enclave import Enclave, EnclavePermissions
 from .indicator import Indicator
+from .indicator_batch import IndicatorBatch
 from .page import Page
 from .report import Report
 from .tag import Tag
+from .view import ModelView, ReportView, IndicatorView
 from .request_quota import RequestQuota
 from .enum import *
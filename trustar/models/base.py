@@ -8,11 +8,145 @@ from six import string_types
 import json
 
 
+class Field(object):
+    """
+    Describes how an attribute of a model maps to a key of its dictionary representation.  A model that lists its
+    fields in ``FIELDS`` and is decorated with :func:`generate_codec` gets ``to_dict`` and ``from_dict`` methods
+    generated from the list.
+
+    :ivar attr: The name of the attribute, which must also be the name of the constructor parameter.
+    :ivar key: The key of the value in the dictionary representation.
+    :ivar source_key: The key read by ``from_dict``, if it differs from ``key``.
+    :ivar item_model: If the value is a list of models, the model class of its items.
+    :ivar encode: A function applied to the attribute value by ``to_dict``.
+    :ivar decode: A function applied to the dictionary value by ``from_dict``.
+    :ivar keep_none: Whether ``to_dict`` keeps this key even when ``remove_nones`` is ``True``.
+    :ivar required: Whether ``from_dict`` raises a ``KeyError`` if the key is missing.
+    """
+
+    __slots__ = ('attr', 'key', 'source_key', 'item_model', 'encode', 'decode', 'keep_none', 'required')
+
+    def __init__(self, attr, key, source_key=None, item_model=None, encode=None, decode=None, keep_none=False,
+                 required=False):
+        self.attr = attr
+        self.key = key
+        self.source_key = source_key if source_key is not None else key
+        self.item_model = item_model
+        self.encode = encode
+        self.decode = decode
+        self.keep_none = keep_none
+        self.required = required
+
+
+def _decode_items(model, items):
+    if items is None:
+        return None
+    return [model.from_dict(item) for item in items]
+
+
+def _compile(source, namespace, name):
+    """
+    Compiles the source code of a single function and returns the function.
+    """
+
+    exec(compile(source, "<generated %s>" % name, 'exec'), namespace)
+    return namespace[name]
+
+
+def generate_codec(cls):
+    """
+    Class decorator that generates the ``to_dict`` and ``from_dict`` methods of a model from its ``FIELDS``.  The
+    methods are compiled once, when the class is defined, into straight-line code: ``to_dict`` builds the dictionary
+    directly, dropping ``None`` values in the same pass when ``remove_nones`` is ``True``, and ``from_dict`` reads each
+    key once and assigns it to the new instance, without calling the constructor.  Any normalization that the
+    constructor applies must therefore be done by the ``decode`` functions of the fields.
+
+    :param cls: The model class.
+    :return: The same class.
+    """
+
+    fields = cls.FIELDS
+    namespace = {
+        '_decode_items': _decode_items
+    }
+
+    # expressions that produce the dictionary value of each field
+    values = []
+    for i, field in enumerate(fields):
+        value = "self.%s" % field.attr
+        if field.encode is not None:
+            namespace['encode_%d' % i] = field.encode
+            value = "encode_%d(%s)" % (i, value)
+        elif field.item_model is not None:
+            # inlined rather than calling a helper, since to_dict is called for every item of a page
+            value = "([item.to_dict(remove_nones) for item in %s] if %s is not None else None)" % (value, value)
+        values.append(value)
+
+    lines = ["def to_dict(self, remove_nones=False):",
+             "    if remove_nones:",
+             "        d = {}"]
+    for field, value in zip(fields, values):
+        if field.keep_none:
+            lines.append("        d[%r] = %s" % (field.key, value))
+        else:
+            lines.append("        value = %s" % value)
+            lines.append("        if value is not None:")
+            lines.append("            d[%r] = value" % field.key)
+    lines.append("        return d")
+    lines.append("    return {%s}" % ", ".join("%r: %s" % (field.key, value) for field, value in zip(fields, values)))
+
+    to_dict = _compile("\n".join(lines), namespace, 'to_dict')
+    to_dict.__doc__ = ModelBase.to_dict.__doc__
+
+    # attribute assignments that set each field from the dictionary
+    assignments = []
+    for i, field in enumerate(fields):
+        value = "d[%r]" % field.source_key if field.required else "get(%r)" % field.source_key
+        if field.decode is not None:
+            namespace['decode_%d' % i] = field.decode
+            value = "decode_%d(%s)" % (i, value)
+        elif field.item_model is not None:
+            namespace['model_%d' % i] = field.item_model
+            value = "_decode_items(model_%d, %s)" % (i, value)
+        assignments.append("%s = %s" % (field.attr, value))
+
+    lines = ["def from_dict(cls, d):",
+             "    if d is None:",
+             "        return None",
+             "    get = d.get"]
+    # assign the attributes directly, skipping the keyword argument handling of the constructor
+    lines.append("    obj = new(cls)")
+    lines.extend("    obj.%s" % assignment for assignment in assignments)
+    lines.append("    return obj")
+    namespace['new'] = object.__new__
+
+    from_dict = _compile("\n".join(lines), namespace, 'from_dict')
+    from_dict.__doc__ = ModelBase.from_dict.__doc__
+
+    cls.to_dict = to_dict
+    cls.from_dict = classmethod(from_dict)
+
+    return cls
+
+
 class ModelBase(object):
     """
-    This is the base class for all models.
+    This is the base class for all models.  Models declare their attributes in ``__slots__``, so that large numbers of
+    them can be held in memory without a ``__dict__`` per instance.
+
+    :cvar FIELDS: A tuple of :class:`Field` objects, used by :func:`generate_codec` to generate ``to_dict`` and
+        ``from_dict``.
+    :cvar REPR_FIELDS: The attributes shown by ``repr``.
+    :cvar REPR_MAX_LENGTH: The number of characters of each string attribute shown by ``repr``.
     """
 
+    __slots__ = ()
+
+    FIELDS = None
+
+    REPR_FIELDS = ()
+    REPR_MAX_LENGTH = 60
+
     def to_dict(self, remove_nones=False):
         """
         Creates a dictionary representation of the object.
@@ -34,16 +168,42 @@ class ModelBase(object):
         """
         raise NotImplementedError()
 
+    def to_json(self, remove_nones=True, indent=2):
+        """
+        :param remove_nones: Whether ``None`` values should be left out.  Defaults to ``True``.
+        :param indent: The indentation of the JSON, or ``None`` for a single line.
+        :return: A JSON representation of the object.
+        """
+
+        return json.dumps(self.to_dict(remove_nones=remove_nones), indent=indent)
+
     def __str__(self):
         """
-        :return: A json representation of the object.
+        :return: A json representation of the object.  This serializes the whole object, so prefer ``repr`` (e.g. the
+            ``%r`` format) when logging.
         """
 
-        return json.dumps(self.to_dict(remove_nones=True), indent=2)
+        return self.to_json()
 
     def __repr__(self):
         """
-        :return: The string representation of the object.
+        :return: A short summary of the object, showing the attributes in ``REPR_FIELDS``.  Long strings are truncated
+            and lists are summarized by their lengths, so that the cost does not grow with the size of the object.
         """
 
-        return str(self)
+        values = []
+        for attr in self.REPR_FIELDS:
+            value = getattr(self, attr, None)
+            if value is None:
+                continue
+
+            if isinstance(value, string_types) and len(value) > self.REPR_MAX_LENGTH:
+                value = "%s..." % repr(value[:self.REPR_MAX_LENGTH])
+            elif isinstance(value, (list, tuple)):
+                value = "<%d items>" % len(value)
+            else:
+                value = repr(value)
+
+            values.append("%s=%s" % (attr, value))
+
+        return "%s(%s)" % (type(self).__name__, ", ".join(values))
@@ -0,0 +1,399 @@
+"""
+A compact binary encoding of models, lists of models, and pages of models, for caching them or passing them between
+processes.  Models of one class are encoded together in columns: numbers are packed as fixed-width binary values,
+strings are replaced by indices into a table holding each distinct string once, and lists of nested models (such as
+the tags of indicators) are encoded as a nested block of columns.
+
+Each block of columns starts with the model name and the key and type of each column, so data encoded by one version
+of the SDK can be decoded by another: columns for keys that a model no longer has are ignored, and fields that have no
+column are ``None``.
+
+Example:
+
+>>> data = codec.dumps(ts.get_indicators_page(page_size=1000))
+>>> page = codec.loads(data)
+"""
+
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, range, zip
+from future import standard_library
+from six import integer_types, string_types, text_type
+
+# external imports
+import json
+import struct
+
+# package imports
+from .base import ModelBase
+from .enclave import Enclave, EnclavePermissions
+from .indicator import Indicator
+from .page import Page
+from .report import Report
+from .request_quota import RequestQuota
+from .tag import Tag
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+
+MAGIC = b'TSMB'
+
+# the version of the layout written by ``dumps``
+FORMAT_VERSION = 1
+
+# the models that can be encoded, by name
+MODELS = {cls.__name__: cls for cls in (Enclave, EnclavePermissions, Indicator, Report, RequestQuota, Tag)}
+
+# what was encoded
+_KIND_MODEL = 0
+_KIND_LIST = 1
+_KIND_PAGE = 2
+
+# column types
+_NONE = b'n'
+_BOOL = b'b'
+_INT = b'i'
+_FLOAT = b'f'
+_STRING = b's'
+_STRINGS = b'l'
+_MODELS = b'm'
+_JSON = b'j'
+
+# the value types of each column type
+_BOOL_TYPES = {bool}
+_INT_TYPES = set(integer_types)
+_FLOAT_TYPES = {float}
+_STRING_TYPES = set(string_types) | {text_type}
+_LIST_TYPES = {list}
+
+# the keys of the metadata of a page, encoded as a block with one row
+_PAGE_KEYS = ('pageNumber', 'pageSize', 'totalElements', 'hasNext')
+
+_HEADER = struct.Struct('<4sBB')
+_UINT = struct.Struct('<I')
+_COLUMN = struct.Struct('<Ic')
+
+
+def dumps(value):
+    """
+    Encodes a model, a list of models of one class, or a |Page| of models of one class.
+
+    :param value: The value to encode.
+    :return: The encoded ``bytes``.
+    """
+
+    writer = _Writer()
+
+    if isinstance(value, Page):
+        kind = _KIND_PAGE
+        writer.write_block(None, [value.to_dict()], _PAGE_KEYS)
+        writer.write_models(value.items)
+    elif isinstance(value, (list, tuple)):
+        kind = _KIND_LIST
+        writer.write_models(value)
+    elif isinstance(value, ModelBase):
+        kind = _KIND_MODEL
+        writer.write_models([value])
+    else:
+        raise TypeError("Cannot encode a value of type %s." % type(value).__name__)
+
+    return writer.get_bytes(kind)
+
+
+def loads(data):
+    """
+    Decodes a value encoded by ``dumps``.
+
+    :param bytes data: The encoded value.
+    :return: The model, list of models, or |Page|.
+    """
+
+    magic, version, kind = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("The data was not encoded by trustar.models.codec.")
+    if version != FORMAT_VERSION:
+        raise ValueError("Unsupported encoding format version: %s" % version)
+
+    reader = _Reader(data, _HEADER.size)
+
+    if kind == _KIND_PAGE:
+        page = reader.read_block()[1][0]
+        return Page(items=reader.read_models(),
+                    page_number=page.get('pageNumber'),
+                    page_size=page.get('pageSize'),
+                    total_elements=page.get('totalElements'),
+                    has_next=page.get('hasNext'))
+
+    models = reader.read_models()
+    if kind == _KIND_MODEL:
+        return models[0]
+    return models
+
+
+def _get_model_class(model):
+    """
+    :return: The model class that a model is encoded as.  Views are encoded as the models they are views of.
+    """
+
+    return getattr(model, 'MODEL', None) or type(model)
+
+
+def _get_column_type(values):
+    """
+    :return: The narrowest column type that can hold all of the values.
+    """
+
+    types = set(map(type, values))
+    types.discard(type(None))
+
+    if not types:
+        return _NONE
+    if types == _BOOL_TYPES:
+        return _BOOL
+    if types <= _INT_TYPES:
+        return _INT
+    if types == _FLOAT_TYPES:
+        return _FLOAT
+    if types <= _STRING_TYPES:
+        return _STRING
+    if types == _LIST_TYPES:
+        item_types = set(type(item) for value in values if value is not None for item in value)
+        if item_types <= _STRING_TYPES:
+            return _STRINGS
+
+    # anything else, including subclasses of the types above, is left to JSON
+    return _JSON
+
+
+class _Writer(object):
+    """
+    Writes blocks of columns, collecting the distinct strings in the string table.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._strings = {}
+
+    def get_bytes(self, kind):
+        """
+        :return: The header, string table and blocks.
+        """
+
+        # index 0 is reserved for None
+        strings = sorted(self._strings, key=self._strings.get)
+        encoded = [s.encode('utf-8') if isinstance(s, text_type) else s for s in strings]
+
+        table = [_UINT.pack(len(encoded)),
+                 struct.pack('<%dI' % len(encoded), *[len(s) for s in encoded]),
+                 b''.join(encoded)]
+
+        return b''.join([_HEADER.pack(MAGIC, FORMAT_VERSION, kind)] + table + self._chunks)
+
+    def get_string_index(self, value):
+        return self.get_string_indices([value])[0]
+
+    def get_string_indices(self, values):
+        strings = self._strings
+        return [0 if value is None else strings.setdefault(value, len(strings) + 1) for value in values]
+
+    def pack_array(self, code, values):
+        self._chunks.append(struct.pack('<%d%s' % (len(values), code), *values))
+
+    def write_models(self, models):
+        """
+        Writes a block for a list of models of one class.
+        """
+
+        classes = set(_get_model_class(model) for model in models)
+        if len(classes) > 1:
+            raise ValueError("Cannot encode models of different classes together: %s"
+                             % ", ".join(sorted(cls.__name__ for cls in classes)))
+
+        model_class = classes.pop() if classes else None
+        if model_class is not None and model_class.__name__ not in MODELS:
+            raise TypeError("Cannot encode a value of type %s." % model_class.__name__)
+
+        self.write_block(model_class, [model.to_dict() for model in models])
+
+    def write_block(self, model_class, rows, keys=None):
+        """
+        Writes a block of columns.
+
+        :param model_class: The model class of the rows, or ``None``.
+        :param rows: The dictionary representations of the rows.
+        :param keys: The keys of the columns, if there is no model class.
+        """
+
+        fields = model_class.FIELDS if model_class is not None else ()
+        item_models = {field.key: field.item_model for field in fields}
+        if keys is None:
+            keys = [field.key for field in fields]
+
+        self._chunks.append(struct.pack('<IIH',
+                                        self.get_string_index(model_class.__name__ if model_class else None),
+                                        len(rows),
+                                        len(keys)))
+
+        for key in keys:
+            values = [row.get(key) for row in rows]
+            item_model = item_models.get(key)
+            column_type = _MODELS if item_model is not None else _get_column_type(values)
+
+            # values that do not fit in 64 bits are left to JSON
+            if column_type is _INT and not all(-2 ** 63 <= v < 2 ** 63 for v in values if v is not None):
+                column_type = _JSON
+
+            self._chunks.append(_COLUMN.pack(self.get_string_index(key), column_type))
+            self.write_column(column_type, values, item_model)
+
+    def write_column(self, column_type, values, item_model):
+        if column_type is _NONE:
+            return
+
+        if column_type is _BOOL:
+            self._chunks.append(bytes(bytearray(2 if v is None else int(v) for v in values)))
+
+        elif column_type is _INT or column_type is _FLOAT:
+            has_nulls = None in values
+            self._chunks.append(b'\x01' if has_nulls else b'\x00')
+            if has_nulls:
+                self._chunks.append(bytes(bytearray(v is None for v in values)))
+                values = [0 if v is None else v for v in values]
+            self.pack_array('q' if column_type is _INT else 'd', values)
+
+        elif column_type is _STRING:
+            self.pack_array('I', self.get_string_indices(values))
+
+        elif column_type is _STRINGS:
+            self.pack_array('i', [-1 if v is None else len(v) for v in values])
+            indices = self.get_string_indices([s for v in values if v is not None for s in v])
+            self._chunks.append(_UINT.pack(len(indices)))
+            self.pack_array('I', indices)
+
+        elif column_type is _MODELS:
+            self.pack_array('i', [-1 if v is None else len(v) for v in values])
+            self.write_block(item_model, [item for v in values if v is not None for item in v])
+
+        else:
+            encoded = json.dumps(values).encode('utf-8')
+            self._chunks.append(_UINT.pack(len(encoded)))
+            self._chunks.append(encoded)
+
+
+class _Reader(object):
+    """
+    Reads the string table and blocks of columns written by :class:`_Writer`.
+    """
+
+    def __init__(self, data, offset):
+        self._data = data
+        self._offset = offset
+
+        count = self.unpack_array('I', 1)[0]
+        lengths = self.unpack_array('I', count)
+
+        self._strings = [None]
+        for length in lengths:
+            self._strings.append(data[self._offset:self._offset + length].decode('utf-8'))
+            self._offset += length
+
+    def unpack_array(self, code, count):
+        fmt = '<%d%s' % (count, code)
+        values = struct.unpack_from(fmt, self._data, self._offset)
+        self._offset += struct.calcsize(fmt)
+        return values
+
+    def read_bytes(self, count):
+        value = self._data[self._offset:self._offset + count]
+        self._offset += count
+        return value
+
+    def read_models(self):
+        """
+        Reads a block of models.
+
+        :return: The list of models.
+        """
+
+        model_class, rows = self.read_block()
+        if model_class is None:
+            return rows
+        return [model_class.from_dict(row) for row in rows]
+
+    def read_block(self):
+        """
+        Reads a block of columns.
+
+        :return: A tuple containing the model class of the block (or ``None``) and the list of rows, as dictionaries
+            in the form read by the model's ``from_dict``.
+        """
+
+        name_index, count, column_count = struct.unpack_from('<IIH', self._data, self._offset)
+        self._offset += struct.calcsize('<IIH')
+
+        name = self._strings[name_index]
+        if name is not None and name not in MODELS:
+            raise ValueError("Unknown model in encoded data: %s" % name)
+        model_class = MODELS.get(name)
+
+        # columns are written under the keys of to_dict, but read back under the keys that from_dict reads
+        fields = model_class.FIELDS if model_class is not None else ()
+        source_keys = {field.key: field.source_key for field in fields}
+
+        keys = []
+        columns = []
+        for _ in range(column_count):
+            key_index, column_type = _COLUMN.unpack_from(self._data, self._offset)
+            self._offset += _COLUMN.size
+
+            key = self._strings[key_index]
+            keys.append(source_keys.get(key, key))
+            columns.append(self.read_column(column_type, count))
+
+        rows = [dict(zip(keys, values)) for values in zip(*columns)] if columns else [{} for _ in range(count)]
+        return model_class, rows
+
+    def read_column(self, column_type, count):
+        strings = self._strings
+
+        if column_type == _NONE:
+            return [None] * count
+
+        if column_type == _BOOL:
+            return [None if b == 2 else b == 1 for b in bytearray(self.read_bytes(count))]
+
+        if column_type == _INT or column_type == _FLOAT:
+            has_nulls = self.read_bytes(1) == b'\x01'
+            nulls = bytearray(self.read_bytes(count)) if has_nulls else None
+            values = list(self.unpack_array('q' if column_type == _INT else 'd', count))
+            if has_nulls:
+                values = [None if null else v for v, null in zip(values, nulls)]
+            return values
+
+        if column_type == _STRING:
+            return [strings[i] for i in self.unpack_array('I', count)]
+
+        if column_type == _STRINGS or column_type == _MODELS:
+            lengths = self.unpack_array('i', count)
+            if column_type == _STRINGS:
+                items = [strings[i] for i in self.unpack_array('I', self.unpack_array('I', 1)[0])]
+            else:
+                # nested models are left as dictionaries, for the parent's from_dict to decode
+                items = self.read_block()[1]
+
+            values = []
+            position = 0
+            for length in lengths:
+                if length < 0:
+                    values.append(None)
+                else:
+                    values.append(items[position:position + length])
+                    position += length
+            return values
+
+        if column_type == _JSON:
+            length = self.unpack_array('I', 1)[0]
+            return json.loads(self.read_bytes(length).decode('utf-8'))
+
+        raise ValueError("Unknown column type in encoded data: %r" % column_type)
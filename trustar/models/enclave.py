@@ -5,10 +5,11 @@ from future import standard_library
 from six import string_types
 
 # package imports
-from .base import ModelBase
+from .base import ModelBase, Field, generate_codec
 from .enum import EnclaveType
 
 
+@generate_codec
 class Enclave(ModelBase):
     """
     Models an |Enclave_resource|.
@@ -17,6 +18,16 @@ class Enclave(ModelBase):
     :ivar name: The name of the enclave.
     """
 
+    __slots__ = ('id', 'name', 'type')
+
+    REPR_FIELDS = ('id', 'name', 'type')
+
+    FIELDS = (
+        Field('id', 'id', required=True),
+        Field('name', 'name', required=True),
+        Field('type', 'type', decode=EnclaveType.from_string, required=True)
+    )
+
     def __init__(self, id, name=None, type=None):
         """
         Constructs an Enclave object.
@@ -30,42 +41,23 @@ class Enclave(ModelBase):
         self.name = name
         self.type = type
 
-    @classmethod
-    def from_dict(cls, enclave):
-        """
-        Create a enclave object from a dictionary.
-
-        :param enclave: The dictionary.
-        :return: The enclave object.
-        """
-
-        return Enclave(id=enclave['id'],
-                       name=enclave['name'],
-                       type=EnclaveType.from_string(enclave['type']))
-
-    def to_dict(self, remove_nones=False):
-        """
-        Creates a dictionary representation of the enclave.
-
-        :param remove_nones: Whether ``None`` values should be filtered out of the dictionary.  Defaults to ``False``.
-        :return: A dictionary representation of the enclave.
-        """
-
-        if remove_nones:
-            return super().to_dict(remove_nones=True)
-
-        return {
-            'id': self.id,
-            'name': self.name,
-            'type': self.type
-        }
-
 
+@generate_codec
 class EnclavePermissions(Enclave):
     """
     Models an |Enclave_resource| object, but also contains the permissions that the requesting user has to the enclave.
     """
 
+    __slots__ = ('read', 'create', 'update')
+
+    REPR_FIELDS = ('id', 'name', 'type', 'read', 'create', 'update')
+
+    FIELDS = Enclave.FIELDS + (
+        Field('read', 'read'),
+        Field('create', 'create'),
+        Field('update', 'updated', source_key='update')
+    )
+
     def __init__(self, id, name=None, type=None, read=None, create=None, update=None):
         """
         Constructs an EnclavePermissions object.
@@ -83,42 +75,6 @@ class EnclavePermissions(Enclave):
         self.create = create
         self.update = update
 
-    @classmethod
-    def from_dict(cls, d):
-        """
-        Create a enclave object from a dictionary.
-
-        :param d: The dictionary.
-        :return: The EnclavePermissions object.
-        """
-
-        enclave = super(cls, EnclavePermissions).from_dict(d)
-        enclave_permissions = cls.from_enclave(enclave)
-
-        enclave_permissions.read = d.get('read')
-        enclave_permissions.create = d.get('create')
-        enclave_permissions.update = d.get('update')
-
-        return enclave_permissions
-
-    def to_dict(self, remove_nones=False):
-        """
-        Creates a dictionary representation of the enclave.
-
-        :param remove_nones: Whether ``None`` values should be filtered out of the dictionary.  Defaults to ``False``.
-        :return: A dictionary representation of the EnclavePermissions object.
-        """
-
-        d = super().to_dict(remove_nones=remove_nones)
-
-        d.update({
-            'read': self.read,
-            'create': self.create,
-            'updated': self.update
-        })
-
-        return d
-
     @classmethod
     def from_enclave(cls, enclave):
         """
@@ -1,4 +1,4 @@
-from ..utils import get_logger
+from ..utils import get_logger, intern_string
 
 
 logger = get_logger(__name__)
@@ -9,9 +9,30 @@ class Enum(object):
     def __new__(cls, *args, **kwargs):
         raise Exception("Enums cannot be instantiated.")
 
+    @classmethod
+    def _get_lookup(cls):
+        """
+        :return: A dictionary mapping each value of the enum to itself.  It is built on first use, once per subclass.
+        """
+
+        # look in the class's own namespace, so that subclasses do not share the table of their parent
+        lookup = cls.__dict__.get('_lookup')
+        if lookup is None:
+            lookup = {}
+            for attr in dir(cls):
+                value = getattr(cls, attr)
+                if not attr.startswith("_") and not callable(value):
+                    lookup[value] = value
+            # _values is assigned first, since another thread that finds _lookup set goes on to read _values
+            cls._values = tuple(lookup)
+            cls._lookup = lookup
+
+        return lookup
+
     @classmethod
     def values(cls):
-        return [getattr(cls, attr) for attr in dir(cls) if not callable(getattr(cls, attr)) and not attr.startswith("__")]
+        cls._get_lookup()
+        return list(cls.__dict__['_values'])
 
     @classmethod
     def from_string(cls, string):
@@ -23,15 +44,30 @@ class Enum(object):
         """
 
         # find enum value
-        for attr in dir(cls):
-            value = getattr(cls, attr)
-            if value == string:
-                return value
+        value = cls._get_lookup().get(string)
+        if value is not None:
+            return value
 
         # if not found, log warning and return the value passed in
-        logger.warning("{} is not a valid enum value for {}.".format(string, cls.__name__))
+        logger.warning("%s is not a valid enum value for %s.", string, cls.__name__)
         return string
 
+    @classmethod
+    def intern(cls, string):
+        """
+        Returns the enum value equal to a string, without logging a warning if there is none.  This is used when
+        deserializing API responses, so that the many copies of each value share a single string object.
+
+        :param string: The string.
+        :return: The enum value, or an interned copy of ``string`` if it is not a value of the enum.
+        """
+
+        value = cls._get_lookup().get(string)
+        if value is not None:
+            return value
+
+        return intern_string(string)
+
 
 class IndicatorType(Enum):
 
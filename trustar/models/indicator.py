@@ -5,11 +5,13 @@ from future import standard_library
 from six import string_types
 
 # package imports
-from .base import ModelBase
+from .base import ModelBase, Field, generate_codec
 from .enum import *
 from .tag import Tag
+from ..utils import intern_strings
 
 
+@generate_codec
 class Indicator(ModelBase):
     """
     Models an |Indicator_resource|.
@@ -32,6 +34,29 @@ class Indicator(ModelBase):
     :cvar TYPES: A list of all valid indicator types.
     """
 
+    __slots__ = ('value', 'type', 'priority_level', 'correlation_count', 'whitelisted', 'weight', 'reason',
+                 'first_seen', 'last_seen', 'sightings', 'source', 'notes', 'tags', 'enclave_ids')
+
+    REPR_FIELDS = ('value', 'type', 'priority_level')
+
+    FIELDS = (
+        Field('value', 'value'),
+        Field('type', 'indicatorType', decode=IndicatorType.intern),
+        Field('priority_level', 'priorityLevel', decode=PriorityLevel.intern),
+        Field('correlation_count', 'correlationCount'),
+        Field('whitelisted', 'whitelisted'),
+        Field('weight', 'weight'),
+        Field('reason', 'reason'),
+        Field('first_seen', 'firstSeen'),
+        Field('last_seen', 'lastSeen'),
+        # sightings are accepted by POST /indicators (see submit_indicators), so to_dict includes them
+        Field('sightings', 'sightings'),
+        Field('source', 'source'),
+        Field('notes', 'notes'),
+        Field('tags', 'tags', item_model=Tag),
+        Field('enclave_ids', 'enclaveIds', decode=intern_strings)
+    )
+
     TYPES = IndicatorType.values()
 
     def __init__(self,
@@ -66,61 +91,3 @@ class Indicator(ModelBase):
         self.notes = notes
         self.tags = tags
         self.enclave_ids = enclave_ids
-
-    @classmethod
-    def from_dict(cls, indicator):
-        """
-        Create an indicator object from a dictionary.
-
-        :param indicator: The dictionary.
-        :return: The indicator object.
-        """
-
-        tags = indicator.get('tags')
-        if tags is not None:
-            tags = [Tag.from_dict(tag) for tag in tags]
-
-        return Indicator(value=indicator.get('value'),
-                         type=indicator.get('indicatorType'),
-                         priority_level=indicator.get('priorityLevel'),
-                         correlation_count=indicator.get('correlationCount'),
-                         whitelisted=indicator.get('whitelisted'),
-                         weight=indicator.get('weight'),
-                         reason=indicator.get('reason'),
-                         first_seen=indicator.get('firstSeen'),
-                         last_seen=indicator.get('lastSeen'),
-                         source=indicator.get('source'),
-                         notes=indicator.get('notes'),
-                         tags=tags,
-                         enclave_ids=indicator.get('enclaveIds'))
-
-    def to_dict(self, remove_nones=False):
-        """
-        Creates a dictionary representation of the indicator.
-
-        :param remove_nones: Whether ``None`` values should be filtered out of the dictionary.  Defaults to ``False``.
-        :return: A dictionary representation of the indicator.
-        """
-
-        if remove_nones:
-            return super().to_dict(remove_nones=True)
-
-        tags = None
-        if self.tags is not None:
-            tags = [tag.to_dict(remove_nones=remove_nones) for tag in self.tags]
-
-        return {
-            'value': self.value,
-            'indicatorType': self.type,
-            'priorityLevel': self.priority_level,
-            'correlationCount': self.correlation_count,
-            'whitelisted': self.whitelisted,
-            'weight': self.weight,
-            'reason': self.reason,
-            'firstSeen': self.first_seen,
-            'lastSeen': self.last_seen,
-            'source': self.source,
-            'notes': self.notes,
-            'tags': tags,
-            'enclaveIds': self.enclave_ids
-        }
@@ -0,0 +1,365 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, range, zip
+from future import standard_library
+
+# external imports
+import math
+from array import array
+from itertools import compress
+
+# package imports
+from .enum import IndicatorType, PriorityLevel
+from .indicator import Indicator
+from ..utils import intern_strings
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+
+def _to_float(value):
+    return float('nan') if value is None else float(value)
+
+
+def _to_int(value):
+    return None if math.isnan(value) else int(value)
+
+
+_numpy = False
+
+
+def _import_numpy():
+    """
+    :return: The ``numpy`` module, or ``None`` if it is not installed.  The import is only attempted once.
+    """
+
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy as _numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+def _as_numpy(np, values):
+    """
+    :return: A NumPy view of an ``array('d')``, without copying it.
+    """
+
+    return np.frombuffer(values, dtype=np.float64) if len(values) > 0 else np.empty(0, dtype=np.float64)
+
+
+def _from_numpy(values):
+    """
+    :return: An ``array('d')`` with the contents of a NumPy array.
+    """
+
+    return array('d', values.astype('float64', copy=False).tobytes())
+
+
+class IndicatorBatch(object):
+    """
+    Holds many indicators in columns rather than as individual |Indicator| objects.  The numeric columns
+    (``first_seen``, ``last_seen`` and ``sightings``) are contiguous ``array('d')`` buffers in which missing values are
+    ``NaN``; the other columns are lists.  Every column has one entry per indicator.
+
+    A batch can be built directly from the items of a page of indicators returned by the API, without creating an
+    |Indicator| object per item.  See |get_indicator_batches|.
+
+    :ivar value: The indicator values.
+    :ivar type: The indicator types.
+    :ivar priority_level: The priority levels of the indicators.
+    :ivar first_seen: The first times the indicators were sighted, in milliseconds since epoch.
+    :ivar last_seen: The last times the indicators were sighted, in milliseconds since epoch.
+    :ivar sightings: The numbers of times the indicators have been sighted.
+    :ivar enclave_ids: The lists of IDs of the enclaves that the indicators are found in.
+    """
+
+    COLUMNS = ('value', 'type', 'priority_level', 'first_seen', 'last_seen', 'sightings', 'enclave_ids')
+    NUMERIC_COLUMNS = ('first_seen', 'last_seen', 'sightings')
+
+    __slots__ = COLUMNS
+
+    def __init__(self, value=None, type=None, priority_level=None, first_seen=None, last_seen=None, sightings=None,
+                 enclave_ids=None):
+        """
+        Constructs an IndicatorBatch object.  Columns that are not given are filled with missing values.
+
+        :param value: The list of indicator values.
+        :param type: The list of indicator types.
+        :param priority_level: The list of priority levels.
+        :param first_seen: The ``array('d')`` of first seen times.
+        :param last_seen: The ``array('d')`` of last seen times.
+        :param sightings: The ``array('d')`` of sighting counts.
+        :param enclave_ids: The list of lists of enclave IDs.
+        """
+
+        self.value = list(value) if value is not None else []
+        size = len(self.value)
+
+        self.type = type if type is not None else [None] * size
+        self.priority_level = priority_level if priority_level is not None else [None] * size
+        self.first_seen = first_seen if first_seen is not None else array('d', [float('nan')]) * size
+        self.last_seen = last_seen if last_seen is not None else array('d', [float('nan')]) * size
+        self.sightings = sightings if sightings is not None else array('d', [float('nan')]) * size
+        self.enclave_ids = enclave_ids if enclave_ids is not None else [None] * size
+
+        for column in self.COLUMNS:
+            if len(getattr(self, column)) != size:
+                raise ValueError("Column '%s' does not have %d entries." % (column, size))
+
+    @classmethod
+    def from_dicts(cls, items):
+        """
+        Creates a batch from a list of indicator dictionaries, such as the ``items`` of the body of a response from
+        ``GET /indicators``.
+
+        :param items: The list of dictionaries.
+        :return: The |IndicatorBatch| object.
+        """
+
+        return cls(value=[item.get('value') for item in items],
+                   type=[IndicatorType.intern(item.get('indicatorType')) for item in items],
+                   priority_level=[PriorityLevel.intern(item.get('priorityLevel')) for item in items],
+                   first_seen=array('d', [_to_float(item.get('firstSeen')) for item in items]),
+                   last_seen=array('d', [_to_float(item.get('lastSeen')) for item in items]),
+                   sightings=array('d', [_to_float(item.get('sightings')) for item in items]),
+                   enclave_ids=[intern_strings(item.get('enclaveIds')) for item in items])
+
+    @classmethod
+    def from_indicators(cls, indicators):
+        """
+        Creates a batch from |Indicator| objects.
+
+        :param indicators: An iterable of |Indicator| objects.
+        :return: The |IndicatorBatch| object.
+        """
+
+        indicators = list(indicators)
+
+        return cls(value=[i.value for i in indicators],
+                   type=[i.type for i in indicators],
+                   priority_level=[i.priority_level for i in indicators],
+                   first_seen=array('d', [_to_float(i.first_seen) for i in indicators]),
+                   last_seen=array('d', [_to_float(i.last_seen) for i in indicators]),
+                   sightings=array('d', [_to_float(i.sightings) for i in indicators]),
+                   enclave_ids=[i.enclave_ids for i in indicators])
+
+    @classmethod
+    def concat(cls, batches):
+        """
+        Joins several batches into one.
+
+        :param batches: An iterable of |IndicatorBatch| objects.
+        :return: The |IndicatorBatch| object.
+        """
+
+        result = cls()
+        for batch in batches:
+            for column in cls.COLUMNS:
+                getattr(result, column).extend(getattr(batch, column))
+
+        return result
+
+    def take(self, indices):
+        """
+        The numeric columns are gathered with NumPy when it is installed.
+
+        :param indices: An iterable of positions in the batch, such as a NumPy integer array.
+        :return: A new batch containing the indicators at the given positions, in the given order.
+        """
+
+        np = _import_numpy()
+        if np is not None:
+            indices = np.asarray(indices if hasattr(indices, '__len__') else list(indices), dtype=np.intp)
+            positions = indices.tolist()
+        else:
+            positions = list(indices)
+
+        columns = {}
+        for column in self.COLUMNS:
+            values = getattr(self, column)
+            if column not in self.NUMERIC_COLUMNS:
+                columns[column] = [values[i] for i in positions]
+            elif np is not None:
+                columns[column] = _from_numpy(_as_numpy(np, values)[indices])
+            else:
+                columns[column] = array('d', [values[i] for i in positions])
+
+        return IndicatorBatch(**columns)
+
+    def filter(self, mask):
+        """
+        The numeric columns are filtered with NumPy when it is installed.
+
+        :param mask: A sequence of booleans with one entry per indicator, such as a NumPy boolean array.
+        :return: A new batch containing the indicators whose entries in ``mask`` are true.
+        """
+
+        np = _import_numpy()
+        mask = np.asarray(mask, dtype=bool) if np is not None else list(mask)
+        if len(mask) != len(self):
+            raise ValueError("The mask has %d entries, but the batch has %d." % (len(mask), len(self)))
+
+        selectors = mask.tolist() if np is not None else mask
+        columns = {}
+        for column in self.COLUMNS:
+            values = getattr(self, column)
+            if column not in self.NUMERIC_COLUMNS:
+                columns[column] = list(compress(values, selectors))
+            elif np is not None:
+                columns[column] = _from_numpy(_as_numpy(np, values)[mask])
+            else:
+                columns[column] = array('d', compress(values, selectors))
+
+        return IndicatorBatch(**columns)
+
+    def filter_types(self, types):
+        """
+        :param types: The indicator types to keep.
+        :return: A new batch containing only the indicators of the given types.
+        """
+
+        return self.filter(list(map(set(types).__contains__, self.type)))
+
+    def filter_range(self, column, min_value=None, max_value=None):
+        """
+        The range is checked with NumPy when it is installed.
+
+        :param str column: One of the numeric columns: ``first_seen``, ``last_seen`` or ``sightings``.
+        :param min_value: The smallest value to keep (optional).
+        :param max_value: The largest value to keep (optional).
+        :return: A new batch containing only the indicators whose value in ``column`` is in the given range.  Missing
+            values are never in range.
+        """
+
+        if column not in self.NUMERIC_COLUMNS:
+            raise ValueError("'%s' is not a numeric column." % column)
+
+        low = float('-inf') if min_value is None else min_value
+        high = float('inf') if max_value is None else max_value
+
+        np = _import_numpy()
+        if np is None:
+            return self.filter([low <= x <= high for x in getattr(self, column)])
+
+        # comparisons with NaN are false, so missing values are left out
+        values = _as_numpy(np, getattr(self, column))
+        return self.filter((values >= low) & (values <= high))
+
+    def group_by_type(self):
+        """
+        The positions of each type are found with NumPy when it is installed.
+
+        :return: A dictionary mapping each indicator type in the batch to a batch of the indicators of that type.
+        """
+
+        np = _import_numpy()
+        if np is None:
+            positions = {}
+            for i, indicator_type in enumerate(self.type):
+                positions.setdefault(indicator_type, []).append(i)
+
+            return {indicator_type: self.take(indices) for indicator_type, indices in positions.items()}
+
+        # there are few distinct types, so one comparison over the whole column per type is cheap
+        types = np.empty(len(self), dtype=object)
+        types[:] = self.type
+        return {indicator_type: self.take(np.flatnonzero(types == indicator_type))
+                for indicator_type in sorted(set(self.type), key=self.type.index)}
+
+    def dedup(self):
+        """
+        :return: A new batch with only the first occurrence of each (value, type) pair.
+        """
+
+        # when a key repeats, the dictionary keeps the last position it is given, so the positions are given in
+        # reverse to keep the first occurrence of each key
+        size = len(self)
+        first = dict(zip(zip(reversed(self.value), reversed(self.type)), range(size - 1, -1, -1)))
+
+        np = _import_numpy()
+        if np is None:
+            return self.take(sorted(first.values()))
+
+        return self.take(np.sort(np.fromiter(first.values(), dtype=np.intp, count=len(first))))
+
+    def to_indicators(self):
+        """
+        :return: A list of |Indicator| objects, one per entry in the batch.
+        """
+
+        return [Indicator(value=value,
+                          type=indicator_type,
+                          priority_level=priority_level,
+                          first_seen=_to_int(first_seen),
+                          last_seen=_to_int(last_seen),
+                          sightings=_to_int(sightings),
+                          enclave_ids=enclave_ids)
+                for value, indicator_type, priority_level, first_seen, last_seen, sightings, enclave_ids
+                in zip(*[getattr(self, column) for column in self.COLUMNS])]
+
+    def to_submission_content(self):
+        """
+        :return: The list of indicator dictionaries to use as the ``content`` of a request to |submit_indicators|.
+            Missing values are left out.
+        """
+
+        content = []
+        for value, indicator_type, first_seen, last_seen, sightings in zip(self.value, self.type, self.first_seen,
+                                                                            self.last_seen, self.sightings):
+            d = {'value': value}
+            if indicator_type is not None:
+                d['indicatorType'] = indicator_type
+            if not math.isnan(first_seen):
+                d['firstSeen'] = int(first_seen)
+            if not math.isnan(last_seen):
+                d['lastSeen'] = int(last_seen)
+            if not math.isnan(sightings):
+                d['sightings'] = int(sightings)
+            content.append(d)
+
+        return content
+
+    def to_numpy(self):
+        """
+        Requires NumPy.  The numeric columns are converted without copying.
+
+        :return: A dictionary mapping each column name to a NumPy array.
+        """
+
+        np = _import_numpy()
+        if np is None:
+            raise ImportError("NumPy is required to convert an IndicatorBatch to NumPy arrays.")
+
+        columns = {}
+        for column in self.COLUMNS:
+            values = getattr(self, column)
+            if column in self.NUMERIC_COLUMNS:
+                columns[column] = _as_numpy(np, values)
+            else:
+                columns[column] = np.array(values, dtype=object)
+
+        return columns
+
+    def to_dataframe(self):
+        """
+        Requires pandas.
+
+        :return: A ``pandas.DataFrame`` with one column per batch column.
+        """
+
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("pandas is required to convert an IndicatorBatch to a DataFrame.")
+
+        return pd.DataFrame({column: list(getattr(self, column)) for column in self.COLUMNS},
+                            columns=list(self.COLUMNS))
+
+    def __len__(self):
+        return len(self.value)
+
+    def __iter__(self):
+        return iter(self.to_indicators())
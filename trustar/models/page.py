@@ -27,6 +27,10 @@ class Page(ModelBase):
         pages.  Note that it is possible for this value to change between pages, since data can change between queries.
     """
 
+    __slots__ = ('items', 'page_number', 'page_size', 'total_elements', 'has_next')
+
+    REPR_FIELDS = ('page_number', 'page_size', 'total_elements', 'has_next', 'items')
+
     def __init__(self, items=None, page_number=None, page_size=None, total_elements=None, has_next=None):
         self.items = items
         self.page_number = page_number
@@ -5,11 +5,29 @@ from future import standard_library
 from six import string_types
 
 # package imports
-from ..utils import normalize_timestamp
-from .base import ModelBase
+from ..utils import normalize_timestamp, intern_strings
+from .base import ModelBase, Field, generate_codec
 from .enum import *
 
 
+def _encode_distribution_type(is_enclave):
+    """
+    :return: The distribution type of a report that is, or is not, an enclave report.
+    """
+
+    return DistributionType.ENCLAVE if is_enclave else DistributionType.COMMUNITY
+
+
+def _decode_distribution_type(distribution_type):
+    """
+    :return: Whether a report with the given distribution type is an enclave report.  Like the constructor, reports
+        whose distribution type is unknown are enclave reports.
+    """
+
+    return distribution_type is None or distribution_type.upper() != DistributionType.COMMUNITY
+
+
+@generate_codec
 class Report(ModelBase):
     """
     Models a |Report_resource|.
@@ -26,6 +44,26 @@ class Report(ModelBase):
     :ivar enclave_ids: A list of IDs of enclaves that the report belongs to
     """
 
+    __slots__ = ('id', 'title', 'body', 'time_began', 'external_id', 'external_url', 'is_enclave', 'enclave_ids',
+                 'created', 'updated')
+
+    REPR_FIELDS = ('id', 'title', 'time_began', 'body')
+
+    # the id field is always present, even when None values are removed.  The decoders apply the same normalization as
+    # the constructor, so that from_dict can set the attributes directly.
+    FIELDS = (
+        Field('title', 'title'),
+        Field('body', 'reportBody'),
+        Field('time_began', 'timeBegan', decode=normalize_timestamp),
+        Field('external_url', 'externalUrl'),
+        Field('is_enclave', 'distributionType', encode=_encode_distribution_type, decode=_decode_distribution_type),
+        Field('external_id', 'externalTrackingId'),
+        Field('enclave_ids', 'enclaveIds', decode=intern_strings),
+        Field('created', 'created'),
+        Field('updated', 'updated'),
+        Field('id', 'id', keep_none=True)
+    )
+
     ID_TYPE_INTERNAL = IdType.INTERNAL
     ID_TYPE_EXTERNAL = IdType.EXTERNAL
 
@@ -84,67 +122,4 @@ class Report(ModelBase):
         :return: A string indicating whether the report belongs to an enclave or not.
         """
 
-        if self.is_enclave:
-            return DistributionType.ENCLAVE
-        else:
-            return DistributionType.COMMUNITY
-
-    def to_dict(self, remove_nones=False):
-        """
-        Creates a dictionary representation of the object.
-
-        :param remove_nones: Whether ``None`` values should be filtered out of the dictionary.  Defaults to ``False``.
-        :return: A dictionary representation of the report.
-        """
-
-        if remove_nones:
-            report_dict = super().to_dict(remove_nones=True)
-        else:
-            report_dict = {
-                'title': self.title,
-                'reportBody': self.body,
-                'timeBegan': self.time_began,
-                'externalUrl': self.external_url,
-                'distributionType': self._get_distribution_type(),
-                'externalTrackingId': self.external_id,
-                'enclaveIds': self.enclave_ids,
-                'created': self.created,
-                'updated': self.updated,
-            }
-
-        # id field might not be present
-        if self.id is not None:
-            report_dict['id'] = self.id
-        else:
-            report_dict['id'] = None
-
-        return report_dict
-
-    @classmethod
-    def from_dict(cls, report):
-        """
-        Create a report object from a dictionary.  This method is intended for internal use, to construct a
-        :class:`Report` object from the body of a response json.  It expects the keys of the dictionary to match those
-        of the json that would be found in a response to an API call such as ``GET /report/{id}``.
-
-        :param report: The dictionary.
-        :return: The report object.
-        """
-
-        # determine distribution type
-        distribution_type = report.get('distributionType')
-        if distribution_type is not None:
-            is_enclave = distribution_type.upper() != DistributionType.COMMUNITY
-        else:
-            is_enclave = None
-
-        return Report(id=report.get('id'),
-                      title=report.get('title'),
-                      body=report.get('reportBody'),
-                      time_began=report.get('timeBegan'),
-                      external_id=report.get('externalTrackingId'),
-                      external_url=report.get('externalUrl'),
-                      is_enclave=is_enclave,
-                      enclave_ids=report.get('enclaveIds'),
-                      created=report.get('created'),
-                      updated=report.get('updated'))
+        return _encode_distribution_type(self.is_enclave)
@@ -4,9 +4,10 @@ from builtins import object, super
 from future import standard_library
 from six import string_types
 
-from .base import ModelBase
+from .base import ModelBase, Field, generate_codec
 
 
+@generate_codec
 class RequestQuota(ModelBase):
     """
     Models a request quota.
@@ -19,6 +20,19 @@ class RequestQuota(ModelBase):
     :ivar next_reset_time: The time that the counter will next be reset, in milliseconds since epoch.
     """
 
+    __slots__ = ('guid', 'max_requests', 'used_requests', 'time_window', 'last_reset_time', 'next_reset_time')
+
+    REPR_FIELDS = ('guid', 'used_requests', 'max_requests')
+
+    FIELDS = (
+        Field('guid', 'guid'),
+        Field('max_requests', 'maxRequests'),
+        Field('used_requests', 'usedRequests'),
+        Field('time_window', 'timeWindow'),
+        Field('last_reset_time', 'lastResetTime'),
+        Field('next_reset_time', 'nextResetTime')
+    )
+
     def __init__(self, guid, max_requests, used_requests, time_window, last_reset_time, next_reset_time):
 
         self.guid = guid
@@ -27,31 +41,3 @@ class RequestQuota(ModelBase):
         self.time_window = time_window
         self.last_reset_time = last_reset_time
         self.next_reset_time = next_reset_time
-
-    def to_dict(self, remove_nones=False):
-
-        if remove_nones:
-            return super().to_dict(remove_nones=True)
-
-        d = {
-            'guid': self.guid,
-            'maxRequests': self.max_requests,
-            'usedRequests': self.used_requests,
-            'timeWindow': self.time_window,
-            'lastResetTime': self.last_reset_time,
-            'nextResetTime': self.next_reset_time
-        }
-        return d
-
-    @classmethod
-    def from_dict(cls, d):
-
-        if d is None:
-            return None
-
-        return RequestQuota(guid=d.get('guid'),
-                            max_requests=d.get('maxRequests'),
-                            used_requests=d.get('usedRequests'),
-                            time_window=d.get('timeWindow'),
-                            last_reset_time=d.get('lastResetTime'),
-                            next_reset_time=d.get('nextResetTime'))
@@ -0,0 +1,125 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object
+from future import standard_library
+
+# package imports
+from .indicator import Indicator
+from .report import Report
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+
+class _LazyField(object):
+    """
+    A descriptor that decodes one field of a view from the view's raw dictionary on first access, and caches the result.
+    """
+
+    __slots__ = ('attr', 'key', 'decode', 'item_model')
+
+    def __init__(self, field):
+        self.attr = field.attr
+        self.key = field.source_key
+        self.decode = field.decode
+        self.item_model = field.item_model
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        decoded = obj._decoded
+        try:
+            return decoded[self.attr]
+        except KeyError:
+            pass
+
+        value = obj._raw.get(self.key)
+        if self.decode is not None:
+            value = self.decode(value)
+        elif self.item_model is not None and value is not None:
+            value = [self.item_model.from_dict(item) for item in value]
+
+        decoded[self.attr] = value
+        return value
+
+    def __set__(self, obj, value):
+        raise AttributeError("'%s' is read-only on a %s; use to_model() to get a mutable copy."
+                             % (self.attr, type(obj).__name__))
+
+
+def create_view_class(model):
+    """
+    Creates a read-only view class for a model.  The view class is a subclass of the model, so views can be used
+    wherever the model is expected for reading, including ``to_dict``.
+
+    :param model: The model class, which must have ``FIELDS``.  The fields are decoded by their ``decode`` functions,
+        as in the model's ``from_dict``.
+    :return: The view class.
+    """
+
+    namespace = {
+        '__slots__': ('_raw', '_decoded'),
+        '__doc__': "A read-only, lazily decoded view of a |%s|.  See :class:`ModelView`." % model.__name__,
+        'MODEL': model
+    }
+    for field in model.FIELDS:
+        namespace[field.attr] = _LazyField(field)
+
+    return type(model.__name__ + "View", (ModelView, model), namespace)
+
+
+class ModelView(object):
+    """
+    Mixin for read-only views of models.  A view wraps the dictionary of a response body and decodes each field only
+    when it is first accessed, so that iterating over many results while reading only a few fields skips the cost of
+    building full models.  Views are created by |TruStar| methods that return pages when its ``lazy_models`` config
+    value is ``True``.
+
+    :cvar MODEL: The model class that the view is a view of.
+    """
+
+    __slots__ = ()
+
+    MODEL = None
+
+    def __init__(self, raw):
+        """
+        Constructs a view.
+
+        :param dict raw: The dictionary representation of the model, as found in a response body.
+        """
+
+        object.__setattr__(self, '_raw', raw)
+        object.__setattr__(self, '_decoded', {})
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Creates a view of a dictionary representation, without decoding it.
+
+        :param d: The dictionary.
+        :return: The view.
+        """
+
+        if d is None:
+            return None
+
+        return cls(d)
+
+    def __reduce__(self):
+        # the attributes of a view are read-only, so views are pickled and copied by recreating them from the raw
+        # dictionary rather than by restoring their slots
+        return type(self), (self._raw,)
+
+    def to_model(self):
+        """
+        :return: A full, mutable model object with the same values as the view.
+        """
+
+        return self.MODEL.from_dict(self._raw)
+
+
+ReportView = create_view_class(Report)
+
+IndicatorView = create_view_class(Indicator)
@@ -0,0 +1,400 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, range
+from future import standard_library
+
+# external imports
+import functools
+import multiprocessing
+import threading
+import time
+from queue import Queue, Empty, Full
+
+# package imports
+from .utils import get_logger, DEFAULT_MAX_WORKERS
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+# the default maximum number of items waiting in the queue in front of each stage
+DEFAULT_QUEUE_SIZE = 100
+
+# how often threads blocked on a queue check whether the pipeline has been stopped, in seconds
+_POLL_INTERVAL = 0.1
+
+# passed along the queues after the last item
+_DONE = object()
+
+
+class Stage(object):
+    """
+    A step of a |Pipeline|: a function applied to each item that reaches the stage, by ``workers`` threads or
+    processes at a time.
+
+    The function returns the item to pass on to the next stage, or ``None`` to drop the item (for instance because it
+    is a duplicate, or should be filtered out).  If ``flatten`` is ``True``, the function returns an iterable instead,
+    and each of its elements is passed on; this suits stages that parse one input (such as a file) into many records.
+
+    If the function raises an exception for an item, the item is not passed on, and the stage goes on to the next
+    item.  The failure is logged and counted in the ``errors`` metric of the stage, and ``on_error`` is called with the
+    item and the exception, so that callers can record which inputs were lost.
+
+    Stages that run in processes are for CPU-bound work, such as extracting text from PDFs.  Their function, and the
+    items and results, must be picklable, so the function must be defined at the top level of a module.
+    """
+
+    def __init__(self, func, name=None, workers=1, processes=False, flatten=False, queue_size=None, initializer=None,
+                 initargs=(), on_error=None):
+        """
+        Constructs a Stage object.
+
+        :param func: The function to apply to each item.
+        :param str name: The name of the stage in metrics and log messages (defaults to the name of the function).
+        :param int workers: The number of items to process at a time.
+        :param bool processes: Whether to process items in a pool of ``workers`` processes, rather than in threads.
+        :param bool flatten: Whether ``func`` returns an iterable of items to pass on, rather than a single item.
+        :param int queue_size: The maximum number of items waiting for this stage (defaults to the queue size of the
+            pipeline).
+        :param initializer: A function called at the start of each process, if ``processes`` is ``True``.
+        :param initargs: The arguments of ``initializer``.
+        :param on_error: A function called with the item and the exception when ``func`` raises an exception for an
+            item (optional).  It is called in the thread of the worker, so it must be thread-safe if ``workers`` is
+            more than 1.  If it raises an exception, the pipeline is stopped.
+        """
+
+        self.func = func
+        self.name = name if name is not None else getattr(func, '__name__', 'stage')
+        self.workers = workers
+        self.processes = processes
+        self.flatten = flatten
+        self.queue_size = queue_size
+        self.initializer = initializer
+        self.initargs = initargs
+        self.on_error = on_error
+
+
+class StageMetrics(object):
+    """
+    Counts what happened to the items that reached a stage of a |Pipeline|.
+
+    :ivar items_in: The number of items the stage has taken from its queue.
+    :ivar items_out: The number of items the stage has passed on.
+    :ivar dropped: The number of items the stage's function returned ``None`` for.
+    :ivar errors: The number of items the stage's function raised an exception for.
+    :ivar busy_seconds: The total time spent in the stage's function, across all workers.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items_in = 0
+        self.items_out = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items_out, dropped, error, seconds):
+        with self._lock:
+            self.items_in += 1
+            self.items_out += items_out
+            self.dropped += dropped
+            self.errors += error
+            self.busy_seconds += seconds
+
+    def to_dict(self, elapsed=None):
+        """
+        :param float elapsed: The time the pipeline has been running, in seconds (optional).
+        :return: A dictionary of the metrics.  If ``elapsed`` is given, it includes the number of items taken per
+            second (``rate``) and the fraction of the time the workers were busy (``utilization``); a stage whose
+            utilization is close to 1 is the bottleneck of the pipeline.
+        """
+
+        metrics = {
+            'stage': self.name,
+            'workers': self.workers,
+            'in': self.items_in,
+            'out': self.items_out,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'busy_seconds': self.busy_seconds,
+        }
+        if elapsed:
+            metrics['rate'] = self.items_in / elapsed
+            metrics['utilization'] = self.busy_seconds / (elapsed * self.workers)
+        return metrics
+
+
+class Pipeline(object):
+    """
+    Moves items from a source through a sequence of stages.  Each stage takes items from a bounded queue and puts its
+    results on the queue of the next stage, so all of the stages work at the same time, and a slow stage holds back
+    the ones before it instead of letting items pile up in memory.  Items may leave a stage in a different order than
+    they reached it.
+
+    An item that a stage fails to process does not stop the pipeline: it is dropped, and only shows up in the log, in
+    the ``errors`` metric of the stage, and in the calls to the ``on_error`` function of the stage, if it has one.  An
+    exception raised by the source or by an ``on_error`` function stops the pipeline, and is raised by ``run``.
+
+    Example:
+
+    >>> pipeline = Pipeline(read_alerts(f), [
+    >>>     Stage(lambda alert: alert if alert_filter.get_reason(alert) is None else None, name='filter'),
+    >>>     Stage(alert_to_report, name='convert'),
+    >>>     dedup_stage(key=lambda report: report.title),
+    >>>     submit_reports_stage(ts, workers=4, rate_limiter=RateLimiter(rate=5)),
+    >>> ])
+    >>> for result in pipeline.run():
+    >>>     print(result['report'].id)
+    >>> print(pipeline.format_metrics())
+    """
+
+    def __init__(self, source, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Constructs a Pipeline object.
+
+        :param source: An iterable of the items to process, such as a generator over the lines of a file.
+        :param stages: A list of |Stage| objects.
+        :param int queue_size: The maximum number of items waiting in front of each stage, and waiting to be consumed
+            from ``run``.
+        """
+
+        self.source = source
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.metrics = [StageMetrics(stage.name, stage.workers) for stage in self.stages]
+        self._start_time = None
+        self._end_time = None
+
+    def run(self):
+        """
+        Runs the pipeline.  Items are only taken from the source as fast as the results are consumed.  If the
+        generator is closed before it is exhausted, the pipeline is stopped.
+
+        :return: A generator of the items passed on by the last stage.
+        """
+
+        stop = threading.Event()
+        failures = []
+        queues = [Queue(stage.queue_size or self.queue_size) for stage in self.stages] + [Queue(self.queue_size)]
+        threads = []
+        pools = []
+
+        def put(queue, item):
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def get(queue):
+            while not stop.is_set():
+                try:
+                    return queue.get(timeout=_POLL_INTERVAL)
+                except Empty:
+                    pass
+            return _DONE
+
+        def fail(e):
+            failures.append(e)
+            stop.set()
+
+        def feed():
+            try:
+                for item in self.source:
+                    if not put(queues[0], item):
+                        return
+                put(queues[0], _DONE)
+            except Exception as e:
+                logger.error("Pipeline source failed: %s", e)
+                fail(e)
+
+        def work(stage, metrics, apply, in_queue, out_queue, remaining, lock):
+            try:
+                while True:
+                    item = get(in_queue)
+                    if item is _DONE:
+                        # let the other workers of the stage see that the items are done too
+                        put(in_queue, _DONE)
+                        break
+
+                    start = time.time()
+                    count = 0
+                    try:
+                        result = apply(item)
+                        results = (result if result is not None else ()) if stage.flatten else (result,)
+                        # the results of a flattening stage may be a generator, so errors can occur while iterating
+                        for result in results:
+                            if result is not None:
+                                if not put(out_queue, result):
+                                    return
+                                count += 1
+                    except Exception as e:
+                        metrics.record(count, 0, 1, time.time() - start)
+                        logger.warning("Stage '%s' failed to process an item: %s", stage.name, e)
+                        if stage.on_error is not None:
+                            stage.on_error(item, e)
+                        continue
+
+                    metrics.record(count, 1 if count == 0 else 0, 0, time.time() - start)
+
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    put(out_queue, _DONE)
+
+            except Exception as e:
+                logger.error("Stage '%s' failed: %s", stage.name, e)
+                fail(e)
+
+        self._start_time = time.time()
+        self._end_time = None
+        try:
+            for i, (stage, metrics) in enumerate(zip(self.stages, self.metrics)):
+                apply = stage.func
+                if stage.processes:
+                    pool = multiprocessing.Pool(stage.workers, stage.initializer, stage.initargs)
+                    pools.append(pool)
+                    apply = _wrap_pool_apply(pool, stage.func)
+
+                remaining = [stage.workers]
+                lock = threading.Lock()
+                for _ in range(stage.workers):
+                    threads.append(threading.Thread(target=work, args=(stage, metrics, apply, queues[i], queues[i + 1],
+                                                                       remaining, lock)))
+
+            threads.append(threading.Thread(target=feed))
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+
+            while True:
+                item = get(queues[-1])
+                if item is _DONE:
+                    break
+                yield item
+
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            for pool in pools:
+                pool.terminate()
+            self._end_time = time.time()
+
+        if failures:
+            raise failures[0]
+
+    def get_metrics(self):
+        """
+        :return: A list of dictionaries of the metrics of each stage (see |StageMetrics|), in order.
+        """
+
+        elapsed = None
+        if self._start_time is not None:
+            elapsed = (self._end_time or time.time()) - self._start_time
+        return [metrics.to_dict(elapsed) for metrics in self.metrics]
+
+    def format_metrics(self):
+        """
+        :return: The metrics of each stage, formatted as a table.
+        """
+
+        lines = ["%-16s %7s %9s %9s %9s %7s %10s %7s" % ("stage", "workers", "in", "out", "dropped", "errors",
+                                                          "items/s", "busy")]
+        for metrics in self.get_metrics():
+            lines.append("%-16s %7d %9d %9d %9d %7d %10.1f %6.0f%%" % (
+                metrics['stage'][:16], metrics['workers'], metrics['in'], metrics['out'], metrics['dropped'],
+                metrics['errors'], metrics.get('rate', 0), 100 * metrics.get('utilization', 0)))
+        return "\n".join(lines)
+
+
+def _wrap_pool_apply(pool, func):
+    """
+    :return: A function that applies ``func`` to an item in a process of ``pool``, waiting for the result.
+    """
+
+    def apply(item):
+        return pool.apply(func, (item,))
+
+    return apply
+
+
+def dedup_stage(key=None, name='dedup'):
+    """
+    Creates a stage that drops items that have already reached it.
+
+    :param key: A function returning the value that identifies an item (defaults to the item itself).
+    :param str name: The name of the stage.
+    :return: The |Stage|.
+    """
+
+    seen = set()
+    lock = threading.Lock()
+
+    def dedup(item):
+        value = key(item) if key is not None else item
+        with lock:
+            if value in seen:
+                return None
+            seen.add(value)
+        return item
+
+    return Stage(dedup, name=name)
+
+
+def submit_reports_stage(client, workers=DEFAULT_MAX_WORKERS, rate_limiter=None, name='submit'):
+    """
+    Creates a stage that submits |Report| objects.  The stage passes on a dict for each report, like
+    |submit_reports|: 'report' (the |Report|, with ``id`` set if it was submitted) and 'error' (the exception that
+    stopped it from being submitted, or ``None``).
+
+    :param client: The |TruStar| object to submit the reports with.
+    :param int workers: The maximum number of reports to submit concurrently.
+    :param rate_limiter: A |RateLimiter| to acquire before each submission (optional).
+    :param str name: The name of the stage.
+    :return: The |Stage|.
+    """
+
+    return Stage(functools.partial(client._submit_report_result, rate_limiter=rate_limiter), name=name,
+                 workers=workers)
+
+
+def submit_indicators_stage(client, enclave_ids=None, tags=None, workers=1, rate_limiter=None, name='submit'):
+    """
+    Creates a stage that submits lists of |Indicator| objects with |submit_indicators|.  The stage passes on a dict
+    for each list: 'indicators' (the list) and 'error' (the exception that stopped it from being submitted, or
+    ``None``).
+
+    :param client: The |TruStar| object to submit the indicators with.
+    :param list(str) enclave_ids: The enclaves to submit the indicators to.
+    :param tags: A list of |Tag| objects to apply to all of the indicators (optional).
+    :param int workers: The maximum number of lists to submit concurrently.
+    :param rate_limiter: A |RateLimiter| to acquire before each submission (optional).
+    :param str name: The name of the stage.
+    :return: The |Stage|.
+    """
+
+    def submit(indicators):
+        result = {
+            'indicators': indicators,
+            'error': None
+        }
+
+        try:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            client.submit_indicators(indicators, enclave_ids=enclave_ids, tags=tags)
+        except Exception as e:
+            logger.warning("Failed to submit %d indicators: %s", len(indicators), e)
+            result['error'] = e
+
+        return result
+
+    return Stage(submit, name=name, workers=workers)
@@ -10,8 +10,9 @@ from datetime import datetime
 import functools
 
 # package imports
-from .models import Page, Report, DistributionType, IdType
-from .utils import get_logger, get_time_based_page_generator
+from .models import Page, Report, ReportView, DistributionType, IdType
+from .utils import get_logger, get_time_based_page_generator, chunk_query_params, parallel_imap, \
+    DEFAULT_MAX_WORKERS
 
 # python 2 backwards compatibility
 standard_library.install_aliases()
@@ -19,8 +20,24 @@ standard_library.install_aliases()
 logger = get_logger(__name__)
 
 
+# the number of reports looked up in a ReportIndex at a time by submit_reports
+REPORT_LOOKUP_BATCH_SIZE = 100
+
+
 class ReportClient(object):
 
+    # a ReportIndex that skips submitting reports that were already submitted unchanged (see ReportIndex)
+    report_index = None
+
+    @property
+    def _report_model(self):
+        """
+        :return: The class of the items of pages of reports: |ReportView| if the ``lazy_models`` config value is
+            ``True``, otherwise |Report|.
+        """
+
+        return ReportView if self.lazy_models else Report
+
     def get_report_details(self, report_id, id_type=None):
         """
         Retrieves a report by its ID.  Internal and external IDs are both allowed.
@@ -79,6 +96,20 @@ class ReportClient(object):
 
         """
 
+        page = self._get_reports_page_json(is_enclave, enclave_ids, tag, excluded_tags, from_time, to_time)
+
+        # create a Page object from the dict
+        return Page.from_dict(page, content_type=self._report_model)
+
+    def _get_reports_page_json(self, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None,
+                               from_time=None, to_time=None):
+        """
+        Gets the body of a response from the reports endpoint, without converting the reports to |Report| objects.
+        See |get_reports_page|.
+
+        :return: The response body, as a dictionary.
+        """
+
         distribution_type = None
 
         # explicitly compare to True and False to distinguish from None (which is treated as False in a conditional)
@@ -99,10 +130,8 @@ class ReportClient(object):
             'excludedTags': excluded_tags
         }
         resp = self._client.get("reports", params=params)
-        result = Page.from_dict(resp.json(), content_type=Report)
 
-        # create a Page object from the dict
-        return result
+        return resp.json()
 
     def submit_report(self, report):
         """
@@ -112,6 +141,9 @@ class ReportClient(object):
           identified by ``report.enclaves``; if that field is ``None``, then the enclave IDs registered with this
           |TruStar| object will be used.
         * If ``report.time_began`` is ``None``, then the current time will be used.
+        * If the ``report_index`` attribute of this object is a |ReportIndex|, then a report that was already submitted
+          unchanged is not submitted again, and a changed report with the same ``external_id`` as a submitted report
+          updates that report instead.
 
         :param report: The |Report| object that was submitted, with the ``id`` field updated based
             on values from the response.
@@ -128,6 +160,21 @@ class ReportClient(object):
         Suspicious Activity
         """
 
+        self._set_report_distribution(report)
+
+        lookup = None
+        if self.report_index is not None:
+            lookup = self.report_index.lookup(report)
+
+        return self._submit_report(report, lookup)
+
+    def _set_report_distribution(self, report):
+        """
+        Sets the default distribution type and enclaves of a report that is about to be submitted.
+
+        :param report: The |Report| object.
+        """
+
         # make distribution type default to "enclave"
         if report.is_enclave is None:
             report.is_enclave = True
@@ -140,9 +187,33 @@ class ReportClient(object):
             else:
                 report.enclave_ids = []
 
+    def _submit_report(self, report, lookup=None):
+        """
+        Submits a report whose distribution has been set, unless ``report_index`` found it was already submitted.
+
+        :param report: The |Report| object.
+        :param lookup: The result of looking up the report in ``report_index`` (see |ReportIndex|), or ``None``.
+        :return: The |Report| object, with the ``id`` field set.
+        """
+
         if report.is_enclave and len(report.enclave_ids) == 0:
             raise Exception("Cannot submit a report of distribution type 'ENCLAVE' with an empty set of enclaves.")
 
+        if lookup is not None:
+            report_id, unchanged = lookup
+
+            if unchanged:
+                logger.debug("Report '%s' was already submitted as %s.", report.title, report_id)
+                report.id = report_id
+                return report
+
+            if report_id is not None:
+                logger.debug("Report '%s' has changed since it was submitted; updating %s.", report.title, report_id)
+                report.id = report_id
+                self.update_report(report)
+                self.report_index.add(report)
+                return report
+
         # default time began is current time
         if report.time_began is None:
             report.time_began = datetime.now()
@@ -158,8 +229,104 @@ class ReportClient(object):
 
         report.id = report_id
 
+        if self.report_index is not None:
+            self.report_index.add(report)
+
         return report
 
+    def submit_reports(self, reports, max_workers=DEFAULT_MAX_WORKERS, max_pending=None, rate_limiter=None):
+        """
+        Submits many reports concurrently with |submit_report|.  Reports are only taken from ``reports`` as fast as they
+        are submitted, so ``reports`` can be a generator over a source of any size, such as |read_csv_reports|.
+
+        :param reports: An iterable of |Report| objects.
+        :param int max_workers: The maximum number of reports to submit concurrently.
+        :param int max_pending: The maximum number of reports that have been taken from ``reports`` but whose results
+            have not been consumed (defaults to twice ``max_workers``).
+        :param rate_limiter: A |RateLimiter| to acquire before each submission (optional).  Reports that
+            ``report_index`` found were already submitted unchanged do not acquire it.
+        :return: A generator of dicts, one per report in the same order, containing two fields: 'report' (the |Report|
+            object, with ``id`` set if it was submitted) and 'error' (the exception that stopped the report from being
+            submitted, or ``None``).
+
+        If the ``report_index`` attribute of this object is a |ReportIndex|, the reports are looked up in the index in
+        batches of ``REPORT_LOOKUP_BATCH_SIZE`` as they are taken from ``reports``.
+
+        Example:
+
+        >>> results = ts.submit_reports(reports, rate_limiter=RateLimiter(rate=5))
+        >>> failed = [result['report'] for result in results if result['error'] is not None]
+        """
+
+        def submit(item):
+            report, lookup = item
+            return self._submit_report_result(report, rate_limiter=rate_limiter, lookup=lookup)
+
+        if self.report_index is not None:
+            items = self._lookup_reports(reports)
+        else:
+            items = ((report, None) for report in reports)
+
+        return parallel_imap(submit, items, max_workers=max_workers, max_pending=max_pending)
+
+    def _lookup_reports(self, reports, batch_size=REPORT_LOOKUP_BATCH_SIZE):
+        """
+        Looks up reports in ``report_index``, ``batch_size`` reports at a time.  Reports in the same batch are looked up
+        before any of them is submitted, so a report that appears twice in a batch is submitted twice.
+
+        :param reports: An iterable of |Report| objects.
+        :param int batch_size: The number of reports to look up at a time.
+        :return: A generator of tuples of each report and the result of looking it up.
+        """
+
+        batch = []
+        for report in reports:
+            self._set_report_distribution(report)
+            batch.append(report)
+            if len(batch) >= batch_size:
+                for item in zip(batch, self.report_index.lookup_many(batch)):
+                    yield item
+                batch = []
+
+        if len(batch) > 0:
+            for item in zip(batch, self.report_index.lookup_many(batch)):
+                yield item
+
+    def _submit_report_result(self, report, rate_limiter=None, lookup=None):
+        """
+        Submits a report with |submit_report|, catching the exception if it fails.
+
+        :param report: The |Report| object.
+        :param rate_limiter: A |RateLimiter| to acquire before submitting the report (optional).
+        :param lookup: The result of looking up the report in ``report_index``, if it has been looked up already.
+        :return: A dict containing two fields: 'report' (the |Report| object) and 'error' (the exception that stopped
+            the report from being submitted, or ``None``).
+        """
+
+        result = {
+            'report': report,
+            'error': None
+        }
+
+        try:
+            if lookup is None and self.report_index is not None:
+                self._set_report_distribution(report)
+                lookup = self.report_index.lookup(report)
+
+            # reports that were already submitted unchanged are not sent, so do not count against the rate limit
+            if rate_limiter is not None and (lookup is None or not lookup[1]):
+                rate_limiter.acquire()
+
+            if lookup is None:
+                self.submit_report(report)
+            else:
+                self._submit_report(report, lookup)
+        except Exception as e:
+            logger.warning("Failed to submit report '%s': %s", report.title, e)
+            result['error'] = e
+
+        return result
+
     def update_report(self, report):
         """
         Updates the report identified by the ``report.id`` field; if this field does not exist, then
@@ -219,6 +386,12 @@ class ReportClient(object):
         params = {'idType': id_type}
         self._client.delete("reports/%s" % report_id, params=params)
 
+        if self.report_index is not None:
+            if id_type == IdType.EXTERNAL:
+                self.report_index.remove(external_id=report_id)
+            else:
+                self.report_index.remove(report_id=report_id)
+
     def get_correlated_report_ids(self, indicators):
         """
         DEPRECATED!
@@ -271,7 +444,7 @@ class ReportClient(object):
         }
         resp = self._client.get("reports/correlated", params=params)
 
-        return Page.from_dict(resp.json(), content_type=Report)
+        return Page.from_dict(resp.json(), content_type=self._report_model)
 
     def search_reports_page(self, search_term, enclave_ids=None, page_size=None, page_number=None):
         """
@@ -293,7 +466,7 @@ class ReportClient(object):
         }
 
         resp = self._client.get("reports/search", params=params)
-        page = Page.from_dict(resp.json(), content_type=Report)
+        page = Page.from_dict(resp.json(), content_type=self._report_model)
 
         return page
 
@@ -367,20 +540,149 @@ class ReportClient(object):
         get_page = functools.partial(self.get_correlated_reports_page, indicators, enclave_ids, is_enclave)
         return Page.get_page_generator(get_page, start_page, page_size)
 
-    def get_correlated_reports(self, indicators, enclave_ids=None, is_enclave=True):
+    def get_correlated_reports(self, indicators, enclave_ids=None, is_enclave=True, max_workers=DEFAULT_MAX_WORKERS):
         """
         Uses the |get_correlated_reports_page| method to create a generator that returns each successive report.
 
+        If the query string for all of the indicators would be too long for a single request, the indicators are split
+        into several groups whose reports are fetched concurrently.  Reports that correlate with more than one group
+        are only returned once.
+
         :param indicators: A list of indicator values to retrieve correlated reports for.
         :param enclave_ids: The enclaves to search in.
         :param is_enclave: Whether to search enclave reports or community reports.
+        :param int max_workers: The maximum number of groups of indicators to fetch concurrently.
         :return: The generator.
         """
 
-        return Page.get_generator(page_generator=self._get_correlated_reports_page_generator(indicators,
-                                                                                             enclave_ids,
-                                                                                             is_enclave))
-    
+        params = {
+            'indicators': indicators,
+            'enclaveIds': enclave_ids,
+            'distributionType': DistributionType.ENCLAVE if is_enclave else DistributionType.COMMUNITY
+        }
+        chunks = chunk_query_params(params, ['indicators'])
+
+        if len(chunks) == 1:
+            return Page.get_generator(page_generator=self._get_correlated_reports_page_generator(indicators,
+                                                                                                 enclave_ids,
+                                                                                                 is_enclave))
+
+        def get_reports(chunk):
+            return list(Page.get_generator(page_generator=self._get_correlated_reports_page_generator(
+                chunk['indicators'], enclave_ids, is_enclave)))
+
+        return self._get_unique_reports(parallel_imap(get_reports, chunks, max_workers=max_workers))
+
+    @staticmethod
+    def _get_unique_reports(report_lists):
+        """
+        Creates a generator that returns each report from a sequence of lists of reports, skipping reports whose IDs
+        have already been returned.
+
+        :param report_lists: An iterable of lists of |Report| objects.
+        :return: The generator.
+        """
+
+        seen = set()
+        for reports in report_lists:
+            for report in reports:
+                if report.id not in seen:
+                    seen.add(report.id)
+                    yield report
+
+    def export_report_indicators(self, sink, from_time=None, to_time=None, is_enclave=True, enclave_ids=None,
+                                 max_workers=DEFAULT_MAX_WORKERS, max_pending=None):
+        """
+        Writes a row for each indicator of each report in a time window to a sink, such as a |CsvSink| or an
+        |NdjsonSink|.  The rows have the keys in ``REPORT_INDICATOR_COLUMNS``: the ID, title and tag names of the
+        report, and the value and type of the indicator.
+
+        The tags and indicators of up to ``max_workers`` reports are fetched concurrently, and reports are only taken
+        from |get_reports| as fast as their rows are written, so memory use does not grow with the size of the export.
+        Rows are written in the order the reports are returned.
+
+        :param sink: The |ExportSink| to write the rows to.  It is not closed by this method.
+        :param int from_time: start of time window in milliseconds since epoch (optional)
+        :param int to_time: end of time window in milliseconds since epoch (optional)
+        :param boolean is_enclave: restrict reports to specific distribution type (optional - by default enclave
+            reports are exported)
+        :param list(str) enclave_ids: list of enclave ids used to restrict reports to specific enclaves (optional)
+        :param int max_workers: The maximum number of reports to fetch tags and indicators for concurrently.
+        :param int max_pending: The maximum number of reports that have been fetched but not yet written (defaults to
+            twice ``max_workers``).
+        :return: A tuple of the number of reports and the number of rows written.
+
+        Example:
+
+        >>> with CsvSink("indicators.csv", REPORT_INDICATOR_COLUMNS) as sink:
+        >>>     ts.export_report_indicators(sink, from_time=from_time, to_time=to_time, enclave_ids=ts.enclave_ids)
+        (120, 4310)
+        """
+
+        def get_report_rows(report):
+            tags = [tag.name for tag in self.get_enclave_tags(report.id)]
+            return [{
+                'report_id': report.id,
+                'report_title': report.title,
+                'report_tags': tags,
+                'indicator_value': indicator.value,
+                'indicator_type': indicator.type
+            } for indicator in self.get_indicators_for_report(report.id)]
+
+        reports = self.get_reports(is_enclave=is_enclave, enclave_ids=enclave_ids,
+                                   from_time=from_time, to_time=to_time)
+
+        report_count = 0
+        row_count = 0
+        for rows in parallel_imap(get_report_rows, reports, max_workers=max_workers, max_pending=max_pending):
+            sink.write_rows(rows)
+            report_count += 1
+            row_count += len(rows)
+
+        logger.debug("Exported %d indicators from %d reports.", row_count, report_count)
+
+        return report_count, row_count
+
+    def export_reports(self, sink, is_enclave=None, enclave_ids=None, tag=None, excluded_tags=None, from_time=None,
+                       to_time=None):
+        """
+        Writes the reports matching the provided filters to a sink, such as an |ArrowSink| with
+        ``REPORT_ARROW_COLUMNS``.  The items of each page are written as they are returned by the API, without creating
+        a |Report| object per item, so the rows have the keys of the report JSON (``id``, ``title``, ``reportBody``,
+        ...).  Takes the same filters as |get_reports|.
+
+        :param sink: The |ExportSink| to write the rows to.  It is not closed by this method.
+        :param boolean is_enclave: restrict reports to specific distribution type (optional - by default all accessible
+            reports are returned).
+        :param list(str) enclave_ids: list of enclave ids used to restrict reports to specific
+            enclaves (optional - by default reports from all enclaves are returned)
+        :param str tag: name of tag to filter reports by.
+        :param list(str) excluded_tags: Reports containing ANY of these tags will be excluded from the results.
+        :param int from_time: start of time window in milliseconds since epoch (optional)
+        :param int to_time: end of time window in milliseconds since epoch (optional)
+        :return: The number of reports written.
+        """
+
+        def get_page(from_time, to_time):
+            return Page.from_dict(self._get_reports_page_json(is_enclave, enclave_ids, tag, excluded_tags,
+                                                              from_time, to_time))
+
+        pages = get_time_based_page_generator(
+            get_page=get_page,
+            get_next_to_time=lambda x: x.items[-1].get('updated') if len(x.items) > 0 else None,
+            from_time=from_time,
+            to_time=to_time
+        )
+
+        count = 0
+        for page in pages:
+            sink.write_rows(page.items)
+            count += len(page.items)
+
+        logger.debug("Exported %d reports.", count)
+
+        return count
+
     def _search_reports_page_generator(self, search_term, enclave_ids=None, start_page=0, page_size=None):
         """
         Creates a generator from the |search_reports_page| method that returns each successive page.
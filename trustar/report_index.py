@@ -0,0 +1,244 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, range, str
+from future import standard_library
+
+# external imports
+import hashlib
+import json
+import sqlite3
+import threading
+
+# package imports
+from .utils import get_logger, get_current_time_millis
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submitted_reports (
+    fingerprint TEXT NOT NULL,
+    report_id TEXT NOT NULL,
+    external_id TEXT,
+    submitted INTEGER
+);
+CREATE INDEX IF NOT EXISTS submitted_reports_fingerprint ON submitted_reports (fingerprint);
+CREATE INDEX IF NOT EXISTS submitted_reports_report_id ON submitted_reports (report_id);
+CREATE INDEX IF NOT EXISTS submitted_reports_external_id ON submitted_reports (external_id);
+"""
+
+# version 1 keyed the table on the fingerprint alone
+_MIGRATE_FROM_VERSION_1 = """
+DROP INDEX IF EXISTS submitted_reports_report_id;
+DROP INDEX IF EXISTS submitted_reports_external_id;
+ALTER TABLE submitted_reports RENAME TO submitted_reports_v1;
+%s
+INSERT INTO submitted_reports SELECT fingerprint, report_id, external_id, submitted FROM submitted_reports_v1;
+DROP TABLE submitted_reports_v1;
+""" % _SCHEMA
+
+# the maximum number of values bound to a single query (SQLite allows 999)
+_MAX_QUERY_VALUES = 500
+
+
+class ReportIndex(object):
+    """
+    A persistent record of the reports that have been submitted, keyed by a fingerprint of their contents, used by
+    |submit_report| and |submit_reports| when assigned to the ``report_index`` attribute of a |TruStar| object.  Running
+    the same ingest job twice then only submits the reports that are new or have changed:
+
+    * a report with the same ``external_id`` as a submitted report is not submitted again if its fingerprint is
+      unchanged, and otherwise updates that report with |update_report|, instead of being submitted as a new report.
+      Either way its ``id`` is set to the ID of the submitted report.
+    * any other report with the same fingerprint as a submitted report is not submitted again; its ``id`` is set to the
+      ID of the submitted report.
+
+    Reports with the same contents but different external IDs are recorded separately, each with its own external ID.
+
+    The fingerprint is a SHA-256 hash of the title (with runs of whitespace collapsed), the body (with line endings
+    normalized, and trailing whitespace removed), the distribution type, and the set of enclave IDs.  The time the report
+    began and its external ID are not part of the fingerprint.
+
+    Only reports submitted through the |TruStar| object the index is assigned to are recorded, and reports deleted
+    through it are removed.
+
+    Example:
+
+    >>> ts.report_index = ReportIndex("submitted.db")
+    >>> for result in ts.submit_reports(reports):
+    >>>     print(result['report'].id)
+    >>> print(ts.report_index.get_stats())
+    """
+
+    # the version of the schema, stored in the database file
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path=":memory:"):
+        """
+        Opens an index, creating the database if it does not exist.
+
+        :param str path: The path of the SQLite database file, or ``":memory:"`` for an index that is not persisted.
+        """
+
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock, self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, 1, self.SCHEMA_VERSION):
+                raise ValueError("Unsupported report index schema version: %s" % version)
+
+            self._connection.executescript(_MIGRATE_FROM_VERSION_1 if version == 1 else _SCHEMA)
+            self._connection.execute("PRAGMA user_version = %d" % self.SCHEMA_VERSION)
+
+        self.unchanged = 0
+        self.changed = 0
+        self.misses = 0
+
+    def close(self):
+        """
+        Closes the database.
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def get_fingerprint(report):
+        """
+        :param report: The |Report| object.
+        :return: The fingerprint of the report, as a hex string.
+        """
+
+        title = u" ".join((report.title or u"").split())
+        body = u"\n".join(line.rstrip() for line in (report.body or u"").splitlines()).strip()
+        enclave_ids = sorted(set(report.enclave_ids or [])) if report.is_enclave else []
+
+        content = json.dumps([title, body, report._get_distribution_type(), enclave_ids])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def lookup(self, report):
+        """
+        Looks up a report that is about to be submitted.
+
+        :param report: The |Report| object, with the ``is_enclave`` and ``enclave_ids`` it will be submitted with.
+        :return: A tuple of the ID of the submitted report that matches ``report`` (or ``None``), and whether the
+            report is unchanged (``True`` if the fingerprint matches, ``False`` if only the external ID matches).  A
+            submitted report with the same external ID takes precedence over one with the same fingerprint.
+        """
+
+        return self.lookup_many([report])[0]
+
+    def lookup_many(self, reports):
+        """
+        Looks up many reports at once, with one query per few hundred reports.
+
+        :param reports: A list of |Report| objects.
+        :return: A list of the tuples returned by ``lookup``, in the same order.
+        """
+
+        fingerprints = [self.get_fingerprint(report) for report in reports]
+        external_ids = [report.external_id for report in reports if report.external_id is not None]
+
+        by_fingerprint = self._select('fingerprint', fingerprints)
+        by_external_id = self._select('external_id', external_ids)
+
+        results = []
+        for report, fingerprint in zip(reports, fingerprints):
+            if report.external_id in by_external_id:
+                submitted_fingerprint, report_id = by_external_id[report.external_id]
+                results.append((report_id, submitted_fingerprint == fingerprint))
+            elif fingerprint in by_fingerprint:
+                results.append((by_fingerprint[fingerprint][1], True))
+            else:
+                results.append((None, False))
+
+        with self._lock:
+            for report_id, unchanged in results:
+                if unchanged:
+                    self.unchanged += 1
+                elif report_id is not None:
+                    self.changed += 1
+                else:
+                    self.misses += 1
+
+        return results
+
+    def _select(self, column, values):
+        """
+        :return: A dict mapping the values of a column that are in the index to (fingerprint, report ID) tuples.
+        """
+
+        values = list(set(values))
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(values), _MAX_QUERY_VALUES):
+                chunk = values[i:i + _MAX_QUERY_VALUES]
+                rows = self._connection.execute(
+                    "SELECT %s, fingerprint, report_id FROM submitted_reports WHERE %s IN (%s)"
+                    % (column, column, ", ".join("?" * len(chunk))), chunk)
+                found.update((row[0], row[1:]) for row in rows)
+
+        return found
+
+    def add(self, report):
+        """
+        Records a report that has been submitted or updated.  An earlier record of a report with the same external ID,
+        or with the same fingerprint and no external ID, is replaced.
+
+        :param report: The |Report| object, with its ``id`` set.
+        """
+
+        fingerprint = self.get_fingerprint(report)
+
+        with self._lock, self._connection as connection:
+            if report.external_id is not None:
+                connection.execute("DELETE FROM submitted_reports WHERE external_id = ?", (report.external_id,))
+            else:
+                connection.execute("DELETE FROM submitted_reports WHERE fingerprint = ? AND external_id IS NULL",
+                                   (fingerprint,))
+            connection.execute("INSERT INTO submitted_reports VALUES (?, ?, ?, ?)",
+                               (fingerprint, report.id, report.external_id, get_current_time_millis()))
+
+    def remove(self, report_id=None, external_id=None):
+        """
+        Removes the records of a report, e.g. one that has been deleted.
+
+        :param str report_id: The ID of the report.
+        :param str external_id: The external ID of the report.
+        """
+
+        with self._lock, self._connection as connection:
+            if report_id is not None:
+                connection.execute("DELETE FROM submitted_reports WHERE report_id = ?", (report_id,))
+            if external_id is not None:
+                connection.execute("DELETE FROM submitted_reports WHERE external_id = ?", (external_id,))
+
+    def get_stats(self):
+        """
+        :return: A dict containing the number of 'entries' in the index, and the number of lookups that found an
+            'unchanged' report, found a 'changed' report by its external ID, or were 'misses'.
+        """
+
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM submitted_reports").fetchone()[0]
+            return {
+                'entries': entries,
+                'unchanged': self.unchanged,
+                'changed': self.changed,
+                'misses': self.misses,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM submitted_reports").fetchone()[0]
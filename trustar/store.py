@@ -0,0 +1,613 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str
+from future import standard_library
+
+# external imports
+import sqlite3
+import threading
+
+# package imports
+from .models import EnclavePermissions, Indicator, Report, Tag, DistributionType
+from .utils import get_logger, get_current_time_millis, parallel_map, DEFAULT_MAX_WORKERS
+from .whitelist import WhitelistIndex
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    body TEXT,
+    time_began,
+    external_id TEXT,
+    external_url TEXT,
+    distribution_type TEXT,
+    created INTEGER,
+    updated INTEGER
+);
+CREATE INDEX IF NOT EXISTS reports_updated ON reports (updated);
+CREATE INDEX IF NOT EXISTS reports_created ON reports (created);
+CREATE INDEX IF NOT EXISTS reports_external_id ON reports (external_id);
+
+CREATE TABLE IF NOT EXISTS report_enclaves (
+    report_id TEXT NOT NULL,
+    enclave_id TEXT NOT NULL,
+    PRIMARY KEY (report_id, enclave_id)
+);
+CREATE INDEX IF NOT EXISTS report_enclaves_enclave_id ON report_enclaves (enclave_id);
+
+CREATE TABLE IF NOT EXISTS report_indicators (
+    report_id TEXT NOT NULL,
+    value TEXT NOT NULL,
+    type TEXT,
+    PRIMARY KEY (report_id, value)
+);
+CREATE INDEX IF NOT EXISTS report_indicators_value ON report_indicators (value);
+
+CREATE TABLE IF NOT EXISTS report_tags (
+    report_id TEXT NOT NULL,
+    tag_id TEXT NOT NULL,
+    name TEXT,
+    enclave_id TEXT,
+    PRIMARY KEY (report_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS report_tags_name ON report_tags (name);
+
+CREATE TABLE IF NOT EXISTS indicators (
+    value TEXT PRIMARY KEY,
+    type TEXT,
+    priority_level TEXT,
+    first_seen INTEGER,
+    last_seen INTEGER,
+    sightings INTEGER
+);
+CREATE INDEX IF NOT EXISTS indicators_type ON indicators (type);
+CREATE INDEX IF NOT EXISTS indicators_last_seen ON indicators (last_seen);
+
+CREATE TABLE IF NOT EXISTS indicator_tags (
+    value TEXT NOT NULL,
+    tag_id TEXT NOT NULL,
+    name TEXT,
+    enclave_id TEXT,
+    PRIMARY KEY (value, tag_id)
+);
+CREATE INDEX IF NOT EXISTS indicator_tags_name ON indicator_tags (name);
+
+CREATE TABLE IF NOT EXISTS tags (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT,
+    enclave_id TEXT,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS tags_name ON tags (name);
+
+CREATE TABLE IF NOT EXISTS enclaves (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    can_read INTEGER,
+    can_create INTEGER,
+    can_update INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS whitelist (
+    normalized TEXT PRIMARY KEY,
+    value TEXT,
+    type TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+class LocalStore(object):
+    """
+    A local SQLite mirror of the reports, report indicators and tags, indicators, tags, enclaves, and whitelist that a
+    user has access to.  Once synced, tools can query the mirror instead of making the same API requests repeatedly.
+
+    Reports and indicators are synced incrementally: each sync only requests the reports updated, and the indicators
+    seen, since the previous sync.  The indicators and tags of each new or updated report are fetched concurrently.
+    Tags, enclaves and the whitelist are small, and are replaced in full on each sync.  Reports deleted on the server
+    are not detected by a sync; use ``remove_report`` to remove them.
+
+    A store can be shared between threads.
+
+    Example:
+
+    >>> store = LocalStore("trustar.db")
+    >>> store.sync(ts, from_time=1514764800000)
+    >>> reports = store.get_reports(indicator_values=["evil.com"], tag="malicious")
+    """
+
+    # the version of the schema, stored in the database file
+    SCHEMA_VERSION = 1
+
+    REPORT_TAGS = 'report'
+    INDICATOR_TAGS = 'indicator'
+
+    def __init__(self, path=":memory:"):
+        """
+        Opens a store, creating the database if it does not exist.
+
+        :param str path: The path of the SQLite database file, or ``":memory:"`` for a store that is not persisted.
+        """
+
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock, self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, self.SCHEMA_VERSION):
+                raise ValueError("Unsupported store schema version: %s" % version)
+
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute("PRAGMA user_version = %d" % self.SCHEMA_VERSION)
+
+    def close(self):
+        """
+        Closes the database.
+        """
+
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    ##########
+    #  SYNC  #
+    ##########
+
+    def sync(self, client, from_time=0, enclave_ids=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Brings the whole store up to date.
+
+        :param client: The |TruStar| object to sync from.
+        :param int from_time: Where the first sync of reports and indicators starts, in milliseconds since epoch.
+            Later syncs continue from where the previous one ended.
+        :param list(str) enclave_ids: The enclaves to sync reports, indicators and tags from (optional - by default,
+            the enclaves of ``client`` are used).
+        :param int max_workers: The maximum number of concurrent requests made for the indicators and tags of reports.
+        :return: A dict containing the number of 'reports', 'indicators', 'tags', 'enclaves' and 'whitelist' terms that
+            were synced.
+        """
+
+        return {
+            'enclaves': self.sync_enclaves(client),
+            'tags': self.sync_tags(client, enclave_ids=enclave_ids),
+            'whitelist': self.sync_whitelist(client),
+            'reports': self.sync_reports(client, from_time=from_time, enclave_ids=enclave_ids,
+                                         max_workers=max_workers),
+            'indicators': self.sync_indicators(client, from_time=from_time, enclave_ids=enclave_ids)
+        }
+
+    def sync_reports(self, client, from_time=0, enclave_ids=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Stores the reports updated since the last sync, along with their indicators and tags.
+
+        :param client: The |TruStar| object to sync from.
+        :param int from_time: Where the first sync starts, in milliseconds since epoch.
+        :param list(str) enclave_ids: The enclaves to sync reports from (optional).
+        :param int max_workers: The maximum number of concurrent requests made for the indicators and tags of reports.
+        :return: The number of reports stored.
+        """
+
+        from_time = self.get_sync_state('reports', from_time)
+        to_time = get_current_time_millis()
+
+        def get_details(report):
+            return report, list(client.get_indicators_for_report(report.id)), client.get_enclave_tags(report.id)
+
+        # reports are requested one page at a time, and the details of each page are fetched concurrently
+        count = 0
+        page = []
+        for report in client.get_reports(enclave_ids=enclave_ids, from_time=from_time, to_time=to_time):
+            page.append(report)
+            if len(page) >= 100:
+                count += self._store_reports(parallel_map(get_details, page, max_workers))
+                page = []
+        count += self._store_reports(parallel_map(get_details, page, max_workers))
+
+        self.set_sync_state('reports', to_time)
+        logger.debug("Synced %d reports.", count)
+
+        return count
+
+    def sync_indicators(self, client, from_time=0, enclave_ids=None):
+        """
+        Stores the indicators seen since the last sync.
+
+        :param client: The |TruStar| object to sync from.
+        :param int from_time: Where the first sync starts, in milliseconds since epoch.
+        :param list(str) enclave_ids: The enclaves to sync indicators from (optional).
+        :return: The number of indicators stored.
+        """
+
+        from_time = self.get_sync_state('indicators', from_time)
+        to_time = get_current_time_millis()
+
+        indicators = client.get_indicators(from_time=from_time, to_time=to_time, enclave_ids=enclave_ids,
+                                           page_size=1000)
+
+        count = 0
+        batch = []
+        for indicator in indicators:
+            batch.append(indicator)
+            if len(batch) >= 1000:
+                count += self._store_indicators(batch)
+                batch = []
+        count += self._store_indicators(batch)
+
+        self.set_sync_state('indicators', to_time)
+        logger.debug("Synced %d indicators.", count)
+
+        return count
+
+    def sync_tags(self, client, enclave_ids=None):
+        """
+        Replaces the stored report and indicator tags.
+
+        :param client: The |TruStar| object to sync from.
+        :param list(str) enclave_ids: The enclaves to sync tags from (optional).
+        :return: The number of tags stored.
+        """
+
+        tags = [(self.REPORT_TAGS, tag) for tag in client.get_all_enclave_tags(enclave_ids=enclave_ids)]
+        tags += [(self.INDICATOR_TAGS, tag) for tag in client.get_all_indicator_tags(enclave_ids=enclave_ids)]
+
+        with self._lock, self._connection as connection:
+            connection.execute("DELETE FROM tags")
+            connection.executemany("INSERT OR REPLACE INTO tags VALUES (?, ?, ?, ?)",
+                                   [(kind, tag.id, tag.name, tag.enclave_id) for kind, tag in tags])
+
+        return len(tags)
+
+    def sync_enclaves(self, client):
+        """
+        Replaces the stored enclaves.
+
+        :param client: The |TruStar| object to sync from.
+        :return: The number of enclaves stored.
+        """
+
+        enclaves = client.get_user_enclaves()
+
+        with self._lock, self._connection as connection:
+            connection.execute("DELETE FROM enclaves")
+            connection.executemany("INSERT OR REPLACE INTO enclaves VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(e.id, e.name, e.type, e.read, e.create, e.update) for e in enclaves])
+
+        return len(enclaves)
+
+    def sync_whitelist(self, client):
+        """
+        Replaces the stored whitelist.
+
+        :param client: The |TruStar| object to sync from.
+        :return: The number of whitelisted terms stored.
+        """
+
+        terms = [(WhitelistIndex.normalize(i.value), i.value, i.type) for i in client.get_whitelist()]
+
+        with self._lock, self._connection as connection:
+            connection.execute("DELETE FROM whitelist")
+            connection.executemany("INSERT OR REPLACE INTO whitelist VALUES (?, ?, ?)", terms)
+
+        return len(terms)
+
+    def get_sync_state(self, name, default=None):
+        """
+        :param str name: The name of the synced resource, e.g. 'reports' or 'indicators'.
+        :param default: The value to return if the resource has never been synced.
+        :return: The time that the last sync of the resource ended at, in milliseconds since epoch.
+        """
+
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+
+        return row[0] if row is not None else default
+
+    def set_sync_state(self, name, value):
+        """
+        Sets the time that the next sync of a resource starts at.
+
+        :param str name: The name of the synced resource, e.g. 'reports' or 'indicators'.
+        :param int value: The time, in milliseconds since epoch.
+        """
+
+        with self._lock, self._connection as connection:
+            connection.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (name, value))
+
+    def store_report(self, report, indicators=None, tags=None):
+        """
+        Stores a single report, e.g. one just submitted through |submit_report|.
+
+        :param report: The |Report| object.
+        :param indicators: The |Indicator| objects extracted from the report (optional).
+        :param tags: The |Tag| objects of the report (optional).
+        """
+
+        self._store_reports([(report, indicators or [], tags or [])])
+
+    def remove_report(self, report_id):
+        """
+        Removes a report, with its indicators and tags, from the store.
+
+        :param str report_id: The ID of the report.
+        """
+
+        with self._lock, self._connection as connection:
+            for table, column in [('reports', 'id'), ('report_enclaves', 'report_id'),
+                                  ('report_indicators', 'report_id'), ('report_tags', 'report_id')]:
+                connection.execute("DELETE FROM %s WHERE %s = ?" % (table, column), (report_id,))
+
+    def _store_reports(self, details):
+        """
+        Stores reports, replacing their stored enclaves, indicators and tags.
+
+        :param details: A list of (|Report|, list of |Indicator|, list of |Tag|) tuples.
+        :return: The number of reports stored.
+        """
+
+        if len(details) == 0:
+            return 0
+
+        ids = [(report.id,) for report, _, _ in details]
+
+        with self._lock, self._connection as connection:
+            for table in ('report_enclaves', 'report_indicators', 'report_tags'):
+                connection.executemany("DELETE FROM %s WHERE report_id = ?" % table, ids)
+
+            connection.executemany(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(r.id, r.title, r.body, r.time_began, r.external_id, r.external_url, r._get_distribution_type(),
+                  r.created, r.updated) for r, _, _ in details])
+            connection.executemany(
+                "INSERT OR REPLACE INTO report_enclaves VALUES (?, ?)",
+                [(r.id, enclave_id) for r, _, _ in details for enclave_id in r.enclave_ids or []])
+            connection.executemany(
+                "INSERT OR REPLACE INTO report_indicators VALUES (?, ?, ?)",
+                [(r.id, i.value, i.type) for r, indicators, _ in details for i in indicators])
+            connection.executemany(
+                "INSERT OR REPLACE INTO report_tags VALUES (?, ?, ?, ?)",
+                [(r.id, t.id, t.name, t.enclave_id) for r, _, tags in details for t in tags])
+
+        return len(details)
+
+    def _store_indicators(self, indicators):
+        """
+        Stores indicators, replacing their stored tags.
+
+        :param indicators: A list of |Indicator| objects.
+        :return: The number of indicators stored.
+        """
+
+        if len(indicators) == 0:
+            return 0
+
+        with self._lock, self._connection as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO indicators VALUES (?, ?, ?, ?, ?, ?)",
+                [(i.value, i.type, i.priority_level, i.first_seen, i.last_seen, i.sightings) for i in indicators])
+
+            tagged = [i for i in indicators if i.tags is not None]
+            connection.executemany("DELETE FROM indicator_tags WHERE value = ?", [(i.value,) for i in tagged])
+            connection.executemany(
+                "INSERT OR REPLACE INTO indicator_tags VALUES (?, ?, ?, ?)",
+                [(i.value, t.id, t.name, t.enclave_id) for i in tagged for t in i.tags])
+
+        return len(indicators)
+
+    ###########
+    #  QUERY  #
+    ###########
+
+    def get_report(self, report_id):
+        """
+        :param str report_id: The ID of the report.
+        :return: The stored |Report|, or ``None`` if it is not stored.
+        """
+
+        reports = self.get_reports(report_ids=[report_id])
+        return reports[0] if len(reports) > 0 else None
+
+    def get_reports(self, report_ids=None, enclave_ids=None, tag=None, indicator_values=None, from_time=None,
+                    to_time=None, limit=None):
+        """
+        Gets stored reports matching all of the given filters, most recently updated first.
+
+        :param list(str) report_ids: only reports with these IDs are returned.
+        :param list(str) enclave_ids: only reports in at least one of these enclaves are returned.
+        :param str tag: only reports with a tag with this name are returned.
+        :param list(str) indicator_values: only reports containing at least one of these indicators are returned.
+        :param int from_time: only reports updated at or after this time are returned (milliseconds since epoch).
+        :param int to_time: only reports updated at or before this time are returned (milliseconds since epoch).
+        :param int limit: the maximum number of reports to return.
+        :return: The list of |Report| objects.
+        """
+
+        conditions = []
+        params = []
+
+        def add_in_condition(condition, values):
+            conditions.append(condition % ", ".join("?" * len(values)))
+            params.extend(values)
+
+        if report_ids is not None:
+            add_in_condition("id IN (%s)", list(report_ids))
+        if enclave_ids is not None:
+            add_in_condition("id IN (SELECT report_id FROM report_enclaves WHERE enclave_id IN (%s))",
+                             list(enclave_ids))
+        if tag is not None:
+            add_in_condition("id IN (SELECT report_id FROM report_tags WHERE name IN (%s))", [tag])
+        if indicator_values is not None:
+            add_in_condition("id IN (SELECT report_id FROM report_indicators WHERE value IN (%s))",
+                             list(indicator_values))
+        if from_time is not None:
+            conditions.append("updated >= ?")
+            params.append(from_time)
+        if to_time is not None:
+            conditions.append("updated <= ?")
+            params.append(to_time)
+
+        query = "SELECT id, title, body, time_began, external_id, external_url, distribution_type, created, updated " \
+                "FROM reports"
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY updated DESC"
+        if limit is not None:
+            query += " LIMIT %d" % limit
+
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+            enclaves = self._get_report_enclaves([row[0] for row in rows])
+
+        return [Report(id=row[0], title=row[1], body=row[2], time_began=row[3], external_id=row[4],
+                       external_url=row[5], is_enclave=row[6] != DistributionType.COMMUNITY,
+                       enclave_ids=enclaves.get(row[0], []), created=row[7], updated=row[8])
+                for row in rows]
+
+    def _get_report_enclaves(self, report_ids):
+        """
+        :return: A dict mapping each of the report IDs to the list of IDs of the enclaves that the report is in.  The
+            lock must be held by the caller.
+        """
+
+        enclaves = {}
+        # stay below SQLite's limit on the number of parameters of a query
+        for i in range(0, len(report_ids), 500):
+            chunk = report_ids[i:i + 500]
+            rows = self._connection.execute("SELECT report_id, enclave_id FROM report_enclaves "
+                                            "WHERE report_id IN (%s)" % ", ".join("?" * len(chunk)), chunk)
+            for report_id, enclave_id in rows:
+                enclaves.setdefault(report_id, []).append(enclave_id)
+
+        return enclaves
+
+    def get_indicators_for_report(self, report_id):
+        """
+        :param str report_id: The ID of the report.
+        :return: The list of stored |Indicator| objects extracted from the report, with only ``value`` and ``type``.
+        """
+
+        with self._lock:
+            rows = self._connection.execute("SELECT value, type FROM report_indicators WHERE report_id = ? "
+                                            "ORDER BY value", (report_id,)).fetchall()
+
+        return [Indicator(value=value, type=indicator_type) for value, indicator_type in rows]
+
+    def get_tags_for_report(self, report_id):
+        """
+        :param str report_id: The ID of the report.
+        :return: The list of stored |Tag| objects of the report.
+        """
+
+        with self._lock:
+            rows = self._connection.execute("SELECT name, tag_id, enclave_id FROM report_tags WHERE report_id = ? "
+                                            "ORDER BY name", (report_id,)).fetchall()
+
+        return [Tag(name=name, id=tag_id, enclave_id=enclave_id) for name, tag_id, enclave_id in rows]
+
+    def get_indicators(self, values=None, types=None, tag=None, from_time=None, to_time=None, limit=None):
+        """
+        Gets stored indicators matching all of the given filters, most recently seen first.
+
+        :param list(str) values: only indicators with these values are returned.
+        :param list(str) types: only indicators of these types are returned.
+        :param str tag: only indicators with a tag with this name are returned.
+        :param int from_time: only indicators last seen at or after this time are returned (milliseconds since epoch).
+        :param int to_time: only indicators last seen at or before this time are returned (milliseconds since epoch).
+        :param int limit: the maximum number of indicators to return.
+        :return: The list of |Indicator| objects.
+        """
+
+        conditions = []
+        params = []
+
+        if values is not None:
+            values = list(values)
+            conditions.append("value IN (%s)" % ", ".join("?" * len(values)))
+            params.extend(values)
+        if types is not None:
+            types = list(types)
+            conditions.append("type IN (%s)" % ", ".join("?" * len(types)))
+            params.extend(types)
+        if tag is not None:
+            conditions.append("value IN (SELECT value FROM indicator_tags WHERE name = ?)")
+            params.append(tag)
+        if from_time is not None:
+            conditions.append("last_seen >= ?")
+            params.append(from_time)
+        if to_time is not None:
+            conditions.append("last_seen <= ?")
+            params.append(to_time)
+
+        query = "SELECT value, type, priority_level, first_seen, last_seen, sightings FROM indicators"
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY last_seen DESC"
+        if limit is not None:
+            query += " LIMIT %d" % limit
+
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+
+        return [Indicator(value=row[0], type=row[1], priority_level=row[2], first_seen=row[3], last_seen=row[4],
+                          sightings=row[5])
+                for row in rows]
+
+    def get_tags(self, kind=REPORT_TAGS, enclave_ids=None):
+        """
+        :param str kind: ``LocalStore.REPORT_TAGS`` or ``LocalStore.INDICATOR_TAGS``.
+        :param list(str) enclave_ids: only tags in these enclaves are returned (optional).
+        :return: The list of stored |Tag| objects.
+        """
+
+        query = "SELECT name, id, enclave_id FROM tags WHERE kind = ?"
+        params = [kind]
+        if enclave_ids is not None:
+            enclave_ids = list(enclave_ids)
+            query += " AND enclave_id IN (%s)" % ", ".join("?" * len(enclave_ids))
+            params.extend(enclave_ids)
+
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY name", params).fetchall()
+
+        return [Tag(name=name, id=tag_id, enclave_id=enclave_id) for name, tag_id, enclave_id in rows]
+
+    def get_enclaves(self):
+        """
+        :return: The list of stored |EnclavePermissions| objects.
+        """
+
+        with self._lock:
+            rows = self._connection.execute("SELECT id, name, type, can_read, can_create, can_update FROM enclaves "
+                                            "ORDER BY name").fetchall()
+
+        return [EnclavePermissions(id=row[0], name=row[1], type=row[2], read=bool(row[3]), create=bool(row[4]),
+                                   update=bool(row[5]))
+                for row in rows]
+
+    def is_whitelisted(self, value):
+        """
+        :param str value: An indicator value.
+        :return: Whether the value is in the stored whitelist.  Like |WhitelistIndex|, the lookup is case-insensitive.
+        """
+
+        with self._lock:
+            row = self._connection.execute("SELECT 1 FROM whitelist WHERE normalized = ?",
+                                           (WhitelistIndex.normalize(value),)).fetchone()
+
+        return row is not None
@@ -0,0 +1,199 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str
+from future import standard_library
+
+# external imports
+import threading
+import time
+
+# package imports
+from .utils import get_logger
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+class TagCache(object):
+    """
+    A local cache of the tags in the user's enclaves, used to translate between tag names and tag IDs without making
+    an API request for every lookup.  Report (enclave) tags and indicator tags are cached separately, since they are
+    distinct resources.
+
+    The first lookup of each kind of tag loads the cache synchronously.  Once the cache is older than ``ttl`` seconds,
+    lookups continue to be answered from the cached tags while they are reloaded in a background thread.  The cache is
+    also updated by |TagClient| whenever tags are added or deleted through it.
+
+    :ivar ttl: The number of seconds that the cached tags are considered fresh.
+    """
+
+    REPORT = 'report'
+    INDICATOR = 'indicator'
+
+    DEFAULT_TTL = 5 * 60
+
+    def __init__(self, client, ttl=DEFAULT_TTL):
+        """
+        Constructs a TagCache object.
+
+        :param client: The |TruStar| object used to load the tags.
+        :param ttl: The number of seconds that the cached tags are considered fresh.
+        """
+
+        self.ttl = ttl
+        self._client = client
+        self._lock = threading.Lock()
+        self._by_name = {self.REPORT: {}, self.INDICATOR: {}}
+        self._by_id = {self.REPORT: {}, self.INDICATOR: {}}
+        self._loaded_at = {self.REPORT: None, self.INDICATOR: None}
+        self._refreshing = {self.REPORT: False, self.INDICATOR: False}
+        # incremented by invalidate, so that a load which started before the invalidation is not kept as fresh
+        self._generation = {self.REPORT: 0, self.INDICATOR: 0}
+
+    def get_tag_id(self, name, enclave_id, tag_type=REPORT):
+        """
+        Finds the ID of a tag by its name and enclave.
+
+        :param str name: The name of the tag.
+        :param str enclave_id: The ID of the enclave the tag belongs to.
+        :param str tag_type: Either ``TagCache.REPORT`` or ``TagCache.INDICATOR``.
+        :return: The ID of the tag, or ``None`` if no such tag is known.
+        """
+
+        tag = self._get_tags_by_name(tag_type).get((name, enclave_id))
+        return tag.id if tag is not None else None
+
+    def get_tag_ids(self, names, enclave_ids=None, tag_type=REPORT):
+        """
+        Finds the IDs of all tags with any of the given names.  A tag name can exist in several enclaves, so a single
+        name can resolve to several IDs.  The result can be passed as the ``included_tag_ids`` or ``excluded_tag_ids``
+        of |get_indicators_page|.
+
+        :param list(str) names: The names of the tags.
+        :param list(str) enclave_ids: Only tags in these enclaves are returned (optional - by default tags from all
+            enclaves are returned).
+        :param str tag_type: Either ``TagCache.REPORT`` or ``TagCache.INDICATOR``.
+        :return: The list of tag IDs.
+        """
+
+        names = set(names)
+        return [tag.id for (name, enclave_id), tag in self._get_tags_by_name(tag_type).items()
+                if name in names and (enclave_ids is None or enclave_id in enclave_ids)]
+
+    def get_tag(self, tag_id, tag_type=REPORT):
+        """
+        Finds a tag by its ID.
+
+        :param str tag_id: The ID of the tag.
+        :param str tag_type: Either ``TagCache.REPORT`` or ``TagCache.INDICATOR``.
+        :return: The |Tag| object, or ``None`` if no such tag is known.
+        """
+
+        self._get_tags_by_name(tag_type)
+        return self._by_id[tag_type].get(tag_id)
+
+    def add(self, tag, tag_type=REPORT):
+        """
+        Adds a tag to the cache.  Tags without an ID are ignored.
+
+        :param tag: The |Tag| object.
+        :param str tag_type: Either ``TagCache.REPORT`` or ``TagCache.INDICATOR``.
+        """
+
+        if tag.id is None:
+            return
+
+        with self._lock:
+            self._by_name[tag_type][(tag.name, tag.enclave_id)] = tag
+            self._by_id[tag_type][tag.id] = tag
+
+    def invalidate(self, tag_type=None):
+        """
+        Discards the freshness of the cached tags, so that the next lookup reloads them synchronously from the API
+        rather than answering from the cache.  This is used when tags are deleted, since a deleted tag cannot be
+        removed from the cache by name: the same tag may still be applied elsewhere.
+
+        :param str tag_type: Either ``TagCache.REPORT`` or ``TagCache.INDICATOR``.  If ``None``, both are invalidated.
+        """
+
+        with self._lock:
+            for key in self._loaded_at:
+                if tag_type is None or key == tag_type:
+                    self._loaded_at[key] = None
+                    self._generation[key] += 1
+
+    def refresh(self, tag_type=None):
+        """
+        Reloads the cached tags from the API, blocking until they have been loaded.
+
+        :param str tag_type: Either ``TagCache.REPORT`` or ``TagCache.INDICATOR``.  If ``None``, both are reloaded.
+        """
+
+        for key in [self.REPORT, self.INDICATOR]:
+            if tag_type is None or key == tag_type:
+                self._load(key)
+
+    def _load(self, tag_type):
+        """
+        Loads all tags of the given type from the API and replaces the cached tags with them.  If the cache is
+        invalidated while the tags are being loaded, they are discarded, since they may predate the change.
+        """
+
+        with self._lock:
+            generation = self._generation[tag_type]
+
+        if tag_type == self.REPORT:
+            tags = self._client.get_all_enclave_tags()
+        else:
+            tags = self._client.get_all_indicator_tags()
+
+        by_name = {(tag.name, tag.enclave_id): tag for tag in tags}
+        by_id = {tag.id: tag for tag in tags}
+
+        with self._lock:
+            if self._generation[tag_type] != generation:
+                return
+            self._by_name[tag_type] = by_name
+            self._by_id[tag_type] = by_id
+            self._loaded_at[tag_type] = time.time()
+
+    def _refresh_in_background(self, tag_type):
+        """
+        Reloads the tags of the given type in a daemon thread, unless a reload is already in progress.
+        """
+
+        with self._lock:
+            if self._refreshing[tag_type]:
+                return
+            self._refreshing[tag_type] = True
+
+        def refresh():
+            try:
+                self._load(tag_type)
+            except Exception as e:
+                logger.warning("Failed to refresh %s tag cache: %s", tag_type, e)
+            finally:
+                with self._lock:
+                    self._refreshing[tag_type] = False
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+
+    def _get_tags_by_name(self, tag_type):
+        """
+        :return: The dictionary mapping (name, enclave ID) pairs to tags, loading or refreshing it if necessary.
+        """
+
+        loaded_at = self._loaded_at[tag_type]
+        if loaded_at is not None and time.time() - loaded_at > self.ttl:
+            self._refresh_in_background(tag_type)
+
+        # a load is discarded if the cache is invalidated while it is in flight, so keep loading until one is kept
+        while loaded_at is None:
+            self._load(tag_type)
+            loaded_at = self._loaded_at[tag_type]
+
+        return self._by_name[tag_type]
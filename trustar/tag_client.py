@@ -5,8 +5,9 @@ from future import standard_library
 from six import string_types
 
 # package imports
-from .models import Tag
-from .utils import get_logger
+from .models import Indicator, Tag
+from .tag_cache import TagCache
+from .utils import get_logger, parallel_map, DEFAULT_MAX_WORKERS
 
 # python 2 backwards compatibility
 standard_library.install_aliases()
@@ -15,7 +16,27 @@ logger = get_logger(__name__)
 
 
 class TagClient(object):
-    
+
+    # the TagCache and IndicatorCache kept up to date as tags change (set by TruStar)
+    _tag_cache = None
+    indicator_cache = None
+
+    @property
+    def tag_cache(self):
+        """
+        The |TagCache| used to resolve tag names to IDs locally.  It is created on first use, and kept up to date as
+        tags are added and deleted through this client.
+
+        Example:
+
+        >>> tag_id = ts.tag_cache.get_tag_id("malicious", enclave_id=ts.enclave_ids[0])
+        >>> ts.delete_enclave_tag(report_id, tag_id)
+        """
+
+        if self._tag_cache is None:
+            self._tag_cache = TagCache(self)
+        return self._tag_cache
+
     def get_enclave_tags(self, report_id, id_type=None):
         """
         Retrieves all enclave tags present in a specific report.
@@ -46,7 +67,15 @@ class TagClient(object):
             'enclaveId': enclave_id
         }
         resp = self._client.post("reports/%s/tags" % report_id, params=params)
-        return str(resp.content)
+
+        tag_id = resp.content
+        if isinstance(tag_id, bytes):
+            tag_id = tag_id.decode('utf-8')
+
+        if self._tag_cache is not None:
+            self._tag_cache.add(Tag(name=name, id=tag_id, enclave_id=enclave_id), TagCache.REPORT)
+
+        return tag_id
 
     def delete_enclave_tag(self, report_id, tag_id, id_type=None):
         """
@@ -63,6 +92,10 @@ class TagClient(object):
         }
         self._client.delete("reports/%s/tags/%s" % (report_id, tag_id), params=params)
 
+        # the tag might no longer exist in the enclave, so it must be reloaded
+        if self._tag_cache is not None:
+            self._tag_cache.invalidate(TagCache.REPORT)
+
     def get_all_enclave_tags(self, enclave_ids=None):
         """
         Retrieves all tags present in the given enclaves. If the enclave list is empty, the tags returned include all
@@ -106,7 +139,16 @@ class TagClient(object):
             'enclaveId': enclave_id
         }
         resp = self._client.post("indicators/%s/tags" % indicator_value, params=params)
-        return Tag.from_dict(resp.json())
+        tag = Tag.from_dict(resp.json())
+
+        if self._tag_cache is not None:
+            self._tag_cache.add(tag, TagCache.INDICATOR)
+
+        # the cached metadata of the indicator has the old tags
+        if self.indicator_cache is not None:
+            self.indicator_cache.remove(indicator_value)
+
+        return tag
 
     def delete_indicator_tag(self, indicator_value, tag_id):
         """
@@ -117,3 +159,126 @@ class TagClient(object):
         """
 
         self._client.delete("indicators/%s/tags/%s" % (indicator_value, tag_id))
+
+        # the cached metadata of the indicator has the old tags
+        if self.indicator_cache is not None:
+            self.indicator_cache.remove(indicator_value)
+
+        # the tag might no longer exist in the enclave, so it must be reloaded
+        if self._tag_cache is not None:
+            self._tag_cache.invalidate(TagCache.INDICATOR)
+
+    def reconcile_enclave_tags(self, desired_tags, enclave_ids=None, id_type=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Brings the enclave tags of many reports in line with a desired set of tags.  The current tags of the reports are
+        fetched concurrently, and only the tags that are missing or no longer wanted are added or deleted.
+
+        :param dict desired_tags: A dictionary mapping each report ID to the list of |Tag| objects that the report
+            should have.  Tags are identified by their ``name`` and ``enclave_id``.
+        :param list(str) enclave_ids: Only tags in these enclaves are added or deleted (optional - by default all tags on
+            the reports are reconciled).
+        :param id_type: indicates whether the IDs are internal or external IDs provided by the user
+        :param int max_workers: The maximum number of reports to reconcile concurrently.
+        :return: A list of dicts, one per report, containing four fields: 'id' (the report ID), 'added' (a list of the
+            |Tag| objects that were added), 'deleted' (a list of the |Tag| objects that were deleted), and 'error'
+            (the exception that stopped the report from being reconciled, or ``None``).
+
+        Example:
+
+        >>> results = ts.reconcile_enclave_tags({
+        >>>     "1a09f14b-ef8c-443f-b082-9643071c522a": [Tag(name="phishing", enclave_id=enclave_id)],
+        >>>     "4d04804f-ff82-4a0b-8586-c42aef2f6f73": []
+        >>> }, enclave_ids=[enclave_id])
+        >>> print([(r['id'], len(r['added']), len(r['deleted'])) for r in results])
+        [("1a09f14b-ef8c-443f-b082-9643071c522a", 1, 0), ("4d04804f-ff82-4a0b-8586-c42aef2f6f73", 0, 2)]
+        """
+
+        def get_tags(report_id):
+            return self.get_enclave_tags(report_id, id_type=id_type)
+
+        def add_tag(report_id, tag):
+            tag_id = self.add_enclave_tag(report_id, name=tag.name, enclave_id=tag.enclave_id, id_type=id_type)
+            return Tag(name=tag.name, id=tag_id, enclave_id=tag.enclave_id)
+
+        def delete_tag(report_id, tag):
+            self.delete_enclave_tag(report_id, tag_id=tag.id, id_type=id_type)
+
+        return self._reconcile_tags(desired_tags, get_tags, add_tag, delete_tag, enclave_ids, max_workers)
+
+    def reconcile_indicator_tags(self, desired_tags, enclave_ids=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Brings the tags of many indicators in line with a desired set of tags.  The current tags of the indicators are
+        fetched concurrently, and only the tags that are missing or no longer wanted are added or deleted.
+
+        :param dict desired_tags: A dictionary mapping each indicator value to the list of |Tag| objects that the
+            indicator should have.  Tags are identified by their ``name`` and ``enclave_id``.
+        :param list(str) enclave_ids: Only tags in these enclaves are added or deleted (optional - by default all tags on
+            the indicators are reconciled).
+        :param int max_workers: The maximum number of indicators to reconcile concurrently.
+        :return: A list of dicts, one per indicator, containing four fields: 'id' (the indicator value), 'added' (a
+            list of the |Tag| objects that were added), 'deleted' (a list of the |Tag| objects that were deleted), and
+            'error' (the exception that stopped the indicator from being reconciled, or ``None``).
+        """
+
+        def get_tags(value):
+            tags = []
+            for indicator in self.get_indicators_metadata([Indicator(value=value)]):
+                if indicator.value == value and indicator.tags is not None:
+                    tags.extend(indicator.tags)
+            return tags
+
+        def add_tag(value, tag):
+            return self.add_indicator_tag(value, name=tag.name, enclave_id=tag.enclave_id)
+
+        def delete_tag(value, tag):
+            self.delete_indicator_tag(value, tag_id=tag.id)
+
+        return self._reconcile_tags(desired_tags, get_tags, add_tag, delete_tag, enclave_ids, max_workers)
+
+    @staticmethod
+    def _reconcile_tags(desired_tags, get_tags, add_tag, delete_tag, enclave_ids=None, max_workers=None):
+        """
+        Reconciles the tags of many items concurrently.  This method is intended for internal use.
+
+        :param dict desired_tags: A dictionary mapping each item ID to the list of |Tag| objects it should have.
+        :param get_tags: Takes an item ID and returns the list of |Tag| objects it currently has.
+        :param add_tag: Takes an item ID and a |Tag| and adds the tag to the item, returning the created |Tag|.
+        :param delete_tag: Takes an item ID and a |Tag| and deletes the tag from the item.
+        :param list(str) enclave_ids: Only tags in these enclaves are considered.
+        :param int max_workers: The maximum number of items to reconcile concurrently.
+        :return: A list of dicts containing the outcome for each item.
+        """
+
+        def in_scope(tag):
+            return enclave_ids is None or tag.enclave_id in enclave_ids
+
+        def reconcile(item):
+            item_id, tags = item
+            result = {
+                'id': item_id,
+                'added': [],
+                'deleted': [],
+                'error': None
+            }
+
+            try:
+                desired = {(tag.name, tag.enclave_id): tag for tag in tags if in_scope(tag)}
+                current = [tag for tag in get_tags(item_id) if in_scope(tag)]
+                current_keys = set((tag.name, tag.enclave_id) for tag in current)
+
+                for tag in current:
+                    if (tag.name, tag.enclave_id) not in desired:
+                        delete_tag(item_id, tag)
+                        result['deleted'].append(tag)
+
+                for key, tag in desired.items():
+                    if key not in current_keys:
+                        result['added'].append(add_tag(item_id, tag))
+
+            except Exception as e:
+                logger.warning("Failed to reconcile tags for %s: %s", item_id, e)
+                result['error'] = e
+
+            return result
+
+        return parallel_map(reconcile, list(desired_tags.items()), max_workers=max_workers)
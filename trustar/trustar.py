@@ -47,7 +47,8 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         'client_metatag': None,
         'verify': True,
         'retry': True,
-        'max_wait_time': 60
+        'max_wait_time': 60,
+        'lazy_models': False
     }
 
     def __init__(self, config_file="trustar.conf", config_role="trustar", config=None):
@@ -86,6 +87,9 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
         | ``client_metatag``      | No        | ``None``                                         | any additional information (ex. email address of user) |
         +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
+        | ``lazy_models``         | No        | ``False``                                        | whether pages (and the generators over them) contain   |
+        |                         |           |                                                  | read-only views instead of reports and indicators      |
+        +-------------------------+-----------+--------------------------------------------------+--------------------------------------------------------+
 
         :param str config_file: Path to configuration file (conf, json, or yaml).
         :param str config_role: The section in the configuration file to use.
@@ -113,6 +117,12 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         else:
             config['retry'] = True
 
+        lazy_models = config.get('lazy_models')
+        if lazy_models is not None and str(lazy_models).lower() == 'true':
+            config['lazy_models'] = True
+        else:
+            config['lazy_models'] = False
+
         max_wait_time = config.get('max_wait_time')
         if max_wait_time is not None:
             config['max_wait_time'] = int(max_wait_time)
@@ -129,6 +139,9 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
 
         self.enclave_ids = config.get('enclave_ids')
 
+        # whether pages of reports and indicators contain ReportView and IndicatorView objects
+        self.lazy_models = config.get('lazy_models')
+
         if isinstance(self.enclave_ids, str):
             self.enclave_ids = [self.enclave_ids]
 
@@ -151,12 +164,24 @@ class TruStar(ReportClient, IndicatorClient, TagClient):
         # if API version does not match expected version, log a warning
         if api_version.strip(BETA_TAG) != __api_version__.strip(BETA_TAG):
             logger.warn("This version (%s) of the TruStar Python SDK is only compatible with version %s of"
-                        " the TruStar Rest API, but is attempting to contact version %s of the Rest API."
-                        % (__version__, __api_version__, api_version))
+                        " the TruStar Rest API, but is attempting to contact version %s of the Rest API.",
+                        __version__, __api_version__, api_version)
 
         # initialize token property
         self.token = None
 
+        # the tag cache is created on first use
+        self._tag_cache = None
+
+        # assign an IndicatorCache to cache indicator metadata and details lookups
+        self.indicator_cache = None
+
+        # assign a WhitelistIndex to keep it in step with changes made to the whitelist
+        self.whitelist_index = None
+
+        # assign a ReportIndex to skip submitting reports that were already submitted unchanged
+        self.report_index = None
+
     @staticmethod
     def config_from_file(config_file_path, config_role):
         """
@@ -1,12 +1,20 @@
 # python 2 backwards compatibility
 from __future__ import print_function
 from six import string_types
+from six.moves import intern
+from six.moves.urllib.parse import quote_plus
 
 # external imports
 import sys
 import logging
+import re
+import threading
 import time
+from collections import deque
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
+from numbers import Number
+import json
 import dateutil.parser
 import pytz
 from tzlocal import get_localzone
@@ -14,6 +22,64 @@ from tzlocal import get_localzone
 
 DAY = 24 * 60 * 60 * 1000
 
+# default number of threads used by methods that make API requests concurrently
+DEFAULT_MAX_WORKERS = 8
+
+# the maximum length of a query string; GET requests with more parameters than this are split into several requests
+MAX_QUERY_LENGTH = 6000
+
+
+# matches the ISO-8601 timestamps that are parsed without dateutil, such as "2017-02-23", "2017-02-23T23:01:54",
+# "2017-02-23 23:01:54.123Z", "2017-02-23T23:01:54+0000" and "2017-02-23 23:01:54 +00"
+ISO_8601_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})'
+                              r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?'
+                              r'(?: ?(?:(Z)|([+-])(\d{2})(?::?(\d{2}))?))?)?$')
+
+# the system timezone, looked up on first use
+_local_timezone = None
+
+
+def _get_local_timezone():
+    """
+    :return: The system timezone.
+    """
+
+    global _local_timezone
+    if _local_timezone is None:
+        _local_timezone = get_localzone()
+    return _local_timezone
+
+
+def _parse_iso_8601(date_time):
+    """
+    Parses the timestamps matched by ``ISO_8601_PATTERN``.
+
+    :param str date_time: The timestamp.
+    :return: The datetime object, or ``None`` if the timestamp is not in one of the recognized formats.
+    """
+
+    match = ISO_8601_PATTERN.match(date_time)
+    if match is None:
+        return None
+
+    year, month, day, hour, minute, second, fraction, utc, sign, offset_hours, offset_minutes = match.groups()
+
+    try:
+        tzinfo = None
+        if utc is not None:
+            tzinfo = pytz.utc
+        elif sign is not None:
+            offset = int(offset_hours) * 60 + int(offset_minutes or 0)
+            tzinfo = pytz.FixedOffset(-offset if sign == '-' else offset)
+
+        return datetime(int(year), int(month), int(day),
+                        int(hour or 0), int(minute or 0), int(second or 0),
+                        int(fraction.ljust(6, '0')) if fraction else 0,
+                        tzinfo)
+    except ValueError:
+        # out of range values are left to dateutil
+        return None
+
 
 def normalize_timestamp(date_time):
     """
@@ -25,10 +91,6 @@ def normalize_timestamp(date_time):
     :return If input is an int, will return milliseconds since epoch.  Otherwise, will return a normalized isoformat
     timestamp.
     """
-    datetime_dt = datetime.now()
-
-    # get current time in seconds-since-epoch
-    current_time = int(time.time()) * 1000
 
     try:
         # identify type of timestamp and convert to datetime object
@@ -39,15 +101,20 @@ def normalize_timestamp(date_time):
                 date_time *= 1000
 
             # if timestamp is incorrectly forward dated, set to current time
-            if date_time > current_time:
+            if date_time > int(time.time()) * 1000:
                 raise ValueError("The given time %s is in the future." % date_time)
 
             return date_time
 
         if isinstance(date_time, str):
-            datetime_dt = dateutil.parser.parse(date_time)
+            # common ISO-8601 formats are parsed directly, anything else by dateutil
+            datetime_dt = _parse_iso_8601(date_time)
+            if datetime_dt is None:
+                datetime_dt = dateutil.parser.parse(date_time)
         elif isinstance(date_time, datetime):
             datetime_dt = date_time
+        else:
+            datetime_dt = datetime.now()
 
     # if timestamp is none of the formats above, error message is printed and timestamp is set to current time by
     # default
@@ -59,12 +126,76 @@ def normalize_timestamp(date_time):
     # if timestamp is timezone naive, add timezone
     if not datetime_dt.tzinfo:
         # add system timezone and convert to UTC
-        datetime_dt = get_localzone().localize(datetime_dt).astimezone(pytz.utc)
+        local_timezone = _get_local_timezone()
+        if hasattr(local_timezone, 'localize'):
+            datetime_dt = local_timezone.localize(datetime_dt)
+        else:
+            # newer versions of tzlocal return zoneinfo timezones, which have no localize method
+            datetime_dt = datetime_dt.replace(tzinfo=local_timezone)
+        datetime_dt = datetime_dt.astimezone(pytz.utc)
 
     # converts datetime to iso8601
     return datetime_dt.isoformat()
 
 
+def normalize_timestamps(date_times):
+    """
+    Normalizes many timestamps at once, such as a date column of a CSV file.  The result is the same as calling
+    ``normalize_timestamp`` on each timestamp, but each distinct timestamp is only normalized once.
+
+    :param date_times: An iterable of timestamps, in any of the formats accepted by ``normalize_timestamp``.
+    :return: A list of the normalized timestamps, in the same order.
+    """
+
+    normalized = {}
+    results = []
+
+    for date_time in date_times:
+        # key by type too, since 1 == 1.0 == True but they are normalized differently
+        key = (type(date_time), date_time)
+        try:
+            result = normalized[key]
+        except KeyError:
+            result = normalized[key] = normalize_timestamp(date_time)
+        except TypeError:
+            # unhashable values are not memoized
+            result = normalize_timestamp(date_time)
+        results.append(result)
+
+    return results
+
+
+def intern_string(value):
+    """
+    Interns a string, so that all equal strings that are interned share a single object.  This is used for strings that
+    are repeated across many deserialized objects, such as enclave IDs.
+
+    :param value: The string.
+    :return: The interned string, or ``value`` itself if it cannot be interned (i.e. it is ``None``, or a ``unicode``
+        object in python 2).
+    """
+
+    try:
+        return intern(value)
+    except TypeError:
+        return value
+
+
+def intern_strings(values):
+    """
+    :param values: A list of strings, a single string, or ``None``.
+    :return: A new list of the interned strings (a single string is put in a list of its own), or ``None``.
+    """
+
+    if values is None:
+        return None
+
+    if isinstance(values, string_types):
+        return [intern_string(values)]
+
+    return [intern_string(value) for value in values]
+
+
 def get_current_time_millis():
     """
     :return: the current time in milliseconds since epoch.
@@ -130,4 +261,237 @@ def get_time_based_page_generator(get_page, get_next_to_time, from_time=None, to
         to_time = new_to_time
 
 
+def parallel_map(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Applies a function to each item concurrently, using a pool of threads.  This is intended for I/O bound work, such
+    as making many API requests.
+
+    :param func: The function to apply to each item.
+    :param items: An iterable of items.
+    :param int max_workers: The maximum number of threads to use.  If ``None`` or less than 2, the items are processed
+        serially in the calling thread.
+    :return: The list of results, in the same order as ``items``.
+    """
+
+    items = list(items)
+
+    if max_workers is None or max_workers < 2 or len(items) < 2:
+        return [func(item) for item in items]
+
+    pool = ThreadPool(min(max_workers, len(items)))
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def parallel_imap(func, items, max_workers=DEFAULT_MAX_WORKERS, max_pending=None):
+    """
+    Lazily applies a function to each item concurrently, using a pool of threads.  Items are only taken from ``items``
+    as fast as the results are consumed, so that no more than ``max_pending`` results are ever buffered.
+
+    :param func: The function to apply to each item.
+    :param items: An iterable of items.
+    :param int max_workers: The maximum number of threads to use.  If ``None`` or less than 2, the items are processed
+        serially in the calling thread.
+    :param int max_pending: The maximum number of items being processed or waiting to be consumed at any time
+        (defaults to twice ``max_workers``).
+    :return: A generator of the results, in the same order as ``items``.
+    """
+
+    if max_workers is None or max_workers < 2:
+        for item in items:
+            yield func(item)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * max_workers
+
+    pool = ThreadPool(max_workers)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(pool.apply_async(func, (item,)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+
+        while len(pending) > 0:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+
+
+# matches whitespace, and the commas between the elements of a JSON array
+_JSON_SEPARATOR_PATTERN = re.compile(r'[\s,]*')
+
+# characters that may follow the first part of a JSON number, such as the "1" of "1.5", "1e5" or "1e-5"
+_JSON_NUMBER_CONTINUATIONS = u"0123456789.eE+-"
+
+
+def iter_json_array(stream, key=None, chunk_size=1 << 16):
+    """
+    Parses the elements of a JSON array from a stream one at a time, so that arrays larger than memory can be processed.
+    Only the element being parsed, and the rest of the chunk it is in, are held in memory.
+
+    :param stream: A file object opened in text mode.
+    :param str key: The key of the array, if it is a value of an object (such as ``{"alerts": [...]}``) rather than the
+        whole document.  The first occurrence of the key is used.
+    :param int chunk_size: The number of characters to read at a time.
+    :return: A generator of the elements.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = u""
+    eof = False
+
+    def read():
+        chunk = stream.read(chunk_size)
+        return chunk, len(chunk) == 0
+
+    # find the start of the array
+    if key is not None:
+        key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        partial_key_pattern = re.compile(r'"%s"\s*(?::\s*)?\Z' % re.escape(key))
+    while True:
+        if key is not None:
+            match = key_pattern.search(buffer)
+            if match is not None:
+                position = match.end()
+                break
+            # keep the part of the buffer that may be the start of the key and the array, however much whitespace
+            # separates them, so that they are still found when split across chunks
+            match = partial_key_pattern.search(buffer)
+            buffer = buffer[match.start():] if match is not None else buffer[-(len(key) + 1):]
+        else:
+            stripped = buffer.lstrip()
+            if stripped:
+                if stripped[0] != u"[":
+                    raise ValueError("The JSON document is not an array.")
+                position = len(buffer) - len(stripped) + 1
+                break
+
+        if eof:
+            raise ValueError("No JSON array found%s." % (" under the key '%s'" % key if key is not None else ""))
+        chunk, eof = read()
+        buffer += chunk
+
+    while True:
+        position = _JSON_SEPARATOR_PATTERN.match(buffer, position).end()
+
+        if position < len(buffer):
+            if buffer[position] == u"]":
+                return
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+                # a number at the end of the buffer, or followed by a character that continues it (such as the
+                # exponent of "1e" when the rest of "1e5" is in the next chunk), may continue in the next chunk
+                if eof or not (isinstance(element, Number) and not isinstance(element, bool)) or \
+                        (end < len(buffer) and buffer[end] not in _JSON_NUMBER_CONTINUATIONS):
+                    position = end
+                    yield element
+                    continue
+            except ValueError:
+                if eof:
+                    raise
+
+        if eof:
+            raise ValueError("Unexpected end of JSON array.")
+
+        chunk, eof = read()
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+class RateLimiter(object):
+    """
+    Limits how often an operation is performed, across all of the threads that share the limiter, such as the
+    requests made by a pool of threads to an endpoint with a rate limit.
+
+    Example:
+
+    >>> limiter = RateLimiter(rate=5)
+    >>> def submit(report):
+    >>>     limiter.acquire()
+    >>>     return ts.submit_report(report)
+    >>> reports = parallel_map(submit, reports)
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Constructs a RateLimiter object.
+
+        :param float rate: The maximum number of operations per second.
+        :param int burst: The number of operations that may be performed at once after the limiter has been idle.
+        """
+
+        self.interval = 1.0 / rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._next_time = time.time()
+
+    def acquire(self):
+        """
+        Blocks until the operation may be performed.
+        """
+
+        with self._lock:
+            now = time.time()
+            # permits that were not used while the limiter was idle can be used later, up to ``burst`` of them
+            self._next_time = max(self._next_time, now - (self.burst - 1) * self.interval)
+            wait_time = self._next_time - now
+            self._next_time += self.interval
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+def chunk_query_params(params, list_keys, max_length=MAX_QUERY_LENGTH):
+    """
+    Splits the query parameters of a GET request into several sets of parameters, so that the encoded query string of
+    each set is no longer than ``max_length``.  The lists under ``list_keys`` must be of equal length; they are split
+    at the same positions, so that their elements stay aligned.  All other parameters are repeated in every set.
+
+    :param dict params: The query parameters.
+    :param list(str) list_keys: The keys of the list parameters to split.
+    :param int max_length: The maximum length of each encoded query string.  A single element that is longer than this
+        is still given its own set.
+    :return: A list of parameter dictionaries, in order.
+    """
+
+    def encoded_length(key, value):
+        if not isinstance(value, bytes):
+            value = (u"%s" % value).encode('utf-8')
+        return len(quote_plus(key)) + len(quote_plus(value)) + 2
+
+    lists = [(key, params[key]) for key in list_keys if params.get(key) is not None]
+    if len(lists) == 0:
+        return [params]
+
+    other_params = [(k, v) for k, v in params.items() if k not in list_keys and v is not None]
+    base_length = sum(encoded_length(k, v) for k, values in other_params
+                      for v in (values if isinstance(values, (list, tuple)) else [values]))
+
+    bounds = []
+    start = 0
+    length = base_length
+    for i in range(len(lists[0][1])):
+        item_length = sum(encoded_length(key, values[i]) for key, values in lists if values[i] is not None)
+        if i > start and length + item_length > max_length:
+            bounds.append((start, i))
+            start = i
+            length = base_length
+        length += item_length
+    bounds.append((start, len(lists[0][1])))
+
+    chunks = []
+    for start, end in bounds:
+        chunk = dict(params)
+        for key, values in lists:
+            chunk[key] = values[start:end]
+        chunks.append(chunk)
+
+    return chunks
+
+
 logger = get_logger(__name__)
@@ -0,0 +1,230 @@
+# python 2 backwards compatibility
+from __future__ import print_function
+from builtins import object, str
+from future import standard_library
+from six import string_types
+
+# external imports
+import io
+import json
+import os
+import threading
+import time
+
+# package imports
+from .models import Indicator
+from .utils import get_logger
+
+# python 2 backwards compatibility
+standard_library.install_aliases()
+
+logger = get_logger(__name__)
+
+
+class WhitelistIndex(object):
+    """
+    A local copy of the user's company's whitelist, used to check indicators against the whitelist without paging
+    through |get_whitelist| each time.  Lookups are case-insensitive and ignore surrounding whitespace.
+
+    When assigned to the ``whitelist_index`` attribute of a |TruStar| object, the index is kept up to date as terms are
+    added through |add_terms_to_whitelist| and deleted through |delete_indicator_from_whitelist|.  Changes made
+    elsewhere are picked up by calling ``sync``.
+
+    :ivar synced_at: The time of the last sync, in seconds since epoch, or ``None`` if the index has never been synced.
+
+    Example:
+
+    >>> ts.whitelist_index = WhitelistIndex.load("whitelist.json") if os.path.exists("whitelist.json") \\
+    >>>     else WhitelistIndex()
+    >>> ts.whitelist_index.sync(ts)
+    >>> ts.whitelist_index.save("whitelist.json")
+    >>> indicators = list(ts.whitelist_index.filter(indicators))
+    >>> ts.submit_indicators(indicators)
+    """
+
+    # the version of the format written by ``save``
+    FORMAT_VERSION = 1
+
+    def __init__(self, indicators=None):
+        """
+        Constructs a WhitelistIndex object.
+
+        :param indicators: An optional iterable of whitelisted |Indicator| objects to populate the index with.
+        """
+
+        self.synced_at = None
+        self._lock = threading.Lock()
+        self._terms = {}
+        # the changes made during each sync in progress, which are applied to the synced terms before they are used
+        self._sync_changes = []
+
+        if indicators is not None:
+            self.add(indicators)
+
+    @staticmethod
+    def normalize(value):
+        """
+        :return: The form of an indicator value that is used for lookups.
+        """
+
+        return value.strip().lower()
+
+    def is_whitelisted(self, value):
+        """
+        Checks whether an indicator value is whitelisted.
+
+        :param value: An indicator value, or an |Indicator| object.
+        :return: ``True`` if the value is whitelisted.
+        """
+
+        if isinstance(value, Indicator):
+            value = value.value
+
+        return self.normalize(value) in self._terms
+
+    def filter(self, indicators):
+        """
+        Creates a generator that returns each of the given indicators that is not whitelisted.
+
+        :param indicators: An iterable of |Indicator| objects or indicator values.
+        :return: The generator.
+        """
+
+        terms = self._terms
+        normalize = self.normalize
+
+        for indicator in indicators:
+            value = indicator.value if isinstance(indicator, Indicator) else indicator
+            if normalize(value) not in terms:
+                yield indicator
+
+    def add(self, indicators):
+        """
+        Adds whitelisted indicators to the index.
+
+        :param indicators: An iterable of |Indicator| objects or indicator values.
+        """
+
+        with self._lock:
+            for indicator in indicators:
+                if isinstance(indicator, string_types):
+                    indicator = Indicator(value=indicator)
+                self._apply_change(self.normalize(indicator.value), (indicator.value, indicator.type))
+
+    def remove(self, value):
+        """
+        Removes an indicator from the index.
+
+        :param value: An indicator value, or an |Indicator| object.
+        """
+
+        if isinstance(value, Indicator):
+            value = value.value
+
+        with self._lock:
+            self._apply_change(self.normalize(value), None)
+
+    def _apply_change(self, key, term):
+        """
+        Adds a term to the index, or removes it if ``term`` is ``None``, and records the change for any sync in
+        progress.  Must be called with the lock held.
+        """
+
+        if term is None:
+            self._terms.pop(key, None)
+        else:
+            self._terms[key] = term
+
+        for changes in self._sync_changes:
+            changes.append((key, term))
+
+    def sync(self, client):
+        """
+        Brings the index up to date with the whitelist on the server.  The whitelist is paged through with
+        |get_whitelist|, and terms that were added or deleted since the last sync are applied to the index in a single
+        step, so that lookups made during a sync are answered from the previous state.  Terms added or removed with
+        ``add`` and ``remove`` while the sync is in progress are applied again to the synced terms, so they are kept.
+
+        :param client: The |TruStar| object to get the whitelist from.
+        :return: A tuple containing the number of terms that were added and the number that were removed.
+        """
+
+        started_at = time.time()
+        changes = []
+
+        with self._lock:
+            self._sync_changes.append(changes)
+
+        try:
+            terms = {}
+            for indicator in client.get_whitelist():
+                terms[self.normalize(indicator.value)] = (indicator.value, indicator.type)
+        except Exception:
+            with self._lock:
+                self._sync_changes.remove(changes)
+            raise
+
+        with self._lock:
+            self._sync_changes.remove(changes)
+            for key, term in changes:
+                if term is None:
+                    terms.pop(key, None)
+                else:
+                    terms[key] = term
+
+            added = len(set(terms) - set(self._terms))
+            removed = len(set(self._terms) - set(terms))
+            self._terms = terms
+            self.synced_at = started_at
+
+        logger.debug("Synced whitelist index: %d terms added, %d removed.", added, removed)
+
+        return added, removed
+
+    def save(self, path):
+        """
+        Writes the index to a file, so that it can be restored with ``load`` without syncing the whole whitelist.  The
+        file is replaced atomically.
+
+        :param str path: The path of the file.
+        """
+
+        with self._lock:
+            data = {
+                'version': self.FORMAT_VERSION,
+                'syncedAt': self.synced_at,
+                'terms': list(self._terms.values())
+            }
+
+        tmp_path = path + ".tmp"
+        with io.open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(json.dumps(data)))
+
+        # os.replace is not available in python 2
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads an index from a file written by ``save``.
+
+        :param str path: The path of the file.
+        :return: The |WhitelistIndex| object.
+        """
+
+        with io.open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version') != cls.FORMAT_VERSION:
+            raise ValueError("Unsupported whitelist index format version: %s" % data.get('version'))
+
+        index = cls(Indicator(value=value, type=indicator_type) for value, indicator_type in data.get('terms'))
+        index.synced_at = data.get('syncedAt')
+
+        return index
+
+    def __contains__(self, value):
+        return self.is_whitelisted(value)
+
+    def __len__(self):
+        return len(self._terms)